@@ -0,0 +1,19 @@
+"""Record the actor and details of audited actions"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_audit_log_details'
+down_revision = '20261019_partitioned_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('audit_log', sa.Column('actor_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('audit_log', sa.Column('details', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('audit_log', 'details')
+    op.drop_column('audit_log', 'actor_id')
@@ -0,0 +1,28 @@
+"""Index audit_log for time-range and workspace/resource queries"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_audit_log_indexes'
+down_revision = '20261019_audit_log_details'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # audit_log is append-only in created_at order, so a BRIN index answers
+    # month-range scans at a tiny fraction of a B-tree's size.
+    op.create_index(
+        'ix_audit_log_created_brin', 'audit_log', ['created_at'], postgresql_using='brin'
+    )
+    op.create_index(
+        'ix_audit_log_tenant_workspace_created',
+        'audit_log',
+        ['tenant_id', 'workspace_id', 'created_at'],
+    )
+    op.create_index('ix_audit_log_resource_created', 'audit_log', ['resource_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_log_resource_created', table_name='audit_log')
+    op.drop_index('ix_audit_log_tenant_workspace_created', table_name='audit_log')
+    op.drop_index('ix_audit_log_created_brin', table_name='audit_log')
@@ -0,0 +1,64 @@
+"""Add manual position and added_at to collection_prompts"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_collection_positions'
+down_revision = '20261019_prompt_links'
+branch_labels = None
+depends_on = None
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def upgrade() -> None:
+    op.add_column('collection_prompts', sa.Column('position', sa.String(collation='C')))
+    op.add_column(
+        'collection_prompts',
+        sa.Column(
+            'added_at',
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+    )
+    # Keep the order lists showed so far (most recently updated first): the
+    # n-th prompt gets n as four base-62 digits plus a trailing midpoint digit,
+    # which leaves room before, between and after every key.
+    digit = "substr('{digits}', (n / {div} % 62)::int + 1, 1)"
+    key = ' || '.join(digit.format(digits=DIGITS, div=62**p) for p in (3, 2, 1, 0))
+    op.execute(
+        f"""
+        UPDATE collection_prompts cp
+        SET position = {key} || 'V'
+        FROM (
+            SELECT cp.collection_id, cp.prompt_id,
+                   row_number() OVER (
+                       PARTITION BY cp.collection_id
+                       ORDER BY c.updated_at DESC NULLS LAST, cp.prompt_id DESC
+                   ) AS n
+            FROM collection_prompts cp
+            LEFT JOIN prompt_cards c ON c.id = cp.prompt_id
+        ) ranked
+        WHERE ranked.collection_id = cp.collection_id AND ranked.prompt_id = cp.prompt_id
+        """
+    )
+    op.alter_column('collection_prompts', 'position', nullable=False)
+    op.drop_index('ix_collection_prompts_collection', table_name='collection_prompts')
+    op.create_index(
+        'ix_collection_prompts_position',
+        'collection_prompts',
+        ['collection_id', 'position', 'prompt_id'],
+    )
+    op.create_index(
+        'ix_collection_prompts_added',
+        'collection_prompts',
+        ['collection_id', sa.text('added_at DESC'), sa.text('prompt_id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collection_prompts_added', table_name='collection_prompts')
+    op.drop_index('ix_collection_prompts_position', table_name='collection_prompts')
+    op.create_index('ix_collection_prompts_collection', 'collection_prompts', ['collection_id'])
+    op.drop_column('collection_prompts', 'added_at')
+    op.drop_column('collection_prompts', 'position')
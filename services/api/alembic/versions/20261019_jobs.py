@@ -0,0 +1,55 @@
+"""Add the background job queue"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_jobs'
+down_revision = '20261019_outbox_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('task', sa.String(length=128), nullable=False),
+        sa.Column('queue', sa.String(length=64), nullable=False, server_default='default'),
+        sa.Column('payload', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('priority', sa.SmallInteger(), nullable=False, server_default='0'),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('worker', sa.String(length=128), nullable=True),
+        sa.Column('run_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'ix_jobs_ready',
+        'jobs',
+        ['queue', sa.text('priority DESC'), 'run_at', 'id'],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        'ix_jobs_heartbeat',
+        'jobs',
+        ['heartbeat_at'],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+    op.create_index(
+        'ix_jobs_finished',
+        'jobs',
+        ['finished_at'],
+        postgresql_where=sa.text("status = 'done'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jobs_finished', table_name='jobs')
+    op.drop_index('ix_jobs_heartbeat', table_name='jobs')
+    op.drop_index('ix_jobs_ready', table_name='jobs')
+    op.drop_table('jobs')
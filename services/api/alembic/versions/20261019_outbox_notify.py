@@ -0,0 +1,53 @@
+"""Add outbox_events.owner_id and NOTIFY subscribers of new events"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_outbox_notify'
+down_revision = '20261019_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'outbox_events',
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.execute(
+        "UPDATE outbox_events SET owner_id = (payload->>'owner_id')::uuid "
+        "WHERE payload ? 'owner_id'"
+    )
+    op.create_index('ix_outbox_events_owner', 'outbox_events', ['owner_id', 'id'])
+    # NOTIFY payloads are limited to 8000 bytes; large event payloads are
+    # left out and can be read back from the table by id.
+    op.execute(
+        """
+        CREATE FUNCTION notify_outbox_event() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('outbox_events', json_build_object(
+                'id', NEW.id,
+                'type', NEW.event_type,
+                'aggregate_id', NEW.aggregate_id,
+                'owner_id', NEW.owner_id,
+                'payload', CASE WHEN octet_length(NEW.payload::text) <= 4000
+                                THEN NEW.payload END
+            )::text);
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER outbox_events_notify AFTER INSERT ON outbox_events "
+        "FOR EACH ROW WHEN (NEW.owner_id IS NOT NULL) "
+        "EXECUTE FUNCTION notify_outbox_event()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER outbox_events_notify ON outbox_events")
+    op.execute("DROP FUNCTION notify_outbox_event()")
+    op.drop_index('ix_outbox_events_owner', table_name='outbox_events')
+    op.drop_column('outbox_events', 'owner_id')
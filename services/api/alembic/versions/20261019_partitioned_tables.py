@@ -0,0 +1,254 @@
+"""Partition prompt_versions by prompt and audit_log by month
+
+Existing rows are converted online: a trigger mirrors writes on the old
+table into a partitioned shadow table while rows are copied in committed
+batches, then the tables are swapped under a short exclusive lock.  Set the
+batch size with ``alembic -x partition_batch_size=N upgrade head``.
+"""
+from datetime import date, datetime, timezone
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '20261019_partitioned_tables'
+down_revision = '20261019_version_retention'
+branch_labels = None
+depends_on = None
+
+VERSION_PARTITIONS = 16
+AUDIT_PARTITIONS_AHEAD = 3
+
+
+def _batch_size() -> int:
+    return int(context.get_x_argument(as_dictionary=True).get('partition_batch_size', 5000))
+
+
+def _month(value: date, offset: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _mirror(table: str, shadow: str) -> None:
+    op.execute(f"""
+    CREATE TRIGGER {table}_mirror AFTER INSERT OR UPDATE OR DELETE ON {table}
+        FOR EACH ROW EXECUTE FUNCTION partition_mirror('{shadow}')
+    """)
+
+
+def _backfill(table: str, shadow: str) -> None:
+    """Copy ``table`` into ``shadow`` in id order, committing every batch."""
+
+    bind = op.get_bind()
+    batch = _batch_size()
+    last = None
+    with context.get_context().autocommit_block():
+        while True:
+            after = '' if last is None else 'WHERE id > :last'
+            last = bind.execute(
+                sa.text(f"""
+                WITH batch AS (
+                    SELECT * FROM {table} {after} ORDER BY id LIMIT :batch
+                ), copied AS (
+                    INSERT INTO {shadow} SELECT * FROM batch ON CONFLICT DO NOTHING
+                )
+                SELECT id FROM batch ORDER BY id DESC LIMIT 1
+                """),
+                {'last': last, 'batch': batch},
+            ).scalar()
+            if last is None:
+                break
+
+
+def _swap(table: str, shadow: str) -> None:
+    """Drop ``table`` and put ``shadow`` in its place."""
+
+    op.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    # Rows deleted between a batch snapshot and its insert must not survive.
+    op.execute(f"""
+    DELETE FROM {shadow} s WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = s.id)
+    """)
+    op.execute(f"DROP TRIGGER {table}_mirror ON {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {shadow}_pkey TO {table}_pkey")
+
+
+def _partition_versions() -> None:
+    op.execute("""
+    CREATE TABLE prompt_versions_partitioned (
+        LIKE prompt_versions INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+        PRIMARY KEY (id, prompt_id)
+    ) PARTITION BY HASH (prompt_id)
+    """)
+    for remainder in range(VERSION_PARTITIONS):
+        op.execute(f"""
+        CREATE TABLE prompt_versions_p{remainder:02d} PARTITION OF prompt_versions_partitioned
+            FOR VALUES WITH (MODULUS {VERSION_PARTITIONS}, REMAINDER {remainder})
+        """)
+    op.execute("""
+    ALTER TABLE prompt_versions_partitioned ADD CONSTRAINT fk_prompt_versions_prompt_id
+        FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
+    """)
+    for field in (
+        'body',
+        'input_schema',
+        'llm_parameters',
+        'success_metrics',
+        'sample_input',
+        'sample_output',
+    ):
+        op.execute(f"""
+        ALTER TABLE prompt_versions_partitioned ADD CONSTRAINT fk_prompt_versions_{field}_digest
+            FOREIGN KEY ({field}_digest) REFERENCES prompt_blobs(digest)
+        """)
+    # Indexes are built before the copy so the swap only renames them.
+    op.create_index(
+        'ix_prompt_versions_created_at_partitioned', 'prompt_versions_partitioned', ['created_at']
+    )
+    op.create_index(
+        'ix_prompt_versions_prompt_desc_partitioned',
+        'prompt_versions_partitioned',
+        ['prompt_id', sa.text('version DESC')],
+    )
+    op.create_index(
+        'ix_prompt_versions_prompt_id_version_partitioned',
+        'prompt_versions_partitioned',
+        ['prompt_id', 'version'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_prompt_versions_body_trgm_partitioned',
+        'prompt_versions_partitioned',
+        ['body'],
+        postgresql_using='gin',
+        postgresql_ops={'body': 'gin_trgm_ops'},
+    )
+    _mirror('prompt_versions', 'prompt_versions_partitioned')
+    _backfill('prompt_versions', 'prompt_versions_partitioned')
+
+    op.execute("""
+    ALTER TABLE prompt_version_labels DROP CONSTRAINT prompt_version_labels_version_id_fkey
+    """)
+    _swap('prompt_versions', 'prompt_versions_partitioned')
+    for index in (
+        'ix_prompt_versions_created_at',
+        'ix_prompt_versions_prompt_desc',
+        'ix_prompt_versions_prompt_id_version',
+        'ix_prompt_versions_body_trgm',
+    ):
+        op.execute(f"ALTER INDEX {index}_partitioned RENAME TO {index}")
+    op.create_foreign_key(
+        'fk_prompt_version_labels_version',
+        'prompt_version_labels',
+        'prompt_versions',
+        ['version_id', 'prompt_id'],
+        ['id', 'prompt_id'],
+    )
+
+
+def _partition_audit_log() -> None:
+    op.execute("""
+    CREATE TABLE audit_log_partitioned (
+        LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log_partitioned DEFAULT")
+    oldest = op.get_bind().execute(
+        sa.text("SELECT min(created_at AT TIME ZONE 'UTC')::date FROM audit_log")
+    ).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = _month(oldest or today)
+    while month <= _month(today, AUDIT_PARTITIONS_AHEAD):
+        op.execute(f"""
+        CREATE TABLE audit_log_y{month:%Ym%m} PARTITION OF audit_log_partitioned
+            FOR VALUES FROM ('{month} UTC') TO ('{_month(month, 1)} UTC')
+        """)
+        month = _month(month, 1)
+    _mirror('audit_log', 'audit_log_partitioned')
+    _backfill('audit_log', 'audit_log_partitioned')
+
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log_partitioned.id")
+    _swap('audit_log', 'audit_log_partitioned')
+
+
+def upgrade() -> None:
+    op.execute("""
+    CREATE FUNCTION partition_mirror() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            EXECUTE format('DELETE FROM %I WHERE id = $1', TG_ARGV[0]) USING OLD.id;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            EXECUTE format('INSERT INTO %I SELECT ($1).* ON CONFLICT DO NOTHING', TG_ARGV[0])
+                USING NEW;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """)
+    _partition_versions()
+    _partition_audit_log()
+    op.execute("DROP FUNCTION partition_mirror()")
+
+
+def downgrade() -> None:
+    op.execute("""
+    CREATE TABLE audit_log_plain (LIKE audit_log INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    """)
+    op.execute("INSERT INTO audit_log_plain SELECT * FROM audit_log")
+    op.execute("ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log_plain.id")
+    op.execute("DROP TABLE audit_log")
+    op.execute("ALTER TABLE audit_log_plain RENAME TO audit_log")
+    op.create_primary_key('audit_log_pkey', 'audit_log', ['id'])
+
+    op.drop_constraint('fk_prompt_version_labels_version', 'prompt_version_labels', type_='foreignkey')
+    op.execute("""
+    CREATE TABLE prompt_versions_plain (
+        LIKE prompt_versions INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    )
+    """)
+    op.execute("INSERT INTO prompt_versions_plain SELECT * FROM prompt_versions")
+    op.execute("DROP TABLE prompt_versions")
+    op.execute("ALTER TABLE prompt_versions_plain RENAME TO prompt_versions")
+    op.create_primary_key('prompt_versions_pkey', 'prompt_versions', ['id'])
+    op.create_foreign_key(
+        'fk_prompt_versions_prompt_id', 'prompt_versions', 'prompts',
+        ['prompt_id'], ['id'], ondelete='CASCADE',
+    )
+    for field in (
+        'body',
+        'input_schema',
+        'llm_parameters',
+        'success_metrics',
+        'sample_input',
+        'sample_output',
+    ):
+        op.create_foreign_key(
+            f'fk_prompt_versions_{field}_digest', 'prompt_versions', 'prompt_blobs',
+            [f'{field}_digest'], ['digest'],
+        )
+    op.create_index('ix_prompt_versions_created_at', 'prompt_versions', ['created_at'])
+    op.create_index(
+        'ix_prompt_versions_prompt_desc', 'prompt_versions', ['prompt_id', sa.text('version DESC')]
+    )
+    op.create_index(
+        'ix_prompt_versions_prompt_id_version',
+        'prompt_versions',
+        ['prompt_id', 'version'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_prompt_versions_body_trgm',
+        'prompt_versions',
+        ['body'],
+        postgresql_using='gin',
+        postgresql_ops={'body': 'gin_trgm_ops'},
+    )
+    op.create_foreign_key(
+        'prompt_version_labels_version_id_fkey',
+        'prompt_version_labels',
+        'prompt_versions',
+        ['version_id'],
+        ['id'],
+    )
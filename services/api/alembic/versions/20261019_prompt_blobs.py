@@ -0,0 +1,60 @@
+"""Add content-addressed blob storage for prompt versions"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_blobs'
+down_revision = '20261019_prompt_next_version'
+branch_labels = None
+depends_on = None
+
+BLOB_FIELDS = (
+    'body',
+    'input_schema',
+    'llm_parameters',
+    'success_metrics',
+    'sample_input',
+    'sample_output',
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'prompt_blobs',
+        sa.Column('digest', sa.String(length=64), primary_key=True),
+        sa.Column('content', postgresql.JSONB(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    for field in BLOB_FIELDS:
+        op.add_column(
+            'prompt_versions',
+            sa.Column(
+                f'{field}_digest',
+                sa.String(length=64),
+                sa.ForeignKey('prompt_blobs.digest', name=f'fk_prompt_versions_{field}_digest'),
+                nullable=True,
+            ),
+        )
+    op.alter_column('prompt_versions', 'body', existing_type=sa.String(), nullable=True)
+    op.create_check_constraint(
+        'ck_prompt_versions_body_present',
+        'prompt_versions',
+        'body IS NOT NULL OR body_digest IS NOT NULL',
+    )
+
+
+def downgrade() -> None:
+    # Restore sealed content inline; bodies are stored as JSON strings.
+    for field in BLOB_FIELDS:
+        value = "b.content #>> '{}'" if field == 'body' else 'b.content'
+        op.execute(
+            f"UPDATE prompt_versions v SET {field} = {value} "
+            f"FROM prompt_blobs b WHERE b.digest = v.{field}_digest"
+        )
+    op.drop_constraint('ck_prompt_versions_body_present', 'prompt_versions', type_='check')
+    op.alter_column('prompt_versions', 'body', existing_type=sa.String(), nullable=False)
+    for field in reversed(BLOB_FIELDS):
+        op.drop_column('prompt_versions', f'{field}_digest')
+    op.drop_table('prompt_blobs')
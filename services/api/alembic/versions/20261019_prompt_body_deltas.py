@@ -0,0 +1,36 @@
+"""Add delta-compressed body history to prompt versions"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_body_deltas'
+down_revision = '20261019_prompt_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('prompt_versions', sa.Column('body_delta', postgresql.JSONB(), nullable=True))
+    op.add_column(
+        'prompt_versions',
+        sa.Column('delta_depth', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.drop_constraint('ck_prompt_versions_body_present', 'prompt_versions', type_='check')
+    op.create_check_constraint(
+        'ck_prompt_versions_body_present',
+        'prompt_versions',
+        'body IS NOT NULL OR body_digest IS NOT NULL OR body_delta IS NOT NULL',
+    )
+
+
+def downgrade() -> None:
+    # Delta bodies must be expanded first:
+    #   python -m app.services.history_service compact --mode blob
+    op.drop_constraint('ck_prompt_versions_body_present', 'prompt_versions', type_='check')
+    op.create_check_constraint(
+        'ck_prompt_versions_body_present',
+        'prompt_versions',
+        'body IS NOT NULL OR body_digest IS NOT NULL',
+    )
+    op.drop_column('prompt_versions', 'delta_depth')
+    op.drop_column('prompt_versions', 'body_delta')
@@ -0,0 +1,44 @@
+"""Add partial indexes for active and favorite prompt cards"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_prompt_card_active'
+down_revision = '20261019_prompt_card_governance'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text('NOT is_archived')
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_prompt_cards_active_updated',
+        'prompt_cards',
+        ['owner_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+        postgresql_where=ACTIVE,
+    )
+    op.create_index(
+        'ix_prompt_cards_active_created',
+        'prompt_cards',
+        ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_where=ACTIVE,
+    )
+    op.create_index(
+        'ix_prompt_cards_active_title',
+        'prompt_cards',
+        ['owner_id', 'title', sa.text('id DESC')],
+        postgresql_where=ACTIVE,
+    )
+    op.create_index(
+        'ix_prompt_cards_favorites_updated',
+        'prompt_cards',
+        ['owner_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('is_favorite AND NOT is_archived'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_cards_favorites_updated', table_name='prompt_cards')
+    op.drop_index('ix_prompt_cards_active_title', table_name='prompt_cards')
+    op.drop_index('ix_prompt_cards_active_created', table_name='prompt_cards')
+    op.drop_index('ix_prompt_cards_active_updated', table_name='prompt_cards')
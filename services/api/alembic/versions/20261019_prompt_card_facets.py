@@ -0,0 +1,24 @@
+"""Add GIN indexes for prompt card facet filters"""
+from alembic import op
+
+revision = '20261019_prompt_card_facets'
+down_revision = '20261019_prompt_cards'
+branch_labels = None
+depends_on = None
+
+FACETS = ('tags', 'target_models', 'providers', 'use_cases')
+
+
+def upgrade() -> None:
+    for column in FACETS:
+        op.create_index(
+            f'ix_prompt_cards_{column}',
+            'prompt_cards',
+            [column],
+            postgresql_using='gin',
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(FACETS):
+        op.drop_index(f'ix_prompt_cards_{column}', table_name='prompt_cards')
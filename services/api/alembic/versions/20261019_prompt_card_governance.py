@@ -0,0 +1,66 @@
+"""Add governance fields and indexes to prompt_cards"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_card_governance'
+down_revision = '20261019_prompt_card_facets'
+branch_labels = None
+depends_on = None
+
+SCALARS = ('category', 'complexity', 'audience', 'status')
+DOCUMENTS = ('llm_parameters', 'success_metrics')
+NUMERIC_PARAMETERS = ('temperature', 'max_tokens')
+
+
+def upgrade() -> None:
+    for column in SCALARS:
+        op.add_column('prompt_cards', sa.Column(column, sa.String(), nullable=True))
+    for column in DOCUMENTS:
+        op.add_column('prompt_cards', sa.Column(column, postgresql.JSONB(), nullable=True))
+
+    op.execute("""
+    UPDATE prompt_cards c
+    SET category = v.category,
+        complexity = v.complexity,
+        audience = v.audience,
+        status = v.status,
+        llm_parameters = v.llm_parameters,
+        success_metrics = v.success_metrics
+    FROM prompt_versions v
+    WHERE v.id = c.version_id
+    """)
+
+    for column in SCALARS:
+        op.create_index(f'ix_prompt_cards_owner_{column}', 'prompt_cards', ['owner_id', column])
+    for column in DOCUMENTS:
+        op.create_index(
+            f'ix_prompt_cards_{column}',
+            'prompt_cards',
+            [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'jsonb_path_ops'},
+        )
+    for key in NUMERIC_PARAMETERS:
+        op.create_index(
+            f'ix_prompt_cards_{key}',
+            'prompt_cards',
+            [
+                'owner_id',
+                sa.text(
+                    f"(CASE WHEN jsonb_typeof(llm_parameters -> '{key}') = 'number' "
+                    f"THEN (llm_parameters ->> '{key}')::numeric END)"
+                ),
+            ],
+        )
+
+
+def downgrade() -> None:
+    for key in reversed(NUMERIC_PARAMETERS):
+        op.drop_index(f'ix_prompt_cards_{key}', table_name='prompt_cards')
+    for column in reversed(DOCUMENTS):
+        op.drop_index(f'ix_prompt_cards_{column}', table_name='prompt_cards')
+    for column in reversed(SCALARS):
+        op.drop_index(f'ix_prompt_cards_owner_{column}', table_name='prompt_cards')
+    for column in reversed(DOCUMENTS + SCALARS):
+        op.drop_column('prompt_cards', column)
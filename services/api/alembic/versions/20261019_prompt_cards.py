@@ -0,0 +1,75 @@
+"""Add prompt_cards read model for prompt listings"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_cards'
+down_revision = '20250901_tenancy_foundations'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'prompt_cards',
+        sa.Column('id', postgresql.UUID(as_uuid=True), sa.ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('version_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('excerpt', sa.String(), nullable=False, server_default=''),
+        sa.Column('tags', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('target_models', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('providers', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('use_cases', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('access_control', postgresql.ENUM('private', 'unlisted', name='prompt_access_control', create_type=False), nullable=False),
+        sa.Column('is_favorite', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('is_archived', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    include = ['is_favorite', 'is_archived']
+    op.create_index(
+        'ix_prompt_cards_owner_updated',
+        'prompt_cards',
+        ['owner_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+        postgresql_include=include,
+    )
+    op.create_index(
+        'ix_prompt_cards_owner_created',
+        'prompt_cards',
+        ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=include,
+    )
+    op.create_index(
+        'ix_prompt_cards_owner_title',
+        'prompt_cards',
+        ['owner_id', 'title', sa.text('id DESC')],
+        postgresql_include=include,
+    )
+
+    op.execute("""
+    INSERT INTO prompt_cards (
+        id, owner_id, version_id, version, title, excerpt, tags, target_models,
+        providers, use_cases, access_control, is_favorite, is_archived,
+        created_at, updated_at
+    )
+    SELECT p.id, p.owner_id, v.id, v.version, p.title, left(v.body, 280), p.tags,
+           v.target_models, v.providers, v.use_cases, v.access_control,
+           p.is_favorite, p.is_archived, coalesce(p.created_at, v.created_at),
+           p.updated_at
+    FROM prompts p
+    JOIN LATERAL (
+        SELECT * FROM prompt_versions pv
+        WHERE pv.prompt_id = p.id
+        ORDER BY pv.version DESC
+        LIMIT 1
+    ) v ON true
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_cards_owner_title', table_name='prompt_cards')
+    op.drop_index('ix_prompt_cards_owner_created', table_name='prompt_cards')
+    op.drop_index('ix_prompt_cards_owner_updated', table_name='prompt_cards')
+    op.drop_table('prompt_cards')
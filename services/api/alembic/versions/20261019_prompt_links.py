@@ -0,0 +1,40 @@
+"""Add prompt_links, the edges of related_prompt_ids"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_links'
+down_revision = '20261019_outbox_event_seq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'prompt_links',
+        sa.Column(
+            'source_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('prompts.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('target_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=False),
+    )
+    # Edges come from the current version of each prompt.
+    op.execute(
+        """
+        INSERT INTO prompt_links (source_id, target_id, owner_id)
+        SELECT DISTINCT c.id, t.target_id, c.owner_id
+        FROM prompt_cards c
+        JOIN prompt_versions v ON v.prompt_id = c.id AND v.id = c.version_id
+        CROSS JOIN LATERAL unnest(v.related_prompt_ids) AS t(target_id)
+        WHERE t.target_id IS NOT NULL AND t.target_id <> c.id
+        """
+    )
+    op.create_index('ix_prompt_links_target', 'prompt_links', ['target_id', 'source_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_links_target', table_name='prompt_links')
+    op.drop_table('prompt_links')
@@ -0,0 +1,29 @@
+"""Add per-prompt version counter"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261019_prompt_next_version'
+down_revision = '20261019_prompt_card_active'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'prompts',
+        sa.Column('next_version', sa.Integer(), nullable=False, server_default='1'),
+    )
+    op.execute("""
+    UPDATE prompts p
+    SET next_version = v.max_version + 1
+    FROM (
+        SELECT prompt_id, max(version) AS max_version
+        FROM prompt_versions
+        GROUP BY prompt_id
+    ) v
+    WHERE v.prompt_id = p.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('prompts', 'next_version')
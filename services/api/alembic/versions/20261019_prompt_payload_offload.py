@@ -0,0 +1,29 @@
+"""Allow prompt blobs to live in an external payload store"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_prompt_payload_offload'
+down_revision = '20261019_prompt_body_deltas'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'prompt_blobs',
+        sa.Column('storage', sa.String(length=32), nullable=False, server_default='db'),
+    )
+    op.alter_column('prompt_blobs', 'content', existing_type=postgresql.JSONB(), nullable=True)
+    op.create_check_constraint(
+        'ck_prompt_blobs_content_present',
+        'prompt_blobs',
+        "content IS NOT NULL OR storage <> 'db'",
+    )
+
+
+def downgrade() -> None:
+    # Externally stored payloads must be copied back into ``content`` first.
+    op.drop_constraint('ck_prompt_blobs_content_present', 'prompt_blobs', type_='check')
+    op.alter_column('prompt_blobs', 'content', existing_type=postgresql.JSONB(), nullable=False)
+    op.drop_column('prompt_blobs', 'storage')
@@ -0,0 +1,39 @@
+"""Add smart collection filters and their materialized members"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_smart_collections'
+down_revision = '20261019_collection_positions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('collections', sa.Column('filters', postgresql.JSONB(), nullable=True))
+    op.add_column('collections', sa.Column('refreshed_seq', sa.BigInteger(), nullable=True))
+    op.create_table(
+        'smart_collection_prompts',
+        sa.Column(
+            'collection_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('collections.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column(
+            'prompt_id',
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('prompts.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+    )
+    op.create_index(
+        'ix_smart_collection_prompts_prompt', 'smart_collection_prompts', ['prompt_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_smart_collection_prompts_prompt', table_name='smart_collection_prompts')
+    op.drop_table('smart_collection_prompts')
+    op.drop_column('collections', 'refreshed_seq')
+    op.drop_column('collections', 'filters')
@@ -0,0 +1,65 @@
+"""Add per-owner change sequences for delta sync"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_sync_changes'
+down_revision = '20261019_outbox_notify'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sync_counters',
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('seq', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('floor_seq', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'sync_changes',
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('entity', sa.String(length=24), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('parent_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False, server_default='false'),
+        sa.Column('changed_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('owner_id', 'entity', 'entity_id', 'parent_id'),
+    )
+    # Existing records become the first changes of their owner, oldest first.
+    op.execute(
+        """
+        INSERT INTO sync_changes (owner_id, entity, entity_id, parent_id, seq)
+        SELECT owner_id, entity, entity_id, parent_id,
+               row_number() OVER (PARTITION BY owner_id ORDER BY ts, entity, entity_id)
+        FROM (
+            SELECT owner_id, 'prompt' AS entity, id AS entity_id, id AS parent_id,
+                   updated_at AS ts
+            FROM prompts
+            UNION ALL
+            SELECT p.owner_id, 'version', v.id, v.prompt_id, v.updated_at
+            FROM prompt_versions v JOIN prompts p ON p.id = v.prompt_id
+            UNION ALL
+            SELECT owner_id, 'collection', id, id, updated_at FROM collections
+            UNION ALL
+            SELECT c.owner_id, 'collection_prompt', cp.prompt_id, cp.collection_id,
+                   c.updated_at
+            FROM collection_prompts cp JOIN collections c ON c.id = cp.collection_id
+        ) AS records
+        WHERE owner_id IS NOT NULL
+        """
+    )
+    op.create_index(
+        'ix_sync_changes_owner_seq', 'sync_changes', ['owner_id', 'seq'], unique=True
+    )
+    op.execute(
+        "INSERT INTO sync_counters (owner_id, seq) "
+        "SELECT owner_id, max(seq) FROM sync_changes GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_changes_owner_seq', table_name='sync_changes')
+    op.drop_table('sync_changes')
+    op.drop_table('sync_counters')
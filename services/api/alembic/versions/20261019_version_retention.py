@@ -0,0 +1,53 @@
+"""Add version retention policies, labels and cold storage"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261019_version_retention'
+down_revision = '20261019_prompt_payload_offload'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'retention_policies',
+        sa.Column('owner_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('keep_last', sa.Integer(), nullable=True),
+        sa.Column('keep_days', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        'prompt_version_labels',
+        sa.Column('prompt_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('prompts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('label', sa.String(length=64), primary_key=True),
+        sa.Column('version_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('prompt_versions.id'), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_prompt_version_labels_version', 'prompt_version_labels', ['version_id'])
+    op.create_table(
+        'prompt_versions_cold',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('prompt_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('prompts.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('content', sa.LargeBinary(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('archived_at', sa.TIMESTAMP(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index(
+        'ix_prompt_versions_cold_prompt_version',
+        'prompt_versions_cold',
+        ['prompt_id', 'version'],
+        unique=True,
+    )
+    # Content is compressed by the application; skip TOAST compression.
+    op.execute("ALTER TABLE prompt_versions_cold ALTER COLUMN content SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prompt_versions_cold_prompt_version', table_name='prompt_versions_cold')
+    op.drop_table('prompt_versions_cold')
+    op.drop_index('ix_prompt_version_labels_version', table_name='prompt_version_labels')
+    op.drop_table('prompt_version_labels')
+    op.drop_table('retention_policies')
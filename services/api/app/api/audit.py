@@ -0,0 +1,85 @@
+"""Admin API for querying and exporting the audit log."""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import require_admin
+from app.core.serialization import json_response
+from app.db.session import get_db
+from app.models.tenancy import AuditLogPage
+from app.models.user import UserORM
+from app.services import audit_service
+from app.services.audit_service import AuditFilters
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+def _filters(
+    tenant_id: Optional[uuid.UUID] = Query(None),
+    workspace_id: Optional[uuid.UUID] = Query(None),
+    resource_id: Optional[uuid.UUID] = Query(None),
+    actor_id: Optional[uuid.UUID] = Query(None),
+    action: Optional[str] = Query(None, description="Exact action, e.g. `prompts.update`"),
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on `created_at`"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on `created_at`"),
+) -> AuditFilters:
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="`since` must be before `until`")
+    return AuditFilters(
+        tenant_id=tenant_id,
+        workspace_id=workspace_id,
+        resource_id=resource_id,
+        actor_id=actor_id,
+        action=action,
+        since=since,
+        until=until,
+    )
+
+
+@router.get("/audit-log", response_model=AuditLogPage)
+def get_audit_log(
+    filters: AuditFilters = Depends(_filters),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(
+        None, description="Cursor from a previous response's `next_cursor`"
+    ),
+    db: Session = Depends(get_db),
+):
+    """Return audit records matching the filters, newest first."""
+
+    try:
+        page = audit_service.list_entries(db, filters, limit=limit, after=after)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return json_response(page, AuditLogPage)
+
+
+@router.get("/audit-log/export")
+def export_audit_log(
+    filters: AuditFilters = Depends(_filters),
+    db: Session = Depends(get_db),
+    admin: UserORM = Depends(require_admin),
+) -> StreamingResponse:
+    """Stream every matching record as newline-delimited JSON, newest first."""
+
+    audit_service.record(
+        "audit.export",
+        actor_id=admin.id,
+        **{k: v for k, v in vars(filters).items() if v is not None},
+    )
+
+    def lines() -> Iterator[str]:
+        for entry in audit_service.iter_entries(db, filters):
+            yield entry.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="audit-log.ndjson"'},
+    )
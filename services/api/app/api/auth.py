@@ -12,7 +12,7 @@ from app.api.deps import get_current_user
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import AuthProvider, UserORM, User
-from app.services import auth_service
+from app.services import audit_service, auth_service
 
 logger = logging.getLogger(__name__)
 
@@ -110,6 +110,7 @@ def github_callback(request: Request, db: Session = Depends(get_db)) -> Redirect
         domain="localhost",
     )
     logger.info("auth.login.success", extra={"user_id": str(user.id), "provider": "github"})
+    audit_service.record("auth.login", user.id, user.id, provider="github")
     return response
 
 
@@ -120,6 +121,7 @@ def logout(user: User = Depends(get_current_user)) -> JSONResponse:
     response.delete_cookie(settings.AUTH_COOKIE_NAME)
     response.delete_cookie("csrf_token")
     logger.info("auth.logout", extra={"user_id": str(user.id)})
+    audit_service.record("auth.logout", user.id, user.id)
     return response
 
 
@@ -10,10 +10,12 @@ from sqlalchemy.orm import Session
 
 from app.api.deps import csrf_protect, get_current_user
 from app.db.session import get_db
-from app.models.collection import Collection, CollectionCreate
+from app.models.collection import Collection, CollectionCreate, CollectionPromptPosition
 from app.models.prompt import PromptListResponse
 from app.models.user import UserORM
-from app.services import collection_service, prompt_service
+from app.services import collection_service
+from app.services.search_service import SearchSort
+from app.services.smart_collection_service import InvalidFilters
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
@@ -47,8 +49,10 @@ def create_collection(
 
     try:
         return collection_service.create_collection(
-            db=db, owner_id=current_user.id, name=payload.name
+            db=db, owner_id=current_user.id, name=payload.name, filters=payload.filters
         )
+    except InvalidFilters as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
 
@@ -72,7 +76,10 @@ def rename_collection(
             owner_id=current_user.id,
             collection_id=collection_id,
             name=payload.name,
+            filters=payload.filters,
         )
+    except InvalidFilters as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
     if updated is None:
@@ -109,18 +116,32 @@ def list_collection_prompts(
     collection_id: uuid.UUID,
     limit: int = 20,
     after: Optional[str] = None,
+    sort: Optional[SearchSort] = Query(
+        default=None,
+        description=(
+            "`position` (manual order, default), `added_desc` or a prompt sort; "
+            "smart collections default to `updated_desc`"
+        ),
+    ),
     db: Session = Depends(get_db),
     current_user: UserORM = Depends(get_current_user),
 ) -> PromptListResponse:
-    """List prompts within a collection."""
-
-    return prompt_service.list_prompts(
-        db=db,
-        owner_id=current_user.id,
-        collection_id=collection_id,
-        limit=limit,
-        after=after,
-    )
+    """List prompts within a collection, in its manual order by default."""
+
+    try:
+        result = collection_service.list_prompts(
+            db=db,
+            owner_id=current_user.id,
+            collection_id=collection_id,
+            sort=sort.value if sort else None,
+            limit=limit,
+            after=after,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    return result
 
 
 class CollectionPromptPayload(BaseModel):
@@ -150,6 +171,8 @@ def add_prompt(
         )
     except PermissionError:
         raise HTTPException(status_code=403, detail="Forbidden")
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     return {"ok": True}
 
 
@@ -176,4 +199,45 @@ def remove_prompt(
         )
     except PermissionError:
         raise HTTPException(status_code=403, detail="Forbidden")
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     return Response(status_code=204)
+
+
+class CollectionPromptMovePayload(BaseModel):
+    """Payload for moving a prompt within a collection."""
+
+    after_id: Optional[uuid.UUID] = None
+    before_id: Optional[uuid.UUID] = None
+
+
+@router.put(
+    "/collections/{collection_id}/prompts/{prompt_id}/position",
+    response_model=CollectionPromptPosition,
+    dependencies=[Depends(csrf_protect)],
+)
+def move_prompt(
+    collection_id: uuid.UUID,
+    prompt_id: uuid.UUID,
+    payload: CollectionPromptMovePayload,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> CollectionPromptPosition:
+    """Move a prompt directly after or before another prompt of the collection."""
+
+    try:
+        moved = collection_service.move_prompt(
+            db=db,
+            owner_id=current_user.id,
+            collection_id=collection_id,
+            prompt_id=prompt_id,
+            after_id=payload.after_id,
+            before_id=payload.before_id,
+        )
+    except PermissionError:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if moved is None:
+        raise HTTPException(status_code=404, detail="Prompt not in collection")
+    return moved
@@ -26,6 +26,14 @@ def get_current_user(
     return user
 
 
+def require_admin(user: UserORM = Depends(get_current_user)) -> UserORM:
+    """Allow only users listed in ``ADMIN_EMAILS``."""
+    admins = {email.lower() for email in settings.ADMIN_EMAILS}
+    if user.email.lower() not in admins:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+
 def csrf_protect(request: Request) -> None:
     """Validate CSRF token for state-changing requests."""
     header = request.headers.get("X-CSRF-Token")
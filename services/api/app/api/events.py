@@ -0,0 +1,52 @@
+"""Server-Sent Events stream of library changes for the current user."""
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.user import UserORM
+from app.services import live_service
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.get("/events")
+async def stream_events(
+    last_event_id: Optional[int] = Header(None, ge=0),
+    after: Optional[int] = Query(
+        None, ge=0, description="Resume point for clients that cannot set `Last-Event-ID`"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream prompt and collection change events as `text/event-stream`."""
+
+    try:
+        sub = await live_service.hub.subscribe(current_user.id)
+    except live_service.HubUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+    resume = last_event_id if last_event_id is not None else after
+    missed, reset = [], False
+    if resume is not None:
+        limit = settings.SSE_REPLAY_LIMIT
+        missed = await asyncio.to_thread(
+            live_service.replay, db, current_user.id, resume, limit + 1
+        )
+        if missed is None or len(missed) > limit:
+            missed, reset = [], True
+    # The stream outlives the request's database work.
+    db.close()
+
+    return StreamingResponse(
+        live_service.sse_stream(sub, missed, reset=reset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,51 @@
+"""Admin API for the background job queue."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import csrf_protect, require_admin
+from app.db.session import get_db
+from app.models.job import Job, JobQueueStats
+from app.services import job_service
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/jobs/stats", response_model=List[JobQueueStats])
+def get_job_stats(
+    window: int = Query(300, ge=10, le=86400, description="Latency window in seconds"),
+    db: Session = Depends(get_db),
+) -> List[JobQueueStats]:
+    """Return depth and latency for every queue."""
+
+    return job_service.queue_stats(db, window=timedelta(seconds=window))
+
+
+@router.get("/jobs", response_model=List[Job])
+def get_jobs(
+    status: Literal["queued", "running", "done", "dead"] = Query("dead"),
+    queue: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+) -> List[Job]:
+    """List jobs in one state, newest first; dead-lettered jobs by default."""
+
+    return job_service.list_jobs(db, status=status, queue=queue, limit=limit)
+
+
+@router.post(
+    "/jobs/{job_id}/retry",
+    response_model=Job,
+    dependencies=[Depends(csrf_protect)],
+)
+def retry_job(job_id: int, db: Session = Depends(get_db)) -> Job:
+    """Requeue a dead job with a fresh attempt budget."""
+
+    job = job_service.retry(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Dead job not found")
+    return job
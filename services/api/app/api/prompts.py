@@ -1,13 +1,28 @@
 import logging
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.serialization import json_response
 from app.db.session import get_db
-from app.models.prompt import Prompt, PromptCreate, PromptListResponse
-from app.services import prompt_service
+from app.models.prompt import (
+    DiffGranularity,
+    PayloadField,
+    Prompt,
+    PromptBatchGetRequest,
+    PromptBatchGetResponse,
+    PromptCreate,
+    PromptDiff,
+    PromptListResponse,
+    PromptVersionListResponse,
+    PromptView,
+)
+from app.models.link import LinkDirection, PromptGraph
+from app.services import diff_service, link_service, prompt_service
+from app.services.search_service import FacetMatch
 from app.api.deps import get_current_user, csrf_protect
 from app.models.user import UserORM
 
@@ -30,10 +45,13 @@ def create_new_prompt(
     """Create a new prompt."""
 
     try:
-        return prompt_service.create_prompt(db=db, prompt=prompt, owner_id=current_user.id)
+        created = prompt_service.create_prompt(
+            db=db, prompt=prompt, owner_id=current_user.id
+        )
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("prompts.create failed", exc_info=exc)
         raise HTTPException(status_code=400, detail=str(exc))
+    return json_response(created, Prompt, status_code=201)
 
 
 @router.get("/prompts", response_model=PromptListResponse)
@@ -42,7 +60,7 @@ def get_prompts(
         default=None, description="Full-text search applied to titles and bodies"
     ),
     tags: Optional[List[str]] = Query(
-        default=None, description="Filter results to prompts tagged with any of these values"
+        default=None, description="Filter results to prompts tagged with these values (see `match`)"
     ),
     favorite: Optional[bool] = Query(
         default=None, description="If true, only return prompts marked as favorites"
@@ -51,19 +69,47 @@ def get_prompts(
         default=None, description="If true, only return prompts that have been archived"
     ),
     target_models: Optional[List[str]] = Query(
-        default=None, description="Restrict prompts to those targeting the given LLM models"
+        default=None, description="Restrict prompts to those targeting the given LLM models (see `match`)"
     ),
     providers: Optional[List[str]] = Query(
-        default=None, description="Restrict prompts to those from the specified model providers"
+        default=None, description="Restrict prompts to those from the specified model providers (see `match`)"
     ),
     purposes: Optional[List[str]] = Query(
         default=None,
         alias="use_cases",
-        description="Filter by declared use cases for the prompt",
+        description="Filter by declared use cases for the prompt (see `match`)",
     ),
     collection_id: Optional[uuid.UUID] = Query(
         default=None, description="Limit results to a specific collection"
     ),
+    category: Optional[List[str]] = Query(
+        default=None, description="Restrict prompts to any of these categories"
+    ),
+    complexity: Optional[List[str]] = Query(
+        default=None, description="Restrict prompts to any of these complexity levels"
+    ),
+    audience: Optional[List[str]] = Query(
+        default=None, description="Restrict prompts to any of these audiences"
+    ),
+    status: Optional[List[str]] = Query(
+        default=None, description="Restrict prompts to any of these statuses"
+    ),
+    where: Optional[List[str]] = Query(
+        default=None,
+        description=(
+            "JSONB path predicates on `llm_parameters` or `success_metrics`, e.g. "
+            "`llm_parameters.temperature<=0.3`. Supports `=`, `<`, `<=`, `>`, `>=`; "
+            "repeated predicates must all match"
+        ),
+    ),
+    match: FacetMatch = Query(
+        default=FacetMatch.all,
+        description=(
+            "How multiple values of `tags`, `target_models`, `providers` and "
+            "`use_cases` combine: `all` (default) requires every value, `any` "
+            "at least one"
+        ),
+    ),
     sort: str = Query(
         default="updated_desc",
         description="Sort order for returned prompts (e.g., updated_desc)",
@@ -81,6 +127,28 @@ def get_prompts(
             "response to retrieve subsequent pages."
         ),
     ),
+    view: PromptView = Query(
+        default=PromptView.full,
+        description=(
+            "`summary` returns lightweight cards with a server-truncated "
+            "`excerpt` instead of the body and JSON payloads"
+        ),
+    ),
+    fields: Optional[List[str]] = Query(
+        default=None,
+        description=(
+            "Sparse fieldset of prompt attributes to return, comma separated "
+            "(e.g. `title,tags`). `id`, `prompt_id` and `version` are always "
+            "included. Not combinable with `view=summary`."
+        ),
+    ),
+    include: Optional[List[str]] = Query(
+        default=None,
+        description=(
+            "Related data to side-load under `included`, comma separated: "
+            "`collections` and/or `related`"
+        ),
+    ),
     db: Session = Depends(get_db),
     current_user: UserORM = Depends(get_current_user),
 ):
@@ -104,6 +172,12 @@ def get_prompts(
         Filter by declared use cases for the prompt.
     collection_id:
         Limit results to prompts within the specified collection.
+    category, complexity, audience, status:
+        Governance values to match; any listed value qualifies.
+    where:
+        JSONB path predicates such as ``llm_parameters.temperature<=0.3``.
+    match:
+        ``all`` (default) requires every facet value, ``any`` at least one.
     sort:
         Sort order for returned prompts (e.g., ``updated_desc``).
     limit:
@@ -111,6 +185,13 @@ def get_prompts(
     after:
         Cursor for pagination. Pass the ``next_cursor`` value from a previous
         response to continue listing prompts.
+    view:
+        ``summary`` for list cards with an excerpt or ``full`` (default).
+    fields:
+        Sparse fieldset of prompt attributes to load and return.
+    include:
+        ``collections`` and ``related`` side-load each prompt's collections
+        and related prompt titles, one query per relation for the page.
 
     Returns
     -------
@@ -119,7 +200,7 @@ def get_prompts(
     """
 
     try:
-        return prompt_service.list_prompts(
+        result = prompt_service.list_prompts(
             db=db,
             owner_id=current_user.id,
             q=q,
@@ -130,23 +211,196 @@ def get_prompts(
             providers=providers,
             purposes=purposes,
             collection_id=collection_id,
+            category=category,
+            complexity=complexity,
+            audience=audience,
+            status=status,
+            where=where,
+            match=match.value,
             sort=sort,
             limit=limit,
             after=after,
+            view=view.value,
+            fields=fields,
+            include=include,
         )
     except Exception as exc:  # pragma: no cover - defensive
         logger.exception("prompts.list failed", exc_info=exc)
         raise HTTPException(status_code=400, detail=str(exc))
+    return json_response(result, PromptListResponse, exclude_unset=bool(fields))
+
+
+@router.post("/prompts:batchGet", response_model=PromptBatchGetResponse)
+def batch_get_prompts(
+    payload: PromptBatchGetRequest,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Return the latest versions of up to 500 of the current user's prompts.
+
+    Items keep the order of ``ids``; ids that are unknown or not the user's
+    are listed in ``missing`` rather than failing the request.
+    """
+
+    result = prompt_service.batch_get_prompts(db, payload.ids, owner_id=current_user.id)
+    return json_response(result, PromptBatchGetResponse)
 
 
 @router.get("/prompts/{prompt_id}", response_model=Prompt)
-def get_prompt(prompt_id: uuid.UUID, db: Session = Depends(get_db)):
-    """Retrieve a prompt by its identifier."""
+def get_prompt(
+    prompt_id: uuid.UUID,
+    version: Optional[int] = Query(
+        None, ge=1, description="Return this version instead of the latest"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Retrieve a prompt, or one of its earlier versions, by its identifier."""
 
-    prompt_obj = prompt_service.get_prompt_by_id(db=db, prompt_id=prompt_id)
+    prompt_obj = prompt_service.get_prompt_by_id(
+        db=db, prompt_id=prompt_id, owner_id=current_user.id, version=version
+    )
     if prompt_obj is None:
         raise HTTPException(status_code=404, detail="Prompt not found")
-    return prompt_obj
+    return json_response(prompt_obj, Prompt)
+
+
+@router.get("/prompts/{prompt_id}/graph", response_model=PromptGraph)
+def get_prompt_graph(
+    prompt_id: uuid.UUID,
+    depth: int = Query(1, ge=1, le=link_service.MAX_DEPTH, description="Most links from the prompt"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of prompts"),
+    direction: LinkDirection = Query(
+        LinkDirection.BOTH, description="Follow links `out` of, `in` to, or `both` ways"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Return the prompts related to a prompt within ``depth`` links."""
+
+    graph = link_service.neighbourhood(
+        db, prompt_id, current_user.id, depth=depth, limit=limit, direction=direction
+    )
+    if graph is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return json_response(graph, PromptGraph)
+
+
+@router.get("/prompts/{prompt_id}/versions", response_model=PromptVersionListResponse)
+def get_prompt_versions(
+    prompt_id: uuid.UUID,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of versions"),
+    after: Optional[str] = Query(
+        None, description="Cursor from a previous response's `next_cursor`"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """List the versions of a prompt, newest first."""
+
+    try:
+        result = prompt_service.list_versions(
+            db=db,
+            prompt_id=prompt_id,
+            owner_id=current_user.id,
+            limit=limit,
+            after=after,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return json_response(result, PromptVersionListResponse)
+
+
+@router.get("/prompts/{prompt_id}/diff", response_model=PromptDiff)
+def get_prompt_diff(
+    prompt_id: uuid.UUID,
+    from_version: int = Query(..., alias="from", ge=1, description="Old version"),
+    to_version: int = Query(..., alias="to", ge=1, description="New version"),
+    granularity: DiffGranularity = Query(
+        DiffGranularity.line, description="Diff by `line` or by `word`"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Diff the bodies of two versions of a prompt."""
+
+    result = diff_service.diff_versions(
+        db, prompt_id, current_user.id, from_version, to_version, granularity
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Prompt version not found")
+    return json_response(result, PromptDiff)
+
+
+def _byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into ``(start, end)``, end exclusive.
+
+    Returns ``None`` when the whole body should be sent, including for
+    multi-range requests, and raises :class:`ValueError` if unsatisfiable.
+    """
+
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else size
+        else:
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return None
+    end = min(end, size)
+    if start >= end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+@router.get(
+    "/prompts/{prompt_id}/payloads/{field}",
+    response_class=StreamingResponse,
+    responses={206: {"description": "Partial content"}, 416: {"description": "Range not satisfiable"}},
+)
+def get_prompt_payload(
+    prompt_id: uuid.UUID,
+    field: PayloadField,
+    version: Optional[int] = Query(
+        None, ge=1, description="Read this version instead of the latest"
+    ),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Stream a payload field as JSON, honouring single byte ranges."""
+
+    payload = prompt_service.get_payload(
+        db, prompt_id, current_user.id, field.value, version
+    )
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Payload not found")
+    headers = {"Accept-Ranges": "bytes", "ETag": f'"{payload.digest}"'}
+    try:
+        span = _byte_range(range_header, payload.size_bytes)
+    except ValueError:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{payload.size_bytes}"}
+        )
+    if span is None:
+        headers["Content-Length"] = str(payload.size_bytes)
+        return StreamingResponse(
+            payload.read(0, None), media_type="application/json", headers=headers
+        )
+    start, end = span
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{payload.size_bytes}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        payload.read(start, end),
+        status_code=206,
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @router.put(
@@ -164,7 +418,7 @@ def update_existing_prompt(
     )
     if updated_prompt is None:
         raise HTTPException(status_code=404, detail="Prompt not found")
-    return updated_prompt
+    return json_response(updated_prompt, Prompt)
 
 
 @router.post(
@@ -179,4 +433,4 @@ def duplicate_prompt(prompt_id: uuid.UUID, db: Session = Depends(get_db)):
     new_prompt = prompt_service.duplicate_prompt(db=db, prompt_id=prompt_id)
     if new_prompt is None:
         raise HTTPException(status_code=404, detail="Prompt not found")
-    return new_prompt
+    return json_response(new_prompt, Prompt, status_code=201)
@@ -0,0 +1,112 @@
+"""API routes for version retention policies and labels."""
+from __future__ import annotations
+
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import csrf_protect, get_current_user
+from app.db.session import get_db
+from app.models.retention import (
+    PromptLabel,
+    PromptLabelUpdate,
+    RetentionPolicy,
+    RetentionPolicyBase,
+)
+from app.models.user import UserORM
+from app.services import retention_service
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.get("/retention-policy", response_model=RetentionPolicy)
+def get_retention_policy(
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> RetentionPolicy:
+    """Return the current user's version retention policy."""
+
+    policy = retention_service.get_policy(db, current_user.id)
+    if policy is None:
+        raise HTTPException(status_code=404, detail="No retention policy")
+    return policy
+
+
+@router.put(
+    "/retention-policy",
+    response_model=RetentionPolicy,
+    dependencies=[Depends(csrf_protect)],
+)
+def put_retention_policy(
+    payload: RetentionPolicyBase,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> RetentionPolicy:
+    """Create or replace the current user's version retention policy."""
+
+    return retention_service.set_policy(
+        db, current_user.id, keep_last=payload.keep_last, keep_days=payload.keep_days
+    )
+
+
+@router.get("/prompts/{prompt_id}/labels", response_model=List[PromptLabel])
+def get_prompt_labels(
+    prompt_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> List[PromptLabel]:
+    """List the labels pinning versions of a prompt."""
+
+    labels = retention_service.list_labels(db, prompt_id, current_user.id)
+    if labels is None:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return labels
+
+
+@router.put(
+    "/prompts/{prompt_id}/labels/{label}",
+    response_model=PromptLabel,
+    dependencies=[Depends(csrf_protect)],
+)
+def put_prompt_label(
+    prompt_id: uuid.UUID,
+    label: str,
+    payload: PromptLabelUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> PromptLabel:
+    """Point a label at a version; labelled versions are never pruned."""
+
+    try:
+        result = retention_service.set_label(
+            db, prompt_id, current_user.id, label, payload.version
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Prompt version not found")
+    return result
+
+
+@router.delete(
+    "/prompts/{prompt_id}/labels/{label}",
+    status_code=204,
+    dependencies=[Depends(csrf_protect)],
+)
+def delete_prompt_label(
+    prompt_id: uuid.UUID,
+    label: str,
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+) -> Response:
+    """Remove a label."""
+
+    try:
+        removed = retention_service.remove_label(db, prompt_id, current_user.id, label)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not removed:
+        raise HTTPException(status_code=404, detail="Label not found")
+    return Response(status_code=204)
@@ -0,0 +1,107 @@
+"""Delta-sync and snapshot API for offline clients."""
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import csrf_protect, get_current_user
+from app.api.prompts import _byte_range
+from app.core.serialization import json_response
+from app.db.session import get_db
+from app.models.sync import Snapshot, SnapshotStatus, SyncResponse
+from app.models.user import UserORM
+from app.services import snapshot_service, sync_service
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.get("/sync/prompts", response_model=SyncResponse)
+def sync_prompts(
+    since: Optional[str] = Query(
+        None, description="`next_token` of the previous response; omit for a full sync"
+    ),
+    limit: int = Query(500, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Return prompts, versions, collections and links changed since ``since``.
+
+    Keep calling with ``next_token`` while ``has_more`` is true.  A ``410``
+    means the token is too old; discard local state and sync without it.
+    """
+
+    try:
+        page = sync_service.changes(db, current_user.id, since, limit=limit)
+    except sync_service.ResyncRequired as exc:
+        raise HTTPException(status_code=410, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return json_response(page, SyncResponse)
+
+
+@router.post(
+    "/snapshots",
+    response_model=Snapshot,
+    responses={202: {"description": "Build queued; poll again"}},
+    dependencies=[Depends(csrf_protect)],
+)
+def request_snapshot(
+    db: Session = Depends(get_db),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Return the library bundle for the current sequence, building it if needed."""
+
+    snapshot = snapshot_service.request_snapshot(db, current_user.id)
+    status_code = 200 if snapshot.status is SnapshotStatus.READY else 202
+    return json_response(snapshot, Snapshot, status_code=status_code)
+
+
+@router.get("/snapshots/latest", response_model=Snapshot)
+def get_latest_snapshot(current_user: UserORM = Depends(get_current_user)):
+    """Return the newest built bundle, which may predate recent changes."""
+
+    snapshot = snapshot_service.latest_snapshot(current_user.id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No snapshot")
+    return json_response(snapshot, Snapshot)
+
+
+@router.get(
+    "/snapshots/{seq}",
+    response_class=StreamingResponse,
+    responses={206: {"description": "Partial content"}, 416: {"description": "Range not satisfiable"}},
+)
+def download_snapshot(
+    seq: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: UserORM = Depends(get_current_user),
+):
+    """Stream a gzip NDJSON bundle, honouring single byte ranges."""
+
+    snapshot = snapshot_service.get_snapshot(current_user.id, seq)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    size = snapshot.size_bytes
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{current_user.id}-{seq}"',
+        "Cache-Control": "private, max-age=86400, immutable",
+        "Content-Disposition": f'attachment; filename="library-{seq}.ndjson.gz"',
+    }
+    try:
+        span = _byte_range(range_header, size)
+    except ValueError:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    start, end = span or (0, size)
+    headers["Content-Length"] = str(end - start)
+    if span is not None:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return StreamingResponse(
+        snapshot_service.read_bundle(current_user.id, seq, start, end),
+        status_code=206 if span is not None else 200,
+        media_type="application/gzip",
+        headers=headers,
+    )
@@ -9,8 +9,41 @@ class Settings(BaseSettings):
     AUTH_COOKIE_DOMAIN: str | None = None
     AUTH_SIGNING_SECRET: str
     FF_AUTH_MAGIC_LINK: bool = False
+    ADMIN_EMAILS: list[str] = []
     GITHUB_CLIENT_ID: str
     GITHUB_CLIENT_SECRET: str
+    PROMPT_HISTORY_MODE: str = "delta"
+    PROMPT_SNAPSHOT_INTERVAL: int = 16
+    PROMPT_DIFF_CACHE_SIZE: int = 256
+    PROMPT_DIFF_MAX_EDITS: int = 1000
+    PAYLOAD_OFFLOAD_BYTES: int = 65536
+    PAYLOAD_STORE_BACKEND: str = "filesystem"
+    PAYLOAD_STORE_PATH: str = "var/payloads"
+    AUDIT_LOG_PARTITIONS_AHEAD: int = 3
+    AUDIT_LOG_RETENTION_MONTHS: int | None = None
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_OVERFLOW: str = "block"
+    AUDIT_BLOCK_MS: int = 50
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_MS: int = 500
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_HANDLER_MODULES: list[str] = ["app.services.smart_collection_service"]
+    JOB_QUEUES: list[str] = ["default"]
+    JOB_ASYNC_WORKERS: int = 8
+    JOB_PROCESS_WORKERS: int = 2
+    JOB_POLL_INTERVAL_MS: int = 1000
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF_S: int = 10
+    JOB_STALE_AFTER_S: int = 900
+    JOB_TASK_MODULES: list[str] = ["app.tasks"]
+    SSE_HEARTBEAT_S: float = 15.0
+    SSE_QUEUE_SIZE: int = 256
+    SSE_REPLAY_LIMIT: int = 1000
+    SNAPSHOT_PATH: str = "var/snapshots"
+    SNAPSHOT_KEEP: int = 2
+    SNAPSHOT_COMPRESS_LEVEL: int = 6
 
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,56 @@
+"""Fractional position keys for manually ordered lists.
+
+Keys are strings over :data:`DIGITS`, ordered byte-wise (columns holding
+them use the ``C`` collation), and a new key can always be made between
+any two, so moving an item rewrites only that item's key.  Keys never end
+in ``DIGITS[0]``, which keeps room below every key.  Appending takes the
+next digit of the last key and grows by one character per 61 appends;
+inserting between two keys halves the gap.
+"""
+
+from __future__ import annotations
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+FIRST_KEY = DIGITS[len(DIGITS) // 2]
+
+
+def _midpoint(low: str, high: str | None) -> str:
+    """Return a key strictly between ``low`` ("" for the start) and ``high``."""
+
+    if high is not None:
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else DIGITS[0]) == high[n]:
+            n += 1
+        if n:
+            return high[:n] + _midpoint(low[n:], high[n:])
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else len(DIGITS)
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _after(key: str) -> str:
+    for i in range(len(key) - 1, -1, -1):
+        digit = DIGITS.index(key[i])
+        if digit < len(DIGITS) - 1:
+            return key[:i] + DIGITS[digit + 1]
+    return key + FIRST_KEY
+
+
+def key_between(low: str | None, high: str | None) -> str:
+    """Return a key ordered after ``low`` and before ``high``.
+
+    Either bound may be ``None`` for the start or end of the list.  Raises
+    :class:`ValueError` unless ``low < high``.
+    """
+
+    if low is not None and high is not None and low >= high:
+        raise ValueError(f"{low!r} is not before {high!r}")
+    if low is None and high is None:
+        return FIRST_KEY
+    if high is None:
+        return _after(low)
+    return _midpoint(low or "", high)
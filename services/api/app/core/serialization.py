@@ -0,0 +1,57 @@
+"""Fast JSON serialization helpers for API responses.
+
+Service functions hydrate trusted database rows with ``model_construct`` so
+that response models are built without re-running validation.  Routes then
+return those models through :func:`json_response`, which serializes them in
+a single pass with pydantic-core's native JSON encoder instead of letting
+FastAPI validate and encode the payload a second time via ``response_model``.
+Routes keep declaring ``response_model`` so the OpenAPI schema is unchanged.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Type
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Return a cached :class:`TypeAdapter` for ``model``."""
+
+    return TypeAdapter(model)
+
+
+class PydanticJSONResponse(Response):
+    """Response carrying JSON bytes that were already encoded by pydantic."""
+
+    media_type = "application/json"
+
+
+def dump_json(payload: Any, model: Type[BaseModel], **kwargs: Any) -> bytes:
+    """Serialize ``payload`` as ``model`` into JSON bytes.
+
+    Instances of ``model`` are trusted and encoded directly.  Anything else
+    (for example a plain ``dict``) is validated first so that the output
+    always matches the documented schema.
+    """
+
+    adapter = get_adapter(model)
+    if not isinstance(payload, model):
+        payload = adapter.validate_python(payload)
+    return adapter.dump_json(payload, **kwargs)
+
+
+def json_response(
+    payload: Any,
+    model: Type[BaseModel],
+    status_code: int = 200,
+    **kwargs: Any,
+) -> PydanticJSONResponse:
+    """Return ``payload`` serialized as ``model`` in a JSON response."""
+
+    return PydanticJSONResponse(
+        content=dump_json(payload, model, **kwargs), status_code=status_code
+    )
@@ -2,12 +2,26 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.db import get_db
 from app.db.rls import rls_middleware
+from app.services import audit_service, live_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the audit writer, and close live update streams on shutdown."""
+    audit_service.start()
+    try:
+        yield
+    finally:
+        await live_service.hub.stop()
+        audit_service.stop()
 
 
 def create_app() -> FastAPI:
@@ -15,6 +29,7 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title=os.environ.get("PROJECT_NAME", "{{ project_name }} API"),
         version=os.environ.get("API_VERSION", "0.1.0"),
+        lifespan=lifespan,
     )
 
     # Allow all origins during development; adjust this for production.
@@ -40,11 +55,16 @@ def create_app() -> FastAPI:
         value = tenant.scalar()
         return {"tenant_id": str(value) if value else None}
 
-    from app.api import auth, prompts, collections
+    from app.api import audit, auth, events, jobs, prompts, collections, retention, sync
     from app.api.endpoints import lookups, metadata, tags
     app.include_router(auth.router)
     app.include_router(prompts.router, prefix="/api/v1")
     app.include_router(collections.router, prefix="/api/v1")
+    app.include_router(retention.router, prefix="/api/v1")
+    app.include_router(audit.router, prefix="/api/v1")
+    app.include_router(jobs.router, prefix="/api/v1")
+    app.include_router(events.router, prefix="/api/v1")
+    app.include_router(sync.router, prefix="/api/v1")
     app.include_router(lookups.router, prefix="/api/v1/lookups", tags=["lookups"])
     app.include_router(metadata.router, prefix="/api/v1/metadata", tags=["metadata"])
     app.include_router(tags.router, prefix="/api/v1/tags", tags=["tags"])
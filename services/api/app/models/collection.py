@@ -4,12 +4,12 @@ from __future__ import annotations
 import re
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import Column, ForeignKey, Index, String, TIMESTAMP
-from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, String, TIMESTAMP, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as SA_UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -36,8 +36,37 @@ class CollectionBase(BaseModel):
         return value.strip()
 
 
+class SmartCollectionFilters(BaseModel):
+    """Saved search whose matches make up a smart collection.
+
+    Fields mirror the filters of ``GET /prompts``.
+    """
+
+    q: Optional[str] = None
+    tags: Optional[List[str]] = None
+    favorite: Optional[bool] = None
+    archived: Optional[bool] = None
+    target_models: Optional[List[str]] = None
+    providers: Optional[List[str]] = None
+    purposes: Optional[List[str]] = None
+    category: Optional[List[str]] = None
+    complexity: Optional[List[str]] = None
+    audience: Optional[List[str]] = None
+    status: Optional[List[str]] = None
+    where: Optional[List[str]] = None
+    match: Literal["all", "any"] = "all"
+
+    model_config = {"extra": "forbid"}
+
+
 class CollectionCreate(CollectionBase):
-    """Payload for creating or renaming a collection."""
+    """Payload for creating or renaming a collection.
+
+    ``filters`` makes the collection smart; on rename, omitting it keeps the
+    current filters.
+    """
+
+    filters: Optional[SmartCollectionFilters] = None
 
 
 class Collection(CollectionBase):
@@ -47,10 +76,21 @@ class Collection(CollectionBase):
     created_at: datetime
     updated_at: datetime
     count: Optional[int] = Field(default=None, description="Prompt count when requested")
+    filters: Optional[SmartCollectionFilters] = Field(
+        default=None, description="Saved search of a smart collection"
+    )
 
     model_config = {"from_attributes": True}
 
 
+class CollectionPromptPosition(BaseModel):
+    """Position of a prompt within a collection's manual order."""
+
+    collection_id: UUID
+    prompt_id: UUID
+    position: str
+
+
 class CollectionORM(Base):
     """ORM model backing the ``collections`` table."""
 
@@ -76,6 +116,8 @@ class CollectionORM(Base):
         onupdate=func.now(),
         nullable=False,
     )
+    filters = Column(JSONB, nullable=True)
+    refreshed_seq = Column(BigInteger, nullable=True)
 
     prompts = relationship(
         "CollectionPromptORM",
@@ -85,12 +127,22 @@ class CollectionORM(Base):
 
 
 class CollectionPromptORM(Base):
-    """Bridge table mapping prompts to collections."""
+    """Bridge table mapping prompts to collections.
+
+    ``position`` orders the prompts of a collection manually; keys come from
+    :func:`app.core.ordering.key_between` and compare byte-wise.
+    """
 
     __tablename__ = "collection_prompts"
     __table_args__ = (
         Index("ix_collection_prompts_prompt", "prompt_id"),
-        Index("ix_collection_prompts_collection", "collection_id"),
+        Index("ix_collection_prompts_position", "collection_id", "position", "prompt_id"),
+        Index(
+            "ix_collection_prompts_added",
+            "collection_id",
+            text("added_at DESC"),
+            text("prompt_id DESC"),
+        ),
     )
 
     collection_id = Column(
@@ -103,6 +155,34 @@ class CollectionPromptORM(Base):
         ForeignKey("prompts.id", ondelete="CASCADE"),
         primary_key=True,
     )
+    position = Column(String(collation="C"), nullable=False)
+    added_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
 
     collection = relationship("CollectionORM", back_populates="prompts")
     prompt = relationship(PromptHeaderORM)
+
+
+class SmartCollectionPromptORM(Base):
+    """Materialized members of a smart collection.
+
+    Maintained by :mod:`app.services.smart_collection_service`; the owner's
+    change sequence it reflects is ``collections.refreshed_seq``.
+    """
+
+    __tablename__ = "smart_collection_prompts"
+    __table_args__ = (Index("ix_smart_collection_prompts_prompt", "prompt_id"),)
+
+    collection_id = Column(
+        SA_UUID(as_uuid=True),
+        ForeignKey("collections.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    prompt_id = Column(
+        SA_UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
@@ -0,0 +1,88 @@
+"""Background job queue models and ORM definitions."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, Column, Index, Integer, SmallInteger, String, Text, TIMESTAMP, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.models.prompt import Base
+
+
+class Job(BaseModel):
+    """A queued, running, finished or dead-lettered job."""
+
+    id: int
+    task: str
+    queue: str
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    run_at: datetime
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+class JobQueueStats(BaseModel):
+    """Depth and latency of one queue."""
+
+    queue: str
+    ready: int
+    scheduled: int
+    running: int
+    dead: int
+    oldest_ready_seconds: Optional[float] = None
+    avg_wait_ms: Optional[float] = None
+    avg_run_ms: Optional[float] = None
+    done_recent: int = 0
+
+
+class JobORM(Base):
+    """Unit of background work claimed by ``python -m app.worker``.
+
+    ``status`` moves from ``queued`` to ``running`` when a worker claims the
+    job and to ``done`` or, after ``max_attempts`` failures, ``dead``.
+    Failed attempts return to ``queued`` with ``run_at`` pushed back.  The
+    claiming worker renews ``heartbeat_at`` while the job runs, and
+    ``attempts`` identifies the claim a result belongs to.
+    Higher ``priority`` runs first.  See :mod:`app.services.job_service`.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index(
+            "ix_jobs_ready",
+            "queue",
+            text("priority DESC"),
+            "run_at",
+            "id",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index("ix_jobs_heartbeat", "heartbeat_at", postgresql_where=text("status = 'running'")),
+        Index("ix_jobs_finished", "finished_at", postgresql_where=text("status = 'done'")),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    task = Column(String(128), nullable=False)
+    queue = Column(String(64), nullable=False, default="default", server_default="default")
+    payload = Column(JSONB, nullable=False, default=dict, server_default="{}")
+    priority = Column(SmallInteger, nullable=False, default=0, server_default="0")
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    worker = Column(String(128), nullable=True)
+    run_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    heartbeat_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -0,0 +1,61 @@
+"""Related-prompt link models and ORM definitions."""
+from __future__ import annotations
+
+from enum import Enum as PyEnum
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from sqlalchemy import Column, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+
+from app.models.prompt import Base, Prompt
+
+
+class LinkDirection(str, PyEnum):
+    """Which links a graph traversal follows."""
+
+    OUT = "out"
+    IN = "in"
+    BOTH = "both"
+
+
+class PromptLink(BaseModel):
+    """``source_id`` lists ``target_id`` among its related prompts."""
+
+    source_id: UUID
+    target_id: UUID
+
+
+class PromptGraphNode(BaseModel):
+    """A prompt reached by a traversal and its distance from the root."""
+
+    depth: int = Field(..., description="Fewest links from the root prompt")
+    prompt: Prompt
+
+
+class PromptGraph(BaseModel):
+    """Neighbourhood of a prompt in the related-prompt graph."""
+
+    nodes: List[PromptGraphNode] = Field(..., description="Root first, then by depth")
+    links: List[PromptLink] = Field(..., description="Links between the returned nodes")
+    truncated: bool = Field(..., description="More prompts were reachable than `limit`")
+
+
+class PromptLinkORM(Base):
+    """Edge derived from ``related_prompt_ids`` of a prompt's current version.
+
+    Maintained by the write paths in ``prompt_service`` so both "links from"
+    and, through ``ix_prompt_links_target``, "links to" a prompt are index
+    lookups.  ``target_id`` is not a foreign key: related ids are free-form
+    and may name prompts that no longer exist or belong to someone else.
+    """
+
+    __tablename__ = "prompt_links"
+    __table_args__ = (Index("ix_prompt_links_target", "target_id", "source_id"),)
+
+    source_id = Column(
+        SA_UUID(as_uuid=True), ForeignKey("prompts.id", ondelete="CASCADE"), primary_key=True
+    )
+    target_id = Column(SA_UUID(as_uuid=True), primary_key=True)
+    owner_id = Column(SA_UUID(as_uuid=True), nullable=False)
@@ -0,0 +1,51 @@
+"""Transactional outbox ORM definitions."""
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, Column, Index, Integer, String, Text, TIMESTAMP, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as SA_UUID
+from sqlalchemy.sql import func
+
+from app.models.prompt import Base
+
+
+class OutboxEventORM(Base):
+    """Domain event written in the same transaction as the change it announces.
+
+    ``status`` is ``pending`` until a dispatcher delivers the event
+    (``done``) or gives up after ``OUTBOX_MAX_ATTEMPTS`` (``dead``).  Events
+    of one ``aggregate_id`` are delivered in ``id`` order.  Events with an
+    ``owner_id`` take the next number of the owner's change sequence as
+    ``seq``, which orders them by commit, and inserting one sends a
+    ``NOTIFY outbox_events`` used by :mod:`app.services.live_service`.  See
+    :mod:`app.services.outbox_service`.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "id", postgresql_where=text("status = 'pending'")),
+        Index(
+            "ix_outbox_events_aggregate_pending",
+            "aggregate_id",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "ix_outbox_events_owner_seq",
+            "owner_id",
+            "seq",
+            postgresql_where=text("seq IS NOT NULL"),
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    aggregate_id = Column(SA_UUID(as_uuid=True), nullable=False)
+    owner_id = Column(SA_UUID(as_uuid=True), nullable=True)
+    seq = Column(BigInteger, nullable=True)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict, server_default="{}")
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    available_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    dispatched_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -10,15 +10,26 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
 from enum import Enum as PyEnum
 
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import ARRAY, Boolean, Column, ForeignKey, Index, Integer, String, TIMESTAMP, text
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    CheckConstraint,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    TIMESTAMP,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID as SA_UUID, ENUM
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 from pgvector.sqlalchemy import Vector
 
@@ -32,6 +43,13 @@ class PromptAccessControl(str, PyEnum):
     unlisted = "unlisted"
 
 
+class PromptView(str, PyEnum):
+    """Projection applied to prompts returned from list endpoints."""
+
+    summary = "summary"
+    full = "full"
+
+
 class PromptBase(BaseModel):
     """Shared properties for prompt creation and updates."""
 
@@ -76,6 +94,21 @@ class PromptCreate(PromptBase):
     """Model used when creating a new prompt version."""
 
 
+class PayloadField(str, PyEnum):
+    """Payload fields that may be offloaded to external storage."""
+
+    input_schema = "input_schema"
+    sample_input = "sample_input"
+    sample_output = "sample_output"
+
+
+class PayloadRef(BaseModel):
+    """Reference to an externally stored payload."""
+
+    digest: str = Field(..., description="SHA-256 of the payload's canonical JSON")
+    size_bytes: int
+
+
 class Prompt(PromptBase):
     """Model returned from API responses representing a prompt version."""
 
@@ -87,6 +120,13 @@ class Prompt(PromptBase):
     is_archived: bool = False
     block_count: int = 0
     icon_url: Optional[str] = None
+    payloads: Optional[Dict[PayloadField, PayloadRef]] = Field(
+        default=None,
+        description=(
+            "Large payloads kept in external storage.  List views return these "
+            "fields as null; fetch them from `GET /prompts/{id}/payloads/{field}`."
+        ),
+    )
     created_at: datetime
     updated_at: datetime
 
@@ -95,11 +135,69 @@ class Prompt(PromptBase):
     }
 
 
+class PromptSummary(BaseModel):
+    """Lightweight prompt card returned by ``GET /prompts?view=summary``."""
+
+    id: UUID
+    prompt_id: UUID
+    owner_id: UUID
+    version: int
+    title: str
+    excerpt: str = Field(
+        ..., description="Leading characters of the prompt body, truncated server-side"
+    )
+    tags: Optional[List[str]] = None
+    use_cases: List[str]
+    access_control: PromptAccessControl
+    target_models: Optional[List[str]] = None
+    providers: Optional[List[str]] = None
+    is_favorite: bool = False
+    is_archived: bool = False
+    created_at: datetime
+    updated_at: datetime
+
+
+class PromptInclude(str, PyEnum):
+    """Related data that ``GET /prompts`` can side-load for a page."""
+
+    collections = "collections"
+    related = "related"
+
+
+class IncludedCollection(BaseModel):
+    """A collection a listed prompt belongs to."""
+
+    id: UUID
+    name: str
+
+
+class IncludedPrompt(BaseModel):
+    """A prompt listed in ``related_prompt_ids`` of a listed prompt."""
+
+    prompt_id: UUID
+    title: str
+
+
+class PromptListIncludes(BaseModel):
+    """Side-loaded data keyed by ``prompt_id`` of the listed prompts."""
+
+    collections: Optional[Dict[UUID, List[IncludedCollection]]] = Field(
+        default=None, description="Collections each prompt belongs to"
+    )
+    related: Optional[Dict[UUID, List[IncludedPrompt]]] = Field(
+        default=None, description="The current user's prompts each prompt relates to"
+    )
+
+
 class PromptListResponse(BaseModel):
     """Paginated response model for ``GET /prompts``."""
 
-    items: List[Prompt] = Field(
-        ..., description="Prompts returned in the current page"
+    items: List[Union[Prompt, PromptSummary]] = Field(
+        ...,
+        description=(
+            "Prompts returned in the current page. Items are summaries when "
+            "`view=summary` is requested."
+        ),
     )
     next_cursor: Optional[str] = Field(
         default=None,
@@ -113,6 +211,85 @@ class PromptListResponse(BaseModel):
         default=None,
         description="Approximate total number of prompts matching the query",
     )
+    included: Optional[PromptListIncludes] = Field(
+        default=None, description="Data requested with `include`"
+    )
+
+
+PROMPT_BATCH_MAX = 500
+"""Most prompt ids accepted by ``POST /prompts:batchGet``."""
+
+
+class PromptBatchGetRequest(BaseModel):
+    """Request body for ``POST /prompts:batchGet``."""
+
+    ids: List[UUID] = Field(
+        ..., min_length=1, max_length=PROMPT_BATCH_MAX, description="Prompt identifiers"
+    )
+
+
+class PromptBatchGetResponse(BaseModel):
+    """Latest versions of the requested prompts, in request order."""
+
+    items: List[Prompt] = Field(..., description="Found prompts, in the order requested")
+    missing: List[UUID] = Field(
+        default_factory=list,
+        description="Requested ids that do not exist or belong to another user",
+    )
+
+
+class PromptVersionSummary(BaseModel):
+    """Version row returned by ``GET /prompts/{id}/versions``, without content."""
+
+    id: UUID
+    prompt_id: UUID
+    version: int
+    status: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class PromptVersionListResponse(BaseModel):
+    """Paginated response model for ``GET /prompts/{id}/versions``."""
+
+    items: List[PromptVersionSummary] = Field(
+        ..., description="Versions in the current page, newest first"
+    )
+    next_cursor: Optional[str] = Field(
+        default=None,
+        description="Pass to the `after` query parameter to fetch the next page",
+    )
+    count: int = Field(..., description="Number of versions in this response")
+
+
+class DiffGranularity(str, PyEnum):
+    """Token size used when diffing prompt bodies."""
+
+    line = "line"
+    word = "word"
+
+
+class PromptDiffOp(BaseModel):
+    """One run of unchanged, deleted or inserted text."""
+
+    op: str = Field(..., description="`equal`, `delete` or `insert`")
+    text: str
+
+
+class PromptDiff(BaseModel):
+    """Response model for ``GET /prompts/{id}/diff``."""
+
+    prompt_id: UUID
+    from_version: int
+    to_version: int
+    from_id: UUID
+    to_id: UUID
+    granularity: DiffGranularity
+    insertions: int = Field(..., description="Characters inserted")
+    deletions: int = Field(..., description="Characters deleted")
+    ops: List[PromptDiffOp] = Field(
+        ..., description="Edit script; concatenating `equal` and `insert` runs yields the new body"
+    )
 
 
 class PromptHeaderORM(Base):
@@ -128,6 +305,7 @@ class PromptHeaderORM(Base):
     is_favorite = Column(Boolean, nullable=False, server_default="false")
     is_archived = Column(Boolean, nullable=False, server_default="false")
     block_count = Column(Integer, nullable=False, server_default="0")
+    next_version = Column(Integer, nullable=False, server_default="1")
     embedding = Column(Vector(1536), nullable=True)
     icon_url = Column(String, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
@@ -139,19 +317,70 @@ class PromptHeaderORM(Base):
     )
 
 
+class PromptBlobORM(Base):
+    """Content-addressed storage for version bodies and JSON payloads.
+
+    ``digest`` is the SHA-256 of the canonical JSON encoding of ``content``
+    and ``ref_count`` counts the version fields pointing at the blob.
+    ``storage`` is ``db`` when ``content`` is held in the row, otherwise the
+    name of the external payload store holding it.  See
+    :mod:`app.services.blob_service`.
+    """
+
+    __tablename__ = "prompt_blobs"
+    __table_args__ = (
+        CheckConstraint(
+            "content IS NOT NULL OR storage <> 'db'",
+            name="ck_prompt_blobs_content_present",
+        ),
+    )
+
+    digest = Column(String(64), primary_key=True)
+    content = Column(JSONB, nullable=True)
+    storage = Column(String(32), nullable=False, default="db", server_default="db")
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
 class PromptVersionORM(Base):
-    """ORM model for individual versions of a prompt."""
+    """ORM model for individual versions of a prompt.
+
+    The latest version keeps its content inline.  Superseded versions move
+    ``body`` and the JSON payloads into :class:`PromptBlobORM` rows and keep
+    only the ``*_digest`` references; read them through
+    ``blob_service.content``.  In delta history mode a superseded body may
+    instead be a ``body_delta`` against the previous version, ``delta_depth``
+    deltas away from the nearest full body; read it through
+    ``history_service.body_of``.
+
+    The table is hash-partitioned on ``prompt_id``, which is part of the
+    primary key; filter on it so queries touch a single partition.
+    """
 
     __tablename__ = "prompt_versions"
     __table_args__ = (
         Index("ix_prompt_versions_created_at", "created_at"),
         Index("ix_prompt_versions_prompt_desc", "prompt_id", text("version DESC")),
+        Index(
+            "ix_prompt_versions_prompt_id_version",
+            "prompt_id",
+            "version",
+            unique=True,
+        ),
+        CheckConstraint(
+            "body IS NOT NULL OR body_digest IS NOT NULL OR body_delta IS NOT NULL",
+            name="ck_prompt_versions_body_present",
+        ),
+        {"postgresql_partition_by": "HASH (prompt_id)"},
     )
 
     id = Column(SA_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    prompt_id = Column(SA_UUID(as_uuid=True), ForeignKey("prompts.id"), nullable=False)
+    prompt_id = Column(
+        SA_UUID(as_uuid=True), ForeignKey("prompts.id"), primary_key=True, nullable=False
+    )
     version = Column(Integer, nullable=False)
-    body = Column(String, nullable=False)
+    body = Column(String, nullable=True)
     description = Column(String, nullable=True)
     access_control = Column(
         ENUM(PromptAccessControl, name="prompt_access_control"), nullable=False
@@ -164,14 +393,22 @@ class PromptVersionORM(Base):
     complexity = Column(String, nullable=True)
     audience = Column(String, nullable=True)
     status = Column(String, nullable=True)
-    input_schema = Column(JSONB, nullable=True)
+    input_schema = Column(JSONB(none_as_null=True), nullable=True)
     output_format = Column(String, nullable=True)
-    llm_parameters = Column(JSONB, nullable=True)
-    success_metrics = Column(JSONB, nullable=True)
-    sample_input = Column(JSONB, nullable=True)
-    sample_output = Column(JSONB, nullable=True)
+    llm_parameters = Column(JSONB(none_as_null=True), nullable=True)
+    success_metrics = Column(JSONB(none_as_null=True), nullable=True)
+    sample_input = Column(JSONB(none_as_null=True), nullable=True)
+    sample_output = Column(JSONB(none_as_null=True), nullable=True)
     related_prompt_ids = Column(ARRAY(SA_UUID(as_uuid=True)), nullable=True)
     link = Column(String, nullable=True)
+    body_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    input_schema_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    llm_parameters_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    success_metrics_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    sample_input_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    sample_output_digest = Column(String(64), ForeignKey("prompt_blobs.digest"), nullable=True)
+    body_delta = Column(JSONB(none_as_null=True), nullable=True)
+    delta_depth = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(
         TIMESTAMP(timezone=True),
@@ -179,3 +416,138 @@ class PromptVersionORM(Base):
         onupdate=func.now(),
         nullable=False,
     )
+
+    body_blob = relationship(PromptBlobORM, foreign_keys=[body_digest])
+    input_schema_blob = relationship(PromptBlobORM, foreign_keys=[input_schema_digest])
+    llm_parameters_blob = relationship(PromptBlobORM, foreign_keys=[llm_parameters_digest])
+    success_metrics_blob = relationship(PromptBlobORM, foreign_keys=[success_metrics_digest])
+    sample_input_blob = relationship(PromptBlobORM, foreign_keys=[sample_input_digest])
+    sample_output_blob = relationship(PromptBlobORM, foreign_keys=[sample_output_digest])
+
+
+class PromptCardORM(Base):
+    """Denormalized read model holding one list card per prompt.
+
+    ``id`` is the prompt identifier, so cards can stand in for
+    :class:`PromptHeaderORM` rows when rendering and paginating lists.  The
+    row mirrors the header together with the facets of the current version
+    and is maintained by every write path in ``prompt_service``.
+    """
+
+    __tablename__ = "prompt_cards"
+    __table_args__ = (
+        Index(
+            "ix_prompt_cards_owner_updated",
+            "owner_id",
+            text("updated_at DESC"),
+            text("id DESC"),
+            postgresql_include=["is_favorite", "is_archived"],
+        ),
+        Index(
+            "ix_prompt_cards_owner_created",
+            "owner_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_include=["is_favorite", "is_archived"],
+        ),
+        Index(
+            "ix_prompt_cards_owner_title",
+            "owner_id",
+            "title",
+            text("id DESC"),
+            postgresql_include=["is_favorite", "is_archived"],
+        ),
+        Index(
+            "ix_prompt_cards_active_updated",
+            "owner_id",
+            text("updated_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("NOT is_archived"),
+        ),
+        Index(
+            "ix_prompt_cards_active_created",
+            "owner_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("NOT is_archived"),
+        ),
+        Index(
+            "ix_prompt_cards_active_title",
+            "owner_id",
+            "title",
+            text("id DESC"),
+            postgresql_where=text("NOT is_archived"),
+        ),
+        Index(
+            "ix_prompt_cards_favorites_updated",
+            "owner_id",
+            text("updated_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("is_favorite AND NOT is_archived"),
+        ),
+        Index("ix_prompt_cards_tags", "tags", postgresql_using="gin"),
+        Index("ix_prompt_cards_target_models", "target_models", postgresql_using="gin"),
+        Index("ix_prompt_cards_providers", "providers", postgresql_using="gin"),
+        Index("ix_prompt_cards_use_cases", "use_cases", postgresql_using="gin"),
+        Index("ix_prompt_cards_owner_category", "owner_id", "category"),
+        Index("ix_prompt_cards_owner_complexity", "owner_id", "complexity"),
+        Index("ix_prompt_cards_owner_audience", "owner_id", "audience"),
+        Index("ix_prompt_cards_owner_status", "owner_id", "status"),
+        Index(
+            "ix_prompt_cards_llm_parameters",
+            "llm_parameters",
+            postgresql_using="gin",
+            postgresql_ops={"llm_parameters": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_prompt_cards_success_metrics",
+            "success_metrics",
+            postgresql_using="gin",
+            postgresql_ops={"success_metrics": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_prompt_cards_temperature",
+            "owner_id",
+            text(
+                "(CASE WHEN jsonb_typeof(llm_parameters -> 'temperature') = 'number' "
+                "THEN (llm_parameters ->> 'temperature')::numeric END)"
+            ),
+        ),
+        Index(
+            "ix_prompt_cards_max_tokens",
+            "owner_id",
+            text(
+                "(CASE WHEN jsonb_typeof(llm_parameters -> 'max_tokens') = 'number' "
+                "THEN (llm_parameters ->> 'max_tokens')::numeric END)"
+            ),
+        ),
+    )
+
+    id = Column(
+        SA_UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    owner_id = Column(SA_UUID(as_uuid=True), nullable=False)
+    version_id = Column(SA_UUID(as_uuid=True), nullable=False)
+    version = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    excerpt = Column(String, nullable=False, server_default="")
+    tags = Column(ARRAY(String), nullable=True)
+    target_models = Column(ARRAY(String), nullable=True)
+    providers = Column(ARRAY(String), nullable=True)
+    use_cases = Column(ARRAY(String), nullable=True)
+    access_control = Column(
+        ENUM(PromptAccessControl, name="prompt_access_control", create_type=False),
+        nullable=False,
+    )
+    category = Column(String, nullable=True)
+    complexity = Column(String, nullable=True)
+    audience = Column(String, nullable=True)
+    status = Column(String, nullable=True)
+    llm_parameters = Column(JSONB, nullable=True)
+    success_metrics = Column(JSONB, nullable=True)
+    is_favorite = Column(Boolean, nullable=False, server_default="false")
+    is_archived = Column(Boolean, nullable=False, server_default="false")
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False)
@@ -0,0 +1,128 @@
+"""Version retention models and ORM definitions."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    TIMESTAMP,
+)
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy.sql import func
+
+from app.models.prompt import Base
+
+
+class RetentionPolicyBase(BaseModel):
+    """Rules deciding which superseded versions stay in ``prompt_versions``.
+
+    A version is kept when any rule keeps it.  The latest version and
+    labelled versions are always kept; with no rule set nothing is pruned.
+    """
+
+    keep_last: Optional[int] = Field(
+        default=None, ge=1, description="Keep the newest N versions of each prompt"
+    )
+    keep_days: Optional[int] = Field(
+        default=None, ge=1, description="Keep versions created in the last N days"
+    )
+
+
+class RetentionPolicy(RetentionPolicyBase):
+    """Retention policy returned from the API."""
+
+    owner_id: UUID
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class PromptLabelUpdate(BaseModel):
+    """Payload pointing a label at a version."""
+
+    version: int = Field(..., ge=1)
+
+
+class PromptLabel(BaseModel):
+    """A named pointer to a prompt version, e.g. ``production``."""
+
+    label: str
+    prompt_id: UUID
+    version_id: UUID
+    version: int
+
+
+class RetentionPolicyORM(Base):
+    """Per-owner retention policy."""
+
+    __tablename__ = "retention_policies"
+
+    owner_id = Column(SA_UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    keep_last = Column(Integer, nullable=True)
+    keep_days = Column(Integer, nullable=True)
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class PromptVersionLabelORM(Base):
+    """Label pinning a version; labelled versions are never pruned."""
+
+    __tablename__ = "prompt_version_labels"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["version_id", "prompt_id"],
+            ["prompt_versions.id", "prompt_versions.prompt_id"],
+            name="fk_prompt_version_labels_version",
+        ),
+        Index("ix_prompt_version_labels_version", "version_id"),
+    )
+
+    prompt_id = Column(
+        SA_UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    label = Column(String(64), primary_key=True)
+    version_id = Column(SA_UUID(as_uuid=True), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
+class PromptVersionColdORM(Base):
+    """Pruned version kept as one zlib-compressed JSON document.
+
+    ``content`` holds every version column with the body and payloads
+    resolved, so a cold version can be read back without its neighbours or
+    blobs.  See :mod:`app.services.retention_service`.
+    """
+
+    __tablename__ = "prompt_versions_cold"
+    __table_args__ = (
+        Index(
+            "ix_prompt_versions_cold_prompt_version", "prompt_id", "version", unique=True
+        ),
+    )
+
+    id = Column(SA_UUID(as_uuid=True), primary_key=True)
+    prompt_id = Column(
+        SA_UUID(as_uuid=True),
+        ForeignKey("prompts.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    version = Column(Integer, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    archived_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,116 @@
+"""Delta-sync models and ORM definitions."""
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum as PyEnum
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Index, String, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy.sql import func
+
+from app.models.collection import Collection
+from app.models.prompt import Base, Prompt, PromptVersionSummary
+
+
+class SyncEntity(str, PyEnum):
+    """Kinds of records tracked for sync."""
+
+    PROMPT = "prompt"
+    VERSION = "version"
+    COLLECTION = "collection"
+    COLLECTION_PROMPT = "collection_prompt"
+
+
+class CollectionLink(BaseModel):
+    """Membership of a prompt in a collection.
+
+    Prompts of a collection are ordered by ``position``, compared byte-wise.
+    """
+
+    collection_id: UUID
+    prompt_id: UUID
+    position: str
+
+
+class SyncTombstone(BaseModel):
+    """A record deleted since the client's token.
+
+    ``parent_id`` is the prompt of a version or the collection of a
+    collection link; for prompts and collections it equals ``id``.
+    """
+
+    entity: SyncEntity
+    id: UUID
+    parent_id: UUID
+
+
+class SyncResponse(BaseModel):
+    """Records changed since a sync token, in change order."""
+
+    prompts: List[Prompt] = Field(default_factory=list, description="Current state of changed prompts")
+    versions: List[PromptVersionSummary] = Field(default_factory=list)
+    collections: List[Collection] = Field(default_factory=list)
+    collection_links: List[CollectionLink] = Field(default_factory=list)
+    tombstones: List[SyncTombstone] = Field(default_factory=list)
+    next_token: str = Field(..., description="Pass as `since` on the next request")
+    has_more: bool = Field(..., description="More changes are waiting; request again immediately")
+
+
+class SnapshotStatus(str, PyEnum):
+    """Whether a snapshot bundle can be downloaded yet."""
+
+    READY = "ready"
+    PENDING = "pending"
+
+
+class Snapshot(BaseModel):
+    """A compressed bundle of a user's library as of sequence ``seq``."""
+
+    seq: int = Field(..., description="Change sequence the bundle reflects")
+    status: SnapshotStatus
+    size_bytes: int | None = None
+    created_at: datetime | None = None
+    url: str | None = Field(None, description="Download location once `ready`")
+    next_token: str = Field(..., description="Delta-sync token to continue from the bundle")
+
+
+class SyncCounterORM(Base):
+    """Per-owner change sequence.
+
+    Incrementing ``seq`` locks the row until the writer commits, so an
+    owner's changes commit in sequence order and a reader never sees a
+    later number before an earlier one.  Tombstones at or below
+    ``floor_seq`` have been pruned, and so have live events at or below
+    ``event_floor_seq``.
+    """
+
+    __tablename__ = "sync_counters"
+
+    owner_id = Column(SA_UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    floor_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    event_floor_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+class SyncChangeORM(Base):
+    """Latest change of one record, keyed by the record.
+
+    A record changed many times keeps a single row carrying its newest
+    ``seq``, so a sync page grows with the number of changed records rather
+    than the number of writes.  Deleted records keep a row with ``deleted``
+    set until pruned.  See :mod:`app.services.sync_service`.
+    """
+
+    __tablename__ = "sync_changes"
+    __table_args__ = (Index("ix_sync_changes_owner_seq", "owner_id", "seq", unique=True),)
+
+    owner_id = Column(SA_UUID(as_uuid=True), primary_key=True)
+    entity = Column(String(24), primary_key=True)
+    entity_id = Column(SA_UUID(as_uuid=True), primary_key=True)
+    parent_id = Column(SA_UUID(as_uuid=True), primary_key=True)
+    seq = Column(BigInteger, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default="false")
+    changed_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
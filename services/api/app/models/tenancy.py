@@ -1,11 +1,15 @@
 """Tenancy related ORM models."""
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
 import sqlalchemy as sa
+from pydantic import BaseModel
 from sqlalchemy import Column, Enum as SAEnum, ForeignKey, Index, String, Text, TIMESTAMP
-from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID as SA_UUID
 from sqlalchemy.sql import func
 
 from .prompt import Base
@@ -115,12 +119,51 @@ class ResourceACLORM(Base):
 
 
 class AuditLogORM(Base):
-    """Structured audit log for resource actions."""
+    """Structured audit log for resource actions.
+
+    Range-partitioned by month on ``created_at``; see
+    :mod:`app.services.partition_service`.  Written in batches by
+    :mod:`app.services.audit_service`.
+    """
 
     __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_created_brin", "created_at", postgresql_using="brin"),
+        Index(
+            "ix_audit_log_tenant_workspace_created", "tenant_id", "workspace_id", "created_at"
+        ),
+        Index("ix_audit_log_resource_created", "resource_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     id = Column(sa.BigInteger, primary_key=True, autoincrement=True)  # type: ignore[name-defined]
     tenant_id = Column(SA_UUID(as_uuid=True), nullable=True)
     workspace_id = Column(SA_UUID(as_uuid=True), nullable=True)
     resource_id = Column(SA_UUID(as_uuid=True), nullable=True)
+    actor_id = Column(SA_UUID(as_uuid=True), nullable=True)
     action = Column(Text, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    details = Column(JSONB, nullable=True)
+    created_at = Column(
+        TIMESTAMP(timezone=True), server_default=func.now(), primary_key=True, nullable=False
+    )
+
+
+class AuditLogEntry(BaseModel):
+    """Audit record returned from the admin API."""
+
+    id: int
+    tenant_id: Optional[UUID] = None
+    workspace_id: Optional[UUID] = None
+    resource_id: Optional[UUID] = None
+    actor_id: Optional[UUID] = None
+    action: str
+    details: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class AuditLogPage(BaseModel):
+    """Page of audit records, newest first."""
+
+    items: List[AuditLogEntry]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,382 @@
+"""Asynchronous, batched writer for ``audit_log``.
+
+Write paths call :func:`record` after they commit.  Records go onto a
+bounded in-process queue and a background thread inserts them in multi-row
+batches once ``AUDIT_BATCH_SIZE`` records are waiting or
+``AUDIT_FLUSH_INTERVAL_MS`` has passed, so requests never wait on an audit
+insert.
+
+When the database falls behind and the queue fills, ``AUDIT_OVERFLOW``
+decides what happens: ``block`` (the default) makes the caller wait up to
+``AUDIT_BLOCK_MS`` for space before dropping the record, ``drop`` drops it
+immediately.  Dropped records are counted and logged as ``audit.dropped``.
+Failed inserts are retried with backoff while the queue absorbs new records.
+
+The application starts the writer on startup and drains it on shutdown
+(see :func:`start` and :func:`stop`).  Without a running writer, e.g. in
+command line jobs, :func:`record` is a no-op.
+
+:func:`list_entries` and :func:`iter_entries` read the log back for the
+admin API, newest first with keyset pagination on ``(created_at, id)``.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.rls import TENANT_ID_CTX
+from app.models.tenancy import AuditLogEntry, AuditLogORM, AuditLogPage
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """One audited action."""
+
+    action: str
+    resource_id: UUID | None = None
+    actor_id: UUID | None = None
+    tenant_id: UUID | None = None
+    workspace_id: UUID | None = None
+    details: Dict[str, Any] | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def row(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "resource_id": self.resource_id,
+            "actor_id": self.actor_id,
+            "tenant_id": self.tenant_id,
+            "workspace_id": self.workspace_id,
+            "details": self.details,
+            "created_at": self.created_at,
+        }
+
+
+@dataclass
+class AuditStats:
+    """Counters of an :class:`AuditWriter`."""
+
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    batches: int = 0
+    failures: int = 0
+
+
+def write_batch(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert ``rows`` into ``audit_log`` as multi-row ``INSERT`` statements."""
+
+    db.execute(insert(AuditLogORM), rows)
+    db.commit()
+
+
+class AuditWriter:
+    """Bounded queue of audit records drained by a background thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_queue: int | None = None,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        overflow: str | None = None,
+        block_timeout: float | None = None,
+    ) -> None:
+        overflow = overflow or settings.AUDIT_OVERFLOW
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"unknown audit overflow policy: {overflow}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval
+            if flush_interval is not None
+            else settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+        )
+        self.overflow = overflow
+        self.block_timeout = (
+            block_timeout if block_timeout is not None else settings.AUDIT_BLOCK_MS / 1000
+        )
+        self.stats = AuditStats()
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or settings.AUDIT_QUEUE_SIZE)
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, record: AuditRecord) -> bool:
+        """Queue ``record``; returns ``False`` if it was dropped."""
+
+        if self._stopping.is_set():
+            return self._drop(record)
+        try:
+            if self.overflow == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            return self._drop(record)
+        with self._lock:
+            self.stats.enqueued += 1
+        return True
+
+    def _drop(self, record: AuditRecord) -> bool:
+        with self._lock:
+            self.stats.dropped += 1
+        logger.warning(
+            "audit.dropped",
+            extra={"action": record.action, "dropped": self.stats.dropped},
+        )
+        return False
+
+    def flush(self) -> None:
+        """Block until every queued record has been written or dropped."""
+
+        self._queue.join()
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stop accepting records and drain the queue."""
+
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _next_batch(self) -> tuple[List[AuditRecord], bool]:
+        """Wait for a record, then gather more until the batch is full or due.
+
+        Returns the batch and whether :meth:`stop` was requested.
+        """
+
+        batch: List[AuditRecord] = []
+        timeout = self.flush_interval
+        deadline: float | None = None
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+        return batch, False
+
+    def _write(self, batch: List[AuditRecord]) -> None:
+        delay = 0.05
+        while True:
+            db = self.session_factory()
+            try:
+                write_batch(db, [record.row() for record in batch])
+            except Exception:
+                db.rollback()
+                self.stats.failures += 1
+                logger.exception("audit.write_failed", extra={"count": len(batch)})
+                if self._stopping.is_set():
+                    with self._lock:
+                        self.stats.dropped += len(batch)
+                    logger.error("audit.dropped", extra={"count": len(batch)})
+                    return
+                time.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+            finally:
+                db.close()
+            self.stats.written += len(batch)
+            self.stats.batches += 1
+            return
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            batch, stopped = self._next_batch()
+            if stopped:
+                # Drain whatever is still queued before exiting.
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start : start + self.batch_size])
+            for _ in batch:
+                self._queue.task_done()
+
+
+_writer: AuditWriter | None = None
+
+
+def start(session_factory: Callable[[], Session] | None = None) -> AuditWriter:
+    """Start the process-wide writer."""
+
+    global _writer
+    if _writer is None:
+        if session_factory is None:
+            from app.db.session import SessionLocal
+
+            session_factory = SessionLocal
+        _writer = AuditWriter(session_factory)
+        _writer.start()
+    return _writer
+
+
+def stop() -> None:
+    """Drain and stop the process-wide writer."""
+
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        logger.info("audit.stopped", extra=vars(_writer.stats))
+        _writer = None
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _tenant() -> UUID | None:
+    try:
+        value = TENANT_ID_CTX.get()
+        return UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+def record(
+    action: str,
+    resource_id: UUID | None = None,
+    actor_id: UUID | None = None,
+    **details: Any,
+) -> bool:
+    """Queue an audit record for ``action``; call after the change commits."""
+
+    if _writer is None:
+        return False
+    return _writer.enqueue(
+        AuditRecord(
+            action=action,
+            resource_id=resource_id,
+            actor_id=actor_id,
+            tenant_id=_tenant(),
+            details={k: _json_value(v) for k, v in details.items()} or None,
+        )
+    )
+
+
+@dataclass
+class AuditFilters:
+    """Filters of an audit log query; ``since`` is inclusive, ``until`` exclusive."""
+
+    tenant_id: UUID | None = None
+    workspace_id: UUID | None = None
+    resource_id: UUID | None = None
+    actor_id: UUID | None = None
+    action: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+
+def encode_cursor(entry: AuditLogORM) -> str:
+    payload = json.dumps({"k": entry.created_at.isoformat(), "id": entry.id})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor; raises ``ValueError`` if it is malformed."""
+
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return datetime.fromisoformat(data["k"]), int(data["id"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def _filtered(db: Session, filters: AuditFilters) -> Query:
+    log = AuditLogORM
+    query = db.query(log)
+    for column in ("tenant_id", "workspace_id", "resource_id", "actor_id", "action"):
+        value = getattr(filters, column)
+        if value is not None:
+            query = query.filter(getattr(log, column) == value)
+    # Bounds on the partition key prune monthly partitions and drive the
+    # BRIN index on ``created_at``.
+    if filters.since is not None:
+        query = query.filter(log.created_at >= filters.since)
+    if filters.until is not None:
+        query = query.filter(log.created_at < filters.until)
+    return query.order_by(log.created_at.desc(), log.id.desc())
+
+
+def _page(query: Query, after: Tuple[datetime, int] | None, limit: int) -> List[AuditLogORM]:
+    if after is not None:
+        created_at, entry_id = after
+        query = query.filter(
+            or_(
+                AuditLogORM.created_at < created_at,
+                and_(AuditLogORM.created_at == created_at, AuditLogORM.id < entry_id),
+            )
+        )
+    return query.limit(limit).all()
+
+
+def list_entries(
+    db: Session, filters: AuditFilters, limit: int = 100, after: str | None = None
+) -> AuditLogPage:
+    """Return one page of matching records, newest first."""
+
+    rows = _page(_filtered(db, filters), decode_cursor(after) if after else None, limit + 1)
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return AuditLogPage.model_construct(
+        items=[AuditLogEntry.model_validate(row) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+def iter_entries(
+    db: Session, filters: AuditFilters, page_size: int = 1000
+) -> Iterator[AuditLogEntry]:
+    """Yield every matching record, newest first, one keyset page at a time.
+
+    Each page is a short query, so an export of millions of rows holds no
+    long-running cursor or snapshot and keeps memory bounded.
+    """
+
+    base = _filtered(db, filters)
+    after: Tuple[datetime, int] | None = None
+    while True:
+        rows = _page(base, after, page_size)
+        for row in rows:
+            yield AuditLogEntry.model_validate(row)
+        if len(rows) < page_size:
+            return
+        after = (rows[-1].created_at, rows[-1].id)
+        db.expunge_all()
@@ -0,0 +1,409 @@
+"""Content-addressed storage for prompt version content.
+
+Only the latest version of a prompt keeps ``body`` and its JSON payloads
+inline, so list and detail reads never touch ``prompt_blobs``.  When a
+version is superseded, :func:`seal_version` moves each of those fields into
+a ``prompt_blobs`` row keyed by the SHA-256 of its canonical JSON encoding
+and leaves a ``<field>_digest`` reference behind.  Identical content shared
+by many versions, or by several fields, is stored once and reference
+counted.  :func:`content` resolves a field whether it is inline or sealed.
+
+Payloads in :data:`OFFLOAD_FIELDS` larger than ``PAYLOAD_OFFLOAD_BYTES`` are
+written to an external :mod:`~app.services.payload_store` instead; their
+blob row keeps the digest, size and backend name with ``content`` left
+``NULL``.  Such payloads are offloaded as soon as they are written, so even
+the latest version references them by digest, and list views never read
+them.
+
+Writing an offloaded object and deleting it during garbage collection both
+hold a transaction-scoped advisory lock on its digest, so collection never
+removes a file that a concurrent writer has just reused.
+
+Seal the history of existing prompts and drop unreferenced blobs from
+``services/api`` with::
+
+    python -m app.services.blob_service seal [--prompt-id UUID]
+    python -m app.services.blob_service gc
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.prompt import PromptBlobORM, PromptCardORM, PromptVersionORM
+from app.services import payload_store
+
+logger = logging.getLogger(__name__)
+
+BLOB_FIELDS = (
+    "body",
+    "input_schema",
+    "llm_parameters",
+    "success_metrics",
+    "sample_input",
+    "sample_output",
+)
+"""Version fields stored in ``prompt_blobs`` once a version is superseded."""
+
+OFFLOAD_FIELDS = ("input_schema", "sample_input", "sample_output")
+"""Payload fields moved to the external store when they are large."""
+
+DB_STORAGE = "db"
+"""``prompt_blobs.storage`` of blobs whose content is kept in the row."""
+
+
+def canonical_bytes(value: Any) -> bytes:
+    """Return the canonical JSON encoding used for hashing ``value``."""
+
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode()
+
+
+def digest_of(value: Any) -> str:
+    """Return the content address of ``value``."""
+
+    return hashlib.sha256(canonical_bytes(value)).hexdigest()
+
+
+def _stored_externally(blob: PromptBlobORM) -> bool:
+    # ``storage`` is unset on blobs that were never flushed; those are in-row.
+    return blob.storage not in (None, DB_STORAGE)
+
+
+def _offloads(field: str, size: int) -> bool:
+    return field in OFFLOAD_FIELDS and size > settings.PAYLOAD_OFFLOAD_BYTES
+
+
+def is_external(version: PromptVersionORM, field: str) -> bool:
+    """Return whether ``field`` of ``version`` lives in the external store."""
+
+    if getattr(version, field) is not None or getattr(version, f"{field}_digest") is None:
+        return False
+    return _stored_externally(getattr(version, f"{field}_blob"))
+
+
+def read_bytes(blob: PromptBlobORM, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+    """Yield the canonical encoding of ``blob`` in ``[start, end)``."""
+
+    if not _stored_externally(blob):
+        yield canonical_bytes(blob.content)[start:end]
+    else:
+        yield from payload_store.get_store(blob.storage).read(blob.digest, start, end)
+
+
+@dataclass(frozen=True)
+class Payload:
+    """A version field as canonical JSON bytes, readable by byte range."""
+
+    digest: str
+    size_bytes: int
+    read: Callable[[int, Optional[int]], Iterator[bytes]]
+
+
+def payload(version: PromptVersionORM, field: str) -> Payload | None:
+    """Return ``field`` of ``version`` for streaming, or ``None`` if unset.
+
+    Content held in the database is encoded up front; external payloads
+    are read from their store only as the returned reader is consumed.
+    """
+
+    value = getattr(version, field)
+    digest = getattr(version, f"{field}_digest")
+    if value is None and digest is not None:
+        blob = getattr(version, f"{field}_blob")
+        if _stored_externally(blob):
+            store = payload_store.get_store(blob.storage)
+            return Payload(
+                blob.digest,
+                blob.size_bytes,
+                lambda start, end: store.read(blob.digest, start, end),
+            )
+        value = blob.content
+    if value is None:
+        return None
+    data = canonical_bytes(value)
+    return Payload(digest_of(value), len(data), lambda start, end: iter([data[start:end]]))
+
+
+def content(version: PromptVersionORM, field: str, external: bool = True) -> Any:
+    """Return ``field`` of ``version`` whether stored inline or sealed.
+
+    Externally stored payloads are fetched from their store, or returned as
+    ``None`` when ``external`` is false.
+    """
+
+    value = getattr(version, field)
+    if value is not None or getattr(version, f"{field}_digest") is None:
+        return value
+    blob = getattr(version, f"{field}_blob")
+    if not _stored_externally(blob):
+        return blob.content
+    if not external:
+        return None
+    return json.loads(b"".join(read_bytes(blob)))
+
+
+def _lock_digest(db: Session, digest: str) -> None:
+    """Hold the advisory lock on ``digest`` until the transaction ends."""
+
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:digest))"), {"digest": digest}
+    )
+
+
+def _adjust_refs(
+    db: Session,
+    counts: Dict[str, int],
+    values: Dict[str, Any],
+    offload: Collection[str] = (),
+) -> None:
+    """Insert blobs or bump their reference counts by ``counts``.
+
+    Digests in ``offload`` are written to the external store first and
+    their rows hold no content.  Their digest locks are taken in sorted
+    order and held until the caller commits.
+    """
+
+    rows = []
+    for digest, count in sorted(counts.items()):
+        data = canonical_bytes(values[digest])
+        row = {
+            "digest": digest,
+            "content": values[digest],
+            "size_bytes": len(data),
+            "ref_count": count,
+            "storage": DB_STORAGE,
+        }
+        if digest in offload:
+            _lock_digest(db, digest)
+            payload_store.get_store().put(digest, data)
+            row.update(content=None, storage=settings.PAYLOAD_STORE_BACKEND)
+        rows.append(row)
+    stmt = insert(PromptBlobORM.__table__).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[PromptBlobORM.digest],
+            set_={"ref_count": PromptBlobORM.ref_count + stmt.excluded.ref_count},
+        )
+    )
+
+
+def store(db: Session, value: Any) -> str:
+    """Store ``value`` as a blob holding one reference and return its digest."""
+
+    digest = digest_of(value)
+    _adjust_refs(db, {digest: 1}, {digest: value})
+    return digest
+
+
+def _bump(db: Session, digests: Iterable[str], sign: int) -> None:
+    for digest, count in Counter(digests).items():
+        db.query(PromptBlobORM).filter(PromptBlobORM.digest == digest).update(
+            {PromptBlobORM.ref_count: PromptBlobORM.ref_count + sign * count},
+            synchronize_session=False,
+        )
+
+
+def retain(db: Session, digests: Iterable[str]) -> None:
+    """Add one reference per entry in ``digests`` to existing blobs."""
+
+    _bump(db, digests, 1)
+
+
+def release(db: Session, digests: Iterable[str]) -> None:
+    """Drop one reference per entry in ``digests``."""
+
+    _bump(db, digests, -1)
+
+
+def assign(db: Session, version: PromptVersionORM, field: str, value: Any) -> None:
+    """Set ``field`` of a latest ``version``, offloading large payloads.
+
+    Any blob previously referenced by the field is released.
+    """
+
+    old = getattr(version, f"{field}_digest")
+    if old is not None:
+        release(db, [old])
+        setattr(version, f"{field}_digest", None)
+    if value is not None:
+        data = canonical_bytes(value)
+        if _offloads(field, len(data)):
+            digest = digest_of(value)
+            _adjust_refs(db, {digest: 1}, {digest: value}, offload={digest})
+            setattr(version, f"{field}_digest", digest)
+            value = None
+    setattr(version, field, value)
+
+
+def offload_version(db: Session, version: PromptVersionORM) -> None:
+    """Offload the large payloads of a newly written ``version``."""
+
+    for field in OFFLOAD_FIELDS:
+        value = getattr(version, field)
+        if value is not None and getattr(version, f"{field}_digest") is None:
+            assign(db, version, field, value)
+
+
+def copy_field(
+    db: Session, source: PromptVersionORM, target: PromptVersionORM, field: str
+) -> None:
+    """Copy ``field`` to ``target``, sharing the blob if ``source`` has one."""
+
+    digest = getattr(source, f"{field}_digest")
+    if getattr(source, field) is None and digest is not None:
+        retain(db, [digest])
+        setattr(target, f"{field}_digest", digest)
+    else:
+        setattr(target, field, getattr(source, field))
+
+
+def seal_version(
+    db: Session, version: PromptVersionORM, fields: Iterable[str] = BLOB_FIELDS
+) -> int:
+    """Move the inline ``fields`` of a superseded ``version`` into blobs.
+
+    Runs in the caller's transaction.  Fields that are empty or already
+    sealed are left alone.  Returns the number of fields sealed.
+    """
+
+    digests: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    offload = set()
+    for field in fields:
+        value = getattr(version, field)
+        if value is None or getattr(version, f"{field}_digest") is not None:
+            continue
+        digests[field] = digest_of(value)
+        values[digests[field]] = value
+        if _offloads(field, len(canonical_bytes(value))):
+            offload.add(digests[field])
+    if not digests:
+        return 0
+    # Blobs must exist before the version row references them.
+    _adjust_refs(db, Counter(digests.values()), values, offload)
+    for field, digest in digests.items():
+        setattr(version, f"{field}_digest", digest)
+        setattr(version, field, None)
+    return len(digests)
+
+
+def release_version(db: Session, version: PromptVersionORM) -> None:
+    """Drop the blob references held by ``version`` before it is deleted."""
+
+    release(
+        db,
+        (
+            getattr(version, f"{field}_digest")
+            for field in BLOB_FIELDS
+            if getattr(version, f"{field}_digest") is not None
+        ),
+    )
+
+
+def _unsealed_history(
+    db: Session, prompt_id: UUID | None, limit: int
+) -> Iterable[PromptVersionORM]:
+    """Return superseded versions that still hold inline content.
+
+    Every version has a body, so an inline body marks an unsealed version.
+    """
+
+    query = (
+        db.query(PromptVersionORM)
+        .join(PromptCardORM, PromptCardORM.id == PromptVersionORM.prompt_id)
+        .filter(PromptVersionORM.id != PromptCardORM.version_id)
+        .filter(PromptVersionORM.body.isnot(None))
+    )
+    if prompt_id is not None:
+        query = query.filter(PromptVersionORM.prompt_id == prompt_id)
+    return query.order_by(PromptVersionORM.id).limit(limit).all()
+
+
+def seal_history(
+    db: Session, prompt_id: UUID | None = None, batch_size: int = 200
+) -> int:
+    """Seal every superseded version, one transaction per batch.
+
+    Returns the number of versions sealed.
+    """
+
+    sealed = 0
+    while True:
+        batch = _unsealed_history(db, prompt_id, batch_size)
+        if not batch:
+            break
+        for version in batch:
+            seal_version(db, version)
+        db.commit()
+        sealed += len(batch)
+    logger.info(
+        "prompt_blobs.seal",
+        extra={"prompt_id": str(prompt_id) if prompt_id else None, "count": sealed},
+    )
+    return sealed
+
+
+def collect_garbage(db: Session) -> int:
+    """Delete blobs that no version references any more.
+
+    Externally stored objects are removed after the rows are committed,
+    one transaction per object under its digest lock, unless the same
+    content was stored again in the meantime.
+    """
+
+    table = PromptBlobORM.__table__
+    deleted = db.execute(
+        delete(table)
+        .where(table.c.ref_count <= 0)
+        .returning(table.c.digest, table.c.storage)
+    ).all()
+    db.commit()
+    for digest, storage in deleted:
+        if storage == DB_STORAGE:
+            continue
+        _lock_digest(db, digest)
+        if db.get(PromptBlobORM, digest) is None:
+            payload_store.get_store(storage).delete(digest)
+        db.commit()
+    logger.info("prompt_blobs.gc", extra={"count": len(deleted)})
+    return len(deleted)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain prompt content blobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seal = sub.add_parser("seal", help="Move superseded version content into blobs")
+    seal.add_argument("--prompt-id", type=UUID, default=None)
+    seal.add_argument("--batch-size", type=int, default=200)
+    sub.add_parser("gc", help="Delete unreferenced blobs")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "seal":
+            count = seal_history(db, prompt_id=args.prompt_id, batch_size=args.batch_size)
+            print(f"sealed {count} prompt versions")
+        else:
+            print(f"deleted {collect_garbage(db)} prompt blobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Maintenance of the ``prompt_cards`` read model.
+
+Prompt listings read a single narrow table instead of joining ``prompts``
+with the latest ``prompt_versions`` row.  :func:`upsert_card` is called by
+every write path in ``prompt_service`` inside the same transaction as the
+mutation, and :func:`rebuild_cards` recomputes cards from the source tables.
+
+Rebuild all cards from ``services/api`` with::
+
+    python -m app.services.card_service rebuild [--owner-id UUID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.prompt import PromptCardORM, PromptHeaderORM, PromptVersionORM
+
+logger = logging.getLogger(__name__)
+
+EXCERPT_LENGTH = 280
+"""Number of body characters stored as the card ``excerpt``."""
+
+_CARD_COLUMNS = (
+    "id",
+    "owner_id",
+    "version_id",
+    "version",
+    "title",
+    "excerpt",
+    "tags",
+    "target_models",
+    "providers",
+    "use_cases",
+    "access_control",
+    "category",
+    "complexity",
+    "audience",
+    "status",
+    "llm_parameters",
+    "success_metrics",
+    "is_favorite",
+    "is_archived",
+    "created_at",
+    "updated_at",
+)
+
+
+def card_values(header: PromptHeaderORM, version: PromptVersionORM) -> Dict[str, Any]:
+    """Return the card row for ``header`` and its current ``version``."""
+
+    return {
+        "id": header.id,
+        "owner_id": header.owner_id,
+        "version_id": version.id,
+        "version": int(version.version),
+        "title": header.title,
+        "excerpt": (version.body or "")[:EXCERPT_LENGTH],
+        "tags": header.tags,
+        "target_models": version.target_models,
+        "providers": version.providers,
+        "use_cases": version.use_cases,
+        "access_control": version.access_control,
+        "category": version.category,
+        "complexity": version.complexity,
+        "audience": version.audience,
+        "status": version.status,
+        "llm_parameters": version.llm_parameters,
+        "success_metrics": version.success_metrics,
+        "is_favorite": bool(header.is_favorite),
+        "is_archived": bool(header.is_archived),
+        "created_at": header.created_at,
+        "updated_at": header.updated_at,
+    }
+
+
+def _on_conflict_update(stmt):
+    """Turn an ``INSERT`` into ``prompt_cards`` into an upsert."""
+
+    return stmt.on_conflict_do_update(
+        index_elements=[PromptCardORM.id],
+        set_={name: stmt.excluded[name] for name in _CARD_COLUMNS if name != "id"},
+    )
+
+
+def upsert_card(db: Session, header: PromptHeaderORM, version: PromptVersionORM) -> None:
+    """Write the card for ``header`` in the caller's transaction.
+
+    Pending ORM changes are flushed first so the card row never precedes its
+    prompt.  The caller is responsible for committing.
+    """
+
+    db.flush()
+    stmt = insert(PromptCardORM.__table__).values(card_values(header, version))
+    db.execute(_on_conflict_update(stmt))
+
+
+def _latest_cards_select(after: UUID | None, owner_id: UUID | None, limit: int):
+    """Select card rows for a batch of prompts ordered by id."""
+
+    header = PromptHeaderORM
+    latest = (
+        select(PromptVersionORM)
+        .where(PromptVersionORM.prompt_id == header.id)
+        .order_by(PromptVersionORM.version.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    stmt = (
+        select(
+            header.id,
+            header.owner_id,
+            latest.c.id,
+            latest.c.version,
+            header.title,
+            func.left(latest.c.body, EXCERPT_LENGTH),
+            header.tags,
+            latest.c.target_models,
+            latest.c.providers,
+            latest.c.use_cases,
+            latest.c.access_control,
+            latest.c.category,
+            latest.c.complexity,
+            latest.c.audience,
+            latest.c.status,
+            latest.c.llm_parameters,
+            latest.c.success_metrics,
+            header.is_favorite,
+            header.is_archived,
+            func.coalesce(header.created_at, latest.c.created_at),
+            header.updated_at,
+        )
+        .join(latest, true())
+        .order_by(header.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(header.id > after)
+    if owner_id is not None:
+        stmt = stmt.where(header.owner_id == owner_id)
+    return stmt
+
+
+def rebuild_cards(
+    db: Session, owner_id: UUID | None = None, batch_size: int = 500
+) -> int:
+    """Recompute cards from ``prompts`` and their latest versions.
+
+    Prompts are processed in primary key order, one transaction per batch,
+    so a rebuild can run alongside live traffic.  Returns the number of
+    cards written.
+    """
+
+    written = 0
+    after: UUID | None = None
+    while True:
+        stmt = insert(PromptCardORM.__table__).from_select(
+            _CARD_COLUMNS, _latest_cards_select(after, owner_id, batch_size)
+        )
+        ids = db.execute(
+            _on_conflict_update(stmt).returning(PromptCardORM.id)
+        ).scalars().all()
+        db.commit()
+        if not ids:
+            break
+        written += len(ids)
+        after = max(ids)
+    logger.info(
+        "prompt_cards.rebuild",
+        extra={"owner_id": str(owner_id) if owner_id else None, "count": written},
+    )
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the prompt_cards read model")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild", help="Recompute cards from source tables")
+    rebuild.add_argument("--owner-id", type=UUID, default=None)
+    rebuild.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = rebuild_cards(db, owner_id=args.owner_id, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"rebuilt {count} prompt cards")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,15 +10,29 @@ from uuid import UUID
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.ordering import key_between
 from app.models.collection import (
     Collection,
     CollectionORM,
     CollectionPromptORM,
+    CollectionPromptPosition,
+    SmartCollectionFilters,
+    SmartCollectionPromptORM,
 )
-from app.models.prompt import PromptHeaderORM
+from app.models.prompt import PromptHeaderORM, PromptListResponse
+from app.services import (
+    audit_service,
+    outbox_service,
+    prompt_service,
+    smart_collection_service,
+    sync_service,
+)
+from app.services.search_service import SearchSort
 
 logger = logging.getLogger(__name__)
 
+SMART_MEMBERSHIP = "smart collection members follow its filters"
+
 
 def list_collections(db: Session, owner_id: UUID, include_count: bool = False) -> List[Collection]:
     """Return collections owned by ``owner_id``."""
@@ -32,9 +46,10 @@ def list_collections(db: Session, owner_id: UUID, include_count: bool = False) -
     results: List[Collection] = []
     if include_count:
         for row in rows:
+            members = SmartCollectionPromptORM if row.filters is not None else CollectionPromptORM
             count = (
-                db.query(func.count(CollectionPromptORM.prompt_id))
-                .filter(CollectionPromptORM.collection_id == row.id)
+                db.query(func.count(members.prompt_id))
+                .filter(members.collection_id == row.id)
                 .scalar()
             )
             results.append(
@@ -48,8 +63,14 @@ def list_collections(db: Session, owner_id: UUID, include_count: bool = False) -
     return results
 
 
-def create_collection(db: Session, owner_id: UUID, name: str) -> Collection:
-    """Create a new collection ensuring name uniqueness per owner."""
+def create_collection(
+    db: Session, owner_id: UUID, name: str, filters: SmartCollectionFilters | None = None
+) -> Collection:
+    """Create a new collection ensuring name uniqueness per owner.
+
+    With ``filters`` the collection is smart and its members are evaluated
+    before it is returned.
+    """
 
     existing = (
         db.query(CollectionORM)
@@ -62,22 +83,36 @@ def create_collection(db: Session, owner_id: UUID, name: str) -> Collection:
         id=uuid.uuid4(),
         owner_id=owner_id,
         name=name.strip(),
+        filters=smart_collection_service.dump_filters(owner_id, filters) if filters else None,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
     db.add(obj)
+    if filters:
+        db.flush()
+        smart_collection_service.rebuild(db, obj)
+    sync_service.record(db, owner_id, sync_service.collection(obj.id))
     db.commit()
     db.refresh(obj)
     logger.info(
         "collections.create", extra={"user_id": str(owner_id), "collection_id": str(obj.id)}
     )
+    audit_service.record("collections.create", obj.id, owner_id)
     return Collection.from_orm(obj)
 
 
 def rename_collection(
-    db: Session, owner_id: UUID, collection_id: UUID, name: str
+    db: Session,
+    owner_id: UUID,
+    collection_id: UUID,
+    name: str,
+    filters: SmartCollectionFilters | None = None,
 ) -> Collection | None:
-    """Rename an existing collection."""
+    """Rename an existing collection, replacing the filters of a smart one.
+
+    New ``filters`` re-evaluate every member; static collections cannot
+    gain filters.
+    """
 
     obj = (
         db.query(CollectionORM)
@@ -97,13 +132,21 @@ def rename_collection(
     )
     if conflict:
         raise ValueError("collection name already exists")
+    if filters is not None and obj.filters is None:
+        raise ValueError("a static collection cannot become smart")
     obj.name = name.strip()
     obj.updated_at = datetime.utcnow()
+    if filters is not None:
+        obj.filters = smart_collection_service.dump_filters(owner_id, filters)
+        db.flush()
+        smart_collection_service.rebuild(db, obj)
+    sync_service.record(db, owner_id, sync_service.collection(obj.id))
     db.commit()
     db.refresh(obj)
     logger.info(
         "collections.rename", extra={"user_id": str(owner_id), "collection_id": str(obj.id)}
     )
+    audit_service.record("collections.rename", obj.id, owner_id)
     return Collection.from_orm(obj)
 
 
@@ -117,20 +160,83 @@ def delete_collection(db: Session, owner_id: UUID, collection_id: UUID) -> bool:
     )
     if obj is None:
         return False
+    prompt_ids = [
+        prompt_id
+        for (prompt_id,) in db.query(CollectionPromptORM.prompt_id).filter(
+            CollectionPromptORM.collection_id == collection_id
+        )
+    ]
     db.delete(obj)
+    sync_service.record(
+        db,
+        owner_id,
+        sync_service.collection(collection_id, deleted=True),
+        *(
+            sync_service.collection_prompt(collection_id, prompt_id, deleted=True)
+            for prompt_id in prompt_ids
+        ),
+    )
     db.commit()
     logger.info(
         "collections.delete", extra={"user_id": str(owner_id), "collection_id": str(collection_id)}
     )
+    audit_service.record("collections.delete", collection_id, owner_id)
     return True
 
 
+def list_prompts(
+    db: Session,
+    owner_id: UUID,
+    collection_id: UUID,
+    sort: str | None = None,
+    limit: int = 20,
+    after: str | None = None,
+) -> PromptListResponse | None:
+    """List the prompts of a collection; ``None`` if it is not the owner's.
+
+    Static collections default to their manual order.  Smart collections
+    list their cached members, most recently updated first by default,
+    after catching the cache up with changes not yet applied.
+    """
+
+    collection = (
+        db.query(CollectionORM.filters, CollectionORM.refreshed_seq)
+        .filter(CollectionORM.id == collection_id, CollectionORM.owner_id == owner_id)
+        .first()
+    )
+    if collection is None:
+        return None
+    if collection.filters is None:
+        return prompt_service.list_prompts(
+            db=db,
+            owner_id=owner_id,
+            collection_id=collection_id,
+            sort=sort or SearchSort.position.value,
+            limit=limit,
+            after=after,
+        )
+    if collection.refreshed_seq is None or collection.refreshed_seq < (
+        smart_collection_service.current_seq(db, owner_id)
+    ):
+        smart_collection_service.refresh(db, collection_id)
+    return prompt_service.list_prompts(
+        db=db,
+        owner_id=owner_id,
+        smart_collection_id=collection_id,
+        sort=sort or SearchSort.updated_desc.value,
+        limit=limit,
+        after=after,
+    )
+
+
 def add_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: UUID) -> None:
-    """Add ``prompt_id`` to ``collection_id`` verifying ownership."""
+    """Add ``prompt_id`` to the end of ``collection_id`` verifying ownership."""
 
+    # Locking the collection serialises writers choosing new positions.
     collection = (
         db.query(CollectionORM)
         .filter(CollectionORM.id == collection_id, CollectionORM.owner_id == owner_id)
+        .with_for_update()
         .first()
     )
     prompt = (
@@ -140,6 +246,8 @@ def add_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: UUID
     )
     if not collection or not prompt:
         raise PermissionError("forbidden")
+    if collection.filters is not None:
+        raise ValueError(SMART_MEMBERSHIP)
     existing = (
         db.query(CollectionPromptORM)
         .filter(
@@ -149,13 +257,31 @@ def add_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: UUID
         .first()
     )
     if existing is None:
+        last = (
+            db.query(func.max(CollectionPromptORM.position))
+            .filter(CollectionPromptORM.collection_id == collection_id)
+            .scalar()
+        )
         db.add(
             CollectionPromptORM(
                 collection_id=collection_id,
                 prompt_id=prompt_id,
+                position=key_between(last, None),
             )
         )
+        outbox_service.emit(
+            db,
+            outbox_service.COLLECTION_PROMPT_ADDED,
+            collection_id,
+            owner_id=owner_id,
+            prompt_id=prompt_id,
+        )
+        sync_service.record(
+            db, owner_id, sync_service.collection_prompt(collection_id, prompt_id)
+        )
         db.commit()
+    else:
+        db.rollback()
     logger.info(
         "collections.add_prompt",
         extra={
@@ -164,6 +290,7 @@ def add_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: UUID
             "prompt_id": str(prompt_id),
         },
     )
+    audit_service.record("collections.add_prompt", collection_id, owner_id, prompt_id=prompt_id)
 
 
 def remove_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: UUID) -> None:
@@ -181,6 +308,8 @@ def remove_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: U
     )
     if not collection or not prompt:
         raise PermissionError("forbidden")
+    if collection.filters is not None:
+        raise ValueError(SMART_MEMBERSHIP)
     link = (
         db.query(CollectionPromptORM)
         .filter(
@@ -191,6 +320,18 @@ def remove_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: U
     )
     if link:
         db.delete(link)
+        outbox_service.emit(
+            db,
+            outbox_service.COLLECTION_PROMPT_REMOVED,
+            collection_id,
+            owner_id=owner_id,
+            prompt_id=prompt_id,
+        )
+        sync_service.record(
+            db,
+            owner_id,
+            sync_service.collection_prompt(collection_id, prompt_id, deleted=True),
+        )
         db.commit()
     logger.info(
         "collections.remove_prompt",
@@ -200,3 +341,90 @@ def remove_prompt(db: Session, owner_id: UUID, collection_id: UUID, prompt_id: U
             "prompt_id": str(prompt_id),
         },
     )
+    audit_service.record(
+        "collections.remove_prompt", collection_id, owner_id, prompt_id=prompt_id
+    )
+
+
+def move_prompt(
+    db: Session,
+    owner_id: UUID,
+    collection_id: UUID,
+    prompt_id: UUID,
+    after_id: UUID | None = None,
+    before_id: UUID | None = None,
+) -> CollectionPromptPosition | None:
+    """Move ``prompt_id`` directly after ``after_id`` or before ``before_id``.
+
+    Exactly one anchor must be given, and it must be another prompt of the
+    collection.  Only the moved prompt's ``position`` is rewritten.  Returns
+    ``None`` if the prompt is not in the collection.
+    """
+
+    if (after_id is None) == (before_id is None):
+        raise ValueError("give exactly one of after_id and before_id")
+    anchor_id = after_id if after_id is not None else before_id
+    if anchor_id == prompt_id:
+        raise ValueError("a prompt cannot be moved relative to itself")
+    collection = (
+        db.query(CollectionORM)
+        .filter(CollectionORM.id == collection_id, CollectionORM.owner_id == owner_id)
+        .with_for_update()
+        .first()
+    )
+    if collection is None:
+        raise PermissionError("forbidden")
+    if collection.filters is not None:
+        db.rollback()
+        raise ValueError(SMART_MEMBERSHIP)
+    links = {
+        link.prompt_id: link
+        for link in db.query(CollectionPromptORM).filter(
+            CollectionPromptORM.collection_id == collection_id,
+            CollectionPromptORM.prompt_id.in_((prompt_id, anchor_id)),
+        )
+    }
+    link = links.get(prompt_id)
+    if link is None:
+        db.rollback()
+        return None
+    anchor = links.get(anchor_id)
+    if anchor is None:
+        db.rollback()
+        raise ValueError("anchor prompt is not in the collection")
+    others = db.query(CollectionPromptORM.position).filter(
+        CollectionPromptORM.collection_id == collection_id,
+        CollectionPromptORM.prompt_id != prompt_id,
+    )
+    if after_id is not None:
+        low = anchor.position
+        high = others.filter(CollectionPromptORM.position > low).order_by(
+            CollectionPromptORM.position
+        ).limit(1).scalar()
+    else:
+        high = anchor.position
+        low = others.filter(CollectionPromptORM.position < high).order_by(
+            CollectionPromptORM.position.desc()
+        ).limit(1).scalar()
+    link.position = key_between(low, high)
+    outbox_service.emit(
+        db,
+        outbox_service.COLLECTION_PROMPT_MOVED,
+        collection_id,
+        owner_id=owner_id,
+        prompt_id=prompt_id,
+    )
+    sync_service.record(db, owner_id, sync_service.collection_prompt(collection_id, prompt_id))
+    db.commit()
+    logger.info(
+        "collections.move_prompt",
+        extra={
+            "user_id": str(owner_id),
+            "collection_id": str(collection_id),
+            "prompt_id": str(prompt_id),
+        },
+    )
+    audit_service.record("collections.move_prompt", collection_id, owner_id, prompt_id=prompt_id)
+    return CollectionPromptPosition.model_construct(
+        collection_id=collection_id, prompt_id=prompt_id, position=link.position
+    )
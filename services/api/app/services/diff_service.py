@@ -0,0 +1,259 @@
+"""Diffs between prompt versions.
+
+Bodies are split into lines or words and compared with Myers' O(ND)
+algorithm in its linear-space form: each step finds the middle snake of the
+edit graph and recurses on the two halves, so memory stays proportional to
+the input even for large, heavily edited prompts.
+
+Time grows with the square of the edit distance, so the search for a middle
+snake gives up past ``PROMPT_DIFF_MAX_EDITS`` edits and reports the span as
+one deletion and one insertion.  The script is then still valid, though no
+longer the shortest.
+
+Computed diffs are kept in a process-wide LRU cache keyed by the version
+pair.  Superseded versions never change; the latest version is edited in
+place, so each version's ``updated_at`` is part of the key.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Hashable, List, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.prompt import (
+    DiffGranularity,
+    PromptDiff,
+    PromptDiffOp,
+    PromptHeaderORM,
+    PromptVersionORM,
+)
+from app.services import history_service
+
+_WORD_RE = re.compile(r"\s+|[^\s]+")
+
+Op = Tuple[str, str]
+
+
+def tokenize(text: str, granularity: DiffGranularity) -> List[str]:
+    """Split ``text`` into tokens that concatenate back to ``text``."""
+
+    if granularity == DiffGranularity.word:
+        return _WORD_RE.findall(text)
+    return text.splitlines(keepends=True)
+
+
+def _middle_snake(
+    a: Sequence[Hashable],
+    alo: int,
+    ahi: int,
+    b: Sequence[Hashable],
+    blo: int,
+    bhi: int,
+    max_edits: int,
+) -> Tuple[int, int, int, int] | None:
+    """Return the start and end of the middle snake of ``a[alo:ahi]`` vs ``b[blo:bhi]``.
+
+    Coordinates are relative to ``alo``/``blo``.  Both ranges must be
+    non-empty and differ in their first and last elements.  Returns ``None``
+    when the ranges are more than ``max_edits`` edits apart.
+    """
+
+    n, m = ahi - alo, bhi - blo
+    delta = n - m
+    odd = delta % 2 == 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * max_d + 3)
+    backward = [0] * (2 * max_d + 3)
+    for d in range(max_d + 1):
+        # Round ``d`` finds scripts of up to ``2 * d`` edits.
+        if d > (max_edits + 1) // 2:
+            return None
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1):
+                if x + backward[offset + delta - k] >= n:
+                    return x0, y0, x, y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - x - 1] == b[bhi - y - 1]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d:
+                if x + forward[offset + delta - k] >= n:
+                    return n - x, m - y, n - x0, m - y0
+    raise AssertionError("no middle snake found")  # pragma: no cover
+
+
+def _push(ops: List[Op], op: str, text: str) -> None:
+    if ops and ops[-1][0] == op:
+        ops[-1] = (op, ops[-1][1] + text)
+    else:
+        ops.append((op, text))
+
+
+def _diff(
+    a: Sequence[str],
+    alo: int,
+    ahi: int,
+    b: Sequence[str],
+    blo: int,
+    bhi: int,
+    ops: List[Op],
+    max_edits: int,
+) -> None:
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        _push(ops, "equal", a[alo])
+        alo += 1
+        blo += 1
+    suffix = ahi
+    while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if alo == ahi:
+        if blo < bhi:
+            _push(ops, "insert", "".join(b[blo:bhi]))
+    elif blo == bhi:
+        _push(ops, "delete", "".join(a[alo:ahi]))
+    else:
+        snake = _middle_snake(a, alo, ahi, b, blo, bhi, max_edits)
+        if snake is None:
+            _push(ops, "delete", "".join(a[alo:ahi]))
+            _push(ops, "insert", "".join(b[blo:bhi]))
+        else:
+            x0, y0, x, y = snake
+            _diff(a, alo, alo + x0, b, blo, blo + y0, ops, max_edits)
+            if x > x0:
+                _push(ops, "equal", "".join(a[alo + x0 : alo + x]))
+            _diff(a, alo + x, ahi, b, blo + y, bhi, ops, max_edits)
+    if suffix > ahi:
+        _push(ops, "equal", "".join(a[ahi:suffix]))
+
+
+def diff_tokens(
+    a: Sequence[str], b: Sequence[str], max_edits: int | None = None
+) -> List[Op]:
+    """Return a shortest edit script turning ``a`` into ``b``.
+
+    The script is a list of ``(op, text)`` pairs where ``op`` is ``equal``,
+    ``delete`` or ``insert``; adjacent tokens with the same op are merged.
+    Spans more than ``max_edits`` (default ``PROMPT_DIFF_MAX_EDITS``) edits
+    apart are replaced as a whole.
+    """
+
+    if max_edits is None:
+        max_edits = settings.PROMPT_DIFF_MAX_EDITS
+    ops: List[Op] = []
+    _diff(a, 0, len(a), b, 0, len(b), ops, max_edits)
+    return ops
+
+
+class DiffCache:
+    """Thread-safe LRU cache of computed diffs."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Hashable, PromptDiff]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> PromptDiff | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: PromptDiff) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+cache = DiffCache(settings.PROMPT_DIFF_CACHE_SIZE)
+
+
+def _cache_key(
+    old: PromptVersionORM, new: PromptVersionORM, granularity: DiffGranularity
+) -> Tuple[UUID, datetime, UUID, datetime, str]:
+    return (old.id, old.updated_at, new.id, new.updated_at, granularity.value)
+
+
+def diff_versions(
+    db: Session,
+    prompt_id: UUID,
+    owner_id: UUID,
+    from_version: int,
+    to_version: int,
+    granularity: DiffGranularity = DiffGranularity.line,
+) -> PromptDiff | None:
+    """Diff the bodies of two versions of a prompt owned by ``owner_id``.
+
+    Returns ``None`` if either version does not exist or the prompt belongs
+    to someone else.  Bodies are only loaded and rebuilt when the diff is not
+    cached.
+    """
+
+    rows = {
+        v.version: v
+        for v in db.query(PromptVersionORM)
+        .join(PromptHeaderORM, PromptHeaderORM.id == PromptVersionORM.prompt_id)
+        .filter(
+            PromptVersionORM.prompt_id == prompt_id,
+            PromptHeaderORM.owner_id == owner_id,
+            PromptVersionORM.version.in_({from_version, to_version}),
+        )
+    }
+    old, new = rows.get(from_version), rows.get(to_version)
+    if old is None or new is None:
+        return None
+
+    key = _cache_key(old, new, granularity)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    ops = diff_tokens(
+        tokenize(history_service.body_of(old, db), granularity),
+        tokenize(history_service.body_of(new, db), granularity),
+    )
+    result = PromptDiff.model_construct(
+        prompt_id=prompt_id,
+        from_version=from_version,
+        to_version=to_version,
+        from_id=old.id,
+        to_id=new.id,
+        granularity=granularity,
+        insertions=sum(len(text) for op, text in ops if op == "insert"),
+        deletions=sum(len(text) for op, text in ops if op == "delete"),
+        ops=[PromptDiffOp.model_construct(op=op, text=text) for op, text in ops],
+    )
+    cache.put(key, result)
+    return result
@@ -0,0 +1,301 @@
+"""Delta-compressed storage of superseded prompt bodies.
+
+With ``PROMPT_HISTORY_MODE=delta`` a superseded version stores its body as
+a forward delta against the previous version instead of a full copy.  Every
+``PROMPT_SNAPSHOT_INTERVAL`` versions the body is stored in full (as a
+content-addressed blob, see :mod:`app.services.blob_service`), so
+reconstructing any version fetches one short chain in a single query and
+applies fewer than ``PROMPT_SNAPSHOT_INTERVAL`` deltas.  The latest version
+is always stored inline.  With ``PROMPT_HISTORY_MODE=blob`` every superseded
+body is a full blob.
+
+Deltas are JSON lists of operations applied to the previous body: a
+positive integer copies that many characters, a negative integer skips
+them and a string is inserted.
+
+Rewrite existing chains, e.g. after changing the interval, from
+``services/api`` with::
+
+    python -m app.services.history_service compact [--prompt-id UUID] [--mode delta|blob]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from difflib import SequenceMatcher
+from typing import Callable, Collection, List, Union
+from uuid import UUID
+
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.prompt import PromptHeaderORM, PromptVersionORM
+from app.services import blob_service
+
+logger = logging.getLogger(__name__)
+
+Delta = List[Union[int, str]]
+
+PAYLOAD_FIELDS = tuple(f for f in blob_service.BLOB_FIELDS if f != "body")
+"""Blob fields other than the body; always sealed as full blobs."""
+
+
+def _push(ops: Delta, op: Union[int, str]) -> None:
+    """Append ``op`` to ``ops``, merging it with a preceding op of its kind."""
+
+    if ops:
+        last = ops[-1]
+        if isinstance(op, str) and isinstance(last, str):
+            ops[-1] = last + op
+            return
+        if isinstance(op, int) and isinstance(last, int) and (op > 0) == (last > 0):
+            ops[-1] = last + op
+            return
+    ops.append(op)
+
+
+def make_delta(base: str, target: str) -> Delta:
+    """Return the operations turning ``base`` into ``target``.
+
+    Bodies are compared line by line, which keeps diffing cheap for long
+    prompts while edits stay small.
+    """
+
+    a = base.splitlines(keepends=True)
+    b = target.splitlines(keepends=True)
+    ops: Delta = []
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            _push(ops, sum(len(line) for line in a[i1:i2]))
+            continue
+        if i2 > i1:
+            _push(ops, -sum(len(line) for line in a[i1:i2]))
+        if j2 > j1:
+            _push(ops, "".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, delta: Delta) -> str:
+    """Apply ``delta`` to ``base``; raise :class:`ValueError` on mismatch."""
+
+    out: List[str] = []
+    pos = 0
+    for op in delta:
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.append(base[pos : pos + op])
+            pos += op
+        else:
+            pos -= op
+    if pos != len(base):
+        raise ValueError("delta does not match its base body")
+    return "".join(out)
+
+
+def _full_body(version: PromptVersionORM) -> str:
+    if version.body is not None:
+        return version.body
+    if version.body_digest is not None:
+        return version.body_blob.content
+    raise ValueError(f"prompt version {version.id} has no full body")
+
+
+def _chain(db: Session, version: PromptVersionORM) -> List[PromptVersionORM]:
+    """Return ``version`` and the ``delta_depth`` versions before it, oldest first."""
+
+    return list(
+        reversed(
+            db.query(PromptVersionORM)
+            .filter(
+                PromptVersionORM.prompt_id == version.prompt_id,
+                PromptVersionORM.version <= version.version,
+            )
+            .order_by(PromptVersionORM.version.desc())
+            .limit(version.delta_depth + 1)
+            .all()
+        )
+    )
+
+
+def body_of(version: PromptVersionORM, db: Session | None = None) -> str:
+    """Return the body of ``version`` however it is stored."""
+
+    if version.body is not None or not version.delta_depth:
+        return _full_body(version)
+    db = db or object_session(version)
+    chain = _chain(db, version)
+    if chain[0].delta_depth != 0 or chain[-1] is not version:
+        raise ValueError(f"broken delta chain for prompt version {version.id}")
+    body = _full_body(chain[0])
+    for link in chain[1:]:
+        body = apply_delta(body, link.body_delta)
+    return body
+
+
+def _previous(db: Session, version: PromptVersionORM) -> PromptVersionORM | None:
+    return (
+        db.query(PromptVersionORM)
+        .filter(
+            PromptVersionORM.prompt_id == version.prompt_id,
+            PromptVersionORM.version < version.version,
+        )
+        .order_by(PromptVersionORM.version.desc())
+        .first()
+    )
+
+
+def _store_body(
+    db: Session,
+    version: PromptVersionORM,
+    body: str,
+    previous_body: str | None,
+    depth: int,
+) -> None:
+    """Store ``body`` on ``version`` as a snapshot (``depth == 0``) or delta."""
+
+    old_digest = version.body_digest
+    if depth == 0:
+        if old_digest is None:
+            version.body_digest = blob_service.store(db, body)
+        version.body_delta = None
+    else:
+        version.body_delta = make_delta(previous_body, body)
+        version.body_digest = None
+        if old_digest is not None:
+            blob_service.release(db, [old_digest])
+    version.body = None
+    version.delta_depth = depth
+
+
+def supersede(db: Session, version: PromptVersionORM) -> None:
+    """Move the content of ``version`` out of line once a newer version exists.
+
+    Payloads become blobs.  The body becomes a delta against the previous
+    version in delta mode unless a snapshot is due, otherwise a blob.  Runs
+    in the caller's transaction.
+    """
+
+    body = body_of(version, db)
+    blob_service.seal_version(db, version, PAYLOAD_FIELDS)
+    if version.body is None:
+        return
+    previous = _previous(db, version) if settings.PROMPT_HISTORY_MODE == "delta" else None
+    depth = 0
+    if previous is not None and previous.delta_depth + 1 < settings.PROMPT_SNAPSHOT_INTERVAL:
+        depth = previous.delta_depth + 1
+    _store_body(db, version, body, body_of(previous, db) if depth else None, depth)
+
+
+def compact_prompt(
+    db: Session,
+    prompt_id: UUID,
+    mode: str | None = None,
+    interval: int | None = None,
+    drop: Collection[UUID] = (),
+    archive: Callable[[PromptVersionORM, str], None] | None = None,
+) -> int:
+    """Rewrite the body history of one prompt; returns versions rewritten.
+
+    Superseded versions are re-encoded oldest first with a snapshot every
+    ``interval`` versions (delta mode) or as full blobs (blob mode).
+    Payloads still stored inline are sealed as blobs.  Versions whose id is
+    in ``drop`` are passed to ``archive`` with their body, release their
+    blobs and are deleted; the chain is rebased over the gap.  The latest
+    version is left untouched.  Runs in the caller's transaction.
+    """
+
+    mode = mode or settings.PROMPT_HISTORY_MODE
+    interval = interval or settings.PROMPT_SNAPSHOT_INTERVAL
+    versions = (
+        db.query(PromptVersionORM)
+        .filter(PromptVersionORM.prompt_id == prompt_id)
+        .order_by(PromptVersionORM.version)
+        .all()
+    )
+    rewritten = 0
+    previous_body: str | None = None
+    kept_body: str | None = None
+    kept = depth = 0
+    rebase = False
+    for version in versions[:-1]:
+        if version.delta_depth and version.body is None:
+            body = apply_delta(previous_body, version.body_delta)
+        else:
+            body = _full_body(version)
+        previous_body = body
+        if version.id in drop:
+            if archive is not None:
+                archive(version, body)
+            blob_service.release_version(db, version)
+            db.delete(version)
+            rebase = True
+            continue
+        if mode == "delta" and kept and depth + 1 < interval:
+            depth += 1
+        else:
+            depth = 0
+        kept += 1
+        blob_service.seal_version(db, version, PAYLOAD_FIELDS)
+        if version.body is not None or version.delta_depth != depth or (rebase and depth):
+            _store_body(db, version, body, kept_body, depth)
+            rewritten += 1
+        kept_body = body
+        rebase = False
+    return rewritten
+
+
+def compact(
+    db: Session,
+    prompt_id: UUID | None = None,
+    mode: str | None = None,
+    interval: int | None = None,
+) -> int:
+    """Compact the history of one prompt or of all prompts.
+
+    Prompts are processed in primary key order with one transaction each.
+    Returns the number of versions rewritten.
+    """
+
+    if prompt_id is not None:
+        prompt_ids = [prompt_id]
+    else:
+        prompt_ids = [
+            row[0] for row in db.query(PromptHeaderORM.id).order_by(PromptHeaderORM.id)
+        ]
+    rewritten = 0
+    for pid in prompt_ids:
+        rewritten += compact_prompt(db, pid, mode=mode, interval=interval)
+        db.commit()
+    logger.info(
+        "prompt_history.compact",
+        extra={"prompts": len(prompt_ids), "rewritten": rewritten},
+    )
+    return rewritten
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain prompt body history")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("compact", help="Rewrite version chains")
+    run.add_argument("--prompt-id", type=UUID, default=None)
+    run.add_argument("--mode", choices=("delta", "blob"), default=None)
+    run.add_argument("--interval", type=int, default=None)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = compact(
+            db, prompt_id=args.prompt_id, mode=args.mode, interval=args.interval
+        )
+    finally:
+        db.close()
+    print(f"rewrote {count} prompt versions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Batched loading of data side-loaded on prompt list pages.
+
+Each relation named in ``include`` has a :class:`BatchLoader`.  Building a
+page only registers the prompt ids each relation needs; the first lookup
+then fetches all of them with one query, so a page costs one query per
+relation whatever its size:
+
+* ``collections`` reads ``collection_prompts`` and the smart collection
+  members cached in ``smart_collection_prompts`` by ``prompt_id`` (served by
+  ``ix_collection_prompts_prompt`` and ``ix_smart_collection_prompts_prompt``)
+  joined to the owner's collections;
+* ``related`` reads ``prompt_links`` by ``source_id`` joined to the cards
+  of the owner's prompts for their titles.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, TypeVar
+from uuid import UUID
+
+from sqlalchemy import ARRAY, any_, bindparam, cast, select, union_all
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy.orm import Session
+
+from app.models.collection import CollectionORM, CollectionPromptORM, SmartCollectionPromptORM
+from app.models.link import PromptLinkORM
+from app.models.prompt import (
+    IncludedCollection,
+    IncludedPrompt,
+    PromptCardORM,
+    PromptInclude,
+    PromptListIncludes,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """Collect keys with :meth:`load`, then fetch them all with one call.
+
+    ``batch_fn`` receives the distinct pending keys and returns values for
+    those it found; the others resolve to ``default()``.  Results are cached,
+    so keys loaded again later are not fetched twice.
+    """
+
+    def __init__(
+        self, batch_fn: Callable[[List[K]], Dict[K, V]], default: Callable[[], V]
+    ) -> None:
+        self._batch_fn = batch_fn
+        self._default = default
+        self._pending: Dict[K, None] = {}
+        self._cache: Dict[K, V] = {}
+        self.batches = 0
+
+    def load(self, key: K) -> None:
+        if key not in self._cache:
+            self._pending[key] = None
+
+    def load_many(self, keys: Iterable[K]) -> None:
+        for key in keys:
+            self.load(key)
+
+    def dispatch(self) -> None:
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending = {}
+        found = self._batch_fn(keys)
+        self.batches += 1
+        for key in keys:
+            self._cache[key] = found[key] if key in found else self._default()
+
+    def get(self, key: K) -> V:
+        if key not in self._cache:
+            self.load(key)
+            self.dispatch()
+        return self._cache[key]
+
+
+def _uuid_array(name: str, values: List[UUID]):
+    uuid_array = ARRAY(SA_UUID(as_uuid=True))
+    return cast(bindparam(name, values, type_=uuid_array), uuid_array)
+
+
+def _collections(
+    db: Session, owner_id: UUID, prompt_ids: List[UUID]
+) -> Dict[UUID, List[IncludedCollection]]:
+    ids = _uuid_array("prompt_ids", prompt_ids)
+    members = union_all(
+        *(
+            select(table.prompt_id, table.collection_id).where(table.prompt_id == any_(ids))
+            for table in (CollectionPromptORM, SmartCollectionPromptORM)
+        )
+    ).subquery()
+    rows = (
+        db.query(members.c.prompt_id, CollectionORM.id, CollectionORM.name)
+        .join(CollectionORM, CollectionORM.id == members.c.collection_id)
+        .filter(CollectionORM.owner_id == owner_id)
+        .order_by(members.c.prompt_id, CollectionORM.name)
+    )
+    found: Dict[UUID, List[IncludedCollection]] = defaultdict(list)
+    for prompt_id, collection_id, name in rows:
+        found[prompt_id].append(IncludedCollection.model_construct(id=collection_id, name=name))
+    return found
+
+
+def _related(
+    db: Session, owner_id: UUID, prompt_ids: List[UUID]
+) -> Dict[UUID, List[IncludedPrompt]]:
+    rows = (
+        db.query(PromptLinkORM.source_id, PromptCardORM.id, PromptCardORM.title)
+        .join(PromptCardORM, PromptCardORM.id == PromptLinkORM.target_id)
+        .filter(
+            PromptLinkORM.source_id == any_(_uuid_array("prompt_ids", prompt_ids)),
+            PromptCardORM.owner_id == owner_id,
+        )
+        .order_by(PromptLinkORM.source_id, PromptCardORM.title, PromptCardORM.id)
+    )
+    found: Dict[UUID, List[IncludedPrompt]] = defaultdict(list)
+    for source_id, prompt_id, title in rows:
+        found[source_id].append(IncludedPrompt.model_construct(prompt_id=prompt_id, title=title))
+    return found
+
+
+_BATCH_FNS = {
+    PromptInclude.collections: _collections,
+    PromptInclude.related: _related,
+}
+
+
+def parse_includes(values: List[str] | None) -> List[PromptInclude]:
+    """Parse ``include`` values, each possibly comma separated.
+
+    Unknown names raise :class:`ValueError`.
+    """
+
+    includes: List[PromptInclude] = []
+    for value in values or []:
+        for name in value.split(","):
+            name = name.strip()
+            if not name:
+                continue
+            try:
+                include = PromptInclude(name)
+            except ValueError:
+                raise ValueError(f"unknown include: {name}") from None
+            if include not in includes:
+                includes.append(include)
+    return includes
+
+
+def loaders(
+    db: Session, owner_id: UUID, includes: Iterable[PromptInclude]
+) -> Dict[PromptInclude, BatchLoader]:
+    """Return a fresh loader per requested relation, scoped to ``owner_id``."""
+
+    return {
+        include: BatchLoader(
+            lambda keys, fn=_BATCH_FNS[include]: fn(db, owner_id, keys), list
+        )
+        for include in includes
+    }
+
+
+def resolve(
+    db: Session, owner_id: UUID, prompt_ids: List[UUID], includes: Iterable[PromptInclude]
+) -> PromptListIncludes:
+    """Load each relation in ``includes`` for all of ``prompt_ids``."""
+
+    batch = loaders(db, owner_id, includes)
+    for loader in batch.values():
+        loader.load_many(prompt_ids)
+    values = {
+        include.value: {prompt_id: loader.get(prompt_id) for prompt_id in prompt_ids}
+        for include, loader in batch.items()
+    }
+    return PromptListIncludes.model_construct(
+        collections=values.get(PromptInclude.collections.value),
+        related=values.get(PromptInclude.related.value),
+    )
@@ -0,0 +1,445 @@
+"""Postgres-backed background job queue.
+
+Jobs are rows in ``jobs``.  :func:`enqueue` adds one to the caller's
+transaction, so a job exists only if the work that scheduled it commits.
+Workers (:mod:`app.worker`) call :func:`claim`, which picks ready jobs in
+priority order with ``FOR UPDATE SKIP LOCKED`` and marks them ``running`` in
+one statement, so any number of workers can poll the same queue without
+blocking each other or running a job twice.  The claim's ``attempts``
+number is its token: :func:`complete` and :func:`fail` only apply to the
+attempt they belong to, so a worker that lost its job cannot overwrite the
+outcome of the attempt that replaced it.
+
+A failed attempt is rescheduled with exponential backoff
+(``JOB_RETRY_BACKOFF_S * 2 ** (attempts - 1)``, capped at an hour); after
+``max_attempts`` the job is left ``dead`` for an admin to inspect and
+:func:`retry`.  Workers renew ``heartbeat_at`` of their running jobs with
+:func:`heartbeat`; jobs without a heartbeat for ``JOB_STALE_AFTER_S`` belong
+to a worker that died and are reclaimed by :func:`requeue_stale`, so tasks
+must tolerate running more than once.
+
+Tasks are registered with :func:`task`.  Coroutine functions run on the
+worker's event loop; plain functions run in its process pool and receive
+only the JSON payload.  Modules listed in ``JOB_TASK_MODULES`` are imported
+by the worker to register them.  Tasks registered with ``every`` are queued
+by the workers themselves through :func:`enqueue_periodic`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import inspect
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy import case, func, or_, select, text, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.job import Job, JobORM, JobQueueStats
+
+logger = logging.getLogger(__name__)
+
+ASYNC = "async"
+PROCESS = "process"
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """A registered task."""
+
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    mode: str
+    every: timedelta | None = None
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    """Job handed to a worker by :func:`claim`."""
+
+    id: int
+    task: str
+    payload: Dict[str, Any]
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+
+
+_tasks: Dict[str, TaskSpec] = {}
+
+
+def task(
+    name: str, mode: str | None = None, every: timedelta | None = None
+) -> Callable[[Callable], Callable]:
+    """Register the decorated function as task ``name``.
+
+    ``mode`` defaults to ``async`` for coroutine functions and ``process``
+    otherwise.  Tasks with an ``every`` interval are queued with an empty
+    payload by :func:`enqueue_periodic`.
+    """
+
+    def register(fn: Callable) -> Callable:
+        resolved = mode or (ASYNC if inspect.iscoroutinefunction(fn) else PROCESS)
+        if resolved not in (ASYNC, PROCESS):
+            raise ValueError(f"Unknown task mode: {resolved}")
+        _tasks[name] = TaskSpec(name=name, fn=fn, mode=resolved, every=every)
+        return fn
+
+    return register
+
+
+def get_task(name: str) -> TaskSpec | None:
+    return _tasks.get(name)
+
+
+def task_names(mode: str) -> List[str]:
+    return sorted(name for name, spec in _tasks.items() if spec.mode == mode)
+
+
+def load_tasks(modules: Sequence[str] | None = None) -> None:
+    """Import task modules so they register themselves."""
+
+    for name in modules if modules is not None else settings.JOB_TASK_MODULES:
+        importlib.import_module(name)
+
+
+def enqueue(
+    db: Session,
+    task_name: str,
+    payload: Dict[str, Any] | None = None,
+    *,
+    queue: str = "default",
+    priority: int = 0,
+    delay: timedelta | None = None,
+    max_attempts: int | None = None,
+) -> JobORM:
+    """Add a job to the current transaction; it becomes visible on commit."""
+
+    job = JobORM(
+        task=task_name,
+        queue=queue,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if delay:
+        job.run_at = datetime.now(timezone.utc) + delay
+    db.add(job)
+    return job
+
+
+def enqueue_periodic(db: Session, now: datetime | None = None) -> int:
+    """Queue each periodic task that is due; returns the number queued.
+
+    A task is due when none of its jobs is queued or running and the last
+    one was created at least ``every`` ago.  Callers are serialised per task
+    by an advisory lock, so concurrent workers queue it once.
+    """
+
+    now = now or datetime.now(timezone.utc)
+    queued = 0
+    for spec in sorted(_tasks.values(), key=lambda spec: spec.name):
+        if spec.every is None:
+            continue
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": spec.name})
+        pending = db.scalar(
+            select(JobORM.id)
+            .where(
+                JobORM.task == spec.name,
+                or_(
+                    JobORM.status.in_(("queued", "running")),
+                    JobORM.created_at > now - spec.every,
+                ),
+            )
+            .limit(1)
+        )
+        if pending is None:
+            enqueue(db, spec.name)
+            queued += 1
+    db.commit()
+    if queued:
+        logger.info("jobs.periodic_queued", extra={"count": queued})
+    return queued
+
+
+def claim(
+    db: Session,
+    limit: int,
+    queues: Sequence[str],
+    tasks: Sequence[str],
+    worker: str | None = None,
+) -> List[ClaimedJob]:
+    """Mark up to ``limit`` ready jobs ``running`` and return them, highest priority first."""
+
+    if limit <= 0 or not tasks:
+        return []
+    now = datetime.now(timezone.utc)
+    ready = (
+        select(JobORM.id)
+        .where(
+            JobORM.status == "queued",
+            JobORM.queue.in_(queues),
+            JobORM.task.in_(tasks),
+            JobORM.run_at <= now,
+        )
+        .order_by(JobORM.priority.desc(), JobORM.run_at, JobORM.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(JobORM)
+        .where(JobORM.id.in_(ready))
+        .values(
+            status="running",
+            attempts=JobORM.attempts + 1,
+            started_at=now,
+            heartbeat_at=now,
+            worker=worker,
+        )
+        .returning(
+            JobORM.id,
+            JobORM.task,
+            JobORM.payload,
+            JobORM.priority,
+            JobORM.attempts,
+            JobORM.max_attempts,
+            JobORM.run_at,
+        )
+    ).all()
+    db.commit()
+    jobs = [ClaimedJob(*row) for row in rows]
+    jobs.sort(key=lambda job: (-job.priority, job.run_at, job.id))
+    return jobs
+
+
+def _claimed(job: ClaimedJob):
+    """Match ``job`` only while the claim it came from is still running."""
+
+    return (
+        (JobORM.id == job.id)
+        & (JobORM.attempts == job.attempts)
+        & (JobORM.status == "running")
+    )
+
+
+def heartbeat(db: Session, jobs: Sequence[ClaimedJob]) -> int:
+    """Renew the heartbeat of running claims; returns how many are still held."""
+
+    if not jobs:
+        return 0
+    result = db.execute(
+        update(JobORM)
+        .where(
+            tuple_(JobORM.id, JobORM.attempts).in_([(job.id, job.attempts) for job in jobs]),
+            JobORM.status == "running",
+        )
+        .values(heartbeat_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+    return result.rowcount
+
+
+def complete(db: Session, job: ClaimedJob) -> bool:
+    """Mark a claim done; returns ``False`` if the job was reclaimed meanwhile."""
+
+    result = db.execute(
+        update(JobORM)
+        .where(_claimed(job))
+        .values(status="done", finished_at=datetime.now(timezone.utc), last_error=None)
+    )
+    db.commit()
+    return bool(result.rowcount)
+
+
+def backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(settings.JOB_RETRY_BACKOFF_S * 2 ** max(attempts - 1, 0), 3600))
+
+
+def fail(db: Session, job: ClaimedJob, error: str) -> str | None:
+    """Record a failed attempt; returns the job's new status.
+
+    Returns ``None`` if the job was reclaimed since ``job`` was claimed.
+    """
+
+    now = datetime.now(timezone.utc)
+    if job.attempts >= job.max_attempts:
+        values = {"status": "dead", "finished_at": now}
+    else:
+        values = {"status": "queued", "run_at": now + backoff(job.attempts)}
+    result = db.execute(
+        update(JobORM).where(_claimed(job)).values(last_error=error[:2000], **values)
+    )
+    db.commit()
+    if not result.rowcount:
+        return None
+    if values["status"] == "dead":
+        logger.error("jobs.dead", extra={"job_id": job.id, "task": job.task})
+    return values["status"]
+
+
+def requeue_stale(db: Session, stale_after: timedelta | None = None) -> int:
+    """Release jobs whose worker stopped reporting, counting the lost attempt."""
+
+    stale_after = stale_after or timedelta(seconds=settings.JOB_STALE_AFTER_S)
+    now = datetime.now(timezone.utc)
+    exhausted = JobORM.attempts >= JobORM.max_attempts
+    result = db.execute(
+        update(JobORM)
+        .where(JobORM.status == "running", JobORM.heartbeat_at < now - stale_after)
+        .values(
+            status=case((exhausted, "dead"), else_="queued"),
+            finished_at=case((exhausted, now), else_=None),
+            run_at=now,
+            last_error="worker lost",
+        )
+    )
+    db.commit()
+    if result.rowcount:
+        logger.warning("jobs.requeued_stale", extra={"count": result.rowcount})
+    return result.rowcount
+
+
+def retry(db: Session, job_id: int) -> Job | None:
+    """Put a dead job back on its queue with a fresh attempt budget.
+
+    ``attempts`` keeps counting, since it is the claim token, and
+    ``max_attempts`` is raised by ``JOB_MAX_ATTEMPTS`` instead.
+    """
+
+    job = (
+        db.query(JobORM)
+        .filter(JobORM.id == job_id, JobORM.status == "dead")
+        .with_for_update()
+        .first()
+    )
+    if job is None:
+        return None
+    job.status = "queued"
+    job.max_attempts = job.attempts + settings.JOB_MAX_ATTEMPTS
+    job.run_at = datetime.now(timezone.utc)
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return Job.model_validate(job)
+
+
+def list_jobs(
+    db: Session, status: str = "dead", queue: str | None = None, limit: int = 100
+) -> List[Job]:
+    query = db.query(JobORM).filter(JobORM.status == status)
+    if queue is not None:
+        query = query.filter(JobORM.queue == queue)
+    rows = query.order_by(JobORM.id.desc()).limit(limit).all()
+    return [Job.model_validate(row) for row in rows]
+
+
+def queue_stats(db: Session, window: timedelta = timedelta(minutes=5)) -> List[JobQueueStats]:
+    """Depth of every queue, the age of its oldest ready job and recent latencies.
+
+    ``avg_wait_ms`` is the mean delay between ``run_at`` and the start of
+    jobs started within ``window``; ``avg_run_ms`` the mean run time of jobs
+    finished within it.
+    """
+
+    now = datetime.now(timezone.utc)
+    since = now - window
+    queued = JobORM.status == "queued"
+    ready = queued & (JobORM.run_at <= now)
+    recent_start = JobORM.started_at >= since
+    recent_done = (JobORM.status == "done") & (JobORM.finished_at >= since)
+
+    def _ms(interval):
+        return func.extract("epoch", interval) * 1000
+
+    rows = (
+        db.query(
+            JobORM.queue,
+            func.count().filter(ready),
+            func.count().filter(queued & (JobORM.run_at > now)),
+            func.count().filter(JobORM.status == "running"),
+            func.count().filter(JobORM.status == "dead"),
+            func.min(JobORM.run_at).filter(ready),
+            func.avg(_ms(JobORM.started_at - JobORM.run_at)).filter(recent_start),
+            func.avg(_ms(JobORM.finished_at - JobORM.started_at)).filter(recent_done),
+            func.count().filter(recent_done),
+        )
+        .filter((JobORM.status != "done") | (JobORM.finished_at >= since))
+        .group_by(JobORM.queue)
+        .order_by(JobORM.queue)
+        .all()
+    )
+    return [
+        JobQueueStats(
+            queue=queue,
+            ready=ready_count,
+            scheduled=scheduled,
+            running=running,
+            dead=dead,
+            oldest_ready_seconds=(now - oldest).total_seconds() if oldest else None,
+            avg_wait_ms=round(float(wait), 2) if wait is not None else None,
+            avg_run_ms=round(float(run), 2) if run is not None else None,
+            done_recent=done,
+        )
+        for queue, ready_count, scheduled, running, dead, oldest, wait, run, done in rows
+    ]
+
+
+def prune(db: Session, older_than: timedelta) -> int:
+    """Delete finished jobs older than ``older_than``; dead jobs are kept."""
+
+    cutoff = datetime.now(timezone.utc) - older_than
+    deleted = (
+        db.query(JobORM)
+        .filter(JobORM.status == "done", JobORM.finished_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the background job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("enqueue", help="Queue a job")
+    add.add_argument("task")
+    add.add_argument("--payload", type=json.loads, default=None, help="JSON object")
+    add.add_argument("--queue", default="default")
+    add.add_argument("--priority", type=int, default=0)
+    add.add_argument("--delay", type=int, default=0, help="Seconds to wait before running")
+    sub.add_parser("stats", help="Show queue depth and latency")
+    prune_parser = sub.add_parser("prune", help="Delete finished jobs")
+    prune_parser.add_argument("--older-than-days", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "enqueue":
+            job = enqueue(
+                db,
+                args.task,
+                args.payload,
+                queue=args.queue,
+                priority=args.priority,
+                delay=timedelta(seconds=args.delay),
+            )
+            db.commit()
+            print(f"queued job {job.id}")
+        elif args.command == "stats":
+            for stats in queue_stats(db):
+                print(stats.model_dump_json())
+        else:
+            print(f"deleted {prune(db, timedelta(days=args.older_than_days))} jobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Related-prompt links and graph traversal.
+
+``prompt_links`` holds one row per id in ``related_prompt_ids`` of each
+prompt's current version; :func:`set_links` keeps it in step from the
+prompt write paths.  :func:`neighbourhood` walks the links around a prompt
+breadth first with one recursive query.  Each step expands a whole level:
+it holds the ids first reached at that depth and every id seen so far, so
+a prompt is visited once however many paths lead to it.  ``depth`` bounds
+the number of levels and the walk stops as soon as ``limit`` prompts are
+found, keeping the lowest ids of the last level.  The prompts reached are
+then loaded in one batch.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as SA_UUID, insert
+from sqlalchemy.orm import Session
+
+from app.models.link import LinkDirection, PromptGraph, PromptGraphNode, PromptLink, PromptLinkORM
+from app.services import prompt_service
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 4
+
+
+def set_links(db: Session, source_id: UUID, owner_id: UUID, targets: Iterable[UUID] | None) -> None:
+    """Make the links from ``source_id`` match ``targets`` in the current transaction."""
+
+    wanted = {target for target in targets or () if target is not None and target != source_id}
+    query = db.query(PromptLinkORM).filter(PromptLinkORM.source_id == source_id)
+    if wanted:
+        query = query.filter(PromptLinkORM.target_id.notin_(wanted))
+    query.delete(synchronize_session=False)
+    if wanted:
+        db.execute(
+            insert(PromptLinkORM)
+            .values(
+                [
+                    {"source_id": source_id, "target_id": target, "owner_id": owner_id}
+                    for target in wanted
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+
+
+_NEXT = {
+    LinkDirection.OUT: "SELECT target_id FROM prompt_links WHERE source_id = f.id AND owner_id = :owner_id",
+    LinkDirection.IN: "SELECT source_id FROM prompt_links WHERE target_id = f.id AND owner_id = :owner_id",
+}
+_NEXT[LinkDirection.BOTH] = f"{_NEXT[LinkDirection.OUT]} UNION {_NEXT[LinkDirection.IN]}"
+
+
+def _walk_sql(direction: LinkDirection):
+    return text(
+        f"""
+        WITH RECURSIVE walk(frontier, seen, depth) AS (
+            SELECT ARRAY[CAST(:root_id AS uuid)], ARRAY[CAST(:root_id AS uuid)], 0
+            UNION ALL
+            SELECT level.ids, w.seen || level.ids, w.depth + 1
+            FROM walk w
+            CROSS JOIN LATERAL (
+                SELECT ARRAY(
+                    SELECT DISTINCT n.id
+                    FROM unnest(w.frontier) AS f(id)
+                    CROSS JOIN LATERAL ({_NEXT[direction]}) AS n(id)
+                    WHERE n.id <> ALL(w.seen)
+                    ORDER BY n.id
+                    LIMIT :limit - cardinality(w.seen)
+                ) AS ids
+            ) AS level
+            WHERE w.depth < :depth
+              AND cardinality(w.frontier) > 0
+              AND cardinality(w.seen) < :limit
+        )
+        SELECT node.id, w.depth
+        FROM walk w
+        CROSS JOIN LATERAL unnest(w.frontier) AS node(id)
+        ORDER BY w.depth, node.id
+        """
+    )
+
+
+_LINKS_SQL = text(
+    """
+    SELECT source_id, target_id
+    FROM prompt_links
+    WHERE owner_id = :owner_id AND source_id = ANY(:ids) AND target_id = ANY(:ids)
+    ORDER BY source_id, target_id
+    """
+).bindparams(bindparam("ids", type_=ARRAY(SA_UUID(as_uuid=True))))
+
+
+def neighbourhood(
+    db: Session,
+    prompt_id: UUID,
+    owner_id: UUID,
+    depth: int = 1,
+    limit: int = 100,
+    direction: LinkDirection = LinkDirection.BOTH,
+) -> PromptGraph | None:
+    """Return the prompts within ``depth`` links of ``prompt_id``.
+
+    Only links between prompts of ``owner_id`` are followed.  Returns
+    ``None`` if the root is not one of the owner's prompts.
+    """
+
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"depth must be between 1 and {MAX_DEPTH}")
+    rows = db.execute(
+        _walk_sql(direction),
+        {"root_id": prompt_id, "owner_id": owner_id, "depth": depth, "limit": limit + 1},
+    ).all()
+    truncated = len(rows) > limit
+    depths: Dict[UUID, int] = {row.id: row.depth for row in rows[:limit]}
+    prompts = prompt_service.get_prompts(db, list(depths), owner_id=owner_id)
+    if prompt_id not in prompts:
+        return None
+    nodes: List[PromptGraphNode] = [
+        PromptGraphNode.model_construct(depth=node_depth, prompt=prompts[node_id])
+        for node_id, node_depth in depths.items()
+        if node_id in prompts
+    ]
+    found = [node.prompt.prompt_id for node in nodes]
+    links = [
+        PromptLink.model_construct(source_id=source_id, target_id=target_id)
+        for source_id, target_id in db.execute(_LINKS_SQL, {"owner_id": owner_id, "ids": found})
+    ]
+    logger.info(
+        "prompts.graph",
+        extra={
+            "prompt_id": str(prompt_id),
+            "user_id": str(owner_id),
+            "depth": depth,
+            "count": len(nodes),
+        },
+    )
+    return PromptGraph.model_construct(nodes=nodes, links=links, truncated=truncated)
@@ -0,0 +1,298 @@
+"""Live change notifications for Server-Sent Events streams.
+
+Every outbox event addressed to a user (see :func:`outbox_service.emit`)
+fires ``NOTIFY outbox_events`` when its transaction commits.  Each API
+process holds a single ``LISTEN`` connection in :data:`hub`, which fans the
+notifications out to per-subscriber ``asyncio`` queues, so thousands of
+open streams cost one database connection per process.
+
+Event ids are the ``seq`` of outbox events: numbers of the owner's change
+sequence, which commit in order (see :mod:`app.services.sync_service`).  A
+client reconnecting with ``Last-Event-ID`` first receives the events it
+missed from ``outbox_events`` (see :func:`replay`), then live events; an
+event with a lower number can never commit after one the client has seen.
+When the events after its id were pruned, or the id is not one this owner
+was sent, the stream starts with a ``reset`` event instead.  A subscriber that falls more than
+``SSE_QUEUE_SIZE`` events behind, or whose hub lost its connection, is
+closed so the client reconnects and resumes from the table instead of
+silently missing events.  Delivery is at least once: clients should treat
+events as notifications and refetch what changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Set
+from uuid import UUID
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.outbox import OutboxEventORM
+from app.models.sync import SyncCounterORM
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "outbox_events"
+RETRY_MS = 3000
+
+_CLOSED = object()
+
+
+class HubUnavailable(RuntimeError):
+    """The hub could not open its ``LISTEN`` connection."""
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """A change notification for one user."""
+
+    id: int
+    type: str
+    aggregate_id: UUID
+    owner_id: UUID
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_notify(cls, raw: str) -> "ChangeEvent":
+        data = json.loads(raw)
+        return cls(
+            id=data["id"],
+            type=data["type"],
+            aggregate_id=UUID(data["aggregate_id"]),
+            owner_id=UUID(data["owner_id"]),
+            payload=data.get("payload") or {},
+        )
+
+    def to_sse(self) -> str:
+        data = {"type": self.type, "aggregate_id": str(self.aggregate_id), **self.payload}
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """Bounded queue of one stream's pending events."""
+
+    def __init__(self, owner_id: UUID, maxsize: int) -> None:
+        self.owner_id = owner_id
+        self.maxsize = maxsize
+        # Unbounded so the closing marker always fits; ``offer`` enforces
+        # ``maxsize``.
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    def offer(self, event: ChangeEvent) -> None:
+        if self.closed:
+            return
+        if self.queue.qsize() >= self.maxsize:
+            logger.warning("live.subscriber_lagged", extra={"user_id": str(self.owner_id)})
+            self.close()
+            return
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """End the stream after the events already queued; later ones are dropped."""
+
+        if not self.closed:
+            self.closed = True
+            self.queue.put_nowait(_CLOSED)
+
+
+def _dsn(url: str) -> str:
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class ChangeHub:
+    """One ``LISTEN`` connection fanned out to in-process subscribers."""
+
+    def __init__(
+        self,
+        database_url: str | None = None,
+        queue_size: int | None = None,
+        connect_timeout: float = 5.0,
+    ) -> None:
+        self.database_url = database_url
+        self.queue_size = queue_size
+        self.connect_timeout = connect_timeout
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._task: asyncio.Task | None = None
+        self._ready: asyncio.Event | None = None
+        self._lost: asyncio.Event | None = None
+        self._conn = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    async def subscribe(self, owner_id: UUID) -> Subscription:
+        """Register a stream; events committed from now on are delivered to it."""
+
+        await self.start()
+        sub = Subscription(owner_id, self.queue_size or settings.SSE_QUEUE_SIZE)
+        self._subscribers.setdefault(owner_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.owner_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.owner_id]
+
+    def publish(self, event: ChangeEvent) -> None:
+        for sub in list(self._subscribers.get(event.owner_id, ())):
+            sub.offer(event)
+
+    def close_all(self) -> None:
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.close()
+
+    async def start(self) -> None:
+        """Open the ``LISTEN`` connection unless it is already open."""
+
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise HubUnavailable("live updates are unavailable") from None
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.close_all()
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(_dsn(self.database_url or settings.DATABASE_URL))
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except Exception:
+            logger.exception("live.listen_failed")
+            self._lost.set()
+            return
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                event = ChangeEvent.from_notify(notify.payload)
+            except (KeyError, TypeError, ValueError):
+                logger.warning("live.bad_notification", extra={"payload": notify.payload})
+                continue
+            self.publish(event)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = 0.5
+        while True:
+            try:
+                self._conn = await asyncio.to_thread(self._connect)
+            except Exception:
+                logger.exception("live.connect_failed")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 0.5
+            self._lost = asyncio.Event()
+            fd = self._conn.fileno()
+            loop.add_reader(fd, self._on_readable)
+            self._ready.set()
+            logger.info("live.listening", extra={"subscribers": self.subscriber_count})
+            try:
+                await self._lost.wait()
+            finally:
+                loop.remove_reader(fd)
+                self._conn.close()
+            # Notifications sent while reconnecting are lost; make every
+            # stream resume from the table.
+            self._ready.clear()
+            self.close_all()
+
+
+hub = ChangeHub()
+
+
+def replay(db: Session, owner_id: UUID, after: int, limit: int) -> List[ChangeEvent] | None:
+    """Return up to ``limit`` events for ``owner_id`` numbered above ``after``.
+
+    Returns ``None`` when they cannot be replayed: events after ``after``
+    were pruned, or ``after`` is beyond the owner's sequence.
+    """
+
+    counter = db.get(SyncCounterORM, owner_id)
+    seq, floor = (counter.seq, counter.event_floor_seq) if counter is not None else (0, 0)
+    if after < floor or after > seq:
+        return None
+    rows = (
+        db.query(OutboxEventORM)
+        .filter(OutboxEventORM.owner_id == owner_id, OutboxEventORM.seq > after)
+        .order_by(OutboxEventORM.seq)
+        .limit(limit)
+        .all()
+    )
+    return [
+        ChangeEvent(
+            id=row.seq,
+            type=row.event_type,
+            aggregate_id=row.aggregate_id,
+            owner_id=row.owner_id,
+            payload=dict(row.payload or {}),
+        )
+        for row in rows
+    ]
+
+
+async def sse_stream(
+    sub: Subscription,
+    missed: List[ChangeEvent],
+    reset: bool = False,
+    heartbeat: float | None = None,
+    source: ChangeHub | None = None,
+) -> AsyncIterator[str]:
+    """Yield ``missed`` then live events as SSE frames, with keep-alive comments.
+
+    ``reset`` emits a ``reset`` event first, telling the client that more
+    events were missed than can be replayed and it should refetch.
+    """
+
+    heartbeat = heartbeat if heartbeat is not None else settings.SSE_HEARTBEAT_S
+    source = source or hub
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if reset:
+            yield "event: reset\ndata: {}\n\n"
+        replayed = set()
+        for event in missed:
+            replayed.add(event.id)
+            yield event.to_sse()
+        while True:
+            try:
+                item = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _CLOSED:
+                return
+            # Events committed while replaying arrive both ways.
+            if item.id in replayed:
+                continue
+            yield item.to_sse()
+    finally:
+        source.unsubscribe(sub)
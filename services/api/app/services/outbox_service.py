@@ -0,0 +1,321 @@
+"""Transactional outbox for prompt and collection change events.
+
+Write paths call :func:`emit` before they commit, so an event exists if and
+only if its change does.  A dispatcher (:func:`dispatch_batch`, run in a
+loop by :func:`run`) delivers pending events to in-process handlers
+registered with :func:`register_handler`, at least once and in ``id`` order
+per aggregate:
+
+* only the oldest pending event of each aggregate is claimed, with
+  ``FOR UPDATE SKIP LOCKED`` so concurrent dispatchers never share an
+  aggregate; the claimer then takes that aggregate's later events too;
+* a handler error stops the aggregate for this batch and schedules a retry
+  with exponential backoff; after ``OUTBOX_MAX_ATTEMPTS`` the event is
+  marked ``dead`` and later events proceed.
+
+Handlers must be idempotent: a failure in one handler redelivers the event
+to every handler of its type.  Handler modules listed in
+``OUTBOX_HANDLER_MODULES`` are imported when the dispatcher starts.
+
+Run the dispatcher from ``services/api`` with::
+
+    python -m app.services.outbox_service dispatch [--batch-size N] [--once]
+    python -m app.services.outbox_service prune [--older-than-days N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+from uuid import UUID
+
+from sqlalchemy import exists, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.models.outbox import OutboxEventORM
+from app.models.sync import SyncCounterORM
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CREATED = "prompt.created"
+PROMPT_UPDATED = "prompt.updated"
+PROMPT_DUPLICATED = "prompt.duplicated"
+COLLECTION_PROMPT_ADDED = "collection.prompt_added"
+COLLECTION_PROMPT_REMOVED = "collection.prompt_removed"
+COLLECTION_PROMPT_MOVED = "collection.prompt_moved"
+
+ALL_EVENTS = "*"
+
+
+@dataclass(frozen=True)
+class OutboxEvent:
+    """Event as passed to handlers."""
+
+    id: int
+    event_type: str
+    aggregate_id: UUID
+    payload: Dict[str, Any]
+    attempts: int
+    created_at: datetime
+
+
+Handler = Callable[[OutboxEvent], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def register_handler(event_type: str, handler: Handler) -> Handler:
+    """Deliver events of ``event_type`` (or every event, with ``"*"``) to ``handler``."""
+
+    _handlers[event_type].append(handler)
+    return handler
+
+
+def handler(event_type: str) -> Callable[[Handler], Handler]:
+    """Decorator form of :func:`register_handler`."""
+
+    return lambda fn: register_handler(event_type, fn)
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def emit(db: Session, event_type: str, aggregate_id: UUID, **payload: Any) -> None:
+    """Add an event to the current transaction; it is published on commit.
+
+    An ``owner_id`` in the payload also addresses the event to that user's
+    live update streams.  Such events take the owner's next change sequence
+    number, which keeps the owner's counter locked until the commit, so
+    streams resuming after a number never miss an event that commits later.
+    """
+
+    owner_id = payload.get("owner_id")
+    seq = None
+    if owner_id is not None:
+        # sync_service imports the write paths, which import this module.
+        from app.services import sync_service
+
+        seq = sync_service.reserve(db, owner_id)
+    db.add(
+        OutboxEventORM(
+            aggregate_id=aggregate_id,
+            owner_id=owner_id,
+            seq=seq,
+            event_type=event_type,
+            payload={k: _json_value(v) for k, v in payload.items()},
+        )
+    )
+
+
+@dataclass
+class DispatchStats:
+    """Outcome of one dispatch batch."""
+
+    delivered: int = 0
+    retried: int = 0
+    dead: int = 0
+
+
+def _claim(db: Session, limit: int) -> List[OutboxEventORM]:
+    """Lock the oldest pending event of up to ``limit`` aggregates, then their successors."""
+
+    event = OutboxEventORM
+    earlier = aliased(OutboxEventORM)
+    now = datetime.now(timezone.utc)
+    heads = (
+        db.query(event)
+        .filter(event.status == "pending", event.available_at <= now)
+        .filter(
+            ~exists().where(
+                earlier.aggregate_id == event.aggregate_id,
+                earlier.status == "pending",
+                earlier.id < event.id,
+            )
+        )
+        .order_by(event.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not heads or len(heads) >= limit:
+        return heads
+    # Later events of a claimed aggregate are never claimed elsewhere while
+    # its head is pending, so locking them cannot contend.
+    following = (
+        db.query(event)
+        .filter(
+            event.aggregate_id.in_({head.aggregate_id for head in heads}),
+            event.status == "pending",
+            event.id.notin_([head.id for head in heads]),
+        )
+        .order_by(event.id)
+        .limit(limit - len(heads))
+        .with_for_update()
+        .all()
+    )
+    return sorted(heads + following, key=lambda row: row.id)
+
+
+def _deliver(row: OutboxEventORM) -> None:
+    event = OutboxEvent(
+        id=row.id,
+        event_type=row.event_type,
+        aggregate_id=row.aggregate_id,
+        payload=dict(row.payload or {}),
+        attempts=row.attempts,
+        created_at=row.created_at,
+    )
+    for fn in _handlers.get(row.event_type, []) + _handlers.get(ALL_EVENTS, []):
+        fn(event)
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, 3600))
+
+
+def dispatch_batch(
+    db: Session, batch_size: int | None = None, max_attempts: int | None = None
+) -> DispatchStats:
+    """Claim, deliver and settle one batch of events in a single transaction."""
+
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+    stats = DispatchStats()
+    blocked: set = set()
+    now = datetime.now(timezone.utc)
+    for row in _claim(db, batch_size):
+        if row.aggregate_id in blocked:
+            continue
+        try:
+            _deliver(row)
+        except Exception as exc:
+            row.attempts += 1
+            row.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+            if row.attempts >= max_attempts:
+                row.status = "dead"
+                stats.dead += 1
+                logger.error(
+                    "outbox.dead",
+                    extra={"event_id": row.id, "event_type": row.event_type},
+                )
+            else:
+                row.available_at = now + _backoff(row.attempts)
+                stats.retried += 1
+            # Keep per-aggregate order: later events wait for this one.
+            blocked.add(row.aggregate_id)
+            continue
+        row.status = "done"
+        row.dispatched_at = now
+        stats.delivered += 1
+    db.commit()
+    return stats
+
+
+def load_handlers(modules: List[str] | None = None) -> None:
+    """Import handler modules so they register themselves."""
+
+    for name in modules if modules is not None else settings.OUTBOX_HANDLER_MODULES:
+        importlib.import_module(name)
+
+
+def run(
+    session_factory: Callable[[], Session],
+    stop: threading.Event | None = None,
+    batch_size: int | None = None,
+    poll_interval: float | None = None,
+) -> None:
+    """Dispatch until ``stop`` is set, sleeping when there is nothing to do."""
+
+    stop = stop or threading.Event()
+    if poll_interval is None:
+        poll_interval = settings.OUTBOX_POLL_INTERVAL_MS / 1000
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            stats = dispatch_batch(db, batch_size)
+        except Exception:
+            db.rollback()
+            logger.exception("outbox.dispatch_failed")
+            stats = DispatchStats()
+        finally:
+            db.close()
+        if stats.delivered or stats.retried or stats.dead:
+            logger.info("outbox.dispatched", extra=vars(stats))
+        else:
+            stop.wait(poll_interval)
+
+
+def prune(db: Session, older_than: timedelta) -> int:
+    """Delete delivered events older than ``older_than`` and raise owners' event floors.
+
+    Live streams resuming below an owner's floor are told to refetch.
+    """
+
+    cutoff = datetime.now(timezone.utc) - older_than
+    pruned = db.execute(
+        OutboxEventORM.__table__.delete()
+        .where(OutboxEventORM.status == "done", OutboxEventORM.dispatched_at < cutoff)
+        .returning(OutboxEventORM.owner_id, OutboxEventORM.seq)
+    ).all()
+    floors: Dict[UUID, int] = {}
+    for owner_id, seq in pruned:
+        if owner_id is not None and seq is not None:
+            floors[owner_id] = max(seq, floors.get(owner_id, 0))
+    for owner_id, seq in floors.items():
+        db.execute(
+            update(SyncCounterORM)
+            .where(SyncCounterORM.owner_id == owner_id, SyncCounterORM.event_floor_seq < seq)
+            .values(event_floor_seq=seq)
+        )
+    db.commit()
+    return len(pruned)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dispatch outbox events")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("dispatch", help="Deliver pending events to handlers")
+    run_parser.add_argument("--batch-size", type=int, default=None)
+    run_parser.add_argument("--once", action="store_true", help="Dispatch one batch and exit")
+    prune_parser = sub.add_parser("prune", help="Delete delivered events")
+    prune_parser.add_argument("--older-than-days", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    if args.command == "prune":
+        db = SessionLocal()
+        try:
+            count = prune(db, timedelta(days=args.older_than_days))
+        finally:
+            db.close()
+        print(f"deleted {count} events")
+        return
+
+    load_handlers()
+    if args.once:
+        db = SessionLocal()
+        try:
+            stats = dispatch_batch(db, args.batch_size)
+        finally:
+            db.close()
+        print(f"delivered {stats.delivered}, retried {stats.retried}, dead {stats.dead}")
+        return
+    try:
+        run(SessionLocal, batch_size=args.batch_size)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
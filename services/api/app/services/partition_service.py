@@ -0,0 +1,171 @@
+"""Partition maintenance for ``audit_log``.
+
+``audit_log`` is range-partitioned by calendar month (UTC) on
+``created_at``, one ``audit_log_yYYYYmMM`` partition per month plus
+``audit_log_default`` for rows outside every month.  :func:`maintain` creates
+partitions ``AUDIT_LOG_PARTITIONS_AHEAD`` months ahead and detaches those
+older than ``AUDIT_LOG_RETENTION_MONTHS``; detached partitions are kept as
+plain tables unless ``drop`` is set.  ``prompt_versions`` uses a fixed set
+of hash partitions and needs no maintenance.
+
+Workers queue the ``partitions.maintain`` task daily; run it by hand from
+``services/api`` with::
+
+    python -m app.services.partition_service maintain [--drop]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AUDIT_TABLE = "audit_log"
+DEFAULT_PARTITION = f"{AUDIT_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{AUDIT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def month_start(value: date, offset: int = 0) -> date:
+    """Return the first day of the month ``offset`` months from ``value``."""
+
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{AUDIT_TABLE}_y{month:%Ym%m}"
+
+
+def audit_partitions(db: Session) -> List[Tuple[str, date]]:
+    """Return ``(name, month)`` of the attached monthly partitions, oldest first."""
+
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": AUDIT_TABLE},
+    ).scalars()
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.fullmatch(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def _create_partition(db: Session, month: date) -> str:
+    """Create the partition of ``month``, moving its rows out of the default partition.
+
+    Attaching a range that overlaps rows in the default partition fails, so
+    those rows are moved into the new table before it is attached.
+    """
+
+    name = partition_name(month)
+    lower, upper = f"{month} UTC", f"{month_start(month, 1)} UTC"
+    db.execute(
+        text(
+            f"CREATE TABLE {name} "
+            f"(LIKE {AUDIT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= CAST(:lower AS timestamptz) "
+            f"AND created_at < CAST(:upper AS timestamptz) RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    db.execute(
+        text(
+            f"ALTER TABLE {AUDIT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+    return name
+
+
+def ensure_partitions(
+    db: Session, ahead: int | None = None, today: date | None = None
+) -> List[str]:
+    """Create missing partitions from this month to ``ahead`` months ahead."""
+
+    ahead = settings.AUDIT_LOG_PARTITIONS_AHEAD if ahead is None else ahead
+    current = month_start(today or datetime.now(timezone.utc).date())
+    existing = {month for _, month in audit_partitions(db)}
+    created = [
+        _create_partition(db, month_start(current, offset))
+        for offset in range(ahead + 1)
+        if month_start(current, offset) not in existing
+    ]
+    db.commit()
+    return created
+
+
+def detach_expired(
+    db: Session,
+    retain_months: int | None = None,
+    drop: bool = False,
+    today: date | None = None,
+) -> List[str]:
+    """Detach partitions entirely older than ``retain_months`` months.
+
+    With no retention configured nothing is detached.
+    """
+
+    if retain_months is None:
+        retain_months = settings.AUDIT_LOG_RETENTION_MONTHS
+    if retain_months is None:
+        return []
+    cutoff = month_start(today or datetime.now(timezone.utc).date(), -retain_months)
+    expired = [name for name, month in audit_partitions(db) if month < cutoff]
+    for name in expired:
+        db.execute(text(f"ALTER TABLE {AUDIT_TABLE} DETACH PARTITION {name}"))
+        if drop:
+            db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return expired
+
+
+def maintain(db: Session, drop: bool = False) -> Tuple[List[str], List[str]]:
+    """Create upcoming partitions and detach expired ones."""
+
+    created = ensure_partitions(db)
+    detached = detach_expired(db, drop=drop)
+    logger.info(
+        "partitions.maintained",
+        extra={"table": AUDIT_TABLE, "created": created, "detached": detached, "dropped": drop},
+    )
+    return created, detached
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain audit_log partitions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("maintain", help="Create future and detach expired partitions")
+    run.add_argument("--drop", action="store_true", help="Drop detached partitions")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        created, detached = maintain(db, drop=args.drop)
+    finally:
+        db.close()
+    print(f"created {len(created)} partitions, detached {len(detached)}")
+
+
+if __name__ == "__main__":
+    main()
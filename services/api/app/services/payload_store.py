@@ -0,0 +1,103 @@
+"""External storage for large prompt payloads.
+
+Payloads above ``PAYLOAD_OFFLOAD_BYTES`` are kept out of Postgres and
+addressed by the same SHA-256 digest as their ``prompt_blobs`` row, which
+records the backend name in ``storage``.  The filesystem backend is the
+default; other backends register a factory with :func:`register_backend`
+and are selected with ``PAYLOAD_STORE_BACKEND``.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+from app.core.config import settings
+
+
+class PayloadStore(ABC):
+    """Write-once byte storage keyed by content digest."""
+
+    @abstractmethod
+    def put(self, digest: str, data: bytes) -> None:
+        """Store ``data`` under ``digest``; a no-op if it already exists."""
+
+    @abstractmethod
+    def read(self, digest: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        """Yield the bytes in ``[start, end)`` of the object in chunks."""
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        """Remove the object if it exists."""
+
+    def read_all(self, digest: str) -> bytes:
+        return b"".join(self.read(digest))
+
+
+class FilesystemPayloadStore(PayloadStore):
+    """Objects stored as files under ``root``, fanned out by digest prefix."""
+
+    def __init__(self, root: str | Path, chunk_size: int = 64 * 1024) -> None:
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and rename so readers never see a partial object.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{digest}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def read(self, digest: str, start: int = 0, end: int | None = None) -> Iterator[bytes]:
+        with self._path(digest).open("rb") as fh:
+            fh.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = fh.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+
+_BACKENDS: Dict[str, Callable[[], PayloadStore]] = {
+    "filesystem": lambda: FilesystemPayloadStore(settings.PAYLOAD_STORE_PATH),
+}
+
+
+def register_backend(name: str, factory: Callable[[], PayloadStore]) -> None:
+    """Make a payload store available under ``name``."""
+
+    _BACKENDS[name] = factory
+    get_store.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def get_store(name: str | None = None) -> PayloadStore:
+    """Return the store called ``name``, or the configured default."""
+
+    name = name or settings.PAYLOAD_STORE_BACKEND
+    try:
+        return _BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"unknown payload store: {name}") from None
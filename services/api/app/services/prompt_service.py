@@ -2,24 +2,48 @@
 
 from __future__ import annotations
 
+import base64
 from datetime import datetime
+import json
 import logging
 import time
 import uuid
 import re
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import ARRAY, any_, bindparam, cast, update
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID
+from sqlalchemy.orm import Session, load_only
 
 from app.models.prompt import (
     Prompt,
+    PromptAccessControl,
+    PromptCardORM,
+    PayloadField,
+    PayloadRef,
+    PromptBatchGetResponse,
     PromptCreate,
     PromptHeaderORM,
     PromptVersionORM,
     PromptListResponse,
+    PromptSummary,
+    PromptVersionListResponse,
+    PromptVersionSummary,
+    PromptView,
+)
+from app.services import (
+    audit_service,
+    blob_service,
+    card_service,
+    history_service,
+    include_service,
+    link_service,
+    outbox_service,
+    retention_service,
+    search_service,
+    sync_service,
 )
-from app.services import search_service
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +54,14 @@ def _clean_array(values: List[str] | None) -> List[str]:
     return [v for v in values or [] if v is not None]
 
 
+def _access_control(value: str | None) -> PromptAccessControl | None:
+    """Coerce a stored access policy into :class:`PromptAccessControl`."""
+
+    if value is None or isinstance(value, PromptAccessControl):
+        return value
+    return PromptAccessControl(value.lower())
+
+
 _TAG_RE = re.compile(r"^[a-z0-9._-]{1,32}$")
 
 
@@ -69,36 +101,98 @@ def _normalize_models(models: List[str] | None) -> List[str] | None:
     return cleaned
 
 
-def _to_prompt(version: PromptVersionORM, header: PromptHeaderORM) -> Prompt:
-    """Hydrate ORM objects into a :class:`Prompt` model."""
+def _payload_refs(version: PromptVersionORM) -> Dict[PayloadField, PayloadRef] | None:
+    """Describe the payloads of ``version`` held in external storage."""
 
-    return Prompt(
-        id=version.id,
-        prompt_id=version.prompt_id,
-        owner_id=header.owner_id,
-        version=version.version,
-        title=header.title,
-        body=version.body,
-        use_cases=_clean_array(version.use_cases),
-        access_control=version.access_control,
-        target_models=_clean_array(version.target_models),
-        providers=_clean_array(version.providers),
-        integrations=_clean_array(version.integrations),
-        category=version.category,
-        complexity=version.complexity,
-        audience=version.audience,
-        status=version.status,
-        input_schema=version.input_schema,
-        output_format=version.output_format,
-        llm_parameters=version.llm_parameters,
-        success_metrics=version.success_metrics,
-        sample_input=version.sample_input,
-        sample_output=version.sample_output,
-        related_prompt_ids=version.related_prompt_ids,
-        link=version.link,
-        tags=_clean_array(header.tags),
-        created_at=version.created_at,
-        updated_at=version.updated_at,
+    refs = {}
+    for field in blob_service.OFFLOAD_FIELDS:
+        if blob_service.is_external(version, field):
+            blob = getattr(version, f"{field}_blob")
+            refs[PayloadField(field)] = PayloadRef.model_construct(
+                digest=blob.digest, size_bytes=blob.size_bytes
+            )
+    return refs or None
+
+
+_PROMPT_FIELDS: Dict[str, Callable[[PromptVersionORM, PromptHeaderORM], Any]] = {
+    "id": lambda v, h: v.id,
+    "prompt_id": lambda v, h: v.prompt_id,
+    "owner_id": lambda v, h: h.owner_id,
+    "version": lambda v, h: v.version,
+    "title": lambda v, h: h.title,
+    "body": lambda v, h: history_service.body_of(v),
+    "use_cases": lambda v, h: _clean_array(v.use_cases),
+    "access_control": lambda v, h: _access_control(v.access_control),
+    "target_models": lambda v, h: _clean_array(v.target_models),
+    "providers": lambda v, h: _clean_array(v.providers),
+    "integrations": lambda v, h: _clean_array(v.integrations),
+    "category": lambda v, h: v.category,
+    "complexity": lambda v, h: v.complexity,
+    "audience": lambda v, h: v.audience,
+    "status": lambda v, h: v.status,
+    "input_schema": lambda v, h: blob_service.content(v, "input_schema", external=False),
+    "output_format": lambda v, h: v.output_format,
+    "llm_parameters": lambda v, h: blob_service.content(v, "llm_parameters"),
+    "success_metrics": lambda v, h: blob_service.content(v, "success_metrics"),
+    "sample_input": lambda v, h: blob_service.content(v, "sample_input", external=False),
+    "sample_output": lambda v, h: blob_service.content(v, "sample_output", external=False),
+    "related_prompt_ids": lambda v, h: v.related_prompt_ids,
+    "link": lambda v, h: v.link,
+    "tags": lambda v, h: _clean_array(h.tags),
+    "payloads": lambda v, h: _payload_refs(v),
+    "created_at": lambda v, h: v.created_at,
+    "updated_at": lambda v, h: v.updated_at,
+}
+
+
+def _to_prompt(
+    version: PromptVersionORM,
+    header: PromptHeaderORM,
+    fields: List[str] | None = None,
+    detail: bool = False,
+) -> Prompt:
+    """Hydrate ORM objects into a :class:`Prompt` model.
+
+    Rows loaded from the database are trusted, so the model is assembled with
+    ``model_construct`` and skips pydantic validation.  This keeps list pages
+    with large JSONB payloads cheap to build.  When ``fields`` is given only
+    those attributes are read, so deferred columns are never lazy-loaded, and
+    only they are marked as set so ``exclude_unset`` yields the sparse output.
+    Externally stored payloads are only fetched for ``detail`` reads.
+    """
+
+    if not fields:
+        values = {name: get(version, header) for name, get in _PROMPT_FIELDS.items()}
+        if detail:
+            values.update(
+                (name, blob_service.content(version, name))
+                for name in blob_service.OFFLOAD_FIELDS
+            )
+        return Prompt.model_construct(**values)
+    values: Dict[str, Any] = dict.fromkeys(Prompt.model_fields)
+    values.update({name: _PROMPT_FIELDS[name](version, header) for name in fields})
+    return Prompt.model_construct(_fields_set=set(fields), **values)
+
+
+def _to_summary(card: PromptCardORM) -> PromptSummary:
+    """Hydrate a summary item from its ``prompt_cards`` row."""
+
+    return PromptSummary.model_construct(
+        id=card.version_id,
+        prompt_id=card.id,
+        owner_id=card.owner_id,
+        version=card.version,
+        title=card.title,
+        excerpt=card.excerpt or "",
+        tags=_clean_array(card.tags),
+        use_cases=_clean_array(card.use_cases),
+        access_control=_access_control(card.access_control),
+        target_models=_clean_array(card.target_models),
+        providers=_clean_array(card.providers),
+        is_favorite=bool(card.is_favorite),
+        is_archived=bool(card.is_archived),
+        created_at=card.created_at,
+        updated_at=card.updated_at,
     )
 
 
@@ -112,17 +206,16 @@ def create_prompt(db: Session, prompt: PromptCreate, owner_id: UUID) -> Prompt:
         owner_id=owner_id,
         title=prompt.title,
         tags=tags,
+        next_version=2,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
     db.add(prompt_header)
-    db.commit()
-    db.refresh(prompt_header)
 
     version_orm = PromptVersionORM(
         id=uuid.uuid4(),
         prompt_id=prompt_header.id,
-        version="1",
+        version=1,
         body=prompt.body,
         description=None,
         access_control=prompt.access_control.lower() if prompt.access_control else None,
@@ -145,15 +238,86 @@ def create_prompt(db: Session, prompt: PromptCreate, owner_id: UUID) -> Prompt:
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
+    blob_service.offload_version(db, version_orm)
     db.add(version_orm)
+    card_service.upsert_card(db, prompt_header, version_orm)
+    link_service.set_links(db, prompt_header.id, owner_id, version_orm.related_prompt_ids)
+    outbox_service.emit(
+        db, outbox_service.PROMPT_CREATED, prompt_header.id, owner_id=owner_id, version=1
+    )
+    sync_service.record(
+        db,
+        owner_id,
+        sync_service.prompt(prompt_header.id),
+        sync_service.version(prompt_header.id, version_orm.id),
+    )
     db.commit()
+    db.refresh(prompt_header)
     db.refresh(version_orm)
 
     logger.info(
         "prompts.create",
         extra={"prompt_id": str(prompt_header.id), "user_id": str(owner_id)},
     )
-    return _to_prompt(version_orm, prompt_header)
+    audit_service.record("prompts.create", prompt_header.id, owner_id)
+    return _to_prompt(version_orm, prompt_header, detail=True)
+
+
+def search_filters(
+    owner_id: UUID,
+    q: str | None = None,
+    tags: List[str] | None = None,
+    favorite: bool | None = None,
+    archived: bool | None = None,
+    target_models: List[str] | None = None,
+    providers: List[str] | None = None,
+    purposes: List[str] | None = None,
+    collection_id: UUID | None = None,
+    smart_collection_id: UUID | None = None,
+    category: List[str] | None = None,
+    complexity: List[str] | None = None,
+    audience: List[str] | None = None,
+    status: List[str] | None = None,
+    where: List[str] | None = None,
+    match: str = search_service.FacetMatch.all.value,
+    sort: str = search_service.SearchSort.updated_desc.value,
+    limit: int = 20,
+    after: str | None = None,
+    view: str = PromptView.full.value,
+    fields: List[str] | None = None,
+) -> search_service.SearchFilters:
+    """Validate and normalize listing parameters into search filters.
+
+    Invalid values raise :class:`ValueError`.
+    """
+
+    prompt_view = PromptView(view)
+    fields = search_service.parse_fields(fields)
+    if fields and prompt_view == PromptView.summary:
+        raise ValueError("fields cannot be combined with view=summary")
+    return search_service.SearchFilters(
+        owner_id=owner_id,
+        q=q,
+        tags=_normalize_tags(tags) if tags else None,
+        favorite=favorite,
+        archived=archived,
+        target_models=_normalize_models(target_models) if target_models else None,
+        providers=providers,
+        purposes=purposes,
+        collection_id=collection_id,
+        smart_collection_id=smart_collection_id,
+        category=category,
+        complexity=complexity,
+        audience=audience,
+        status=status,
+        where=search_service.parse_json_filters(where),
+        match=search_service.FacetMatch(match),
+        sort=search_service.SearchSort(sort),
+        limit=limit,
+        after=after,
+        view=prompt_view,
+        fields=fields,
+    )
 
 
 def list_prompts(
@@ -167,34 +331,74 @@ def list_prompts(
     providers: List[str] | None = None,
     purposes: List[str] | None = None,
     collection_id: UUID | None = None,
+    category: List[str] | None = None,
+    complexity: List[str] | None = None,
+    audience: List[str] | None = None,
+    status: List[str] | None = None,
+    where: List[str] | None = None,
+    match: str = search_service.FacetMatch.all.value,
     sort: str = search_service.SearchSort.updated_desc.value,
     limit: int = 20,
     after: str | None = None,
+    view: str = PromptView.full.value,
+    fields: List[str] | None = None,
+    include: List[str] | None = None,
+    smart_collection_id: UUID | None = None,
 ) -> PromptListResponse:
-    """List prompts for an owner applying search, filters and pagination."""
-
-    norm_tags = _normalize_tags(tags) if tags else None
-    norm_models = _normalize_models(target_models) if target_models else None
-    filters = search_service.SearchFilters(
-        owner_id=owner_id,
+    """List prompts for an owner applying search, filters and pagination.
+
+    ``view="summary"`` returns :class:`PromptSummary` cards with an excerpt
+    instead of the full body and payloads.  ``fields`` selects a sparse
+    fieldset of full prompts; identity fields are always included.
+    ``match`` selects whether array facet filters require ``all`` of the
+    given values or ``any`` of them.  ``where`` holds JSONB path predicates
+    such as ``llm_parameters.temperature<=0.3``.  ``include`` names related
+    data to side-load for the page, each relation with a single query.
+    Within a collection, ``sort="position"`` follows its manual order and
+    ``sort="added_desc"`` lists the most recently added prompts first.
+    ``smart_collection_id`` lists the cached members of a smart collection.
+    """
+
+    includes = include_service.parse_includes(include)
+    prompt_view = PromptView(view)
+    filters = search_filters(
+        owner_id,
         q=q,
-        tags=norm_tags,
+        tags=tags,
         favorite=favorite,
         archived=archived,
-        target_models=norm_models,
+        target_models=target_models,
         providers=providers,
         purposes=purposes,
         collection_id=collection_id,
-        sort=search_service.SearchSort(sort),
+        smart_collection_id=smart_collection_id,
+        category=category,
+        complexity=complexity,
+        audience=audience,
+        status=status,
+        where=where,
+        match=match,
+        sort=sort,
         limit=limit,
         after=after,
+        view=view,
+        fields=fields,
     )
+    fields = filters.fields
     query = search_service.build_query(db, filters)
     rows = query.all()
-    items = [
-        _to_prompt(version, header)
-        for version, header in rows[: filters.limit]
-    ]
+    items: List[Prompt | PromptSummary]
+    if prompt_view == PromptView.summary:
+        if filters.sort in search_service.COLLECTION_SORTS:
+            rows = [(None, *row) for row in rows]
+        else:
+            rows = [(None, card) for card in rows]
+        items = [_to_summary(row[1]) for row in rows[: filters.limit]]
+    else:
+        items = [
+            _to_prompt(row[0], row[1], fields)
+            for row in rows[: filters.limit]
+        ]
     next_cursor: str | None = None
     if len(rows) > filters.limit:
         next_cursor = search_service.encode_cursor(rows[filters.limit - 1], filters.sort)
@@ -203,35 +407,233 @@ def list_prompts(
         "prompts.list", extra={"user_id": str(owner_id), "count": len(items)}
     )
 
-    return PromptListResponse(
-        items=items, next_cursor=next_cursor, count=len(items), total_estimate=None
+    extra: Dict[str, Any] = {}
+    if includes:
+        extra["included"] = include_service.resolve(
+            db, owner_id, [item.prompt_id for item in items], includes
+        )
+    return PromptListResponse.model_construct(
+        items=items, next_cursor=next_cursor, count=len(items), total_estimate=None, **extra
     )
 
 
-def get_prompt_by_id(db: Session, prompt_id: UUID) -> Prompt | None:
-    """Return the latest version of a prompt by its identifier."""
+def get_prompt_by_id(
+    db: Session, prompt_id: UUID, owner_id: UUID, version: int | None = None
+) -> Prompt | None:
+    """Return a prompt of ``owner_id`` by its identifier.
 
-    version = (
-        db.query(PromptVersionORM)
-        .filter(PromptVersionORM.prompt_id == prompt_id)
-        .order_by(PromptVersionORM.version.desc())
-        .first()
-    )
-    if version is None:
-        return None
+    The latest version is returned unless ``version`` selects an earlier one,
+    whose body is rebuilt from its snapshot and deltas.  Versions pruned by
+    a retention policy are read back from cold storage.  Returns ``None`` if
+    the prompt or version does not exist or belongs to someone else.
+    """
 
     header = (
         db.query(PromptHeaderORM)
-        .filter(PromptHeaderORM.id == prompt_id)
+        .filter(PromptHeaderORM.id == prompt_id, PromptHeaderORM.owner_id == owner_id)
         .first()
     )
     if header is None:
         return None
 
+    query = db.query(PromptVersionORM).filter(PromptVersionORM.prompt_id == prompt_id)
+    if version is not None:
+        query = query.filter(PromptVersionORM.version == version)
+    version_orm = query.order_by(PromptVersionORM.version.desc()).first()
+    cold = None
+    if version_orm is None and version is not None:
+        cold = retention_service.cold_version(db, prompt_id, version)
+    if version_orm is None and cold is None:
+        return None
+
+    logger.info(
+        "prompts.get", extra={"prompt_id": str(prompt_id), "user_id": str(owner_id)}
+    )
+    if cold is not None:
+        # Cold documents are plain JSON, so validate them back into types.
+        return Prompt.model_validate(
+            {
+                **cold,
+                "prompt_id": prompt_id,
+                "owner_id": header.owner_id,
+                "title": header.title,
+                "tags": _clean_array(header.tags),
+            }
+        )
+    return _to_prompt(version_orm, header, detail=True)
+
+
+def get_prompts(
+    db: Session, prompt_ids: List[UUID], owner_id: UUID | None = None
+) -> Dict[UUID, Prompt]:
+    """Return the latest version of each prompt in ``prompt_ids`` that exists.
+
+    Cards, headers and versions are loaded in one query through
+    ``prompt_cards``, which points at each prompt's current version.  The ids
+    are bound as a single array for ``= ANY``, so the statement text is the
+    same for every batch size.  With ``owner_id`` only that user's prompts
+    are returned.  Externally stored payloads are described by ``payloads``
+    rather than fetched.
+    """
+
+    if not prompt_ids:
+        return {}
+    uuid_array = ARRAY(SA_UUID(as_uuid=True))
+    ids = cast(bindparam("prompt_ids", list(prompt_ids), type_=uuid_array), uuid_array)
+    query = (
+        db.query(PromptVersionORM, PromptHeaderORM)
+        .select_from(PromptCardORM)
+        .join(
+            PromptVersionORM,
+            (PromptVersionORM.prompt_id == PromptCardORM.id)
+            & (PromptVersionORM.id == PromptCardORM.version_id),
+        )
+        .join(PromptHeaderORM, PromptHeaderORM.id == PromptCardORM.id)
+        .filter(PromptCardORM.id == any_(ids))
+    )
+    if owner_id is not None:
+        query = query.filter(PromptCardORM.owner_id == owner_id)
+    return {header.id: _to_prompt(version, header) for version, header in query.all()}
+
+
+def batch_get_prompts(
+    db: Session, prompt_ids: List[UUID], owner_id: UUID
+) -> PromptBatchGetResponse:
+    """Return the prompts of ``owner_id`` among ``prompt_ids``, in request order.
+
+    Repeated ids are returned once; ids that do not exist or belong to
+    someone else are listed in ``missing``.
+    """
+
+    requested = list(dict.fromkeys(prompt_ids))
+    found = get_prompts(db, requested, owner_id=owner_id)
+    items = [found[prompt_id] for prompt_id in requested if prompt_id in found]
+    missing = [prompt_id for prompt_id in requested if prompt_id not in found]
+    logger.info(
+        "prompts.batch_get",
+        extra={"user_id": str(owner_id), "count": len(items), "missing": len(missing)},
+    )
+    return PromptBatchGetResponse.model_construct(items=items, missing=missing)
+
+
+def get_payload(
+    db: Session,
+    prompt_id: UUID,
+    owner_id: UUID,
+    field: str,
+    version: int | None = None,
+) -> blob_service.Payload | None:
+    """Return a payload field of a prompt version for streaming.
+
+    The latest version is used unless ``version`` is given.  Returns ``None``
+    if the version does not exist, the prompt is not owned by ``owner_id`` or
+    the field is empty.
+    """
+
+    query = (
+        db.query(PromptVersionORM)
+        .join(PromptHeaderORM, PromptHeaderORM.id == PromptVersionORM.prompt_id)
+        .filter(
+            PromptVersionORM.prompt_id == prompt_id,
+            PromptHeaderORM.owner_id == owner_id,
+        )
+    )
+    if version is not None:
+        query = query.filter(PromptVersionORM.version == version)
+    version_orm = query.order_by(PromptVersionORM.version.desc()).first()
+    if version_orm is None:
+        return None
+    return blob_service.payload(version_orm, field)
+
+
+def _encode_version_cursor(version: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"v": version}).encode()).decode()
+
+
+def _decode_version_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["v"])
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def list_versions(
+    db: Session,
+    prompt_id: UUID,
+    owner_id: UUID,
+    limit: int = 20,
+    after: str | None = None,
+) -> PromptVersionListResponse | None:
+    """List the versions of a prompt, newest first, without their content.
+
+    Pages are keyset paginated on ``(prompt_id, version DESC)`` and only the
+    summary columns are loaded.  Returns ``None`` if the prompt does not
+    exist or is not owned by ``owner_id``.
+    """
+
+    owned = (
+        db.query(PromptHeaderORM.id)
+        .filter(PromptHeaderORM.id == prompt_id, PromptHeaderORM.owner_id == owner_id)
+        .first()
+    )
+    if owned is None:
+        return None
+
+    query = (
+        db.query(PromptVersionORM)
+        .options(
+            load_only(
+                PromptVersionORM.id,
+                PromptVersionORM.prompt_id,
+                PromptVersionORM.version,
+                PromptVersionORM.status,
+                PromptVersionORM.created_at,
+                PromptVersionORM.updated_at,
+            )
+        )
+        .filter(PromptVersionORM.prompt_id == prompt_id)
+    )
+    if after:
+        query = query.filter(PromptVersionORM.version < _decode_version_cursor(after))
+    rows = query.order_by(PromptVersionORM.version.desc()).limit(limit + 1).all()
+
+    items = [
+        PromptVersionSummary.model_construct(
+            id=v.id,
+            prompt_id=v.prompt_id,
+            version=v.version,
+            status=v.status,
+            created_at=v.created_at,
+            updated_at=v.updated_at,
+        )
+        for v in rows[:limit]
+    ]
+    next_cursor = _encode_version_cursor(rows[limit - 1].version) if len(rows) > limit else None
     logger.info(
-        "prompts.get", extra={"prompt_id": str(prompt_id), "user_id": "unknown"}
+        "prompts.versions", extra={"prompt_id": str(prompt_id), "count": len(items)}
+    )
+    return PromptVersionListResponse.model_construct(
+        items=items, next_cursor=next_cursor, count=len(items)
     )
-    return _to_prompt(version, header)
+
+
+def allocate_version(db: Session, prompt_id: UUID) -> int | None:
+    """Reserve the next version number of a prompt.
+
+    Increments ``prompts.next_version`` with ``UPDATE ... RETURNING``.  The
+    row lock taken by the update queues concurrent allocations for the same
+    prompt until the caller's transaction ends, so numbers are never handed
+    out twice and no serialization retries are needed.  Returns ``None`` if
+    the prompt does not exist.
+    """
+
+    table = PromptHeaderORM.__table__
+    return db.execute(
+        update(table)
+        .where(table.c.id == prompt_id)
+        .values(next_version=table.c.next_version + 1)
+        .returning(table.c.next_version - 1)
+    ).scalar_one_or_none()
 
 
 def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
@@ -239,6 +641,13 @@ def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
 
     start = time.perf_counter()
 
+    # Allocate first: once the prompt row is locked, the latest version read
+    # below is the one committed by any duplicate that ran before us.
+    new_version = allocate_version(db, prompt_id)
+    if new_version is None:
+        db.rollback()
+        return None
+
     latest_version: PromptVersionORM | None = (
         db.query(PromptVersionORM)
         .filter(PromptVersionORM.prompt_id == prompt_id)
@@ -246,6 +655,7 @@ def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
         .first()
     )
     if latest_version is None:
+        db.rollback()
         return None
 
     header: PromptHeaderORM | None = (
@@ -254,22 +664,14 @@ def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
         .first()
     )
     if header is None:
+        db.rollback()
         return None
 
-    try:
-        new_version = str(int(latest_version.version) + 1)
-    except ValueError:
-        logger.warning(
-            "prompts.duplicate.non_numeric_version",
-            extra={"prompt_id": str(prompt_id), "version": latest_version.version},
-        )
-        new_version = "1"
-
     version_copy = PromptVersionORM(
         id=uuid.uuid4(),
         prompt_id=prompt_id,
         version=new_version,
-        body=latest_version.body,
+        body=history_service.body_of(latest_version, db),
         access_control=latest_version.access_control,
         target_models=latest_version.target_models,
         providers=latest_version.providers,
@@ -279,22 +681,38 @@ def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
         complexity=latest_version.complexity,
         audience=latest_version.audience,
         status=latest_version.status,
-        input_schema=latest_version.input_schema,
         output_format=latest_version.output_format,
-        llm_parameters=latest_version.llm_parameters,
-        success_metrics=latest_version.success_metrics,
-        sample_input=latest_version.sample_input,
-        sample_output=latest_version.sample_output,
+        llm_parameters=blob_service.content(latest_version, "llm_parameters"),
+        success_metrics=blob_service.content(latest_version, "success_metrics"),
         related_prompt_ids=latest_version.related_prompt_ids,
         link=latest_version.link,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
+    for field in blob_service.OFFLOAD_FIELDS:
+        blob_service.copy_field(db, latest_version, version_copy, field)
     db.add(version_copy)
+    # The copy is now the latest version; its predecessor keeps only
+    # references to shared payloads and a delta or snapshot of its body.
+    history_service.supersede(db, latest_version)
 
     base_title = re.sub(r"\s\(v[^\)]+\)$", "", header.title)
     header.title = f"{base_title} (v{new_version})"
     header.updated_at = datetime.utcnow()
+    card_service.upsert_card(db, header, version_copy)
+    outbox_service.emit(
+        db,
+        outbox_service.PROMPT_DUPLICATED,
+        prompt_id,
+        owner_id=header.owner_id,
+        version=new_version,
+    )
+    sync_service.record(
+        db,
+        header.owner_id,
+        sync_service.prompt(prompt_id),
+        sync_service.version(prompt_id, version_copy.id),
+    )
 
     db.commit()
     db.refresh(version_copy)
@@ -309,11 +727,12 @@ def duplicate_prompt(db: Session, prompt_id: UUID) -> Prompt | None:
         "events.prompt_duplicated",
         extra={
             "prompt_id": str(prompt_id),
-            "new_version": new_version,
+            "new_version": str(new_version),
             "elapsed_ms": round(elapsed_ms, 2),
         },
     )
-    return _to_prompt(version_copy, header)
+    audit_service.record("prompts.duplicate", prompt_id, header.owner_id, version=new_version)
+    return _to_prompt(version_copy, header, detail=True)
 
 
 def update_prompt(db: Session, prompt_id: UUID, prompt_update: PromptCreate) -> Prompt | None:
@@ -364,14 +783,33 @@ def update_prompt(db: Session, prompt_id: UUID, prompt_update: PromptCreate) ->
         if key in allowed_fields:
             if key == "target_models":
                 setattr(latest_version, key, _normalize_models(value))
+            elif key in blob_service.OFFLOAD_FIELDS:
+                blob_service.assign(db, latest_version, key, value)
             else:
                 setattr(latest_version, key, value)
 
     if "tags" in update_data:
         header.tags = _normalize_tags(update_data["tags"])
+    if "related_prompt_ids" in update_data:
+        link_service.set_links(db, prompt_id, header.owner_id, latest_version.related_prompt_ids)
 
     latest_version.updated_at = datetime.utcnow()
     header.updated_at = datetime.utcnow()
+    card_service.upsert_card(db, header, latest_version)
+    outbox_service.emit(
+        db,
+        outbox_service.PROMPT_UPDATED,
+        prompt_id,
+        owner_id=header.owner_id,
+        version=latest_version.version,
+        fields=",".join(sorted(update_data)),
+    )
+    sync_service.record(
+        db,
+        header.owner_id,
+        sync_service.prompt(prompt_id),
+        sync_service.version(prompt_id, latest_version.id),
+    )
     db.commit()
     db.refresh(latest_version)
     db.refresh(header)
@@ -391,4 +829,7 @@ def update_prompt(db: Session, prompt_id: UUID, prompt_update: PromptCreate) ->
             "elapsed_ms": round(elapsed_ms, 2),
         },
     )
-    return _to_prompt(latest_version, header)
+    audit_service.record(
+        "prompts.update", prompt_id, header.owner_id, version=latest_version.version
+    )
+    return _to_prompt(latest_version, header, detail=True)
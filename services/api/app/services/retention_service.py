@@ -0,0 +1,364 @@
+"""Version retention policies, labels and cold storage.
+
+Each owner may set a :class:`~app.models.retention.RetentionPolicyORM`.
+:func:`apply_retention` finds superseded versions that no rule keeps,
+copies each into ``prompt_versions_cold`` as a compressed JSON document,
+releases its blobs and deletes it from ``prompt_versions``, rebasing delta
+chains over the gaps.  The latest version and labelled versions are never
+pruned.  Cold versions stay readable through :func:`cold_version`.
+
+Run the job from ``services/api`` with::
+
+    python -m app.services.retention_service apply [--owner-id UUID] [--batch-size N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import exists, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.models.prompt import PromptHeaderORM, PromptVersionORM
+from app.models.retention import (
+    PromptLabel,
+    PromptVersionColdORM,
+    PromptVersionLabelORM,
+    RetentionPolicy,
+    RetentionPolicyORM,
+)
+from app.services import audit_service, blob_service, history_service, sync_service
+
+logger = logging.getLogger(__name__)
+
+_LABEL_RE = re.compile(r"^[a-z0-9._-]{1,64}$")
+
+COLD_COLUMNS = (
+    "id",
+    "version",
+    "description",
+    "access_control",
+    "target_models",
+    "providers",
+    "integrations",
+    "use_cases",
+    "category",
+    "complexity",
+    "audience",
+    "status",
+    "output_format",
+    "related_prompt_ids",
+    "link",
+    "created_at",
+    "updated_at",
+)
+"""Version columns copied verbatim into cold storage; blob fields are resolved."""
+
+
+@dataclass
+class RetentionStats:
+    """Outcome of a retention run."""
+
+    versions_moved: int = 0
+    bytes_reclaimed: int = 0
+    cold_bytes: int = 0
+
+
+def _normalize_label(label: str) -> str:
+    norm = label.strip().lower()
+    if not _LABEL_RE.fullmatch(norm):
+        raise ValueError(
+            "invalid label: 1-64 lowercase letters, digits, dots (.), underscores (_) or hyphens (-)"
+        )
+    return norm
+
+
+def get_policy(db: Session, owner_id: UUID) -> RetentionPolicy | None:
+    """Return the retention policy of ``owner_id``, if any."""
+
+    row = db.get(RetentionPolicyORM, owner_id)
+    return RetentionPolicy.model_validate(row) if row is not None else None
+
+
+def set_policy(
+    db: Session, owner_id: UUID, keep_last: int | None, keep_days: int | None
+) -> RetentionPolicy:
+    """Create or replace the retention policy of ``owner_id``."""
+
+    row = db.get(RetentionPolicyORM, owner_id)
+    if row is None:
+        row = RetentionPolicyORM(owner_id=owner_id)
+        db.add(row)
+    row.keep_last = keep_last
+    row.keep_days = keep_days
+    row.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(row)
+    logger.info(
+        "retention.policy",
+        extra={"user_id": str(owner_id), "keep_last": keep_last, "keep_days": keep_days},
+    )
+    audit_service.record(
+        "retention.policy", owner_id, owner_id, keep_last=keep_last, keep_days=keep_days
+    )
+    return RetentionPolicy.model_validate(row)
+
+
+def _owns(db: Session, prompt_id: UUID, owner_id: UUID) -> bool:
+    return (
+        db.query(PromptHeaderORM.id)
+        .filter(PromptHeaderORM.id == prompt_id, PromptHeaderORM.owner_id == owner_id)
+        .first()
+        is not None
+    )
+
+
+def list_labels(db: Session, prompt_id: UUID, owner_id: UUID) -> List[PromptLabel] | None:
+    """Return the labels of a prompt ordered by name.
+
+    Returns ``None`` if the prompt is not owned by ``owner_id``.
+    """
+
+    if not _owns(db, prompt_id, owner_id):
+        return None
+    rows = (
+        db.query(PromptVersionLabelORM, PromptVersionORM.version)
+        .join(
+            PromptVersionORM,
+            (PromptVersionORM.prompt_id == PromptVersionLabelORM.prompt_id)
+            & (PromptVersionORM.id == PromptVersionLabelORM.version_id),
+        )
+        .filter(PromptVersionLabelORM.prompt_id == prompt_id)
+        .order_by(PromptVersionLabelORM.label)
+        .all()
+    )
+    return [
+        PromptLabel(
+            label=row.label,
+            prompt_id=row.prompt_id,
+            version_id=row.version_id,
+            version=version,
+        )
+        for row, version in rows
+    ]
+
+
+def set_label(
+    db: Session, prompt_id: UUID, owner_id: UUID, label: str, version: int
+) -> PromptLabel | None:
+    """Point ``label`` at ``version`` of a prompt owned by ``owner_id``.
+
+    Returns ``None`` if the version is not in ``prompt_versions`` or the
+    prompt belongs to someone else; pruned versions cannot be labelled.
+    """
+
+    label = _normalize_label(label)
+    version_row = (
+        db.query(PromptVersionORM)
+        .join(PromptHeaderORM, PromptHeaderORM.id == PromptVersionORM.prompt_id)
+        .filter(
+            PromptVersionORM.prompt_id == prompt_id,
+            PromptHeaderORM.owner_id == owner_id,
+            PromptVersionORM.version == version,
+        )
+        .first()
+    )
+    if version_row is None:
+        return None
+    row = db.get(PromptVersionLabelORM, (prompt_id, label))
+    if row is None:
+        row = PromptVersionLabelORM(prompt_id=prompt_id, label=label)
+        db.add(row)
+    row.version_id = version_row.id
+    db.commit()
+    logger.info(
+        "prompts.label",
+        extra={"prompt_id": str(prompt_id), "label": label, "version": version},
+    )
+    audit_service.record("prompts.label", prompt_id, label=label, version=version)
+    return PromptLabel(
+        label=label, prompt_id=prompt_id, version_id=version_row.id, version=version
+    )
+
+
+def remove_label(db: Session, prompt_id: UUID, owner_id: UUID, label: str) -> bool:
+    """Delete a label of a prompt owned by ``owner_id``; returns whether it existed."""
+
+    label = _normalize_label(label)
+    if not _owns(db, prompt_id, owner_id):
+        return False
+    deleted = (
+        db.query(PromptVersionLabelORM)
+        .filter(
+            PromptVersionLabelORM.prompt_id == prompt_id,
+            PromptVersionLabelORM.label == label,
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    if deleted:
+        audit_service.record("prompts.unlabel", prompt_id, label=label)
+    return bool(deleted)
+
+
+def _prunable(db: Session, policy: RetentionPolicyORM, limit: int):
+    """Return ``(id, prompt_id, row_bytes)`` of versions no rule keeps."""
+
+    version = PromptVersionORM
+    ranked = (
+        select(
+            version.id,
+            version.prompt_id,
+            version.created_at,
+            func.row_number()
+            .over(partition_by=version.prompt_id, order_by=version.version.desc())
+            .label("rank"),
+            func.pg_column_size(literal_column("prompt_versions")).label("row_bytes"),
+        )
+        .join(PromptHeaderORM, PromptHeaderORM.id == version.prompt_id)
+        .where(PromptHeaderORM.owner_id == policy.owner_id)
+        .subquery()
+    )
+    stmt = (
+        select(ranked.c.id, ranked.c.prompt_id, ranked.c.row_bytes)
+        .where(ranked.c.rank > max(policy.keep_last or 1, 1))
+        .where(
+            ~exists().where(PromptVersionLabelORM.version_id == ranked.c.id)
+        )
+    )
+    if policy.keep_days:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=policy.keep_days)
+        stmt = stmt.where(ranked.c.created_at < cutoff)
+    return db.execute(stmt.order_by(ranked.c.prompt_id).limit(limit)).all()
+
+
+def _cold_document(version: PromptVersionORM, body: str) -> Dict[str, Any]:
+    document = {name: getattr(version, name) for name in COLD_COLUMNS}
+    document["body"] = body
+    for field in history_service.PAYLOAD_FIELDS:
+        document[field] = blob_service.content(version, field)
+    return document
+
+
+def _archive(db: Session, stats: RetentionStats):
+    def archive(version: PromptVersionORM, body: str) -> None:
+        raw = json.dumps(_cold_document(version, body), default=str).encode()
+        content = zlib.compress(raw, 9)
+        db.add(
+            PromptVersionColdORM(
+                id=version.id,
+                prompt_id=version.prompt_id,
+                version=version.version,
+                content=content,
+                size_bytes=len(raw),
+                created_at=version.created_at,
+            )
+        )
+        stats.cold_bytes += len(content)
+
+    return archive
+
+
+def apply_policy(
+    db: Session, policy: RetentionPolicyORM, batch_size: int = 500
+) -> RetentionStats:
+    """Prune the versions of one owner, committing once per prompt."""
+
+    stats = RetentionStats()
+    if not policy.keep_last and not policy.keep_days:
+        return stats
+    while True:
+        rows = _prunable(db, policy, batch_size)
+        if not rows:
+            break
+        by_prompt: Dict[UUID, set] = defaultdict(set)
+        for version_id, prompt_id, row_bytes in rows:
+            by_prompt[prompt_id].add(version_id)
+            stats.bytes_reclaimed += row_bytes
+        for prompt_id, drop in by_prompt.items():
+            history_service.compact_prompt(
+                db, prompt_id, drop=drop, archive=_archive(db, stats)
+            )
+            sync_service.record(
+                db,
+                policy.owner_id,
+                *(sync_service.version(prompt_id, version_id, deleted=True) for version_id in drop),
+            )
+            db.commit()
+            stats.versions_moved += len(drop)
+    return stats
+
+
+def apply_retention(
+    db: Session, owner_id: UUID | None = None, batch_size: int = 500
+) -> RetentionStats:
+    """Apply the retention policy of one owner, or of every owner."""
+
+    query = db.query(RetentionPolicyORM)
+    if owner_id is not None:
+        query = query.filter(RetentionPolicyORM.owner_id == owner_id)
+    total = RetentionStats()
+    for policy in query.order_by(RetentionPolicyORM.owner_id).all():
+        stats = apply_policy(db, policy, batch_size)
+        total.versions_moved += stats.versions_moved
+        total.bytes_reclaimed += stats.bytes_reclaimed
+        total.cold_bytes += stats.cold_bytes
+    logger.info(
+        "events.retention_applied",
+        extra={
+            "versions_moved": total.versions_moved,
+            "bytes_reclaimed": total.bytes_reclaimed,
+            "cold_bytes": total.cold_bytes,
+        },
+    )
+    return total
+
+
+def cold_version(db: Session, prompt_id: UUID, version: int) -> Dict[str, Any] | None:
+    """Return an archived version as a dict of its columns, if archived."""
+
+    row = (
+        db.query(PromptVersionColdORM)
+        .filter(
+            PromptVersionColdORM.prompt_id == prompt_id,
+            PromptVersionColdORM.version == version,
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    return json.loads(zlib.decompress(row.content))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply version retention policies")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("apply", help="Move pruned versions to cold storage")
+    run.add_argument("--owner-id", type=UUID, default=None)
+    run.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        stats = apply_retention(db, owner_id=args.owner_id, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(
+        f"moved {stats.versions_moved} versions, reclaimed {stats.bytes_reclaimed} bytes "
+        f"({stats.cold_bytes} bytes compressed in cold storage)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,41 @@ from __future__ import annotations
 
 import base64
 import json
+import re
 from dataclasses import dataclass
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, asc, desc, func, or_
-from sqlalchemy.orm import Query, Session
+from sqlalchemy import Numeric, String, and_, asc, case, desc, func, literal, or_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session, load_only, selectinload
 
-from app.models.prompt import PromptHeaderORM, PromptVersionORM
-from app.models.collection import CollectionPromptORM
+from app.models.prompt import (
+    Prompt,
+    PromptBlobORM,
+    PromptCardORM,
+    PromptVersionORM,
+    PromptView,
+)
+from app.models.collection import CollectionPromptORM, SmartCollectionPromptORM
+from app.services import blob_service
+
+HEADER_FIELDS = frozenset({"owner_id", "title", "tags"})
+"""Prompt fields that are read from the card rather than the version."""
+
+IDENTITY_FIELDS = ("id", "prompt_id", "version")
+"""Prompt fields always returned, even for sparse fieldsets."""
+
+JSON_FILTER_FIELDS = frozenset({"llm_parameters", "success_metrics"})
+"""JSONB prompt fields that accept path predicates."""
+
+_JSON_FILTER_RE = re.compile(
+    r"^\s*(?P<field>\w+)\.(?P<path>\w+(?:\.\w+)*)\s*"
+    r"(?P<op><=|>=|<|>|=)\s*(?P<value>.+?)\s*$"
+)
 
 
 class SearchSort(str, Enum):
@@ -22,6 +46,31 @@ class SearchSort(str, Enum):
     created_desc = "created_desc"
     title_asc = "title_asc"
     relevance_desc = "relevance_desc"
+    position = "position"
+    added_desc = "added_desc"
+
+
+COLLECTION_SORTS = frozenset({SearchSort.position, SearchSort.added_desc})
+"""Sort orders read from ``collection_prompts``; they require a collection.
+
+Queries using them yield ``position`` and ``added_at`` after the card.
+"""
+
+class FacetMatch(str, Enum):
+    """How multiple values of an array facet filter are combined."""
+
+    any = "any"
+    all = "all"
+
+
+@dataclass(frozen=True)
+class JsonPredicate:
+    """Comparison against a value nested in a JSONB prompt field."""
+
+    field: str
+    path: Tuple[str, ...]
+    op: str
+    value: Any
 
 
 @dataclass
@@ -37,12 +86,168 @@ class SearchFilters:
     providers: Optional[List[str]] = None
     purposes: Optional[List[str]] = None
     collection_id: Optional[UUID] = None
+    smart_collection_id: Optional[UUID] = None
+    category: Optional[List[str]] = None
+    complexity: Optional[List[str]] = None
+    audience: Optional[List[str]] = None
+    status: Optional[List[str]] = None
+    where: Optional[List[JsonPredicate]] = None
+    match: FacetMatch = FacetMatch.all
     sort: SearchSort = SearchSort.updated_desc
     limit: int = 20
     after: Optional[str] = None
+    view: PromptView = PromptView.full
+    fields: Optional[List[str]] = None
+
+
+def parse_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Parse a sparse fieldset into prompt field names.
+
+    Each value may itself be comma separated (``fields=title,tags``).
+    Identity fields are always included.  Unknown names raise
+    :class:`ValueError`.
+    """
+
+    if not fields:
+        return None
+    requested = [
+        name.strip() for value in fields for name in value.split(",") if name.strip()
+    ]
+    unknown = sorted(set(requested) - set(Prompt.model_fields))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    selected = list(IDENTITY_FIELDS)
+    for name in requested:
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def parse_json_filters(values: Optional[List[str]]) -> Optional[List[JsonPredicate]]:
+    """Parse ``field.path <op> value`` expressions into predicates.
+
+    ``field`` must be one of :data:`JSON_FILTER_FIELDS` and ``op`` one of
+    ``=``, ``<``, ``<=``, ``>`` or ``>=``.  Values are decoded as JSON when
+    possible and kept as strings otherwise; range operators require numbers.
+    Invalid expressions raise :class:`ValueError`.
+    """
+
+    if not values:
+        return None
+    predicates = []
+    for raw in values:
+        match = _JSON_FILTER_RE.match(raw)
+        if not match or match["field"] not in JSON_FILTER_FIELDS:
+            raise ValueError(f"invalid filter expression: {raw}")
+        try:
+            value = json.loads(match["value"])
+        except ValueError:
+            value = match["value"]
+        if match["op"] != "=" and (
+            isinstance(value, bool) or not isinstance(value, (int, float))
+        ):
+            raise ValueError(f"range filters require a number: {raw}")
+        predicates.append(
+            JsonPredicate(
+                field=match["field"],
+                path=tuple(match["path"].split(".")),
+                op=match["op"],
+                value=value,
+            )
+        )
+    return predicates
+
+
+def json_number(column, path: Tuple[str, ...]):
+    """Return the numeric value at ``path`` in ``column`` or ``NULL``.
+
+    Non-numeric values yield ``NULL`` instead of a cast error.  For
+    single-key paths the expression matches the ``ix_prompt_cards_<key>``
+    expression indexes.
+    """
+
+    # Explicit operators rather than subscripts: the planner only matches an
+    # expression index written with the same operators.
+    if len(path) == 1:
+        key, get, get_text = path[0], "->", "->>"
+    else:
+        key, get, get_text = postgresql.array(path), "#>", "#>>"
+    node = column.op(get)(key)
+    text_value = column.op(get_text, return_type=String())(key)
+    return case(
+        (func.jsonb_typeof(node) == "number", text_value.cast(Numeric)),
+    )
+
+
+def _json_clause(column, predicate: JsonPredicate):
+    """Translate a :class:`JsonPredicate` into an index-served clause.
+
+    Equality becomes containment (``@>``), served by the column's
+    ``jsonb_path_ops`` GIN index; ranges compare :func:`json_number`.
+    """
+
+    if predicate.op == "=":
+        document: Any = predicate.value
+        for key in reversed(predicate.path):
+            document = {key: document}
+        return column.contains(document)
+    number = json_number(column, predicate.path)
+    # Bind as NUMERIC so the comparison is not widened to double precision,
+    # which would stop the planner from matching the expression index.
+    value = literal(Decimal(str(predicate.value)), Numeric())
+    if predicate.op == "<":
+        return number < value
+    if predicate.op == "<=":
+        return number <= value
+    if predicate.op == ">":
+        return number > value
+    return number >= value
 
 
-def encode_cursor(row: Tuple[PromptVersionORM, PromptHeaderORM], sort: SearchSort) -> str:
+def _offload_refs(fields: Optional[List[str]]) -> List[Any]:
+    """Eagerly load size metadata of offloaded payloads, without content."""
+
+    names = [
+        name
+        for name in blob_service.OFFLOAD_FIELDS
+        if not fields or name in fields or "payloads" in fields
+    ]
+    return [
+        selectinload(getattr(PromptVersionORM, f"{name}_blob")).load_only(
+            PromptBlobORM.digest, PromptBlobORM.size_bytes, PromptBlobORM.storage
+        )
+        for name in names
+    ]
+
+
+def _projection(query: Query, filters: SearchFilters) -> Query:
+    """Restrict loaded version columns to what the requested view needs.
+
+    Summary views never touch ``prompt_versions``; sparse fieldsets load
+    only the requested version columns.  Offloaded payloads are never read
+    by list views, only their size metadata.
+    """
+
+    if filters.view != PromptView.full:
+        return query
+    if not filters.fields:
+        return query.options(*_offload_refs(None))
+    names = list(filters.fields)
+    if "payloads" in names:
+        names.remove("payloads")
+        names += [name for name in blob_service.OFFLOAD_FIELDS if name not in names]
+    columns = [
+        getattr(PromptVersionORM, name) for name in names if name not in HEADER_FIELDS
+    ]
+    columns += [
+        getattr(PromptVersionORM, f"{name}_digest")
+        for name in names
+        if name in blob_service.BLOB_FIELDS
+    ]
+    return query.options(load_only(*columns), *_offload_refs(filters.fields))
+
+
+def encode_cursor(row: Tuple[Any, ...], sort: SearchSort) -> str:
     """Encode a database row into an opaque cursor string.
 
     The cursor is a base64-encoded JSON payload containing the primary
@@ -52,7 +257,11 @@ def encode_cursor(row: Tuple[PromptVersionORM, PromptHeaderORM], sort: SearchSor
     """
 
     header = row[1]
-    if sort == SearchSort.created_desc:
+    if sort == SearchSort.position:
+        key = row[2]
+    elif sort == SearchSort.added_desc:
+        key = row[3].isoformat()
+    elif sort == SearchSort.created_desc:
         key = header.created_at.isoformat()
     elif sort == SearchSort.title_asc:
         key = header.title
@@ -76,8 +285,20 @@ def _apply_after_clause(query: Query, filters: SearchFilters) -> Query:
     if not filters.after:
         return query
     key, pid = decode_cursor(filters.after)
-    header = PromptHeaderORM
-    if filters.sort == SearchSort.created_desc:
+    header = PromptCardORM
+    link = CollectionPromptORM
+    if filters.sort == SearchSort.position:
+        clause = or_(
+            link.position > key,
+            and_(link.position == key, link.prompt_id > pid),
+        )
+    elif filters.sort == SearchSort.added_desc:
+        key_dt = datetime.fromisoformat(key)
+        clause = or_(
+            link.added_at < key_dt,
+            and_(link.added_at == key_dt, link.prompt_id < pid),
+        )
+    elif filters.sort == SearchSort.created_desc:
         key_dt = datetime.fromisoformat(key)
         clause = or_(
             header.created_at < key_dt,
@@ -97,68 +318,111 @@ def _apply_after_clause(query: Query, filters: SearchFilters) -> Query:
     return query.filter(clause)
 
 
+def _facet_clause(column, values: List[str], match: FacetMatch):
+    """Return an array predicate served by the column's GIN index.
+
+    ``any`` maps to overlap (``&&``) and ``all`` to containment (``@>``).
+    """
+
+    operator = "&&" if match == FacetMatch.any else "@>"
+    return column.op(operator)(values)
+
+
 def build_query(db: Session, filters: SearchFilters) -> Query:
-    """Construct an SQLAlchemy query applying search filters and sorting."""
+    """Construct an SQLAlchemy query applying search filters and sorting.
 
-    latest = (
-        db.query(
-            PromptVersionORM.prompt_id.label("pid"),
-            func.max(PromptVersionORM.version).label("maxv"),
-        )
-        .group_by(PromptVersionORM.prompt_id)
-        .subquery()
-    )
+    Listings read the ``prompt_cards`` read model.  Full views join the
+    current version row by primary key and yield ``(version, card)`` rows;
+    summary views yield bare cards.  The join includes ``prompt_id`` so each
+    lookup is pruned to one ``prompt_versions`` partition.  The
+    :data:`COLLECTION_SORTS` page through ``collection_prompts`` in index
+    order and raise :class:`ValueError` without ``collection_id``.
+    ``smart_collection_id`` reads members from ``smart_collection_prompts``.
+    """
 
-    query: Query = (
-        db.query(PromptVersionORM, PromptHeaderORM)
-        .join(PromptHeaderORM, PromptHeaderORM.id == PromptVersionORM.prompt_id)
-        .join(
-            latest,
-            and_(
-                PromptVersionORM.prompt_id == latest.c.pid,
-                PromptVersionORM.version == latest.c.maxv,
-            ),
-        )
-        .filter(PromptHeaderORM.owner_id == filters.owner_id)
+    if filters.sort in COLLECTION_SORTS and not filters.collection_id:
+        raise ValueError(f"sort={filters.sort.value} requires a collection")
+    card = PromptCardORM
+    version_key = and_(
+        PromptVersionORM.prompt_id == card.id, PromptVersionORM.id == card.version_id
     )
+    if filters.view == PromptView.summary:
+        query: Query = db.query(card)
+    else:
+        query = db.query(PromptVersionORM, card).join(card, version_key)
+    query = query.filter(card.owner_id == filters.owner_id)
 
     if filters.q:
+        if filters.view == PromptView.summary:
+            query = query.join(PromptVersionORM, version_key)
         pattern = f"%{filters.q}%"
         query = query.filter(
             or_(
-                PromptHeaderORM.title.ilike(pattern),
+                card.title.ilike(pattern),
                 PromptVersionORM.body.ilike(pattern),
             )
         )
     if filters.tags:
-        query = query.filter(PromptHeaderORM.tags.op('@>')(filters.tags))
+        query = query.filter(_facet_clause(card.tags, filters.tags, filters.match))
+    # Bare/negated boolean columns match the partial index predicates
+    # (``NOT is_archived``, ``is_favorite AND NOT is_archived``) verbatim.
     if filters.favorite is not None:
-        query = query.filter(PromptHeaderORM.is_favorite == filters.favorite)
+        query = query.filter(card.is_favorite if filters.favorite else ~card.is_favorite)
     if filters.archived is not None:
-        query = query.filter(PromptHeaderORM.is_archived == filters.archived)
+        query = query.filter(card.is_archived if filters.archived else ~card.is_archived)
     if filters.target_models:
         query = query.filter(
-            PromptVersionORM.target_models.contains(filters.target_models)
+            _facet_clause(card.target_models, filters.target_models, filters.match)
         )
     if filters.providers:
-        query = query.filter(PromptVersionORM.providers.contains(filters.providers))
+        query = query.filter(
+            _facet_clause(card.providers, filters.providers, filters.match)
+        )
     if filters.purposes:
-        query = query.filter(PromptVersionORM.use_cases.contains(filters.purposes))
+        query = query.filter(
+            _facet_clause(card.use_cases, filters.purposes, filters.match)
+        )
+    for name in ("category", "complexity", "audience", "status"):
+        values = getattr(filters, name)
+        if values:
+            query = query.filter(getattr(card, name).in_(values))
+    for predicate in filters.where or ():
+        query = query.filter(
+            _json_clause(getattr(card, predicate.field), predicate)
+        )
     if filters.collection_id:
         query = query.join(
             CollectionPromptORM,
-            CollectionPromptORM.prompt_id == PromptHeaderORM.id,
+            CollectionPromptORM.prompt_id == card.id,
         ).filter(CollectionPromptORM.collection_id == filters.collection_id)
+        if filters.sort in COLLECTION_SORTS:
+            query = query.add_columns(
+                CollectionPromptORM.position, CollectionPromptORM.added_at
+            )
+    if filters.smart_collection_id:
+        query = query.join(
+            SmartCollectionPromptORM,
+            SmartCollectionPromptORM.prompt_id == card.id,
+        ).filter(SmartCollectionPromptORM.collection_id == filters.smart_collection_id)
 
+    query = _projection(query, filters)
     query = _apply_after_clause(query, filters)
 
-    if filters.sort == SearchSort.created_desc:
-        query = query.order_by(desc(PromptHeaderORM.created_at), desc(PromptHeaderORM.id))
+    if filters.sort == SearchSort.position:
+        query = query.order_by(
+            asc(CollectionPromptORM.position), asc(CollectionPromptORM.prompt_id)
+        )
+    elif filters.sort == SearchSort.added_desc:
+        query = query.order_by(
+            desc(CollectionPromptORM.added_at), desc(CollectionPromptORM.prompt_id)
+        )
+    elif filters.sort == SearchSort.created_desc:
+        query = query.order_by(desc(card.created_at), desc(card.id))
     elif filters.sort == SearchSort.title_asc:
-        query = query.order_by(asc(PromptHeaderORM.title), desc(PromptHeaderORM.id))
+        query = query.order_by(asc(card.title), desc(card.id))
     else:
         # relevance_desc falls back to updated_at sort without similarity scoring
-        query = query.order_by(desc(PromptHeaderORM.updated_at), desc(PromptHeaderORM.id))
+        query = query.order_by(desc(card.updated_at), desc(card.id))
 
     limit = max(1, min(filters.limit, 50))
     return query.limit(limit + 1)
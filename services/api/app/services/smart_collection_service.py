@@ -0,0 +1,210 @@
+"""Smart collections: collections defined by a saved search.
+
+A smart collection keeps the filters of ``GET /prompts`` in
+``collections.filters``.  Its members are evaluated with
+:func:`search_service.build_query` and materialized in
+``smart_collection_prompts``, so listing one reads a join table exactly like
+a static collection.
+
+The cache is kept current against the owner's change sequence, the
+generation ``sync_counters.seq`` bumped by every prompt write (see
+:mod:`app.services.sync_service`).  ``collections.refreshed_seq`` records
+the sequence the cache reflects; :func:`refresh` re-evaluates only the
+prompts whose ``sync_changes`` row is newer, and deleted prompts leave the
+cache through its foreign key.  Refreshes run from the outbox dispatcher on
+prompt events when this module is listed in ``OUTBOX_HANDLER_MODULES``, and
+before a stale collection is listed, so pages never lag the library.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import delete, literal, update
+from sqlalchemy.dialects.postgresql import UUID as SA_UUID, insert
+from sqlalchemy.orm import Query, Session
+
+from app.models.collection import CollectionORM, SmartCollectionFilters, SmartCollectionPromptORM
+from app.models.prompt import PromptCardORM
+from app.models.sync import SyncChangeORM, SyncCounterORM, SyncEntity
+from app.services import outbox_service, prompt_service, search_service
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidFilters(ValueError):
+    """Saved filters that ``GET /prompts`` would reject."""
+
+
+REFRESH_EVENTS = (
+    outbox_service.PROMPT_CREATED,
+    outbox_service.PROMPT_UPDATED,
+    outbox_service.PROMPT_DUPLICATED,
+)
+
+
+def dump_filters(owner_id: UUID, filters: SmartCollectionFilters) -> Dict[str, Any]:
+    """Validate ``filters`` and return them in their stored form.
+
+    Invalid filters raise :class:`InvalidFilters`.
+    """
+
+    data = filters.model_dump(exclude_none=True)
+    try:
+        prompt_service.search_filters(owner_id, **data)
+    except ValueError as exc:
+        raise InvalidFilters(str(exc)) from exc
+    return data
+
+
+def _members(db: Session, owner_id: UUID, data: Dict[str, Any]) -> Query:
+    """Query the ids of the owner's prompts matching stored filters."""
+
+    filters = prompt_service.search_filters(owner_id, view="summary", **data)
+    return (
+        search_service.build_query(db, filters)
+        .limit(None)
+        .order_by(None)
+        .with_entities(PromptCardORM.id)
+    )
+
+
+def current_seq(db: Session, owner_id: UUID) -> int:
+    counter = db.get(SyncCounterORM, owner_id)
+    return counter.seq if counter is not None else 0
+
+
+def _mark_refreshed(db: Session, collection_id: UUID, seq: int) -> None:
+    db.execute(
+        update(CollectionORM)
+        .where(CollectionORM.id == collection_id)
+        # Refreshing the cache is not an edit of the collection.
+        .values(refreshed_seq=seq, updated_at=CollectionORM.updated_at)
+    )
+
+
+def rebuild(db: Session, collection: CollectionORM) -> None:
+    """Re-evaluate every member of ``collection`` in the current transaction."""
+
+    seq = current_seq(db, collection.owner_id)
+    db.execute(
+        delete(SmartCollectionPromptORM).where(
+            SmartCollectionPromptORM.collection_id == collection.id
+        )
+    )
+    members = _members(db, collection.owner_id, collection.filters).with_entities(
+        literal(collection.id, SA_UUID(as_uuid=True)), PromptCardORM.id
+    )
+    db.execute(
+        insert(SmartCollectionPromptORM).from_select(
+            ["collection_id", "prompt_id"], members.statement
+        )
+    )
+    _mark_refreshed(db, collection.id, seq)
+
+
+def refresh(db: Session, collection_id: UUID) -> bool:
+    """Bring the cache of a smart collection up to the owner's sequence.
+
+    Only prompts changed since ``refreshed_seq`` are re-evaluated.  Returns
+    ``False`` when the cache was already current.
+    """
+
+    collection = (
+        db.query(CollectionORM)
+        .filter(CollectionORM.id == collection_id)
+        .with_for_update()
+        .first()
+    )
+    if collection is None or collection.filters is None:
+        db.rollback()
+        return False
+    seq = current_seq(db, collection.owner_id)
+    if collection.refreshed_seq is None:
+        rebuild(db, collection)
+        db.commit()
+        return True
+    if collection.refreshed_seq >= seq:
+        db.rollback()
+        return False
+    changed: List[UUID] = [
+        entity_id
+        for (entity_id,) in db.query(SyncChangeORM.entity_id).filter(
+            SyncChangeORM.owner_id == collection.owner_id,
+            SyncChangeORM.entity == SyncEntity.PROMPT.value,
+            SyncChangeORM.seq > collection.refreshed_seq,
+            SyncChangeORM.seq <= seq,
+            SyncChangeORM.deleted.is_(False),
+        )
+    ]
+    if changed:
+        matching = {
+            prompt_id
+            for (prompt_id,) in _members(db, collection.owner_id, collection.filters).filter(
+                PromptCardORM.id.in_(changed)
+            )
+        }
+        db.execute(
+            delete(SmartCollectionPromptORM).where(
+                SmartCollectionPromptORM.collection_id == collection.id,
+                SmartCollectionPromptORM.prompt_id.in_(set(changed) - matching),
+            )
+        )
+        if matching:
+            db.execute(
+                insert(SmartCollectionPromptORM)
+                .values(
+                    [
+                        {"collection_id": collection.id, "prompt_id": prompt_id}
+                        for prompt_id in matching
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+    _mark_refreshed(db, collection.id, seq)
+    db.commit()
+    logger.info(
+        "collections.smart_refresh",
+        extra={
+            "user_id": str(collection.owner_id),
+            "collection_id": str(collection.id),
+            "count": len(changed),
+        },
+    )
+    return True
+
+
+def refresh_owner(db: Session, owner_id: UUID) -> int:
+    """Refresh every stale smart collection of ``owner_id``; returns how many."""
+
+    seq = current_seq(db, owner_id)
+    stale = [
+        collection_id
+        for (collection_id,) in db.query(CollectionORM.id).filter(
+            CollectionORM.owner_id == owner_id,
+            CollectionORM.filters.isnot(None),
+            (CollectionORM.refreshed_seq.is_(None)) | (CollectionORM.refreshed_seq < seq),
+        )
+    ]
+    for collection_id in stale:
+        refresh(db, collection_id)
+    return len(stale)
+
+
+def _on_prompt_change(event: outbox_service.OutboxEvent) -> None:
+    owner_id = event.payload.get("owner_id")
+    if owner_id is None:
+        return
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_owner(db, UUID(owner_id))
+    finally:
+        db.close()
+
+
+for _event_type in REFRESH_EVENTS:
+    outbox_service.register_handler(_event_type, _on_prompt_change)
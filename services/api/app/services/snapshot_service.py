@@ -0,0 +1,259 @@
+"""Compressed library snapshots for client cold start.
+
+A snapshot is a gzip-compressed NDJSON file holding everything a client
+needs to start from scratch: a ``header`` line with the change sequence it
+reflects and the delta-sync token to continue from, then one line per
+``prompt``, ``collection``, ``collection_link`` and ``tag``; as in delta
+sync, links cover static collections only.  All of it is read in one
+``REPEATABLE READ`` transaction, so the bundle matches its sequence number
+exactly; a client loads it and then calls ``GET /sync/prompts`` with
+``next_token``.
+
+Bundles are built by the ``snapshots.build`` job and cached under
+``SNAPSHOT_PATH`` as ``<owner_id>/<seq>.ndjson.gz``.  A bundle for the
+owner's current sequence is reused until the library changes again; the
+newest ``SNAPSHOT_KEEP`` bundles per owner are kept so downloads in
+progress can finish.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.collection import Collection, CollectionORM, CollectionPromptORM
+from app.models.job import JobORM
+from app.models.prompt import PromptCardORM
+from app.models.sync import Snapshot, SnapshotStatus, SyncCounterORM
+from app.services import job_service, prompt_service, sync_service
+
+logger = logging.getLogger(__name__)
+
+BUILD_TASK = "snapshots.build"
+FORMAT_VERSION = 1
+_SUFFIX = ".ndjson.gz"
+
+
+def _root() -> Path:
+    return Path(settings.SNAPSHOT_PATH)
+
+
+def bundle_path(owner_id: UUID, seq: int) -> Path:
+    return _root() / str(owner_id) / f"{seq}{_SUFFIX}"
+
+
+def current_seq(db: Session, owner_id: UUID) -> int:
+    counter = db.get(SyncCounterORM, owner_id)
+    return counter.seq if counter is not None else 0
+
+
+def _bundles(owner_id: UUID) -> List[int]:
+    """Sequence numbers of the owner's cached bundles, newest first."""
+
+    directory = _root() / str(owner_id)
+    if not directory.is_dir():
+        return []
+    seqs = []
+    for path in directory.glob(f"*{_SUFFIX}"):
+        name = path.name[: -len(_SUFFIX)]
+        if name.isdigit():
+            seqs.append(int(name))
+    return sorted(seqs, reverse=True)
+
+
+def _info(owner_id: UUID, seq: int) -> Snapshot | None:
+    try:
+        stat = bundle_path(owner_id, seq).stat()
+    except FileNotFoundError:
+        return None
+    return Snapshot.model_construct(
+        seq=seq,
+        status=SnapshotStatus.READY,
+        size_bytes=stat.st_size,
+        created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+        url=f"{settings.API_V1_STR}/snapshots/{seq}",
+        next_token=sync_service.encode_token(seq),
+    )
+
+
+def get_snapshot(owner_id: UUID, seq: int) -> Snapshot | None:
+    """Return the cached bundle of ``owner_id`` at ``seq``, if built."""
+
+    return _info(owner_id, seq)
+
+
+def latest_snapshot(owner_id: UUID) -> Snapshot | None:
+    """Return the newest cached bundle of ``owner_id``, current or not."""
+
+    for seq in _bundles(owner_id):
+        info = _info(owner_id, seq)
+        if info is not None:
+            return info
+    return None
+
+
+def read_bundle(
+    owner_id: UUID, seq: int, start: int = 0, end: int | None = None, chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Yield the bytes in ``[start, end)`` of a cached bundle in chunks."""
+
+    with bundle_path(owner_id, seq).open("rb") as fh:
+        fh.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = fh.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def request_snapshot(db: Session, owner_id: UUID) -> Snapshot:
+    """Return the bundle for the current sequence, queuing a build if missing.
+
+    At most one build per owner is queued or running at a time.
+    """
+
+    seq = current_seq(db, owner_id)
+    info = _info(owner_id, seq)
+    if info is not None:
+        return info
+    building = (
+        db.query(JobORM.id)
+        .filter(
+            JobORM.task == BUILD_TASK,
+            JobORM.status.in_(("queued", "running")),
+            JobORM.payload["owner_id"].astext == str(owner_id),
+        )
+        .first()
+    )
+    if building is None:
+        job_service.enqueue(db, BUILD_TASK, {"owner_id": str(owner_id)})
+        db.commit()
+        logger.info("snapshots.requested", extra={"user_id": str(owner_id), "seq": seq})
+    return Snapshot.model_construct(
+        seq=seq,
+        status=SnapshotStatus.PENDING,
+        size_bytes=None,
+        created_at=None,
+        url=None,
+        next_token=sync_service.encode_token(seq),
+    )
+
+
+def _line(kind: str, data: str) -> bytes:
+    """Prefix the non-empty JSON object ``data`` with its record type."""
+
+    return f'{{"type":"{kind}",{data[1:]}\n'.encode()
+
+
+def _records(db: Session, owner_id: UUID, seq: int, batch_size: int) -> Iterator[bytes]:
+    yield _line(
+        "header",
+        json.dumps(
+            {
+                "format": FORMAT_VERSION,
+                "owner_id": str(owner_id),
+                "seq": seq,
+                "next_token": sync_service.encode_token(seq),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+        ),
+    )
+    tags: Counter = Counter()
+    after = None
+    while True:
+        query = db.query(PromptCardORM.id).filter(PromptCardORM.owner_id == owner_id)
+        if after is not None:
+            query = query.filter(PromptCardORM.id > after)
+        ids = [row.id for row in query.order_by(PromptCardORM.id).limit(batch_size)]
+        if not ids:
+            break
+        after = ids[-1]
+        prompts = prompt_service.get_prompts(db, ids, owner_id=owner_id)
+        for prompt_id in ids:
+            prompt = prompts.get(prompt_id)
+            if prompt is None:
+                continue
+            tags.update(prompt.tags or [])
+            yield _line("prompt", prompt.model_dump_json())
+    collections = (
+        db.query(CollectionORM)
+        .filter(CollectionORM.owner_id == owner_id)
+        .order_by(CollectionORM.id)
+        .all()
+    )
+    for row in collections:
+        yield _line("collection", Collection.model_validate(row).model_dump_json())
+    links = (
+        db.query(
+            CollectionPromptORM.collection_id,
+            CollectionPromptORM.prompt_id,
+            CollectionPromptORM.position,
+        )
+        .join(CollectionORM, CollectionORM.id == CollectionPromptORM.collection_id)
+        .filter(CollectionORM.owner_id == owner_id)
+        .order_by(CollectionPromptORM.collection_id, CollectionPromptORM.position)
+    )
+    for collection_id, prompt_id, position in links:
+        yield _line(
+            "collection_link",
+            json.dumps(
+                {
+                    "collection_id": str(collection_id),
+                    "prompt_id": str(prompt_id),
+                    "position": position,
+                }
+            ),
+        )
+    for tag, count in sorted(tags.items()):
+        yield _line("tag", json.dumps({"tag": tag, "count": count}))
+
+
+def build_snapshot(db: Session, owner_id: UUID, batch_size: int = 500) -> Snapshot:
+    """Write the bundle for the owner's current sequence unless it is cached.
+
+    ``db`` must not be inside a transaction: the sequence and the data are
+    read from one consistent snapshot.
+    """
+
+    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"))
+    try:
+        seq = current_seq(db, owner_id)
+        path = bundle_path(owner_id, seq)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file and rename so readers never see a partial bundle.
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{seq}.")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                    fileobj=raw, mode="wb", compresslevel=settings.SNAPSHOT_COMPRESS_LEVEL, mtime=0
+                ) as out:
+                    for line in _records(db, owner_id, seq, batch_size):
+                        out.write(line)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            logger.info(
+                "snapshots.built",
+                extra={"user_id": str(owner_id), "seq": seq, "size_bytes": path.stat().st_size},
+            )
+    finally:
+        db.rollback()
+    for old in _bundles(owner_id)[settings.SNAPSHOT_KEEP :]:
+        bundle_path(owner_id, old).unlink(missing_ok=True)
+    return _info(owner_id, seq)
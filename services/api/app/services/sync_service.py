@@ -0,0 +1,342 @@
+"""Incremental sync of a user's library for offline clients.
+
+Write paths call :func:`record` before they commit.  It takes the next
+numbers from the owner's ``sync_counters`` row and upserts one
+``sync_changes`` row per touched record, so each record appears once with
+its newest sequence number.  Because the counter row stays locked until
+the writer commits, an owner's changes become visible in sequence order
+and a token never skips a change that commits later.
+
+:func:`changes` returns the records changed after a token, in sequence
+order and in bounded pages, so a sync costs in proportion to what changed
+rather than to the size of the library.  Deleted records come back as
+tombstones; records that have since disappeared are reported the same way.
+Collection links are those of static collections only: smart collections
+sync with their filters, and clients page their members from
+``GET /collections/{id}/prompts``.
+Tombstones older than ``--older-than-days`` can be removed with
+``python -m app.services.sync_service prune``; a client whose token predates
+the pruned range gets :class:`ResyncRequired` and starts again from zero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, load_only
+
+from app.models.collection import Collection, CollectionORM, CollectionPromptORM
+from app.models.prompt import PromptVersionORM, PromptVersionSummary
+from app.models.sync import (
+    CollectionLink,
+    SyncChangeORM,
+    SyncCounterORM,
+    SyncEntity,
+    SyncResponse,
+    SyncTombstone,
+)
+from app.services import prompt_service
+
+logger = logging.getLogger(__name__)
+
+
+class ResyncRequired(ValueError):
+    """The token predates pruned tombstones; sync again from the start."""
+
+
+@dataclass(frozen=True)
+class Change:
+    """A record touched by a write."""
+
+    entity: SyncEntity
+    id: UUID
+    parent_id: UUID | None = None
+    deleted: bool = False
+
+
+def prompt(prompt_id: UUID) -> Change:
+    return Change(SyncEntity.PROMPT, prompt_id)
+
+
+def version(prompt_id: UUID, version_id: UUID, deleted: bool = False) -> Change:
+    return Change(SyncEntity.VERSION, version_id, prompt_id, deleted)
+
+
+def collection(collection_id: UUID, deleted: bool = False) -> Change:
+    return Change(SyncEntity.COLLECTION, collection_id, deleted=deleted)
+
+
+def collection_prompt(collection_id: UUID, prompt_id: UUID, deleted: bool = False) -> Change:
+    return Change(SyncEntity.COLLECTION_PROMPT, prompt_id, collection_id, deleted)
+
+
+def reserve(db: Session, owner_id: UUID, count: int = 1) -> int:
+    """Take the owner's next ``count`` sequence numbers; returns the last.
+
+    The counter row stays locked until the transaction commits.
+    """
+
+    return db.execute(
+        insert(SyncCounterORM)
+        .values(owner_id=owner_id, seq=count)
+        .on_conflict_do_update(
+            index_elements=[SyncCounterORM.owner_id],
+            set_={"seq": SyncCounterORM.seq + count},
+        )
+        .returning(SyncCounterORM.seq)
+    ).scalar_one()
+
+
+def record(db: Session, owner_id: UUID, *changes: Change) -> int:
+    """Stamp ``changes`` with the owner's next sequence numbers; returns the last.
+
+    Must run in the transaction making the changes, as late as possible:
+    the counter row stays locked until it commits.
+    """
+
+    if not changes:
+        return 0
+    last = reserve(db, owner_id, len(changes))
+    first = last - len(changes) + 1
+    rows = {}
+    for offset, change in enumerate(changes):
+        parent_id = change.parent_id or change.id
+        # A record touched twice in one write keeps its last change.
+        rows[(change.entity.value, change.id, parent_id)] = {
+            "owner_id": owner_id,
+            "entity": change.entity.value,
+            "entity_id": change.id,
+            "parent_id": parent_id,
+            "seq": first + offset,
+            "deleted": change.deleted,
+        }
+    stmt = insert(SyncChangeORM).values(list(rows.values()))
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                SyncChangeORM.owner_id,
+                SyncChangeORM.entity,
+                SyncChangeORM.entity_id,
+                SyncChangeORM.parent_id,
+            ],
+            set_={
+                "seq": stmt.excluded.seq,
+                "deleted": stmt.excluded.deleted,
+                "changed_at": func.now(),
+            },
+        )
+    )
+    return last
+
+
+def encode_token(seq: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"seq": seq}).encode()).decode()
+
+
+def decode_token(token: str | None) -> int:
+    if not token:
+        return 0
+    try:
+        seq = json.loads(base64.urlsafe_b64decode(token.encode()))["seq"]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("invalid sync token") from exc
+    if not isinstance(seq, int) or seq < 0:
+        raise ValueError("invalid sync token")
+    return seq
+
+
+def _versions(db: Session, keys: List[Tuple[UUID, UUID]]) -> Dict[UUID, PromptVersionSummary]:
+    if not keys:
+        return {}
+    rows = (
+        db.query(PromptVersionORM)
+        .options(
+            load_only(
+                PromptVersionORM.id,
+                PromptVersionORM.prompt_id,
+                PromptVersionORM.version,
+                PromptVersionORM.status,
+                PromptVersionORM.created_at,
+                PromptVersionORM.updated_at,
+            )
+        )
+        # ``prompt_id`` first so only the partitions holding the prompts are read.
+        .filter(
+            PromptVersionORM.prompt_id.in_({prompt_id for prompt_id, _ in keys}),
+            tuple_(PromptVersionORM.prompt_id, PromptVersionORM.id).in_(keys),
+        )
+        .all()
+    )
+    return {
+        row.id: PromptVersionSummary.model_construct(
+            id=row.id,
+            prompt_id=row.prompt_id,
+            version=row.version,
+            status=row.status,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
+        for row in rows
+    }
+
+
+def _collections(db: Session, ids: List[UUID], owner_id: UUID) -> Dict[UUID, Collection]:
+    if not ids:
+        return {}
+    rows = (
+        db.query(CollectionORM)
+        .filter(CollectionORM.id.in_(ids), CollectionORM.owner_id == owner_id)
+        .all()
+    )
+    return {row.id: Collection.model_validate(row) for row in rows}
+
+
+def _links(db: Session, keys: List[Tuple[UUID, UUID]]) -> Dict[Tuple[UUID, UUID], str]:
+    if not keys:
+        return {}
+    rows = (
+        db.query(
+            CollectionPromptORM.collection_id,
+            CollectionPromptORM.prompt_id,
+            CollectionPromptORM.position,
+        )
+        .filter(tuple_(CollectionPromptORM.collection_id, CollectionPromptORM.prompt_id).in_(keys))
+        .all()
+    )
+    return {(collection_id, prompt_id): position for collection_id, prompt_id, position in rows}
+
+
+def changes(db: Session, owner_id: UUID, since: str | None, limit: int = 500) -> SyncResponse:
+    """Return up to ``limit`` records changed after the ``since`` token.
+
+    Raises ``ValueError`` for a malformed token and :class:`ResyncRequired`
+    when tombstones the client may not have seen were pruned.
+    """
+
+    after = decode_token(since)
+    counter = db.get(SyncCounterORM, owner_id)
+    if counter is not None and 0 < after < counter.floor_seq:
+        raise ResyncRequired("sync token expired; sync again without `since`")
+
+    rows: List[SyncChangeORM] = (
+        db.query(SyncChangeORM)
+        .filter(SyncChangeORM.owner_id == owner_id, SyncChangeORM.seq > after)
+        .order_by(SyncChangeORM.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live: Dict[str, List[SyncChangeORM]] = defaultdict(list)
+    for row in rows:
+        if not row.deleted:
+            live[row.entity].append(row)
+    prompts = prompt_service.get_prompts(
+        db, [row.entity_id for row in live[SyncEntity.PROMPT.value]], owner_id=owner_id
+    )
+    versions = _versions(db, [(row.parent_id, row.entity_id) for row in live[SyncEntity.VERSION.value]])
+    collections = _collections(
+        db, [row.entity_id for row in live[SyncEntity.COLLECTION.value]], owner_id
+    )
+    links = _links(
+        db, [(row.parent_id, row.entity_id) for row in live[SyncEntity.COLLECTION_PROMPT.value]]
+    )
+
+    response = SyncResponse.model_construct(
+        prompts=[],
+        versions=[],
+        collections=[],
+        collection_links=[],
+        tombstones=[],
+        next_token=encode_token(rows[-1].seq if rows else after),
+        has_more=has_more,
+    )
+    for row in rows:
+        entity = SyncEntity(row.entity)
+        found = None
+        if row.deleted:
+            pass
+        elif entity is SyncEntity.PROMPT:
+            found = prompts.get(row.entity_id)
+            bucket = response.prompts
+        elif entity is SyncEntity.VERSION:
+            found = versions.get(row.entity_id)
+            bucket = response.versions
+        elif entity is SyncEntity.COLLECTION:
+            found = collections.get(row.entity_id)
+            bucket = response.collections
+        elif (row.parent_id, row.entity_id) in links:
+            found = CollectionLink.model_construct(
+                collection_id=row.parent_id,
+                prompt_id=row.entity_id,
+                position=links[(row.parent_id, row.entity_id)],
+            )
+            bucket = response.collection_links
+        if found is None:
+            response.tombstones.append(
+                SyncTombstone.model_construct(
+                    entity=entity, id=row.entity_id, parent_id=row.parent_id
+                )
+            )
+        else:
+            bucket.append(found)
+
+    logger.info(
+        "sync.prompts",
+        extra={"user_id": str(owner_id), "since": after, "count": len(rows), "has_more": has_more},
+    )
+    return response
+
+
+def prune(db: Session, older_than: timedelta) -> int:
+    """Delete tombstones older than ``older_than`` and raise owners' floors."""
+
+    cutoff = datetime.now(timezone.utc) - older_than
+    pruned = db.execute(
+        SyncChangeORM.__table__.delete()
+        .where(SyncChangeORM.deleted.is_(True), SyncChangeORM.changed_at < cutoff)
+        .returning(SyncChangeORM.owner_id, SyncChangeORM.seq)
+    ).all()
+    floors: Dict[UUID, int] = {}
+    for owner_id, seq in pruned:
+        floors[owner_id] = max(seq, floors.get(owner_id, 0))
+    for owner_id, seq in floors.items():
+        db.execute(
+            update(SyncCounterORM)
+            .where(SyncCounterORM.owner_id == owner_id, SyncCounterORM.floor_seq < seq)
+            .values(floor_seq=seq)
+        )
+    db.commit()
+    return len(pruned)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain delta-sync change records")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("prune", help="Delete old tombstones")
+    run.add_argument("--older-than-days", type=int, default=90)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = prune(db, timedelta(days=args.older_than_days))
+    finally:
+        db.close()
+    print(f"pruned {count} tombstones")
+
+
+if __name__ == "__main__":
+    main()
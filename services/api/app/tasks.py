@@ -0,0 +1,73 @@
+"""Built-in background tasks run by ``python -m app.worker``.
+
+Process tasks open their own session: they run in a worker process and
+receive only the job payload.  Queue them with
+:func:`app.services.job_service.enqueue`, e.g.
+``enqueue(db, "retention.apply", {"owner_id": str(owner_id)})``.
+Partition maintenance is periodic and queued daily by the workers.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from typing import Any, Dict
+from uuid import UUID
+
+from app.services import (
+    history_service,
+    job_service,
+    outbox_service,
+    partition_service,
+    retention_service,
+    snapshot_service,
+)
+from app.services.job_service import task
+
+
+def _uuid(value: Any) -> UUID | None:
+    return UUID(value) if value else None
+
+
+def _session():
+    from app.db.session import SessionLocal
+
+    return SessionLocal()
+
+
+@task("retention.apply")
+def apply_retention(payload: Dict[str, Any]) -> None:
+    with _session() as db:
+        retention_service.apply_retention(db, owner_id=_uuid(payload.get("owner_id")))
+
+
+@task("history.compact")
+def compact_history(payload: Dict[str, Any]) -> None:
+    with _session() as db:
+        history_service.compact(db, prompt_id=_uuid(payload.get("prompt_id")))
+
+
+@task("partitions.maintain", every=timedelta(days=1))
+def maintain_partitions(payload: Dict[str, Any]) -> None:
+    with _session() as db:
+        partition_service.maintain(db, drop=bool(payload.get("drop")))
+
+
+@task(snapshot_service.BUILD_TASK)
+def build_snapshot(payload: Dict[str, Any]) -> None:
+    with _session() as db:
+        snapshot_service.build_snapshot(db, _uuid(payload["owner_id"]))
+
+
+def _prune(module, days: int) -> int:
+    with _session() as db:
+        return module.prune(db, timedelta(days=days))
+
+
+@task("outbox.prune")
+async def prune_outbox(payload: Dict[str, Any]) -> None:
+    await asyncio.to_thread(_prune, outbox_service, int(payload.get("older_than_days", 7)))
+
+
+@task("jobs.prune")
+async def prune_jobs(payload: Dict[str, Any]) -> None:
+    await asyncio.to_thread(_prune, job_service, int(payload.get("older_than_days", 7)))
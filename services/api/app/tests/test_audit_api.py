@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.main import app
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.tenancy import AuditLogEntry, AuditLogPage
+from app.models.user import UserORM
+
+
+def _entry(i: int) -> AuditLogEntry:
+    return AuditLogEntry(
+        id=i,
+        action="prompts.update",
+        resource_id=uuid.uuid4(),
+        created_at=datetime(2026, 9, 1, tzinfo=timezone.utc),
+    )
+
+
+@pytest_asyncio.fixture
+async def admin_client(monkeypatch) -> AsyncClient:
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["Admin@example.com"])
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        user = UserORM(id=uuid.uuid4(), email="admin@example.com", created_at=datetime.utcnow())
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_audit_log_requires_admin(monkeypatch, admin_client: AsyncClient):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+    resp = await admin_client.get("/api/v1/admin/audit-log")
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_audit_log_page(monkeypatch, admin_client: AsyncClient):
+    workspace_id = uuid.uuid4()
+    seen = {}
+
+    def _list_entries(db, filters, limit, after):
+        seen.update(filters=filters, limit=limit, after=after)
+        return AuditLogPage(items=[_entry(2), _entry(1)], next_cursor="next")
+
+    monkeypatch.setattr("app.api.audit.audit_service.list_entries", _list_entries)
+    resp = await admin_client.get(
+        "/api/v1/admin/audit-log",
+        params={
+            "workspace_id": str(workspace_id),
+            "since": "2026-09-01T00:00:00Z",
+            "until": "2026-10-01T00:00:00Z",
+            "limit": 2,
+        },
+    )
+    assert resp.status_code == 200
+    assert [item["id"] for item in resp.json()["items"]] == [2, 1]
+    assert resp.json()["next_cursor"] == "next"
+    assert seen["filters"].workspace_id == workspace_id and seen["limit"] == 2
+
+
+@pytest.mark.asyncio
+async def test_audit_log_rejects_empty_range(admin_client: AsyncClient):
+    resp = await admin_client.get(
+        "/api/v1/admin/audit-log",
+        params={"since": "2026-10-01T00:00:00Z", "until": "2026-09-01T00:00:00Z"},
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_audit_log_export_streams_ndjson(monkeypatch, admin_client: AsyncClient):
+    monkeypatch.setattr(
+        "app.api.audit.audit_service.iter_entries",
+        lambda db, filters: iter([_entry(3), _entry(2), _entry(1)]),
+    )
+    resp = await admin_client.get("/api/v1/admin/audit-log/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = resp.text.splitlines()
+    assert [AuditLogEntry.model_validate_json(line).id for line in lines] == [3, 2, 1]
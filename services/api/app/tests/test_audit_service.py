@@ -0,0 +1,104 @@
+import threading
+import uuid
+from unittest.mock import MagicMock
+
+from sqlalchemy.orm import Session
+
+from app.services import audit_service
+from app.services.audit_service import AuditRecord, AuditWriter
+
+
+class FakeSessions:
+    """Session factory recording the rows of every batch written."""
+
+    def __init__(self, fail=0, gate=None):
+        self.batches = []
+        self.fail = fail
+        self.gate = gate
+
+    def __call__(self):
+        db = MagicMock(spec=Session)
+
+        def execute(stmt, rows):
+            if self.gate is not None:
+                self.gate.wait()
+            if self.fail:
+                self.fail -= 1
+                raise RuntimeError("database unavailable")
+            self.batches.append(list(rows))
+
+        db.execute.side_effect = execute
+        return db
+
+
+def _writer(sessions, **kwargs):
+    kwargs.setdefault("max_queue", 100)
+    kwargs.setdefault("batch_size", 10)
+    kwargs.setdefault("flush_interval", 0.01)
+    kwargs.setdefault("overflow", "drop")
+    return AuditWriter(sessions, **kwargs)
+
+
+def test_records_are_written_in_batches():
+    sessions = FakeSessions()
+    writer = _writer(sessions)
+    writer.start()
+    for i in range(25):
+        assert writer.enqueue(AuditRecord(action=f"a{i}"))
+    writer.flush()
+    writer.stop()
+
+    rows = [row for batch in sessions.batches for row in batch]
+    assert [row["action"] for row in rows] == [f"a{i}" for i in range(25)]
+    assert all(len(batch) <= 10 for batch in sessions.batches)
+    assert writer.stats.written == 25 and writer.stats.batches == len(sessions.batches)
+
+
+def test_full_queue_drops_records():
+    gate = threading.Event()
+    sessions = FakeSessions(gate=gate)
+    writer = _writer(sessions, max_queue=5, batch_size=1)
+    writer.start()
+    results = [writer.enqueue(AuditRecord(action="a")) for _ in range(20)]
+    gate.set()
+    writer.stop()
+
+    assert results.count(False) == writer.stats.dropped > 0
+    assert writer.stats.written == results.count(True)
+
+
+def test_block_policy_waits_for_space():
+    gate = threading.Event()
+    sessions = FakeSessions(gate=gate)
+    writer = _writer(sessions, max_queue=1, batch_size=1, overflow="block", block_timeout=1.0)
+    writer.start()
+    threading.Timer(0.05, gate.set).start()
+    assert all(writer.enqueue(AuditRecord(action="a")) for _ in range(5))
+    writer.stop()
+    assert writer.stats.written == 5 and writer.stats.dropped == 0
+
+
+def test_failed_batches_are_retried():
+    sessions = FakeSessions(fail=2)
+    writer = _writer(sessions)
+    writer.start()
+    writer.enqueue(AuditRecord(action="a"))
+    writer.flush()
+    writer.stop()
+    assert writer.stats.failures == 2 and writer.stats.written == 1
+
+
+def test_stop_drains_the_queue():
+    sessions = FakeSessions()
+    writer = _writer(sessions, flush_interval=5.0, batch_size=1000)
+    writer.start()
+    for _ in range(50):
+        writer.enqueue(AuditRecord(action="a"))
+    writer.stop()
+    assert writer.stats.written == 50
+    assert not writer.enqueue(AuditRecord(action="late"))
+
+
+def test_record_without_writer_is_a_noop():
+    audit_service.stop()
+    assert audit_service.record("prompts.create", uuid.uuid4()) is False
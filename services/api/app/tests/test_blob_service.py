@@ -0,0 +1,60 @@
+import uuid
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.prompt import PromptBlobORM, PromptVersionORM
+from app.services import blob_service
+
+
+def _version(**kwargs):
+    values = dict(
+        id=uuid.uuid4(),
+        prompt_id=uuid.uuid4(),
+        version=1,
+        body="body",
+        access_control="private",
+        use_cases=["u"],
+    )
+    values.update(kwargs)
+    return PromptVersionORM(**values)
+
+
+def test_digest_ignores_key_order():
+    assert blob_service.digest_of({"a": 1, "b": [1, 2]}) == blob_service.digest_of(
+        {"b": [1, 2], "a": 1}
+    )
+    assert blob_service.digest_of("1") != blob_service.digest_of(1)
+
+
+def test_seal_version_stores_each_distinct_value_once():
+    payload = {"shots": [{"in": "x"}]}
+    version = _version(sample_input=payload, sample_output=payload)
+    db = MagicMock(spec=Session)
+
+    assert blob_service.seal_version(db, version) == 3
+
+    assert version.body is None and version.sample_input is None
+    assert version.body_digest == blob_service.digest_of("body")
+    assert version.sample_input_digest == version.sample_output_digest
+    assert version.llm_parameters_digest is None
+    stmt = db.execute.call_args.args[0]
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert sorted(v for k, v in params.items() if k.startswith("ref_count")) == [1, 2]
+    assert "ON CONFLICT (digest) DO UPDATE" in str(stmt.compile(dialect=postgresql.dialect()))
+
+    db.reset_mock()
+    assert blob_service.seal_version(db, version) == 0
+    db.execute.assert_not_called()
+
+
+def test_content_reads_inline_or_sealed_values():
+    version = _version(sample_input={"a": 1})
+    assert blob_service.content(version, "sample_input") == {"a": 1}
+
+    version.body = None
+    version.body_digest = blob_service.digest_of("sealed")
+    version.body_blob = PromptBlobORM(digest=version.body_digest, content="sealed")
+    assert blob_service.content(version, "body") == "sealed"
+    assert blob_service.content(version, "sample_output") is None
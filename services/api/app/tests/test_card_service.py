@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.prompt import PromptHeaderORM, PromptVersionORM
+from app.services import card_service
+
+
+def _rows():
+    now = datetime.utcnow()
+    header = PromptHeaderORM(
+        id=uuid.uuid4(),
+        owner_id=uuid.uuid4(),
+        title="t",
+        tags=["x"],
+        is_favorite=None,
+        created_at=now,
+        updated_at=now,
+    )
+    version = PromptVersionORM(
+        id=uuid.uuid4(),
+        prompt_id=header.id,
+        version="3",
+        body="b" * 1000,
+        access_control="private",
+        use_cases=["u"],
+    )
+    return header, version
+
+
+def test_card_values_truncates_excerpt_and_coerces():
+    header, version = _rows()
+    values = card_service.card_values(header, version)
+    assert values["id"] == header.id
+    assert values["version_id"] == version.id
+    assert values["version"] == 3
+    assert len(values["excerpt"]) == card_service.EXCERPT_LENGTH
+    assert values["is_favorite"] is False
+
+
+def test_upsert_card_flushes_before_insert():
+    header, version = _rows()
+    db = MagicMock(spec=Session)
+    card_service.upsert_card(db, header, version)
+
+    db.flush.assert_called_once()
+    stmt = db.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO prompt_cards" in sql
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    db.commit.assert_not_called()
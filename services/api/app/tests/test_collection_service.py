@@ -20,7 +20,7 @@ def test_add_prompt_checks_ownership():
     def query_side_effect(model):
         mock = MagicMock()
         if model is CollectionORM:
-            mock.filter.return_value.first.return_value = None
+            mock.filter.return_value.with_for_update.return_value.first.return_value = None
         else:
             mock.filter.return_value.first.return_value = MagicMock()
         return mock
@@ -7,7 +7,9 @@ from httpx import AsyncClient
 
 from app.main import app
 from app.api.deps import get_current_user, csrf_protect
-from app.models.collection import Collection
+from app.models.collection import Collection, CollectionPromptPosition
+from app.models.prompt import PromptListResponse
+from app.services.smart_collection_service import InvalidFilters
 from app.models.user import UserORM
 
 
@@ -86,6 +88,106 @@ async def test_add_prompt_permission_error(monkeypatch, auth_client: AsyncClient
     assert resp.status_code == 403
 
 
+@pytest.mark.asyncio
+async def test_move_prompt(monkeypatch, auth_client: AsyncClient):
+    calls = []
+
+    def _move_prompt(*args, **kwargs):
+        calls.append(kwargs)
+        return CollectionPromptPosition(
+            collection_id=kwargs["collection_id"], prompt_id=kwargs["prompt_id"], position="VV"
+        )
+
+    monkeypatch.setattr(
+        "app.api.collections.collection_service.move_prompt", _move_prompt
+    )
+    headers = {"X-CSRF-Token": auth_client.cookies.get("csrf_token")}
+    cid, pid, after = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    resp = await auth_client.put(
+        f"/api/v1/collections/{cid}/prompts/{pid}/position",
+        json={"after_id": str(after)},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["position"] == "VV"
+    assert calls[0]["after_id"] == after and calls[0]["before_id"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "outcome, status", [(None, 404), (ValueError("bad anchor"), 400), (PermissionError(), 403)]
+)
+async def test_move_prompt_errors(monkeypatch, auth_client: AsyncClient, outcome, status):
+    def _move_prompt(*args, **kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(
+        "app.api.collections.collection_service.move_prompt", _move_prompt
+    )
+    headers = {"X-CSRF-Token": auth_client.cookies.get("csrf_token")}
+    resp = await auth_client.put(
+        f"/api/v1/collections/{uuid.uuid4()}/prompts/{uuid.uuid4()}/position",
+        json={"before_id": str(uuid.uuid4())},
+        headers=headers,
+    )
+    assert resp.status_code == status
+
+
+@pytest.mark.asyncio
+async def test_list_collection_prompts_passes_sort(monkeypatch, auth_client: AsyncClient):
+    calls = []
+
+    def _list_prompts(*args, **kwargs):
+        calls.append(kwargs)
+        return PromptListResponse(items=[], next_cursor=None, count=0)
+
+    monkeypatch.setattr("app.api.collections.collection_service.list_prompts", _list_prompts)
+    cid = uuid.uuid4()
+    assert (await auth_client.get(f"/api/v1/collections/{cid}/prompts")).status_code == 200
+    resp = await auth_client.get(f"/api/v1/collections/{cid}/prompts?sort=added_desc")
+    assert resp.status_code == 200
+    assert [call["sort"] for call in calls] == [None, "added_desc"]
+    assert calls[0]["collection_id"] == cid
+
+
+@pytest.mark.asyncio
+async def test_list_collection_prompts_not_found(monkeypatch, auth_client: AsyncClient):
+    monkeypatch.setattr(
+        "app.api.collections.collection_service.list_prompts", lambda *args, **kwargs: None
+    )
+    resp = await auth_client.get(f"/api/v1/collections/{uuid.uuid4()}/prompts")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_smart_collection_invalid_filters(monkeypatch, auth_client: AsyncClient):
+    calls = []
+
+    def _create_collection(*args, **kwargs):
+        calls.append(kwargs)
+        raise InvalidFilters("invalid filter expression: nope")
+
+    monkeypatch.setattr(
+        "app.api.collections.collection_service.create_collection", _create_collection
+    )
+    headers = {"X-CSRF-Token": auth_client.cookies.get("csrf_token")}
+    resp = await auth_client.post(
+        "/api/v1/collections",
+        json={"name": "Support", "filters": {"tags": ["support"], "where": ["nope"]}},
+        headers=headers,
+    )
+    assert resp.status_code == 400
+    assert calls[0]["filters"].tags == ["support"]
+    resp = await auth_client.post(
+        "/api/v1/collections",
+        json={"name": "Support", "filters": {"unknown": 1}},
+        headers=headers,
+    )
+    assert resp.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_list_collections_unauthenticated():
     async with AsyncClient(app=app, base_url="https://test") as ac:
@@ -0,0 +1,107 @@
+import random
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.prompt import DiffGranularity, PromptVersionORM
+from app.services import diff_service
+
+
+def _lcs_length(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = 0
+        for j, y in enumerate(b, 1):
+            prev, row[j] = row[j], prev + 1 if x == y else max(row[j], row[j - 1])
+    return row[-1]
+
+
+def _tokens_of(ops, keep):
+    return "".join(text for op, text in ops if op in keep)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_diff_is_a_shortest_edit_script(seed):
+    rng = random.Random(seed)
+    a = [rng.choice("abc") for _ in range(rng.randint(0, 30))]
+    b = [rng.choice("abc") for _ in range(rng.randint(0, 30))]
+
+    ops = diff_service.diff_tokens(a, b)
+
+    assert _tokens_of(ops, {"equal", "delete"}) == "".join(a)
+    assert _tokens_of(ops, {"equal", "insert"}) == "".join(b)
+    assert len(_tokens_of(ops, {"equal"})) == _lcs_length(a, b)
+
+
+def test_word_diff_keeps_whitespace():
+    old_text, new_text = "Answer  briefly.\nCite sources.", "Answer in detail.\nCite sources."
+    ops = diff_service.diff_tokens(
+        diff_service.tokenize(old_text, DiffGranularity.word),
+        diff_service.tokenize(new_text, DiffGranularity.word),
+    )
+
+    assert _tokens_of(ops, {"equal", "delete"}) == old_text
+    assert _tokens_of(ops, {"equal", "insert"}) == new_text
+    assert ops[0] == ("equal", "Answer")
+    assert ops[-1] == ("equal", "\nCite sources.")
+
+
+def test_diff_replaces_spans_past_the_edit_budget():
+    a = ["keep\n"] + [f"a{i}\n" for i in range(50)] + ["tail\n"]
+    b = ["keep\n"] + [f"b{i}\n" for i in range(50)] + ["tail\n"]
+
+    ops = diff_service.diff_tokens(a, b, max_edits=20)
+
+    assert ops == [
+        ("equal", "keep\n"),
+        ("delete", "".join(a[1:-1])),
+        ("insert", "".join(b[1:-1])),
+        ("equal", "tail\n"),
+    ]
+
+
+def test_diff_within_the_edit_budget_stays_shortest():
+    rng = random.Random(7)
+    a = [rng.choice("abc") for _ in range(200)]
+    b = list(a)
+    for i in rng.sample(range(200), 5):
+        b[i] = "d"
+
+    ops = diff_service.diff_tokens(a, b, max_edits=10)
+
+    assert _tokens_of(ops, {"equal", "delete"}) == "".join(a)
+    assert _tokens_of(ops, {"equal", "insert"}) == "".join(b)
+    assert len(_tokens_of(ops, {"equal"})) == _lcs_length(a, b) == 195
+
+
+def _version(number, body):
+    return PromptVersionORM(
+        id=uuid.uuid4(), version=number, body=body, updated_at=datetime(2026, 1, 1)
+    )
+
+
+def test_diff_versions_caches_by_version_pair():
+    old, new = _version(1, "a\nb\n"), _version(2, "a\nc\n")
+    db = MagicMock(spec=Session)
+    db.query.return_value.join.return_value.filter.return_value = [old, new]
+    diff_service.cache.clear()
+
+    with patch.object(diff_service, "diff_tokens", wraps=diff_service.diff_tokens) as spy:
+        first = diff_service.diff_versions(db, uuid.uuid4(), uuid.uuid4(), 1, 2)
+        second = diff_service.diff_versions(db, uuid.uuid4(), uuid.uuid4(), 1, 2)
+        new.updated_at = datetime(2026, 1, 2)
+        diff_service.diff_versions(db, uuid.uuid4(), uuid.uuid4(), 1, 2)
+
+    assert second is first
+    assert spy.call_count == 2
+    assert (first.insertions, first.deletions) == (2, 2)
+
+
+def test_diff_versions_missing_version():
+    db = MagicMock(spec=Session)
+    db.query.return_value.join.return_value.filter.return_value = [_version(1, "a")]
+
+    assert diff_service.diff_versions(db, uuid.uuid4(), uuid.uuid4(), 1, 2) is None
@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.main import app
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.user import UserORM
+from app.services import live_service
+from app.services.live_service import ChangeEvent, ChangeHub
+
+
+@pytest_asyncio.fixture
+async def client(monkeypatch):
+    user = UserORM(id=uuid.uuid4(), email="a@example.com", created_at=datetime.utcnow())
+    hub = ChangeHub(queue_size=10)
+
+    async def _start():
+        return None
+
+    monkeypatch.setattr(hub, "start", _start)
+    monkeypatch.setattr(live_service, "hub", hub)
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac, hub, user
+    app.dependency_overrides = {}
+
+
+def _event(event_id, owner_id):
+    return ChangeEvent(
+        id=event_id, type="prompt.created", aggregate_id=uuid.uuid4(), owner_id=owner_id
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_from_last_event_id(monkeypatch, client):
+    ac, hub, user = client
+    seen = {}
+
+    def _replay(db, owner_id, after, limit):
+        seen.update(owner_id=owner_id, after=after)
+        # Close the live side so the response ends after the replay.
+        hub.close_all()
+        return [_event(after + 1, owner_id), _event(after + 2, owner_id)]
+
+    monkeypatch.setattr(live_service, "replay", _replay)
+    resp = await ac.get("/api/v1/events", headers={"Last-Event-ID": "41"})
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert [line for line in resp.text.splitlines() if line.startswith("id:")] == ["id: 42", "id: 43"]
+    assert seen == {"owner_id": user.id, "after": 41}
+    assert hub.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_resets_when_too_far_behind(monkeypatch, client):
+    ac, hub, user = client
+    monkeypatch.setattr(settings, "SSE_REPLAY_LIMIT", 1)
+
+    def _replay(db, owner_id, after, limit):
+        hub.close_all()
+        return [_event(after + i, owner_id) for i in range(1, limit + 1)]
+
+    monkeypatch.setattr(live_service, "replay", _replay)
+    resp = await ac.get("/api/v1/events", params={"after": 3})
+
+    assert "event: reset" in resp.text and "id:" not in resp.text
+
+
+@pytest.mark.asyncio
+async def test_stream_resets_when_events_were_pruned(monkeypatch, client):
+    ac, hub, user = client
+
+    def _replay(db, owner_id, after, limit):
+        hub.close_all()
+        return None
+
+    monkeypatch.setattr(live_service, "replay", _replay)
+    resp = await ac.get("/api/v1/events", headers={"Last-Event-ID": "7"})
+
+    assert "event: reset" in resp.text and "id:" not in resp.text
+
+
+@pytest.mark.asyncio
+async def test_stream_unavailable(monkeypatch, client):
+    ac, hub, user = client
+
+    async def _subscribe(owner_id):
+        raise live_service.HubUnavailable("live updates are unavailable")
+
+    monkeypatch.setattr(hub, "subscribe", _subscribe)
+    resp = await ac.get("/api/v1/events")
+    assert resp.status_code == 503
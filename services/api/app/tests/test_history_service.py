@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+
+from app.models.prompt import PromptVersionORM
+from app.services import history_service
+
+
+BASE = "You are a helpful assistant.\nAnswer briefly.\nCite sources.\n"
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        BASE,
+        BASE + "Use British spelling.\n",
+        "Be formal.\n" + BASE,
+        BASE.replace("Answer briefly.\n", "Answer in detail.\n"),
+        "",
+        "no trailing newline",
+    ],
+)
+def test_delta_round_trip(target):
+    delta = history_service.make_delta(BASE, target)
+    assert history_service.apply_delta(BASE, delta) == target
+
+
+def test_delta_of_small_edit_copies_unchanged_lines():
+    body = "".join(f"line {i}\n" for i in range(200))
+    edited = body.replace("line 100\n", "line one hundred\n")
+
+    delta = history_service.make_delta(body, edited)
+
+    assert delta == [
+        len("".join(f"line {i}\n" for i in range(100))),
+        -len("line 100\n"),
+        "line one hundred\n",
+        len("".join(f"line {i}\n" for i in range(101, 200))),
+    ]
+
+
+def test_apply_delta_rejects_wrong_base():
+    delta = history_service.make_delta(BASE, BASE + "More.\n")
+    with pytest.raises(ValueError):
+        history_service.apply_delta("other body", delta)
+
+
+def test_inline_body_needs_no_session():
+    version = PromptVersionORM(id=uuid.uuid4(), body="inline", delta_depth=0)
+    assert history_service.body_of(version) == "inline"
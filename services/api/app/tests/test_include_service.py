@@ -0,0 +1,32 @@
+import pytest
+
+from app.models.prompt import PromptInclude
+from app.services.include_service import BatchLoader, parse_includes
+
+
+def test_batch_loader_fetches_pending_keys_once():
+    calls = []
+
+    def batch_fn(keys):
+        calls.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader = BatchLoader(batch_fn, lambda: 0)
+    loader.load_many([1, 2, 3, 2])
+    assert [loader.get(key) for key in (1, 2, 3)] == [10, 20, 0]
+    assert calls == [[1, 2, 3]]
+
+    loader.load_many([2, 4])
+    assert loader.get(4) == 40
+    assert calls == [[1, 2, 3], [4]]
+    assert loader.batches == 2
+
+
+def test_parse_includes():
+    assert parse_includes(None) == []
+    assert parse_includes(["collections,related", "collections"]) == [
+        PromptInclude.collections,
+        PromptInclude.related,
+    ]
+    with pytest.raises(ValueError, match="unknown include: owners"):
+        parse_includes(["owners"])
@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.main import app
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.job import Job, JobQueueStats
+from app.models.user import UserORM
+
+
+def _job(job_id: int, status: str = "dead") -> Job:
+    now = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    return Job(
+        id=job_id,
+        task="retention.apply",
+        queue="default",
+        priority=0,
+        status=status,
+        attempts=0 if status == "queued" else 5,
+        max_attempts=5,
+        run_at=now,
+        created_at=now,
+    )
+
+
+@pytest_asyncio.fixture
+async def admin_client(monkeypatch) -> AsyncClient:
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        user = UserORM(id=uuid.uuid4(), email="admin@example.com", created_at=datetime.utcnow())
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_job_stats_require_admin(monkeypatch, admin_client: AsyncClient):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+    resp = await admin_client.get("/api/v1/admin/jobs/stats")
+    assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_job_stats(monkeypatch, admin_client: AsyncClient):
+    stats = JobQueueStats(
+        queue="default", ready=3, scheduled=1, running=2, dead=0, oldest_ready_seconds=4.5
+    )
+    monkeypatch.setattr("app.api.jobs.job_service.queue_stats", lambda db, window: [stats])
+    resp = await admin_client.get("/api/v1/admin/jobs/stats")
+    assert resp.status_code == 200
+    assert resp.json()[0]["ready"] == 3 and resp.json()[0]["oldest_ready_seconds"] == 4.5
+
+
+@pytest.mark.asyncio
+async def test_list_dead_jobs(monkeypatch, admin_client: AsyncClient):
+    seen = {}
+
+    def _list_jobs(db, status, queue, limit):
+        seen.update(status=status, queue=queue, limit=limit)
+        return [_job(2), _job(1)]
+
+    monkeypatch.setattr("app.api.jobs.job_service.list_jobs", _list_jobs)
+    resp = await admin_client.get("/api/v1/admin/jobs", params={"limit": 2})
+    assert [job["id"] for job in resp.json()] == [2, 1]
+    assert seen == {"status": "dead", "queue": None, "limit": 2}
+
+
+@pytest.mark.asyncio
+async def test_retry_job(monkeypatch, admin_client: AsyncClient):
+    monkeypatch.setattr(
+        "app.api.jobs.job_service.retry",
+        lambda db, job_id: _job(job_id, "queued") if job_id == 7 else None,
+    )
+    headers = {"X-CSRF-Token": "t"}
+    admin_client.cookies.set("csrf_token", "t")
+    resp = await admin_client.post("/api/v1/admin/jobs/7/retry", headers=headers)
+    assert resp.status_code == 200 and resp.json()["status"] == "queued"
+    resp = await admin_client.post("/api/v1/admin/jobs/8/retry", headers=headers)
+    assert resp.status_code == 404
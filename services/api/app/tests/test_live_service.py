@@ -0,0 +1,97 @@
+import json
+import uuid
+
+import pytest
+
+from app.services import live_service
+from app.services.live_service import ChangeEvent, ChangeHub
+
+
+def _event(event_id: int, owner_id: uuid.UUID) -> ChangeEvent:
+    return ChangeEvent(
+        id=event_id,
+        type="prompt.updated",
+        aggregate_id=uuid.uuid4(),
+        owner_id=owner_id,
+        payload={"version": event_id},
+    )
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = ChangeHub(queue_size=3)
+
+    async def _start():
+        return None
+
+    monkeypatch.setattr(hub, "start", _start)
+    return hub
+
+
+async def _collect(stream, count):
+    frames = []
+    async for frame in stream:
+        frames.append(frame)
+        if len(frames) == count:
+            break
+    return frames
+
+
+def test_notification_payload_round_trip():
+    owner, prompt = uuid.uuid4(), uuid.uuid4()
+    raw = json.dumps(
+        {
+            "id": 5,
+            "type": "collection.prompt_added",
+            "aggregate_id": str(prompt),
+            "owner_id": str(owner),
+            "payload": {"prompt_id": "p"},
+        }
+    )
+    event = ChangeEvent.from_notify(raw)
+    assert (event.id, event.owner_id, event.payload) == (5, owner, {"prompt_id": "p"})
+    assert event.to_sse().startswith("id: 5\nevent: collection.prompt_added\ndata: {")
+
+
+@pytest.mark.asyncio
+async def test_events_fan_out_to_the_owner_only(hub):
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    a1, a2, b = [await hub.subscribe(owner) for owner in (alice, alice, bob)]
+
+    hub.publish(_event(1, alice))
+
+    assert a1.queue.get_nowait().id == 1 and a2.queue.get_nowait().id == 1
+    assert b.queue.empty()
+    hub.unsubscribe(a1)
+    assert hub.subscriber_count == 2
+
+
+@pytest.mark.asyncio
+async def test_lagging_subscriber_is_closed(hub):
+    owner = uuid.uuid4()
+    sub = await hub.subscribe(owner)
+    for i in range(1, 6):
+        hub.publish(_event(i, owner))
+
+    frames = await _collect(live_service.sse_stream(sub, [], heartbeat=1, source=hub), 10)
+
+    # The client sees the events that fit, then resumes after the last one.
+    assert [f.split("\n")[0] for f in frames[1:]] == ["id: 1", "id: 2", "id: 3"]
+    assert hub.subscriber_count == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_then_skips_duplicates(hub):
+    owner = uuid.uuid4()
+    sub = await hub.subscribe(owner)
+    hub.publish(_event(8, owner))
+    hub.publish(_event(9, owner))
+
+    stream = live_service.sse_stream(sub, [_event(7, owner), _event(8, owner)], heartbeat=0.01, source=hub)
+    frames = await _collect(stream, 5)
+
+    assert frames[0] == "retry: 3000\n\n"
+    assert [f.split("\n")[0] for f in frames[1:4]] == ["id: 7", "id: 8", "id: 9"]
+    assert frames[4] == ": keep-alive\n\n"
+    await stream.aclose()
+    assert hub.subscriber_count == 0
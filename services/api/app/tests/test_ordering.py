@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from app.core.ordering import DIGITS, FIRST_KEY, key_between
+
+
+def test_first_key_and_appends_stay_ordered():
+    keys = [key_between(None, None)]
+    for _ in range(200):
+        keys.append(key_between(keys[-1], None))
+    assert keys[0] == FIRST_KEY
+    assert keys == sorted(keys) and len(set(keys)) == len(keys)
+
+
+def test_inserts_fall_between_their_neighbours():
+    rng = random.Random(7)
+    keys = [key_between(None, None)]
+    for _ in range(2000):
+        i = rng.randint(0, len(keys))
+        low = keys[i - 1] if i else None
+        high = keys[i] if i < len(keys) else None
+        key = key_between(low, high)
+        assert (low is None or low < key) and (high is None or key < high)
+        assert not key.endswith(DIGITS[0])
+        keys.insert(i, key)
+    assert max(len(key) for key in keys) < 10
+
+
+def test_repeated_inserts_at_the_front():
+    high = FIRST_KEY
+    for _ in range(100):
+        key = key_between(None, high)
+        assert key < high
+        high = key
+
+
+def test_bounds_must_be_ordered():
+    with pytest.raises(ValueError):
+        key_between("b", "a")
+    with pytest.raises(ValueError):
+        key_between("a", "a")
@@ -0,0 +1,51 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.outbox import OutboxEventORM
+from app.services import outbox_service
+
+
+@pytest.fixture(autouse=True)
+def handlers(monkeypatch):
+    registry = {}
+    monkeypatch.setattr(outbox_service, "_handlers", outbox_service.defaultdict(list, registry))
+    return outbox_service._handlers
+
+
+def test_emit_adds_json_safe_event():
+    db = MagicMock(spec=Session)
+    prompt_id, owner_id = uuid.uuid4(), uuid.uuid4()
+
+    outbox_service.emit(db, outbox_service.PROMPT_CREATED, prompt_id, owner_id=owner_id, version=1)
+
+    event = db.add.call_args.args[0]
+    assert isinstance(event, OutboxEventORM)
+    assert event.aggregate_id == prompt_id
+    assert event.payload == {"owner_id": str(owner_id), "version": 1}
+    db.commit.assert_not_called()
+
+
+def test_handlers_receive_typed_and_wildcard_events(handlers):
+    seen = []
+
+    @outbox_service.handler(outbox_service.PROMPT_UPDATED)
+    def on_update(event):
+        seen.append(("update", event.id))
+
+    outbox_service.register_handler("*", lambda event: seen.append(("any", event.id)))
+    row = OutboxEventORM(
+        id=7,
+        aggregate_id=uuid.uuid4(),
+        event_type=outbox_service.PROMPT_UPDATED,
+        payload={"version": 2},
+        attempts=0,
+    )
+
+    outbox_service._deliver(row)
+    row.event_type = outbox_service.PROMPT_CREATED
+    outbox_service._deliver(row)
+
+    assert seen == [("update", 7), ("any", 7), ("any", 7)]
@@ -0,0 +1,40 @@
+import pytest
+
+from app.api.prompts import _byte_range
+from app.services.payload_store import FilesystemPayloadStore
+
+
+def test_filesystem_store_reads_ranges(tmp_path):
+    store = FilesystemPayloadStore(tmp_path, chunk_size=4)
+    data = bytes(range(50))
+    store.put("ab" + "0" * 62, data)
+    store.put("ab" + "0" * 62, b"ignored")
+
+    assert store.read_all("ab" + "0" * 62) == data
+    assert b"".join(store.read("ab" + "0" * 62, 5, 17)) == data[5:17]
+    assert not list(tmp_path.glob("ab/.*"))
+
+    store.delete("ab" + "0" * 62)
+    store.delete("ab" + "0" * 62)
+    assert not (tmp_path / "ab" / ("ab" + "0" * 62)).exists()
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, None),
+        ("bytes=0-9", (0, 10)),
+        ("bytes=90-", (90, 100)),
+        ("bytes=-10", (90, 100)),
+        ("bytes=95-200", (95, 100)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+    ],
+)
+def test_byte_range(header, expected):
+    assert _byte_range(header, 100) == expected
+
+
+def test_byte_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        _byte_range("bytes=100-", 100)
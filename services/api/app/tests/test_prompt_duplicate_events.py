@@ -87,9 +87,13 @@ def test_duplicate_prompt_emits_event_and_latency() -> None:
 
     query_version = MagicMock()
     query_header = MagicMock()
-    mock_db.query.side_effect = [query_version, query_header]
+    query_previous = MagicMock()
+    mock_db.query.side_effect = [query_version, query_header, query_previous]
     query_version.filter.return_value.order_by.return_value.first.return_value = latest_version
     query_header.filter.return_value.first.return_value = header
+    # Superseding the latest version looks up its predecessor.
+    query_previous.filter.return_value.order_by.return_value.first.return_value = None
+    mock_db.execute.return_value.scalar_one_or_none.return_value = 2
 
     with patch("app.services.prompt_service.time.perf_counter", side_effect=[1.0, 1.05]):
         with patch("app.services.prompt_service.logger") as mock_logger:
@@ -6,7 +6,14 @@ import pytest
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.models.prompt import PromptCreate, PromptHeaderORM, PromptVersionORM
+from app.models.prompt import (
+    PromptCreate,
+    PromptCardORM,
+    PromptHeaderORM,
+    PromptSummary,
+    PromptVersionORM,
+    PromptView,
+)
 from app.services.prompt_service import (
     create_prompt,
     get_prompt_by_id,
@@ -28,10 +35,11 @@ def test_create_prompt():
     prompt = create_prompt(db=mock_db, prompt=prompt_data)
 
     assert prompt.title == "Test Prompt"
-    assert prompt.version == "1"
-    assert mock_db.add.call_count == 2
-    assert mock_db.commit.call_count == 2
+    assert prompt.version == 1
+    assert mock_db.add.call_count == 3
+    assert mock_db.commit.call_count == 1
     assert mock_db.refresh.call_count == 2
+    mock_db.execute.assert_called_once()
 
 
 def test_create_prompt_normalizes_tags():
@@ -107,20 +115,20 @@ def test_get_prompt_by_id_returns_prompt():
 
     query_version = MagicMock()
     query_header = MagicMock()
-    mock_db.query.side_effect = [query_version, query_header]
+    mock_db.query.side_effect = [query_header, query_version]
     query_version.filter.return_value.order_by.return_value.first.return_value = version
     query_header.filter.return_value.first.return_value = header
 
-    result = get_prompt_by_id(mock_db, prompt_id)
+    result = get_prompt_by_id(mock_db, prompt_id, uuid.uuid4())
     assert result.title == "title"
     assert result.body == "body"
 
 
 def test_get_prompt_by_id_not_found():
     mock_db = MagicMock(spec=Session)
-    mock_db.query.return_value.filter.return_value.order_by.return_value.first.return_value = None
+    mock_db.query.return_value.filter.return_value.first.return_value = None
 
-    result = get_prompt_by_id(mock_db, uuid.uuid4())
+    result = get_prompt_by_id(mock_db, uuid.uuid4(), uuid.uuid4())
     assert result is None
 
 
@@ -237,25 +245,29 @@ def test_duplicate_prompt_creates_new_version():
 
     query_version = MagicMock()
     query_header = MagicMock()
-    mock_db.query.side_effect = [query_version, query_header]
+    query_previous = MagicMock()
+    mock_db.query.side_effect = [query_version, query_header, query_previous]
     query_version.filter.return_value.order_by.return_value.first.return_value = latest_version
     query_header.filter.return_value.first.return_value = header
+    # Superseding the latest version looks up its predecessor.
+    query_previous.filter.return_value.order_by.return_value.first.return_value = None
+    mock_db.execute.return_value.scalar_one_or_none.return_value = 2
 
     result = duplicate_prompt(mock_db, prompt_id)
 
-    assert result.version == "2"
+    assert result.version == 2
     assert result.title == "My Prompt (v2)"
     assert mock_db.add.called
 
 
-def test_duplicate_prompt_handles_non_numeric_version():
+def test_duplicate_prompt_uses_allocated_version():
     mock_db = MagicMock(spec=Session)
     prompt_id = uuid.uuid4()
 
     latest_version = PromptVersionORM(
         id=uuid.uuid4(),
         prompt_id=prompt_id,
-        version="alpha",
+        version=3,
         body="body",
         access_control="private",
         use_cases=["test"],
@@ -272,14 +284,30 @@ def test_duplicate_prompt_handles_non_numeric_version():
 
     query_version = MagicMock()
     query_header = MagicMock()
-    mock_db.query.side_effect = [query_version, query_header]
+    query_previous = MagicMock()
+    mock_db.query.side_effect = [query_version, query_header, query_previous]
     query_version.filter.return_value.order_by.return_value.first.return_value = latest_version
     query_header.filter.return_value.first.return_value = header
+    # Superseding the latest version looks up its predecessor.
+    query_previous.filter.return_value.order_by.return_value.first.return_value = None
+    mock_db.execute.return_value.scalar_one_or_none.return_value = 8
 
     result = duplicate_prompt(mock_db, prompt_id)
 
-    assert result.version == "1"
-    assert result.title == "Old Title (v1)"
+    assert result.version == 8
+    assert result.title == "Old Title (v8)"
+    allocation = mock_db.execute.call_args_list[0].args[0]
+    assert "next_version=(prompts.next_version + " in str(allocation)
+    assert "RETURNING prompts.next_version - " in str(allocation)
+
+
+def test_duplicate_prompt_missing_prompt_allocates_nothing():
+    mock_db = MagicMock(spec=Session)
+    mock_db.execute.return_value.scalar_one_or_none.return_value = None
+
+    assert duplicate_prompt(mock_db, uuid.uuid4()) is None
+    mock_db.query.assert_not_called()
+    mock_db.rollback.assert_called_once()
 
 
 def test_update_prompt_updates_header_tags():
@@ -335,3 +363,71 @@ def test_update_prompt_not_found():
     )
     result = update_prompt(mock_db, uuid.uuid4(), update)
     assert result is None
+
+
+def test_list_prompts_summary_view():
+    mock_db = MagicMock(spec=Session)
+    card = PromptCardORM(
+        id=uuid.uuid4(),
+        owner_id=uuid.uuid4(),
+        version_id=uuid.uuid4(),
+        version=2,
+        title="t",
+        excerpt="short excerpt",
+        tags=["x"],
+        use_cases=["u"],
+        access_control="private",
+        is_favorite=False,
+        is_archived=False,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow(),
+    )
+    captured: dict = {}
+
+    class DummyQuery:
+        def all(self):
+            return [card]
+
+    def _build_query(db, filters):
+        captured["filters"] = filters
+        return DummyQuery()
+
+    with patch("app.services.prompt_service.search_service.build_query", _build_query):
+        result = list_prompts(mock_db, owner_id=uuid.uuid4(), view="summary")
+
+    assert captured["filters"].view == PromptView.summary
+    item = result.items[0]
+    assert isinstance(item, PromptSummary)
+    assert item.id == card.version_id
+    assert item.prompt_id == card.id
+    assert item.excerpt == "short excerpt"
+    assert item.is_favorite is False
+
+
+def test_list_prompts_sparse_fields_and_view_conflict():
+    mock_db = MagicMock(spec=Session)
+    prompt_id = uuid.uuid4()
+    version = PromptVersionORM(id=uuid.uuid4(), prompt_id=prompt_id, version=1)
+    header = PromptHeaderORM(id=prompt_id, title="t", tags=["x"])
+
+    class DummyQuery:
+        def all(self):
+            return [(version, header)]
+
+    with patch(
+        "app.services.prompt_service.search_service.build_query",
+        lambda db, filters: DummyQuery(),
+    ):
+        result = list_prompts(mock_db, owner_id=uuid.uuid4(), fields=["title"])
+        with pytest.raises(ValueError):
+            list_prompts(
+                mock_db, owner_id=uuid.uuid4(), fields=["title"], view="summary"
+            )
+
+    item = result.items[0]
+    assert item.model_dump(exclude_unset=True) == {
+        "id": version.id,
+        "prompt_id": prompt_id,
+        "version": 1,
+        "title": "t",
+    }
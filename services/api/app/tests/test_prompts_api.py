@@ -6,7 +6,7 @@ import pytest_asyncio
 from httpx import AsyncClient
 
 from app.main import app
-from app.models.prompt import Prompt
+from app.models.prompt import PROMPT_BATCH_MAX, Prompt, PromptBatchGetResponse
 from app.services import search_service
 
 
@@ -278,3 +278,129 @@ async def test_duplicate_prompt_unauthenticated(monkeypatch):
     async with AsyncClient(app=app, base_url="https://test") as ac:
         resp = await ac.post(f"/api/v1/prompts/{uuid.uuid4()}/duplicate")
     assert resp.status_code == 401
+
+
+@pytest_asyncio.fixture
+async def user_client():
+    """Return a client authenticated as a fixed user via dependency override."""
+    from app.api.deps import get_current_user
+    from app.models.user import UserORM
+
+    user = UserORM(id=uuid.uuid4(), email="a@example.com", created_at=datetime.utcnow())
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac, user
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+async def test_batch_get_prompts(monkeypatch, sample_prompt, user_client):
+    ac, user = user_client
+    missing = uuid.uuid4()
+    seen = {}
+
+    def _batch_get(db, prompt_ids, owner_id):
+        seen.update(ids=prompt_ids, owner_id=owner_id)
+        return PromptBatchGetResponse(items=[sample_prompt], missing=[missing])
+
+    monkeypatch.setattr("app.api.prompts.prompt_service.batch_get_prompts", _batch_get)
+    ids = [str(sample_prompt.prompt_id), str(missing)]
+    resp = await ac.post("/api/v1/prompts:batchGet", json={"ids": ids})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [item["prompt_id"] for item in body["items"]] == [str(sample_prompt.prompt_id)]
+    assert body["missing"] == [str(missing)]
+    assert [str(i) for i in seen["ids"]] == ids
+    assert seen["owner_id"] == user.id
+
+
+@pytest.mark.asyncio
+async def test_batch_get_prompts_limits_batch_size(user_client):
+    ac, _ = user_client
+    empty = await ac.post("/api/v1/prompts:batchGet", json={"ids": []})
+    assert empty.status_code == 422
+    ids = [str(uuid.uuid4()) for _ in range(PROMPT_BATCH_MAX + 1)]
+    too_many = await ac.post("/api/v1/prompts:batchGet", json={"ids": ids})
+    assert too_many.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_prompt_graph(monkeypatch, user_client):
+    ac, user = user_client
+    seen = {}
+
+    def _neighbourhood(db, prompt_id, owner_id, depth, limit, direction):
+        seen.update(owner_id=owner_id, depth=depth, limit=limit, direction=direction.value)
+        return None
+
+    monkeypatch.setattr("app.api.prompts.link_service.neighbourhood", _neighbourhood)
+    resp = await ac.get(
+        f"/api/v1/prompts/{uuid.uuid4()}/graph", params={"depth": 2, "direction": "in"}
+    )
+    assert resp.status_code == 404
+    assert seen == {"owner_id": user.id, "depth": 2, "limit": 100, "direction": "in"}
+    too_deep = await ac.get(f"/api/v1/prompts/{uuid.uuid4()}/graph", params={"depth": 9})
+    assert too_deep.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_prompt_versions_are_scoped_to_the_owner(monkeypatch, user_client):
+    ac, user = user_client
+    seen = []
+
+    def _get_prompt_by_id(db, prompt_id, owner_id, version):
+        seen.append((owner_id, version))
+        return None
+
+    monkeypatch.setattr("app.api.prompts.prompt_service.get_prompt_by_id", _get_prompt_by_id)
+    resp = await ac.get(f"/api/v1/prompts/{uuid.uuid4()}", params={"version": 1})
+
+    assert resp.status_code == 404
+    assert seen == [(user.id, 1)]
+
+
+@pytest.mark.asyncio
+async def test_prompt_history_is_scoped_to_the_owner(monkeypatch, user_client):
+    ac, user = user_client
+    seen = []
+
+    def _list_versions(db, prompt_id, owner_id, limit, after):
+        seen.append(owner_id)
+        if after == "bad":
+            raise ValueError("invalid cursor")
+        return None
+
+    def _diff_versions(db, prompt_id, owner_id, from_version, to_version, granularity):
+        seen.append(owner_id)
+        return None
+
+    monkeypatch.setattr("app.api.prompts.prompt_service.list_versions", _list_versions)
+    monkeypatch.setattr("app.api.prompts.diff_service.diff_versions", _diff_versions)
+    prompt_id = uuid.uuid4()
+    missing = await ac.get(f"/api/v1/prompts/{prompt_id}/versions")
+    bad_cursor = await ac.get(f"/api/v1/prompts/{prompt_id}/versions", params={"after": "bad"})
+    diff = await ac.get(f"/api/v1/prompts/{prompt_id}/diff", params={"from": 1, "to": 2})
+
+    assert missing.status_code == 404
+    assert bad_cursor.status_code == 400
+    assert bad_cursor.json()["detail"] == "invalid cursor"
+    assert diff.status_code == 404
+    assert seen == [user.id, user.id, user.id]
+
+
+@pytest.mark.asyncio
+async def test_prompt_payload_is_scoped_to_the_owner(monkeypatch, user_client):
+    ac, user = user_client
+    seen = {}
+
+    def _get_payload(db, prompt_id, owner_id, field, version):
+        seen.update(owner_id=owner_id, field=field, version=version)
+        return None
+
+    monkeypatch.setattr("app.api.prompts.prompt_service.get_payload", _get_payload)
+    resp = await ac.get(
+        f"/api/v1/prompts/{uuid.uuid4()}/payloads/sample_input", params={"version": 2}
+    )
+    assert resp.status_code == 404
+    assert seen == {"owner_id": user.id, "field": "sample_input", "version": 2}
@@ -22,3 +22,15 @@ def test_prompts_pagination_documented() -> None:
     properties = schema["components"]["schemas"]["PromptListResponse"]["properties"]
     next_cursor = properties["next_cursor"]
     assert "cursor" in next_cursor["description"].lower()
+
+
+def test_prompt_responses_keep_response_models() -> None:
+    """Fast-path responses still advertise their pydantic response models."""
+    schema = app.openapi()
+    paths = schema["paths"]
+    listing = paths["/api/v1/prompts"]["get"]["responses"]["200"]
+    assert listing["content"]["application/json"]["schema"]["$ref"].endswith(
+        "/PromptListResponse"
+    )
+    detail = paths["/api/v1/prompts/{prompt_id}"]["get"]["responses"]["200"]
+    assert detail["content"]["application/json"]["schema"]["$ref"].endswith("/Prompt")
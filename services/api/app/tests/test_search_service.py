@@ -1,6 +1,11 @@
 from datetime import datetime
+from unittest.mock import MagicMock
 import uuid
 
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
 from app.services import search_service
 
 
@@ -19,3 +24,52 @@ def test_cursor_round_trip():
     key, pid = search_service.decode_cursor(cursor)
     assert pid == header.id
     assert key == now.isoformat()
+
+
+def test_parse_fields_adds_identity_and_rejects_unknown():
+    assert search_service.parse_fields(["title,tags", "title"]) == [
+        "id",
+        "prompt_id",
+        "version",
+        "title",
+        "tags",
+    ]
+    assert search_service.parse_fields(None) is None
+    with pytest.raises(ValueError):
+        search_service.parse_fields(["nope"])
+
+
+def _sql(**kwargs) -> str:
+    db = MagicMock()
+    db.query.side_effect = lambda *entities: Query(entities)
+    filters = search_service.SearchFilters(owner_id=uuid.uuid4(), **kwargs)
+    statement = search_service.build_query(db, filters).statement
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_facet_match_maps_to_array_operators():
+    providers = ["openai", "anthropic"]
+    any_sql = _sql(providers=providers, match=search_service.FacetMatch.any)
+    all_sql = _sql(providers=providers, match=search_service.FacetMatch.all)
+    assert "prompt_cards.providers && " in any_sql
+    assert "prompt_cards.providers @> " in all_sql
+
+
+def test_flag_filters_match_partial_index_predicates():
+    sql = _sql(archived=False, favorite=True)
+    assert "prompt_cards.is_favorite AND NOT prompt_cards.is_archived" in sql
+    assert "NOT prompt_cards.is_favorite" in _sql(favorite=False)
+
+
+def test_parse_json_filters():
+    predicates = search_service.parse_json_filters(
+        ["llm_parameters.temperature <= 0.3", "success_metrics.eval.suite=smoke"]
+    )
+    assert predicates == [
+        search_service.JsonPredicate("llm_parameters", ("temperature",), "<=", 0.3),
+        search_service.JsonPredicate("success_metrics", ("eval", "suite"), "=", "smoke"),
+    ]
+    assert search_service.parse_json_filters(None) is None
+    for bad in ("body.x=1", "llm_parameters=1", "llm_parameters.model>gpt"):
+        with pytest.raises(ValueError):
+            search_service.parse_json_filters([bad])
@@ -0,0 +1,68 @@
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.serialization import dump_json, get_adapter
+from app.models.prompt import (
+    Prompt,
+    PromptAccessControl,
+    PromptHeaderORM,
+    PromptListResponse,
+    PromptVersionORM,
+)
+from app.services.prompt_service import _to_prompt
+
+
+def _rows():
+    now = datetime.utcnow()
+    header = PromptHeaderORM(
+        id=uuid.uuid4(),
+        owner_id=uuid.uuid4(),
+        title="title",
+        tags=["a", None],
+        created_at=now,
+        updated_at=now,
+    )
+    version = PromptVersionORM(
+        id=uuid.uuid4(),
+        prompt_id=header.id,
+        version=3,
+        body="body",
+        access_control="private",
+        use_cases=["u"],
+        sample_input={"shots": [{"in": "x", "out": "y"}]},
+        created_at=now,
+        updated_at=now,
+    )
+    return version, header
+
+
+def test_to_prompt_matches_validated_model():
+    version, header = _rows()
+    fast = _to_prompt(version, header)
+    assert fast.access_control is PromptAccessControl.private
+    validated = Prompt.model_validate(fast.model_dump())
+    assert json.loads(dump_json(fast, Prompt)) == json.loads(
+        validated.model_dump_json()
+    )
+
+
+def test_dump_json_validates_untrusted_payloads():
+    version, header = _rows()
+    payload = {
+        "items": [_to_prompt(version, header).model_dump()],
+        "count": 1,
+    }
+    data = json.loads(dump_json(payload, PromptListResponse))
+    assert data["items"][0]["tags"] == ["a"]
+    assert data["next_cursor"] is None
+
+    with pytest.raises(ValidationError):
+        dump_json({"items": []}, PromptListResponse)
+
+
+def test_adapters_are_cached():
+    assert get_adapter(Prompt) is get_adapter(Prompt)
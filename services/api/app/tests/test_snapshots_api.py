@@ -0,0 +1,77 @@
+import gzip
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.main import app
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.models.sync import Snapshot
+from app.models.user import UserORM
+from app.services import snapshot_service
+
+
+@pytest_asyncio.fixture
+async def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_PATH", str(tmp_path))
+    user = UserORM(id=uuid.uuid4(), email="a@example.com", created_at=datetime.utcnow())
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac, user
+    app.dependency_overrides = {}
+
+
+def _bundle(owner_id, seq):
+    path = snapshot_service.bundle_path(owner_id, seq)
+    path.parent.mkdir(parents=True)
+    data = gzip.compress(b'{"type":"header","seq":%d}\n' % seq)
+    path.write_bytes(data)
+    return data
+
+
+@pytest.mark.asyncio
+async def test_download_full_and_range(client):
+    ac, user = client
+    data = _bundle(user.id, 12)
+
+    resp = await ac.get("/api/v1/snapshots/12")
+    assert resp.status_code == 200
+    assert resp.content == data
+    assert resp.headers["accept-ranges"] == "bytes"
+    assert resp.headers["content-type"] == "application/gzip"
+
+    resp = await ac.get("/api/v1/snapshots/12", headers={"Range": "bytes=4-"})
+    assert resp.status_code == 206
+    assert resp.content == data[4:]
+    assert resp.headers["content-range"] == f"bytes 4-{len(data) - 1}/{len(data)}"
+
+    resp = await ac.get("/api/v1/snapshots/12", headers={"Range": f"bytes={len(data)}-"})
+    assert resp.status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_latest_and_missing(client):
+    ac, user = client
+    assert (await ac.get("/api/v1/snapshots/latest")).status_code == 404
+    assert (await ac.get("/api/v1/snapshots/3")).status_code == 404
+    _bundle(user.id, 3)
+    body = (await ac.get("/api/v1/snapshots/latest")).json()
+    assert body["seq"] == 3 and body["status"] == "ready"
+    assert body["url"] == "/api/v1/snapshots/3"
+
+
+@pytest.mark.asyncio
+async def test_request_returns_202_while_building(monkeypatch, client):
+    ac, user = client
+
+    def _request(db, owner_id):
+        return Snapshot(seq=5, status="pending", next_token="t")
+
+    monkeypatch.setattr(snapshot_service, "request_snapshot", _request)
+    ac.cookies.set("csrf_token", "t")
+    resp = await ac.post("/api/v1/snapshots", headers={"X-CSRF-Token": "t"})
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "pending"
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.main import app
+from app.api.deps import get_current_user
+from app.models.sync import SyncEntity, SyncResponse, SyncTombstone
+from app.models.user import UserORM
+from app.services import sync_service
+
+
+@pytest_asyncio.fixture
+async def client():
+    user = UserORM(id=uuid.uuid4(), email="a@example.com", created_at=datetime.utcnow())
+    async with AsyncClient(app=app, base_url="https://test") as ac:
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield ac, user
+    app.dependency_overrides = {}
+
+
+def test_token_round_trip():
+    assert sync_service.decode_token(sync_service.encode_token(42)) == 42
+    assert sync_service.decode_token(None) == 0
+    with pytest.raises(ValueError):
+        sync_service.decode_token("not-a-token")
+    with pytest.raises(ValueError):
+        sync_service.decode_token(sync_service.encode_token(-1))
+
+
+@pytest.mark.asyncio
+async def test_sync_returns_changes_page(monkeypatch, client):
+    ac, user = client
+    prompt_id = uuid.uuid4()
+    seen = {}
+
+    def _changes(db, owner_id, since, limit=500):
+        seen.update(owner_id=owner_id, since=since, limit=limit)
+        return SyncResponse.model_construct(
+            prompts=[],
+            versions=[],
+            collections=[],
+            collection_links=[],
+            tombstones=[SyncTombstone(entity=SyncEntity.PROMPT, id=prompt_id, parent_id=prompt_id)],
+            next_token=sync_service.encode_token(7),
+            has_more=False,
+        )
+
+    monkeypatch.setattr(sync_service, "changes", _changes)
+    token = sync_service.encode_token(3)
+    resp = await ac.get("/api/v1/sync/prompts", params={"since": token, "limit": 50})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["tombstones"] == [
+        {"entity": "prompt", "id": str(prompt_id), "parent_id": str(prompt_id)}
+    ]
+    assert sync_service.decode_token(body["next_token"]) == 7
+    assert seen == {"owner_id": user.id, "since": token, "limit": 50}
+
+
+@pytest.mark.asyncio
+async def test_sync_rejects_bad_and_expired_tokens(monkeypatch, client):
+    ac, _ = client
+
+    def _changes(db, owner_id, since, limit=500):
+        if since == "expired":
+            raise sync_service.ResyncRequired("sync token expired")
+        raise ValueError("invalid sync token")
+
+    monkeypatch.setattr(sync_service, "changes", _changes)
+    assert (await ac.get("/api/v1/sync/prompts", params={"since": "junk"})).status_code == 400
+    assert (await ac.get("/api/v1/sync/prompts", params={"since": "expired"})).status_code == 410
+    assert (await ac.get("/api/v1/sync/prompts", params={"limit": 5000})).status_code == 422
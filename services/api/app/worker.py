@@ -0,0 +1,241 @@
+"""Background worker for the Postgres job queue.
+
+Run from ``services/api`` with::
+
+    python -m app.worker [--queues default,bulk] [--async-workers 8] [--process-workers 2]
+
+One event loop claims jobs from ``jobs`` (see :mod:`app.services.job_service`)
+for two pools: coroutine tasks run concurrently on the loop, up to
+``--async-workers`` at a time, and plain function tasks run in a pool of
+``--process-workers`` processes so CPU-bound work does not stall the loop.
+Each pool only claims jobs while it has a free slot, so jobs are never held
+by a busy worker.  While jobs run the worker renews their heartbeat every
+quarter of ``JOB_STALE_AFTER_S``, so long tasks are not mistaken for jobs of
+a dead worker.  At the same interval it requeues the jobs of dead workers
+and queues periodic tasks that are due.  SIGTERM and SIGINT stop claiming
+and wait for running jobs to finish.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Sequence, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services import job_service
+from app.services.job_service import ASYNC, PROCESS, ClaimedJob
+
+logger = logging.getLogger(__name__)
+
+
+def _run_task(name: str, payload: Dict[str, Any]) -> None:
+    """Entry point of process tasks, executed in a pool process."""
+
+    spec = job_service.get_task(name)
+    if spec is None:
+        raise LookupError(f"Unknown task: {name}")
+    spec.fn(payload)
+
+
+class Worker:
+    """Claims and runs jobs until stopped."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        queues: Sequence[str] | None = None,
+        async_workers: int | None = None,
+        process_workers: int | None = None,
+        poll_interval: float | None = None,
+        stale_after: timedelta | None = None,
+        task_modules: Sequence[str] | None = None,
+        executor: Executor | None = None,
+        name: str | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.queues = list(queues or settings.JOB_QUEUES)
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else settings.JOB_POLL_INTERVAL_MS / 1000
+        )
+        self.stale_after = stale_after or timedelta(seconds=settings.JOB_STALE_AFTER_S)
+        self.task_modules = list(
+            task_modules if task_modules is not None else settings.JOB_TASK_MODULES
+        )
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._free = {
+            ASYNC: async_workers if async_workers is not None else settings.JOB_ASYNC_WORKERS,
+            PROCESS: (
+                process_workers if process_workers is not None else settings.JOB_PROCESS_WORKERS
+            ),
+        }
+        self._executor = executor
+        self._owns_executor = False
+        self._running: Set[asyncio.Task] = set()
+        self._jobs: Dict[int, ClaimedJob] = {}
+        self._wake = asyncio.Event()
+
+    def _db(self, fn: Callable[..., Any], *args: Any) -> Any:
+        db = self.session_factory()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def _execute(self, mode: str, job: ClaimedJob) -> None:
+        start = time.perf_counter()
+        try:
+            if mode == ASYNC:
+                await job_service.get_task(job.task).fn(job.payload)
+            else:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._executor, _run_task, job.task, job.payload)
+        except Exception as exc:
+            status = await asyncio.to_thread(
+                self._db, job_service.fail, job, f"{type(exc).__name__}: {exc}"
+            )
+            logger.warning(
+                "jobs.failed" if status else "jobs.lost",
+                extra={"job_id": job.id, "task": job.task, "attempt": job.attempts, "status": status},
+            )
+        else:
+            completed = await asyncio.to_thread(self._db, job_service.complete, job)
+            logger.info(
+                "jobs.done" if completed else "jobs.lost",
+                extra={
+                    "job_id": job.id,
+                    "task": job.task,
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+            )
+        finally:
+            self._jobs.pop(job.id, None)
+            self._free[mode] += 1
+            self._wake.set()
+
+    async def _claim(self) -> bool:
+        """Fill free slots; returns True if a pool may have more ready jobs."""
+
+        more = False
+        for mode in (ASYNC, PROCESS):
+            free = self._free[mode]
+            names = job_service.task_names(mode)
+            if not free or not names:
+                continue
+            jobs: List[ClaimedJob] = await asyncio.to_thread(
+                self._db, job_service.claim, free, self.queues, names, self.name
+            )
+            for job in jobs:
+                self._free[mode] -= 1
+                self._jobs[job.id] = job
+                running = asyncio.create_task(self._execute(mode, job))
+                self._running.add(running)
+                running.add_done_callback(self._running.discard)
+            more = more or len(jobs) == free
+        return more
+
+    async def _heartbeats(self) -> None:
+        """Renew the heartbeat of running jobs until cancelled."""
+
+        interval = self.stale_after.total_seconds() / 4
+        while True:
+            await asyncio.sleep(interval)
+            jobs = list(self._jobs.values())
+            if not jobs:
+                continue
+            try:
+                held = await asyncio.to_thread(self._db, job_service.heartbeat, jobs)
+            except Exception:
+                logger.exception("jobs.heartbeat_error")
+                continue
+            if held < len(jobs):
+                logger.warning(
+                    "jobs.heartbeat_lost", extra={"worker": self.name, "count": len(jobs) - held}
+                )
+
+    async def _sleep(self, stop: asyncio.Event, timeout: float) -> None:
+        self._wake.clear()
+        waiters = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(self._wake.wait())]
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in waiters:
+            waiter.cancel()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        job_service.load_tasks(self.task_modules)
+        if self._executor is None and self._free[PROCESS] > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._free[PROCESS],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=job_service.load_tasks,
+                initargs=(self.task_modules,),
+            )
+            self._owns_executor = True
+        logger.info(
+            "jobs.worker_started",
+            extra={"worker": self.name, "queues": self.queues, "slots": dict(self._free)},
+        )
+        next_stale_check = 0.0
+        heartbeats = asyncio.create_task(self._heartbeats())
+        try:
+            while not stop.is_set():
+                try:
+                    if time.monotonic() >= next_stale_check:
+                        await asyncio.to_thread(self._db, job_service.requeue_stale, self.stale_after)
+                        await asyncio.to_thread(self._db, job_service.enqueue_periodic)
+                        next_stale_check = time.monotonic() + self.stale_after.total_seconds() / 4
+                    more = await self._claim()
+                except Exception:
+                    logger.exception("jobs.worker_error")
+                    more = False
+                if not more:
+                    await self._sleep(stop, self.poll_interval)
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+        finally:
+            heartbeats.cancel()
+            if self._owns_executor:
+                self._executor.shutdown()
+            logger.info("jobs.worker_stopped", extra={"worker": self.name})
+
+
+async def _serve(worker: Worker) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await worker.run(stop)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--queues", default=None, help="Comma separated queue names")
+    parser.add_argument("--async-workers", type=int, default=None)
+    parser.add_argument("--process-workers", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.db.session import SessionLocal
+
+    worker = Worker(
+        SessionLocal,
+        queues=args.queues.split(",") if args.queues else None,
+        async_workers=args.async_workers,
+        process_workers=args.process_workers,
+        poll_interval=args.poll_interval,
+    )
+    asyncio.run(_serve(worker))
+
+
+if __name__ == "__main__":
+    main()
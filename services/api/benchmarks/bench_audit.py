@@ -0,0 +1,91 @@
+"""Compare synchronous audit inserts with the batched audit writer.
+
+Writes the same number of audit records twice: once with one ``INSERT`` and
+commit per record, as a request would if it audited inline, and once
+through :class:`~app.services.audit_service.AuditWriter`.  Reports
+throughput and the time callers spend per record.
+
+Run from ``services/api``::
+
+    python -m benchmarks.bench_audit --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import uuid
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.tenancy import AuditLogORM
+from app.services.audit_service import AuditRecord, AuditWriter
+
+
+def _record(i: int) -> AuditRecord:
+    return AuditRecord(
+        action="prompts.update",
+        resource_id=uuid.uuid4(),
+        actor_id=uuid.uuid4(),
+        details={"version": i},
+    )
+
+
+def _percentile(timings: list[float], p: float) -> float:
+    return sorted(timings)[int(len(timings) * p)] * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    Session = sessionmaker(bind=create_engine(args.database_url))
+    records = [_record(i) for i in range(args.records)]
+
+    sync_timings = []
+    db = Session()
+    start = time.perf_counter()
+    for record in records:
+        t = time.perf_counter()
+        db.execute(insert(AuditLogORM), [record.row()])
+        db.commit()
+        sync_timings.append(time.perf_counter() - t)
+    sync_elapsed = time.perf_counter() - start
+    db.close()
+
+    writer = AuditWriter(
+        Session,
+        max_queue=args.records,
+        batch_size=args.batch_size,
+        flush_interval=0.05,
+        overflow="block",
+    )
+    writer.start()
+    async_timings = []
+    start = time.perf_counter()
+    for record in records:
+        t = time.perf_counter()
+        writer.enqueue(record)
+        async_timings.append(time.perf_counter() - t)
+    enqueue_elapsed = time.perf_counter() - start
+    writer.flush()
+    async_elapsed = time.perf_counter() - start
+    writer.stop()
+
+    print(f"records: {args.records}  batch size: {args.batch_size}")
+    print(f"sync insert:   {args.records / sync_elapsed:>10,.0f} rec/s  "
+          f"caller p50 {_percentile(sync_timings, 0.5):>8.1f} us  "
+          f"p99 {_percentile(sync_timings, 0.99):>8.1f} us")
+    print(f"audit writer:  {args.records / async_elapsed:>10,.0f} rec/s  "
+          f"caller p50 {_percentile(async_timings, 0.5):>8.1f} us  "
+          f"p99 {_percentile(async_timings, 0.99):>8.1f} us")
+    print(f"enqueue only:  {args.records / enqueue_elapsed:>10,.0f} rec/s  "
+          f"batches {writer.stats.batches}  dropped {writer.stats.dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Report storage saved by content-addressed version content.
+
+Seeds a throwaway owner with prompts that each accumulate many versions
+(duplicates with occasional body edits, sharing large JSON payloads), then
+compares the bytes the blob fields would occupy if every version stored
+them inline with what is actually stored: the inline content of latest
+versions plus one copy per distinct blob.  On-disk relation sizes
+(including TOAST) are reported alongside.
+
+Run from ``services/api``::
+
+    python -m benchmarks.bench_blob_storage --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import uuid
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import user  # noqa: F401  # register ``users`` for FK resolution
+from app.models.prompt import PromptBlobORM, PromptCreate, PromptVersionORM
+from app.services import blob_service, prompt_service
+
+
+def _seed(db, owner_id: uuid.UUID, prompts: int, versions: int, payload_kb: int) -> None:
+    db.execute(
+        text("INSERT INTO users(id, email) VALUES (:id, :email)"),
+        {"id": owner_id, "email": f"{owner_id}@bench.local"},
+    )
+    db.commit()
+    shots = [{"input": "x" * 96, "output": "y" * 96}] * max(1, payload_kb * 4)
+    body = "Summarize the ticket below and list follow-up actions. " * 40
+    for i in range(prompts):
+        created = prompt_service.create_prompt(
+            db,
+            PromptCreate(
+                title=f"History prompt {i}",
+                body=body,
+                use_cases=["support"],
+                access_control="private",
+                llm_parameters={"temperature": 0.2},
+                input_schema={"type": "object", "properties": {"ticket": {"type": "string"}}},
+                sample_input={"shots": shots},
+                sample_output={"shots": shots},
+            ),
+            owner_id=owner_id,
+        )
+        for v in range(2, versions + 1):
+            prompt_service.duplicate_prompt(db, created.prompt_id)
+            if v % 3 == 0:
+                prompt_service.update_prompt(
+                    db,
+                    created.prompt_id,
+                    PromptCreate.model_construct(body=f"{body}\nRevision {v}."),
+                )
+
+
+def _logical_bytes(db, owner_ids) -> int:
+    total = 0
+    versions = db.query(PromptVersionORM).filter(
+        PromptVersionORM.prompt_id.in_(owner_ids)
+    )
+    for version in versions.yield_per(200):
+        for field in blob_service.BLOB_FIELDS:
+            value = blob_service.content(version, field)
+            if value is not None:
+                total += len(blob_service.canonical_bytes(value))
+    return total
+
+
+def _stored_bytes(db, prompt_ids) -> int:
+    inline = 0
+    versions = db.query(PromptVersionORM).filter(
+        PromptVersionORM.prompt_id.in_(prompt_ids)
+    )
+    for version in versions.yield_per(200):
+        for field in blob_service.BLOB_FIELDS:
+            value = getattr(version, field)
+            if value is not None:
+                inline += len(blob_service.canonical_bytes(value))
+    blobs = db.query(func.coalesce(func.sum(PromptBlobORM.size_bytes), 0)).scalar()
+    return inline + int(blobs)
+
+
+def _relation_bytes(db) -> int:
+    return int(
+        db.execute(
+            text(
+                "SELECT pg_total_relation_size('prompt_versions') "
+                "+ pg_total_relation_size('prompt_blobs')"
+            )
+        ).scalar()
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--versions", type=int, default=20)
+    parser.add_argument("--payload-kb", type=int, default=16)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    db = sessionmaker(bind=engine)()
+    owner_id = uuid.uuid4()
+    _seed(db, owner_id, args.prompts, args.versions, args.payload_kb)
+
+    prompt_ids = [
+        row[0]
+        for row in db.execute(
+            text("SELECT id FROM prompts WHERE owner_id = :owner"), {"owner": owner_id}
+        )
+    ]
+    logical = _logical_bytes(db, prompt_ids)
+    stored = _stored_bytes(db, prompt_ids)
+    blobs = db.query(func.count(PromptBlobORM.digest)).scalar()
+    print(f"versions: {args.prompts * args.versions}  distinct blobs: {blobs}")
+    print(f"inline-equivalent content: {logical:>12,} B")
+    print(f"stored content:            {stored:>12,} B")
+    print(f"reduction:                 {1 - stored / logical:>12.1%}")
+    print(f"on-disk (versions+blobs):  {_relation_bytes(db):>12,} B")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Report storage and read cost of delta-compressed prompt history.
+
+Seeds a throwaway owner with prompts whose bodies receive a small edit in
+every version, then compares the bytes superseded bodies would occupy if
+each were stored in full with what delta mode stores (snapshot blobs plus
+deltas), and times reconstructing every version.
+
+Run from ``services/api``::
+
+    python -m benchmarks.bench_history --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import user  # noqa: F401  # register ``users`` for FK resolution
+from app.models.prompt import PromptCreate, PromptVersionORM
+from app.services import history_service, prompt_service
+
+
+def _body(lines: int, revision: int) -> str:
+    steps = [f"Step {i}: check the ticket against policy section {i}.\n" for i in range(lines)]
+    steps[revision % lines] = f"Step {revision % lines}: revised in edit {revision}.\n"
+    return "".join(steps)
+
+
+def _seed(db, owner_id: uuid.UUID, prompts: int, versions: int, lines: int):
+    db.execute(
+        text("INSERT INTO users(id, email) VALUES (:id, :email)"),
+        {"id": owner_id, "email": f"{owner_id}@bench.local"},
+    )
+    db.commit()
+    prompt_ids = []
+    for i in range(prompts):
+        created = prompt_service.create_prompt(
+            db,
+            PromptCreate(
+                title=f"Edited prompt {i}",
+                body=_body(lines, 0),
+                use_cases=["support"],
+                access_control="private",
+            ),
+            owner_id=owner_id,
+        )
+        for v in range(2, versions + 1):
+            prompt_service.duplicate_prompt(db, created.prompt_id)
+            prompt_service.update_prompt(
+                db,
+                created.prompt_id,
+                PromptCreate.model_construct(body=_body(lines, v)),
+            )
+        prompt_ids.append(created.prompt_id)
+    return prompt_ids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--prompts", type=int, default=10)
+    parser.add_argument("--versions", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=80)
+    parser.add_argument("--interval", type=int, default=settings.PROMPT_SNAPSHOT_INTERVAL)
+    args = parser.parse_args()
+
+    settings.PROMPT_HISTORY_MODE = "delta"
+    settings.PROMPT_SNAPSHOT_INTERVAL = args.interval
+    engine = create_engine(args.database_url)
+    db = sessionmaker(bind=engine)()
+    prompt_ids = _seed(db, uuid.uuid4(), args.prompts, args.versions, args.lines)
+
+    full = stored = 0
+    timings = []
+    history = (
+        db.query(PromptVersionORM)
+        .filter(PromptVersionORM.prompt_id.in_(prompt_ids))
+        .filter(PromptVersionORM.body.is_(None))
+        .all()
+    )
+    for version in history:
+        db.expire_all()
+        start = time.perf_counter()
+        body = history_service.body_of(version)
+        timings.append(time.perf_counter() - start)
+        full += len(body.encode())
+        if version.body_delta is not None:
+            stored += len(json.dumps(version.body_delta).encode())
+        else:
+            stored += len(body.encode())
+    timings.sort()
+
+    print(f"superseded versions: {len(history)}  snapshot interval: {args.interval}")
+    print(f"full-body history: {full:>12,} B")
+    print(f"stored history:    {stored:>12,} B")
+    print(f"reduction:         {1 - stored / full:>12.1%}")
+    print(f"rebuild p50:       {timings[len(timings) // 2] * 1000:>12.2f} ms")
+    print(f"rebuild p95:       {timings[int(len(timings) * 0.95)] * 1000:>12.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
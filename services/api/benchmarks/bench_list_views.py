@@ -0,0 +1,91 @@
+"""Measure bytes transferred for ``full`` and ``summary`` prompt list views.
+
+Seeds a throwaway owner with prompts carrying large bodies and JSONB
+payloads into a migrated database, then reports, per view, the bytes the
+list query returns from Postgres (text representation of the selected rows)
+and the size of the JSON response body.
+
+Run from ``services/api``::
+
+    python -m benchmarks.bench_list_views --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.serialization import dump_json
+from app.models import user  # noqa: F401  # register ``users`` for FK resolution
+from app.models.prompt import PromptCreate, PromptListResponse, PromptView
+from app.services import prompt_service, search_service
+
+
+def _seed(db, owner_id: uuid.UUID, count: int, payload_kb: int) -> None:
+    db.execute(
+        text("INSERT INTO users(id, email) VALUES (:id, :email)"),
+        {"id": owner_id, "email": f"{owner_id}@bench.local"},
+    )
+    db.commit()
+    shots = [{"input": "x" * 96, "output": "y" * 96}] * max(1, payload_kb * 4)
+    for i in range(count):
+        prompt_service.create_prompt(
+            db,
+            PromptCreate(
+                title=f"Bench prompt {i}",
+                body=f"Prompt {i}. " + "Summarize the ticket below. " * 200,
+                use_cases=["support"],
+                access_control="private",
+                target_models=["gpt-4o"],
+                tags=["bench"],
+                llm_parameters={"temperature": 0.2},
+                sample_input={"shots": shots},
+                sample_output={"shots": shots},
+            ),
+            owner_id=owner_id,
+        )
+
+
+def _db_bytes(db, filters: search_service.SearchFilters) -> int:
+    statement = search_service.build_query(db, filters).statement
+    sql = statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    return int(
+        db.execute(
+            text(f"SELECT sum(octet_length(t::text)) FROM ({sql}) AS t")
+        ).scalar()
+        or 0
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--prompts", type=int, default=50)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    db = sessionmaker(bind=engine)()
+    owner_id = uuid.uuid4()
+    _seed(db, owner_id, args.prompts, args.payload_kb)
+
+    for view in PromptView:
+        filters = search_service.SearchFilters(owner_id=owner_id, limit=50, view=view)
+        result = prompt_service.list_prompts(
+            db, owner_id=owner_id, limit=50, view=view.value
+        )
+        http_bytes = len(dump_json(result, PromptListResponse))
+        print(
+            f"{view.value:>7}: postgres {_db_bytes(db, filters):>10,} B  "
+            f"http {http_bytes:>10,} B  ({result.count} items)"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
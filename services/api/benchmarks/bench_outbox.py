@@ -0,0 +1,81 @@
+"""Measure outbox dispatch throughput with concurrent dispatchers.
+
+Emits ``--events`` events spread over ``--aggregates`` prompts, then drains
+the outbox with ``--workers`` threads each running
+:func:`~app.services.outbox_service.dispatch_batch` until nothing is left.
+Reports events per second and checks that every prompt's events were
+delivered in order.
+
+Run from ``services/api`` against a migrated database::
+
+    python -m benchmarks.bench_outbox --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.services import outbox_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--aggregates", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, pool_size=args.workers + 1)
+    Session = sessionmaker(bind=engine)
+    aggregates = [uuid.uuid4() for _ in range(args.aggregates)]
+
+    with Session() as db:
+        db.execute(text("TRUNCATE outbox_events"))
+        for i in range(args.events):
+            outbox_service.emit(
+                db, outbox_service.PROMPT_UPDATED, aggregates[i % len(aggregates)], seq=i
+            )
+        db.commit()
+
+    delivered = defaultdict(list)
+    lock = threading.Lock()
+
+    def record(event):
+        with lock:
+            delivered[event.aggregate_id].append(event.payload["seq"])
+
+    outbox_service.register_handler("*", record)
+
+    def worker():
+        while True:
+            with Session() as db:
+                stats = outbox_service.dispatch_batch(db, args.batch_size)
+            if not stats.delivered:
+                return
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(seqs) for seqs in delivered.values())
+    ordered = all(seqs == sorted(seqs) for seqs in delivered.values())
+    print(f"events: {args.events}  aggregates: {args.aggregates}  workers: {args.workers}")
+    print(f"delivered {total} in {elapsed:.2f}s: {total / elapsed:,.0f} events/s")
+    print(f"per-aggregate order preserved: {ordered}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark per-item serialization cost of prompt list responses.
+
+Compares the previous path (validated ``Prompt`` construction followed by a
+second validation and encoding pass through FastAPI's ``response_model``)
+with the fast path used by the API (``model_construct`` plus a cached
+``TypeAdapter`` emitting JSON bytes directly).
+
+Run from ``services/api``::
+
+    python -m benchmarks.bench_serialization --items 50 --payload-kb 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import dump_json
+from app.models.prompt import (
+    Prompt,
+    PromptHeaderORM,
+    PromptListResponse,
+    PromptVersionORM,
+)
+from app.services.prompt_service import _to_prompt
+
+
+def _payload(kb: int) -> dict:
+    """Return a few-shot style JSON payload of roughly ``kb`` kilobytes."""
+
+    shots = max(1, kb * 1024 // 256)
+    return {
+        "examples": [
+            {"input": "x" * 96, "output": "y" * 96, "score": i / shots}
+            for i in range(shots)
+        ]
+    }
+
+
+def _rows(count: int, payload_kb: int) -> List[tuple]:
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        header = PromptHeaderORM(
+            id=uuid.uuid4(),
+            owner_id=uuid.uuid4(),
+            title=f"Prompt {i}",
+            tags=["support", "triage"],
+            created_at=now,
+            updated_at=now,
+        )
+        version = PromptVersionORM(
+            id=uuid.uuid4(),
+            prompt_id=header.id,
+            version=1,
+            body="Summarize the following ticket. " * 40,
+            access_control="private",
+            use_cases=["support"],
+            target_models=["gpt-4o"],
+            providers=["openai"],
+            integrations=[],
+            llm_parameters={"temperature": 0.2},
+            sample_input=_payload(payload_kb),
+            sample_output=_payload(payload_kb),
+            created_at=now,
+            updated_at=now,
+        )
+        rows.append((version, header))
+    return rows
+
+
+def _legacy(rows: List[tuple]) -> bytes:
+    items = [
+        Prompt.model_validate(_to_prompt(v, h).model_dump()) for v, h in rows
+    ]
+    response = PromptListResponse(items=items, count=len(items))
+    validated = PromptListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def _fast(rows: List[tuple]) -> bytes:
+    items = [_to_prompt(v, h) for v, h in rows]
+    response = PromptListResponse.model_construct(
+        items=items, next_cursor=None, count=len(items), total_estimate=None
+    )
+    return dump_json(response, PromptListResponse)
+
+
+def _time(fn: Callable[[List[tuple]], bytes], rows: List[tuple], rounds: int) -> float:
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(rows)
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--payload-kb", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.items, args.payload_kb)
+    assert json.loads(_legacy(rows)) == json.loads(_fast(rows))
+
+    for name, fn in (("legacy", _legacy), ("fast", _fast)):
+        page = _time(fn, rows, args.rounds)
+        print(
+            f"{name:>6}: {page * 1000:8.2f} ms/page "
+            f"{page / args.items * 1e6:8.1f} us/item"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Shared fixtures for the tests that run against Postgres.
+
+The schema is rebuilt once per session and migrated to head; tests keep out
+of each other's way by working under their own ``owner``.  Everything here
+skips unless ``DATABASE_URL_TEST`` points at a reachable database.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import uuid
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import user  # noqa: F401  # register ``users`` for FK resolution
+from app.models.prompt import PromptCreate
+from app.services import prompt_service
+
+TEST_DB = settings.DATABASE_URL_TEST
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def alembic_config() -> Config:
+    cfg = Config(str(BASE_DIR / "alembic.ini"))
+    cfg.set_main_option("sqlalchemy.url", TEST_DB)
+    return cfg
+
+
+@pytest.fixture(scope="session")
+def engine(alembic_config):
+    if not TEST_DB:
+        pytest.skip("DATABASE_URL_TEST is not set")
+    engine = create_engine(TEST_DB, pool_size=16, max_overflow=4)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        pytest.skip("database not available")
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public;"))
+    command.upgrade(alembic_config, "head")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def Session(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(scope="session")
+def make_owner(Session):
+    """Return a factory inserting a new user and returning its id."""
+
+    def make() -> uuid.UUID:
+        owner_id = uuid.uuid4()
+        with Session() as db:
+            db.execute(
+                text("INSERT INTO users(id, email) VALUES (:id, :email)"),
+                {"id": owner_id, "email": f"{owner_id}@example.com"},
+            )
+            db.commit()
+        return owner_id
+
+    return make
+
+
+@pytest.fixture
+def owner(make_owner) -> uuid.UUID:
+    return make_owner()
+
+
+@pytest.fixture(scope="session")
+def create_prompt():
+    """Return a factory creating a private prompt through the service.
+
+    Fields not given default to a short body and a single use case.
+    """
+
+    def create(db, owner_id, title="Prompt", **fields):
+        fields.setdefault("body", "Be concise.")
+        fields.setdefault("use_cases", ["test"])
+        fields.setdefault("access_control", "private")
+        return prompt_service.create_prompt(
+            db, PromptCreate(title=title, **fields), owner_id=owner_id
+        )
+
+    return create
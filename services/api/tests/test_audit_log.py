@@ -0,0 +1,35 @@
+"""Asynchronous audit log writer against the database."""
+from __future__ import annotations
+
+from app.models.tenancy import AuditLogORM
+from app.services import audit_service, collection_service, prompt_service
+
+
+def test_mutations_are_audited(Session, owner, create_prompt):
+    writer = audit_service.start(Session)
+    try:
+        with Session() as db:
+            created = create_prompt(db, owner, "Audited", body="v1")
+            prompt_service.duplicate_prompt(db, created.prompt_id)
+            collection = collection_service.create_collection(db, owner, "Audited")
+            collection_service.add_prompt(db, owner, collection.id, created.prompt_id)
+        writer.flush()
+    finally:
+        audit_service.stop()
+
+    with Session() as db:
+        rows = (
+            db.query(AuditLogORM)
+            .filter(AuditLogORM.actor_id == owner)
+            .order_by(AuditLogORM.id)
+            .all()
+        )
+    assert [row.action for row in rows] == [
+        "prompts.create",
+        "prompts.duplicate",
+        "collections.create",
+        "collections.add_prompt",
+    ]
+    assert rows[0].resource_id == created.prompt_id
+    assert rows[1].details == {"version": 2}
+    assert rows[3].details == {"prompt_id": str(created.prompt_id)}
@@ -0,0 +1,102 @@
+"""Content-addressed storage of superseded prompt versions."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.models.prompt import (
+    PromptBlobORM,
+    PromptCreate,
+    PromptHeaderORM,
+    PromptVersionORM,
+)
+from app.services import blob_service, history_service, prompt_service
+
+PAYLOAD = {"shots": [{"input": "x" * 64, "output": "y" * 64}] * 20}
+
+
+@pytest.fixture
+def prompt(Session, owner, create_prompt):
+    with Session() as db:
+        return create_prompt(
+            db,
+            owner,
+            "Blobs",
+            body="Original body",
+            sample_input=PAYLOAD,
+            sample_output=PAYLOAD,
+        )
+
+
+def _versions(db, prompt_id):
+    return (
+        db.query(PromptVersionORM)
+        .filter(PromptVersionORM.prompt_id == prompt_id)
+        .order_by(PromptVersionORM.version)
+        .all()
+    )
+
+
+def test_duplicates_share_blobs_and_read_transparently(Session, prompt):
+    with Session() as db:
+        for _ in range(3):
+            prompt_service.duplicate_prompt(db, prompt.prompt_id)
+        prompt_service.update_prompt(
+            db,
+            prompt.prompt_id,
+            PromptCreate.model_construct(body="Edited body"),
+        )
+
+    with Session() as db:
+        versions = _versions(db, prompt.prompt_id)
+        header = db.get(PromptHeaderORM, prompt.prompt_id)
+        history, latest = versions[:-1], versions[-1]
+
+        assert latest.body == "Edited body" and latest.body_digest is None
+        assert all(v.body is None and v.sample_input is None for v in history)
+        assert history[0].body_digest == blob_service.digest_of("Original body")
+        assert {history_service.body_of(v) for v in history} == {"Original body"}
+
+        payload = db.get(PromptBlobORM, blob_service.digest_of(PAYLOAD))
+        # sample_input and sample_output of three sealed versions
+        assert payload.ref_count == 6
+
+        old = prompt_service._to_prompt(history[0], header)
+        assert old.body == "Original body"
+        assert old.sample_output == PAYLOAD
+        latest = prompt_service.get_prompt_by_id(db, prompt.prompt_id, prompt.owner_id)
+        assert latest.body == "Edited body"
+
+
+def test_seal_history_release_and_gc(Session, prompt):
+    with Session() as db:
+        # Simulate history written before sealing existed.
+        latest = _versions(db, prompt.prompt_id)[0]
+        db.execute(
+            text(
+                "INSERT INTO prompt_versions(id, prompt_id, version, body, "
+                "access_control, use_cases, sample_input) "
+                "VALUES (:id, :pid, 0, 'Legacy body', 'private', '{u}', "
+                "CAST(:payload AS jsonb))"
+            ),
+            {
+                "id": uuid.uuid4(),
+                "pid": prompt.prompt_id,
+                "payload": '{"legacy": true}',
+            },
+        )
+        db.commit()
+        assert blob_service.seal_history(db, prompt_id=prompt.prompt_id) == 1
+        assert blob_service.seal_history(db, prompt_id=prompt.prompt_id) == 0
+
+        legacy = _versions(db, prompt.prompt_id)[0]
+        assert latest.body == "Original body"
+        assert blob_service.content(legacy, "body") == "Legacy body"
+
+        blob_service.release_version(db, legacy)
+        db.delete(legacy)
+        db.commit()
+        assert blob_service.collect_garbage(db) == 2
+        assert db.get(PromptBlobORM, blob_service.digest_of("Legacy body")) is None
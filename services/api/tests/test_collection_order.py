@@ -0,0 +1,152 @@
+"""Manual ordering of collection prompts against Postgres."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from alembic import command
+from sqlalchemy import event, text
+
+from app.services import collection_service, prompt_service
+
+
+@pytest.fixture
+def collection(Session, owner, create_prompt):
+    """A collection holding P0..P4, added in that order."""
+
+    with Session() as db:
+        found = collection_service.create_collection(db, owner, "Ordered")
+        prompts = []
+        for i in range(5):
+            prompt = create_prompt(db, owner, f"P{i}")
+            collection_service.add_prompt(db, owner, found.id, prompt.prompt_id)
+            prompts.append(prompt.prompt_id)
+    return owner, found.id, prompts
+
+
+def _titles(db, owner_id, collection_id, sort="position", limit=2):
+    titles, after = [], None
+    while True:
+        page = prompt_service.list_prompts(
+            db,
+            owner_id,
+            collection_id=collection_id,
+            sort=sort,
+            limit=limit,
+            after=after,
+            view="summary",
+        )
+        titles += [item.title for item in page.items]
+        after = page.next_cursor
+        if after is None:
+            return titles
+
+
+def test_prompts_page_in_collection_order(Session, collection):
+    owner_id, collection_id, _ = collection
+    with Session() as db:
+        assert _titles(db, owner_id, collection_id) == ["P0", "P1", "P2", "P3", "P4"]
+        assert _titles(db, owner_id, collection_id, sort="added_desc") == [
+            "P4",
+            "P3",
+            "P2",
+            "P1",
+            "P0",
+        ]
+        full = prompt_service.list_prompts(
+            db, owner_id, collection_id=collection_id, sort="position", limit=3
+        )
+        assert [item.title for item in full.items] == ["P0", "P1", "P2"]
+
+
+def test_collection_sorts_require_a_collection(Session, collection):
+    owner_id, _, _ = collection
+    with Session() as db:
+        with pytest.raises(ValueError):
+            prompt_service.list_prompts(db, owner_id, sort="position")
+
+
+def test_move_rewrites_only_the_moved_row(Session, engine, collection, create_prompt):
+    owner_id, collection_id, prompts = collection
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("UPDATE COLLECTION_PROMPTS"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session() as db:
+            moved = collection_service.move_prompt(
+                db, owner_id, collection_id, prompts[4], after_id=prompts[0]
+            )
+            collection_service.move_prompt(
+                db, owner_id, collection_id, prompts[0], before_id=prompts[3]
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert len(statements) == 2
+    assert moved.prompt_id == prompts[4]
+    with Session() as db:
+        assert _titles(db, owner_id, collection_id) == ["P4", "P1", "P2", "P0", "P3"]
+        # New prompts still go to the end.
+        extra = create_prompt(db, owner_id, "P5")
+        collection_service.add_prompt(db, owner_id, collection_id, extra.prompt_id)
+        assert _titles(db, owner_id, collection_id)[-1] == "P5"
+
+
+def test_move_rejects_bad_anchors(Session, collection):
+    owner_id, collection_id, prompts = collection
+    with Session() as db:
+        with pytest.raises(ValueError):
+            collection_service.move_prompt(db, owner_id, collection_id, prompts[0])
+        with pytest.raises(ValueError):
+            collection_service.move_prompt(
+                db, owner_id, collection_id, prompts[0], after_id=prompts[1], before_id=prompts[2]
+            )
+        with pytest.raises(ValueError):
+            collection_service.move_prompt(
+                db, owner_id, collection_id, prompts[0], after_id=uuid.uuid4()
+            )
+        assert (
+            collection_service.move_prompt(
+                db, owner_id, collection_id, uuid.uuid4(), after_id=prompts[0]
+            )
+            is None
+        )
+        with pytest.raises(PermissionError):
+            collection_service.move_prompt(
+                db, uuid.uuid4(), collection_id, prompts[0], after_id=prompts[1]
+            )
+
+
+def test_migration_backfills_the_previous_order(Session, alembic_config, collection):
+    owner_id, collection_id, prompts = collection
+    command.downgrade(alembic_config, "20261019_prompt_links")
+    try:
+        with Session() as db:
+            # Previously lists showed the most recently updated prompt first.
+            db.execute(
+                text(
+                    "UPDATE prompt_cards SET updated_at = now() - make_interval(mins => :i)"
+                    " WHERE id = :id"
+                ),
+                [{"i": i, "id": prompt_id} for i, prompt_id in enumerate(reversed(prompts))],
+            )
+            db.commit()
+    finally:
+        command.upgrade(alembic_config, "head")
+    with Session() as db:
+        assert _titles(db, owner_id, collection_id) == ["P4", "P3", "P2", "P1", "P0"]
+        positions = db.execute(
+            text(
+                "SELECT position FROM collection_prompts WHERE collection_id = :id"
+                " ORDER BY position"
+            ),
+            {"id": collection_id},
+        ).scalars().all()
+        assert positions == ["0001V", "0002V", "0003V", "0004V", "0005V"]
+        collection_service.move_prompt(
+            db, owner_id, collection_id, prompts[0], after_id=prompts[4]
+        )
+        assert _titles(db, owner_id, collection_id)[:2] == ["P4", "P0"]
@@ -0,0 +1,204 @@
+"""Query plan checks for prompt card facet filters."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.models.prompt import PromptView
+from app.services.search_service import (
+    FacetMatch,
+    SearchFilters,
+    SearchSort,
+    build_query,
+    encode_cursor,
+    parse_json_filters,
+)
+
+OWNER_ID = uuid.uuid4()
+PROMPTS = 20000
+
+
+@pytest.fixture(scope="module", autouse=True)
+def library(engine):
+    """``PROMPTS`` cards for ``OWNER_ID`` with spread-out facet values."""
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users(id, email) VALUES (:id, 'facets@example.com')"),
+            {"id": OWNER_ID},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO prompts(id, owner_id, title, tags, created_at, updated_at) "
+                "SELECT gen_random_uuid(), :owner, 'Prompt ' || i, "
+                "ARRAY['common', 'tag' || (i % 1000)], "
+                "now() - i * interval '1 minute', now() - i * interval '1 minute' "
+                "FROM generate_series(1, :n) AS i"
+            ),
+            {"owner": OWNER_ID, "n": PROMPTS},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO prompt_cards(id, owner_id, version_id, version, title, "
+                "tags, target_models, providers, use_cases, access_control, "
+                "category, status, llm_parameters, success_metrics, "
+                "created_at, updated_at) "
+                "SELECT id, owner_id, gen_random_uuid(), 1, title, tags, "
+                "ARRAY['model' || (abs(hashtext(title)) % 1000)], "
+                "ARRAY['provider' || (abs(hashtext(title)) % 1000)], "
+                "ARRAY['use' || (abs(hashtext(title)) % 1000)], "
+                "'private', 'category' || (abs(hashtext(title)) % 500), "
+                "'status' || (abs(hashtext(title)) % 500), "
+                "jsonb_build_object('temperature', (abs(hashtext(title)) % 1000) / 1000.0, "
+                "'model', 'model' || (abs(hashtext(title)) % 1000)), "
+                "jsonb_build_object('accuracy', (abs(hashtext(title)) % 1000) / 1000.0, "
+                "'suite', jsonb_build_object('name', 'suite' || (abs(hashtext(title)) % 1000))), "
+                "created_at, updated_at FROM prompts WHERE owner_id = :owner"
+            ),
+            {"owner": OWNER_ID},
+        )
+        conn.execute(
+            text(
+                "UPDATE prompt_cards SET "
+                "is_archived = abs(hashtext(id::text)) % 10 = 0, "
+                "is_favorite = abs(hashtext(id::text)) % 20 = 1 "
+                "WHERE owner_id = :owner"
+            ),
+            {"owner": OWNER_ID},
+        )
+        conn.execute(text("ANALYZE prompt_cards"))
+
+
+def _plan(engine, **filters) -> str:
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        return "EXPLAIN " + statement, parameters
+
+    with Session(engine) as db:
+        query = build_query(
+            db, SearchFilters(owner_id=OWNER_ID, view=PromptView.summary, **filters)
+        )
+        conn = db.connection()
+        event.listen(conn, "before_cursor_execute", explain, retval=True)
+        rows = conn.execute(query.statement).all()
+    return "\n".join(row[0] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "field,column,values",
+    [
+        ("tags", "tags", ["tag7", "tag8"]),
+        ("target_models", "target_models", ["model7", "model8"]),
+        ("providers", "providers", ["provider7", "provider8"]),
+        ("purposes", "use_cases", ["use7", "use8"]),
+    ],
+)
+@pytest.mark.parametrize("match", list(FacetMatch))
+def test_facet_filters_use_gin_indexes(engine, field, column, values, match):
+    plan = _plan(engine, match=match, **{field: values})
+    assert f"ix_prompt_cards_{column}" in plan
+    operator = "&&" if match == FacetMatch.any else "@>"
+    assert operator in plan
+
+
+def _cards(engine, tags, match=FacetMatch.all):
+    with Session(engine) as db:
+        return build_query(
+            db,
+            SearchFilters(
+                owner_id=OWNER_ID,
+                tags=tags,
+                match=match,
+                limit=50,
+                view=PromptView.summary,
+            ),
+        ).all()
+
+
+def test_facet_match_semantics(engine):
+    any_rows = _cards(engine, ["tag7", "tag8"], FacetMatch.any)
+    all_rows = _cards(engine, ["common", "tag7"])
+    none_rows = _cards(engine, ["tag7", "tag8"])
+    assert len(any_rows) == 40
+    assert all({"tag7", "tag8"} & set(card.tags) for card in any_rows)
+    assert len(all_rows) == 20
+    assert none_rows == []
+
+
+@pytest.mark.parametrize(
+    "filters,index",
+    [
+        ({"category": ["category7"]}, "ix_prompt_cards_owner_category"),
+        ({"status": ["status7", "status8"]}, "ix_prompt_cards_owner_status"),
+        (
+            {"where": parse_json_filters(["llm_parameters.model=model7"])},
+            "ix_prompt_cards_llm_parameters",
+        ),
+        (
+            {"where": parse_json_filters(["success_metrics.suite.name=suite7"])},
+            "ix_prompt_cards_success_metrics",
+        ),
+        (
+            {"where": parse_json_filters(["llm_parameters.temperature<=0.002"])},
+            "ix_prompt_cards_temperature",
+        ),
+    ],
+)
+def test_governance_filters_are_index_served(engine, filters, index):
+    assert index in _plan(engine, **filters)
+
+
+def test_json_range_filters(engine):
+    with Session(engine) as db:
+        cards = build_query(
+            db,
+            SearchFilters(
+                owner_id=OWNER_ID,
+                view=PromptView.summary,
+                limit=50,
+                where=parse_json_filters(
+                    ["llm_parameters.temperature<0.01", "success_metrics.accuracy>=0"]
+                ),
+            ),
+        ).all()
+    assert cards
+    assert all(card.llm_parameters["temperature"] < 0.01 for card in cards)
+
+
+@pytest.mark.parametrize(
+    "filters,index",
+    [
+        ({"archived": False}, "ix_prompt_cards_active_updated"),
+        (
+            {"archived": False, "sort": SearchSort.created_desc},
+            "ix_prompt_cards_active_created",
+        ),
+        (
+            {"archived": False, "sort": SearchSort.title_asc},
+            "ix_prompt_cards_active_title",
+        ),
+        ({"archived": False, "favorite": True}, "ix_prompt_cards_favorites_updated"),
+    ],
+)
+def test_active_listings_use_partial_indexes(engine, filters, index):
+    plan = _plan(engine, **filters)
+    first = plan.splitlines()[1]
+    assert f"Index Scan using {index}" in first or (
+        f"Index Only Scan using {index}" in first
+    )
+    assert "Sort" not in plan
+    assert "Filter" not in plan
+
+
+def test_active_cursor_pages_stay_on_partial_index(engine):
+    with Session(engine) as db:
+        filters = SearchFilters(
+            owner_id=OWNER_ID, archived=False, view=PromptView.summary
+        )
+        cards = build_query(db, filters).all()
+    after = encode_cursor((None, cards[filters.limit - 1]), filters.sort)
+    plan = _plan(engine, archived=False, after=after)
+    assert "ix_prompt_cards_active_updated" in plan
+    assert "Sort" not in plan
@@ -0,0 +1,141 @@
+"""Delta-compressed history of prompt bodies."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.prompt import DiffGranularity, PromptCreate, PromptVersionORM
+from app.services import diff_service, history_service, prompt_service
+
+EDITS = 20
+INTERVAL = 4
+
+
+def _body(n: int) -> str:
+    return "".join(f"Step {i}: do the thing.\n" for i in range(50 + n))
+
+
+@pytest.fixture
+def edited(Session, owner, create_prompt, monkeypatch):
+    """A prompt whose body changed in each of its versions."""
+
+    monkeypatch.setattr(settings, "PROMPT_HISTORY_MODE", "delta")
+    monkeypatch.setattr(settings, "PROMPT_SNAPSHOT_INTERVAL", INTERVAL)
+    with Session() as db:
+        created = create_prompt(db, owner, "History", body=_body(1))
+        for n in range(2, EDITS + 1):
+            prompt_service.duplicate_prompt(db, created.prompt_id)
+            prompt_service.update_prompt(
+                db, created.prompt_id, PromptCreate.model_construct(body=_body(n))
+            )
+    return Session, owner, created.prompt_id
+
+
+def _depths(db, prompt_id):
+    return [
+        (v.version, v.delta_depth, v.body is not None, v.body_digest is not None)
+        for v in db.query(PromptVersionORM)
+        .filter(PromptVersionORM.prompt_id == prompt_id)
+        .order_by(PromptVersionORM.version)
+    ]
+
+
+def test_history_keeps_periodic_snapshots(edited):
+    Session, _, prompt_id = edited
+    with Session() as db:
+        rows = _depths(db, prompt_id)
+
+    *history, latest = rows
+    assert latest == (EDITS, 0, True, False)
+    assert [depth for _, depth, _, _ in history] == [
+        (v - 1) % INTERVAL for v, _, _, _ in history
+    ]
+    assert all(
+        has_digest == (depth == 0) and not inline
+        for _, depth, inline, has_digest in history
+    )
+
+
+def test_old_versions_rebuild_in_one_query(edited, engine):
+    Session, owner_id, prompt_id = edited
+    statements = []
+
+    def count(*args):
+        statements.append(args[2])
+
+    with Session() as db:
+        for n in range(1, EDITS + 1):
+            version = (
+                db.query(PromptVersionORM)
+                .filter_by(prompt_id=prompt_id, version=n)
+                .one()
+            )
+            db.expunge_all()
+            db.add(version)
+            event.listen(engine, "before_cursor_execute", count)
+            try:
+                assert history_service.body_of(version) == _body(n)
+            finally:
+                event.remove(engine, "before_cursor_execute", count)
+            # The chain query, plus the snapshot blob when it is loaded.
+            assert len(statements) <= 2
+            statements.clear()
+
+        old = prompt_service.get_prompt_by_id(db, prompt_id, owner_id, version=7)
+        assert old.version == 7 and old.body == _body(7)
+        missing = prompt_service.get_prompt_by_id(db, prompt_id, owner_id, version=EDITS + 1)
+        assert missing is None
+        # Earlier versions are as private as the latest one.
+        assert prompt_service.get_prompt_by_id(db, prompt_id, uuid.uuid4(), version=7) is None
+
+
+def test_compact_rewrites_chains(edited):
+    Session, owner_id, prompt_id = edited
+    with Session() as db:
+        assert history_service.compact(db, prompt_id=prompt_id, interval=8) > 0
+        depths = [depth for _, depth, _, _ in _depths(db, prompt_id)]
+        assert depths[:-1] == [(v - 1) % 8 for v in range(1, EDITS)]
+        assert history_service.compact(db, prompt_id=prompt_id, interval=8) == 0
+
+        history_service.compact(db, prompt_id=prompt_id, mode="blob")
+        assert all(
+            depth == 0 and (inline or has_digest)
+            for _, depth, inline, has_digest in _depths(db, prompt_id)
+        )
+        for n in range(1, EDITS + 1):
+            old = prompt_service.get_prompt_by_id(db, prompt_id, owner_id, version=n)
+            assert old.body == _body(n)
+
+
+def test_versions_page_newest_first(edited):
+    Session, owner_id, prompt_id = edited
+    seen, after = [], None
+    with Session() as db:
+        while True:
+            page = prompt_service.list_versions(
+                db, prompt_id, owner_id, limit=6, after=after
+            )
+            seen += [item.version for item in page.items]
+            after = page.next_cursor
+            if after is None:
+                break
+        assert prompt_service.list_versions(db, uuid.uuid4(), owner_id) is None
+        # Another user's prompt is reported as missing.
+        assert prompt_service.list_versions(db, prompt_id, uuid.uuid4()) is None
+    assert seen == list(range(EDITS, 0, -1))
+
+
+def test_diff_across_delta_chain(edited):
+    Session, owner_id, prompt_id = edited
+    diff_service.cache.clear()
+    with Session() as db:
+        diff = diff_service.diff_versions(
+            db, prompt_id, owner_id, 3, 11, DiffGranularity.line
+        )
+        assert diff_service.diff_versions(db, prompt_id, uuid.uuid4(), 3, 11) is None
+    assert [op.op for op in diff.ops] == ["equal", "insert"]
+    assert "".join(op.text for op in diff.ops) == _body(11)
+    assert diff.deletions == 0
@@ -0,0 +1,277 @@
+"""Job queue claiming, retries and the worker loop against Postgres."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.models.job import JobORM
+from app.services import job_service
+from app.worker import Worker
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(Session, monkeypatch):
+    with Session() as db:
+        db.execute(text("TRUNCATE jobs"))
+        db.commit()
+    monkeypatch.setattr(job_service, "_tasks", {})
+
+
+def test_claim_orders_by_priority_and_skips_delayed(Session):
+    with Session() as db:
+        low = job_service.enqueue(db, "t", {"n": 1})
+        high = job_service.enqueue(db, "t", {"n": 2}, priority=5)
+        job_service.enqueue(db, "t", {"n": 3}, priority=9, delay=timedelta(hours=1))
+        job_service.enqueue(db, "other", {"n": 4}, priority=9)
+        db.commit()
+        expected = [high.id, low.id]
+        claimed = job_service.claim(db, 10, ["default"], ["t"], worker="w1")
+
+    assert [job.id for job in claimed] == expected
+    assert all(job.attempts == 1 for job in claimed)
+
+
+def test_concurrent_claims_are_disjoint(Session):
+    with Session() as db:
+        for n in range(6):
+            job_service.enqueue(db, "t", {"n": n})
+        db.commit()
+
+    with Session() as first, Session() as second:
+        # Hold the first claim's row locks while the second claims.
+        first.commit = lambda: None
+        a = job_service.claim(first, 3, ["default"], ["t"])
+        b = job_service.claim(second, 10, ["default"], ["t"])
+        first.rollback()
+
+    assert len(a) == 3 and len(b) == 3
+    assert {job.id for job in a}.isdisjoint(job.id for job in b)
+
+
+def test_periodic_tasks_are_queued_once_per_interval(Session):
+    @job_service.task("tick", every=timedelta(hours=1))
+    def tick(payload):
+        pass
+
+    @job_service.task("on_demand")
+    def on_demand(payload):
+        pass
+
+    with Session() as db:
+        assert job_service.enqueue_periodic(db) == 1
+        assert job_service.enqueue_periodic(db) == 0
+        db.execute(text("UPDATE jobs SET status = 'done'"))
+        db.commit()
+        assert job_service.enqueue_periodic(db) == 0
+        later = datetime.now(timezone.utc) + timedelta(hours=1)
+        assert job_service.enqueue_periodic(db, now=later) == 1
+        assert [job.task for job in db.query(JobORM)] == ["tick", "tick"]
+
+
+def test_concurrent_workers_queue_a_periodic_task_once(Session):
+    @job_service.task("tick", every=timedelta(hours=1))
+    def tick(payload):
+        pass
+
+    def queue(_):
+        with Session() as db:
+            return job_service.enqueue_periodic(db)
+
+    with ThreadPoolExecutor(4) as pool:
+        queued = list(pool.map(queue, range(4)))
+
+    assert sum(queued) == 1
+
+
+def test_failures_back_off_then_dead_letter(Session, monkeypatch):
+    monkeypatch.setattr(job_service, "backoff", lambda attempts: timedelta(0))
+    with Session() as db:
+        job = job_service.enqueue(db, "t", max_attempts=2)
+        db.commit()
+        first = job_service.claim(db, 1, ["default"], ["t"])[0]
+        assert job_service.fail(db, first, "boom") == "queued"
+        second = job_service.claim(db, 1, ["default"], ["t"])[0]
+        assert job_service.fail(db, second, "boom again") == "dead"
+        assert job_service.claim(db, 1, ["default"], ["t"]) == []
+
+        dead = job_service.list_jobs(db, status="dead")
+        assert [(j.id, j.attempts, j.last_error) for j in dead] == [(job.id, 2, "boom again")]
+        retried = job_service.retry(db, job.id)
+        assert (retried.status, retried.attempts) == ("queued", 2)
+        assert retried.max_attempts == 2 + settings.JOB_MAX_ATTEMPTS
+        assert job_service.retry(db, job.id) is None
+
+
+def test_results_of_a_claim_from_before_a_retry_are_ignored(Session, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+    with Session() as db:
+        job_service.enqueue(db, "t")
+        db.commit()
+        lost = job_service.claim(db, 1, ["default"], ["t"])[0]
+        db.execute(text("UPDATE jobs SET status = 'dead'"))
+        db.commit()
+        job_service.retry(db, lost.id)
+        current = job_service.claim(db, 1, ["default"], ["t"])[0]
+        assert current.attempts == lost.attempts + 1
+
+        assert job_service.complete(db, lost) is False
+        assert job_service.complete(db, current) is True
+
+
+def test_backoff_grows_exponentially(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF_S", 10)
+    assert [job_service.backoff(n).total_seconds() for n in (1, 2, 3, 20)] == [10, 20, 40, 3600]
+
+
+def test_stale_running_jobs_are_requeued(Session):
+    with Session() as db:
+        job_service.enqueue(db, "t", max_attempts=3)
+        job_service.enqueue(db, "t", max_attempts=1)
+        db.commit()
+        job_service.claim(db, 2, ["default"], ["t"])
+        db.execute(text("UPDATE jobs SET heartbeat_at = now() - interval '1 hour'"))
+        db.commit()
+        assert job_service.requeue_stale(db, timedelta(minutes=10)) == 2
+        statuses = sorted(row.status for row in db.query(JobORM).all())
+    assert statuses == ["dead", "queued"]
+
+
+def test_heartbeats_keep_long_jobs_claimed(Session):
+    with Session() as db:
+        job_service.enqueue(db, "t")
+        db.commit()
+        job = job_service.claim(db, 1, ["default"], ["t"])[0]
+        db.execute(
+            text(
+                "UPDATE jobs SET started_at = now() - interval '1 hour',"
+                " heartbeat_at = now() - interval '1 hour'"
+            )
+        )
+        db.commit()
+        assert job_service.heartbeat(db, [job]) == 1
+        assert job_service.requeue_stale(db, timedelta(minutes=10)) == 0
+        assert job_service.complete(db, job) is True
+        assert db.query(JobORM).one().status == "done"
+
+
+def test_results_of_a_lost_claim_are_ignored(Session):
+    with Session() as db:
+        job_service.enqueue(db, "t")
+        db.commit()
+        lost = job_service.claim(db, 1, ["default"], ["t"], worker="w1")[0]
+        db.execute(text("UPDATE jobs SET heartbeat_at = now() - interval '1 hour'"))
+        db.commit()
+        assert job_service.requeue_stale(db, timedelta(minutes=10)) == 1
+        current = job_service.claim(db, 1, ["default"], ["t"], worker="w2")[0]
+        assert current.attempts == lost.attempts + 1
+
+        assert job_service.heartbeat(db, [lost]) == 0
+        assert job_service.complete(db, lost) is False
+        assert job_service.fail(db, lost, "late") is None
+        row = db.query(JobORM).one()
+        assert (row.status, row.worker, row.last_error) == ("running", "w2", "worker lost")
+        assert job_service.complete(db, current) is True
+
+
+def test_queue_stats(Session):
+    with Session() as db:
+        job_service.enqueue(db, "t")
+        job_service.enqueue(db, "t", delay=timedelta(hours=1))
+        job_service.enqueue(db, "t", queue="bulk")
+        db.commit()
+        db.execute(text("UPDATE jobs SET run_at = now() - interval '30 seconds' WHERE queue = 'default' AND run_at <= now()"))
+        db.commit()
+        stats = {s.queue: s for s in job_service.queue_stats(db)}
+
+    assert (stats["default"].ready, stats["default"].scheduled) == (1, 1)
+    assert stats["default"].oldest_ready_seconds >= 30
+    assert stats["bulk"].ready == 1
+
+
+def test_worker_runs_async_and_pooled_tasks(Session):
+    seen = []
+
+    @job_service.task("collect")
+    async def collect(payload):
+        seen.append(("async", payload["n"]))
+
+    @job_service.task("compute")
+    def compute(payload):
+        if payload["n"] < 0:
+            raise ValueError("negative")
+        seen.append(("pool", payload["n"]))
+
+    with Session() as db:
+        for n in range(5):
+            job_service.enqueue(db, "collect", {"n": n})
+        job_service.enqueue(db, "compute", {"n": 7})
+        job_service.enqueue(db, "compute", {"n": -1}, max_attempts=1)
+        db.commit()
+
+    async def scenario():
+        stop = asyncio.Event()
+        worker = Worker(
+            Session,
+            queues=["default"],
+            async_workers=2,
+            process_workers=1,
+            poll_interval=0.05,
+            task_modules=[],
+            executor=ThreadPoolExecutor(1),
+        )
+        running = asyncio.create_task(worker.run(stop))
+        for _ in range(100):
+            with Session() as db:
+                if not db.query(JobORM).filter(JobORM.status.in_(["queued", "running"])).count():
+                    break
+            await asyncio.sleep(0.05)
+        stop.set()
+        await running
+
+    asyncio.run(scenario())
+
+    assert sorted(seen) == [("async", n) for n in range(5)] + [("pool", 7)]
+    with Session() as db:
+        statuses = sorted(row.status for row in db.query(JobORM).all())
+    assert statuses == ["dead"] + ["done"] * 6
+
+
+def test_worker_heartbeats_outlive_the_stale_timeout(Session):
+    @job_service.task("slow")
+    async def slow(payload):
+        await asyncio.sleep(0.6)
+
+    with Session() as db:
+        job_service.enqueue(db, "slow")
+        db.commit()
+
+    async def scenario():
+        stop = asyncio.Event()
+        worker = Worker(
+            Session,
+            queues=["default"],
+            async_workers=1,
+            process_workers=0,
+            poll_interval=0.05,
+            stale_after=timedelta(seconds=0.2),
+            task_modules=[],
+        )
+        running = asyncio.create_task(worker.run(stop))
+        for _ in range(40):
+            with Session() as db:
+                if db.query(JobORM).filter(JobORM.status == "done").count():
+                    break
+            await asyncio.sleep(0.05)
+        stop.set()
+        await running
+
+    asyncio.run(scenario())
+
+    with Session() as db:
+        row = db.query(JobORM).one()
+    assert (row.status, row.attempts) == ("done", 1)
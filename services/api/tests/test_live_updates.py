@@ -0,0 +1,133 @@
+"""LISTEN/NOTIFY fan-out of outbox events against Postgres."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.services import live_service, outbox_service
+from app.services.live_service import ChangeHub
+
+
+def _emit(Session, owner_id, count=1, event_type=outbox_service.PROMPT_UPDATED):
+    with Session() as db:
+        for version in range(count):
+            outbox_service.emit(db, event_type, uuid.uuid4(), owner_id=owner_id, version=version)
+        db.commit()
+
+
+async def _next(sub, timeout=5.0):
+    return await asyncio.wait_for(sub.queue.get(), timeout)
+
+
+def test_committed_events_reach_their_owner(Session, make_owner):
+    alice, bob = make_owner(), make_owner()
+
+    async def scenario():
+        hub = ChangeHub(settings.DATABASE_URL_TEST)
+        try:
+            a, b = await hub.subscribe(alice), await hub.subscribe(bob)
+            await asyncio.to_thread(_emit, Session, alice, 3)
+            received = [await _next(a) for _ in range(3)]
+            return received, b.queue.empty()
+        finally:
+            await hub.stop()
+
+    received, bob_idle = asyncio.run(scenario())
+    assert [event.payload["version"] for event in received] == [0, 1, 2]
+    assert all(event.owner_id == alice for event in received)
+    assert bob_idle
+
+
+def test_uncommitted_events_are_not_sent(Session, owner):
+    def rolled_back():
+        with Session() as db:
+            outbox_service.emit(db, outbox_service.PROMPT_CREATED, uuid.uuid4(), owner_id=owner)
+            db.flush()
+            db.rollback()
+
+    async def scenario():
+        hub = ChangeHub(settings.DATABASE_URL_TEST)
+        try:
+            sub = await hub.subscribe(owner)
+            await asyncio.to_thread(rolled_back)
+            with pytest.raises(asyncio.TimeoutError):
+                await _next(sub, timeout=0.3)
+        finally:
+            await hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_replay_returns_events_after_cursor(Session, owner):
+    _emit(Session, owner, 4)
+    with Session() as db:
+        events = live_service.replay(db, owner, 0, limit=10)
+        after = live_service.replay(db, owner, events[1].id, limit=10)
+    assert [event.payload["version"] for event in events] == [0, 1, 2, 3]
+    assert [event.id for event in after] == [event.id for event in events[2:]]
+
+
+def test_event_numbers_follow_commit_order(Session, owner):
+    first = Session()
+    outbox_service.emit(first, outbox_service.PROMPT_UPDATED, uuid.uuid4(), owner_id=owner, n=1)
+    # A second writer waits for the first to commit before it is numbered,
+    # so no event can commit below a number a stream has already seen.
+    second = threading.Thread(
+        target=_emit, args=(Session, owner), kwargs={"event_type": outbox_service.PROMPT_CREATED}
+    )
+    second.start()
+    second.join(0.3)
+    assert second.is_alive()
+    first.commit()
+    first.close()
+    second.join(5)
+    with Session() as db:
+        events = live_service.replay(db, owner, 0, limit=10)
+    assert [event.type for event in events] == [
+        outbox_service.PROMPT_UPDATED,
+        outbox_service.PROMPT_CREATED,
+    ]
+    assert events[0].id < events[1].id
+
+
+def test_replay_resets_after_pruning_or_unknown_ids(Session, owner):
+    _emit(Session, owner, 3)
+    with Session() as db:
+        latest = live_service.replay(db, owner, 0, limit=10)[-1].id
+        assert live_service.replay(db, owner, latest + 1, limit=10) is None
+        db.execute(
+            text(
+                "UPDATE outbox_events SET status = 'done',"
+                " dispatched_at = now() - interval '30 days' WHERE owner_id = :owner"
+            ),
+            {"owner": owner},
+        )
+        db.commit()
+        assert outbox_service.prune(db, timedelta(days=7)) >= 3
+        assert live_service.replay(db, owner, 0, limit=10) is None
+        assert live_service.replay(db, owner, latest, limit=10) == []
+
+
+def test_lost_connection_closes_streams_and_reconnects(Session, owner):
+    async def scenario():
+        hub = ChangeHub(settings.DATABASE_URL_TEST)
+        try:
+            sub = await hub.subscribe(owner)
+            pid = hub._conn.get_backend_pid()
+            with Session() as db:
+                db.execute(text("SELECT pg_terminate_backend(:pid)"), {"pid": pid})
+            assert await _next(sub) is live_service._CLOSED
+            hub.unsubscribe(sub)
+            again = await hub.subscribe(owner)
+            await asyncio.to_thread(_emit, Session, owner, 1)
+            return await _next(again)
+        finally:
+            await hub.stop()
+
+    assert asyncio.run(scenario()).owner_id == owner
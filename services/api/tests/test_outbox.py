@@ -0,0 +1,111 @@
+"""Outbox dispatch against Postgres: ordering, retries and concurrent claims."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.models.outbox import OutboxEventORM
+from app.services import outbox_service
+
+
+@pytest.fixture(autouse=True)
+def delivered(Session, monkeypatch):
+    """Start each test with an empty outbox and a recording handler."""
+
+    with Session() as db:
+        db.execute(text("TRUNCATE outbox_events"))
+        db.commit()
+    seen = []
+    monkeypatch.setattr(outbox_service, "_handlers", outbox_service.defaultdict(list))
+    outbox_service.register_handler("*", seen.append)
+    return seen
+
+
+def _emit(Session, aggregates, per_aggregate):
+    with Session() as db:
+        for version in range(1, per_aggregate + 1):
+            for aggregate_id in aggregates:
+                outbox_service.emit(
+                    db, outbox_service.PROMPT_UPDATED, aggregate_id, version=version
+                )
+        db.commit()
+
+
+def test_events_are_delivered_in_order_per_aggregate(Session, delivered):
+    aggregates = [uuid.uuid4() for _ in range(3)]
+    _emit(Session, aggregates, per_aggregate=4)
+
+    with Session() as db:
+        stats = outbox_service.dispatch_batch(db, batch_size=5)
+        stats2 = outbox_service.dispatch_batch(db, batch_size=100)
+
+    assert stats.delivered + stats2.delivered == 12
+    for aggregate_id in aggregates:
+        versions = [e.payload["version"] for e in delivered if e.aggregate_id == aggregate_id]
+        assert versions == [1, 2, 3, 4]
+    with Session() as db:
+        assert db.query(OutboxEventORM).filter_by(status="pending").count() == 0
+
+
+def test_failure_blocks_the_aggregate_until_dead(Session, delivered, monkeypatch):
+    failing, healthy = uuid.uuid4(), uuid.uuid4()
+    _emit(Session, [failing, healthy], per_aggregate=2)
+
+    def flaky(event):
+        if event.aggregate_id == failing and event.payload["version"] == 1:
+            raise RuntimeError("downstream unavailable")
+
+    outbox_service.register_handler("*", flaky)
+    monkeypatch.setattr(outbox_service, "_backoff", lambda attempts: timedelta(0))
+
+    with Session() as db:
+        first = outbox_service.dispatch_batch(db, max_attempts=2)
+        second = outbox_service.dispatch_batch(db, max_attempts=2)
+        third = outbox_service.dispatch_batch(db, max_attempts=2)
+        rows = db.query(OutboxEventORM).filter_by(aggregate_id=failing).order_by(OutboxEventORM.id).all()
+
+    assert (first.delivered, first.retried) == (2, 1)
+    assert (second.dead, third.delivered) == (1, 1)
+    assert [row.status for row in rows] == ["dead", "done"]
+    assert rows[0].attempts == 2 and "downstream unavailable" in rows[0].last_error
+
+
+def test_backoff_delays_redelivery(Session, delivered):
+    aggregate_id = uuid.uuid4()
+    _emit(Session, [aggregate_id], per_aggregate=1)
+    outbox_service.register_handler("*", lambda event: 1 / 0)
+
+    with Session() as db:
+        assert outbox_service.dispatch_batch(db).retried == 1
+        assert outbox_service.dispatch_batch(db).retried == 0
+        row = db.query(OutboxEventORM).one()
+    assert row.available_at > datetime.now(timezone.utc)
+
+
+def test_concurrent_dispatchers_claim_disjoint_aggregates(Session):
+    aggregates = [uuid.uuid4() for _ in range(4)]
+    _emit(Session, aggregates, per_aggregate=2)
+
+    with Session() as first, Session() as second:
+        claimed_first = outbox_service._claim(first, limit=2)
+        claimed_second = outbox_service._claim(second, limit=100)
+        first_ids = {row.aggregate_id for row in claimed_first}
+        second_ids = {row.aggregate_id for row in claimed_second}
+        first.rollback()
+        second.rollback()
+
+    assert len(claimed_first) == 2 and len(first_ids) == 2
+    assert len(claimed_second) == 4 and first_ids.isdisjoint(second_ids)
+    assert first_ids | second_ids == set(aggregates)
+
+
+def test_prune_removes_old_delivered_events(Session, delivered):
+    _emit(Session, [uuid.uuid4()], per_aggregate=3)
+    with Session() as db:
+        outbox_service.dispatch_batch(db)
+        db.execute(text("UPDATE outbox_events SET dispatched_at = now() - interval '10 days'"))
+        db.commit()
+        assert outbox_service.prune(db, timedelta(days=7)) == 3
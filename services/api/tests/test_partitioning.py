@@ -0,0 +1,90 @@
+"""Partitioned ``prompt_versions`` and ``audit_log``."""
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import text
+
+from app.models.prompt import PromptCreate, PromptVersionORM
+from app.services import partition_service, prompt_service
+
+
+def _scanned(db, sql: str, **params) -> set:
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    relations = set()
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return relations
+
+
+def test_version_reads_touch_one_partition(Session, owner, create_prompt):
+    with Session() as db:
+        created = create_prompt(db, owner, "Hashed", body="v1")
+        prompt_service.duplicate_prompt(db, created.prompt_id)
+        prompt_service.update_prompt(
+            db, created.prompt_id, PromptCreate.model_construct(body="v2")
+        )
+
+        scanned = _scanned(
+            db,
+            "SELECT * FROM prompt_versions WHERE prompt_id = :p ORDER BY version DESC LIMIT 1",
+            p=created.prompt_id,
+        )
+        assert len(scanned) == 1 and scanned.pop().startswith("prompt_versions_p")
+
+        partition = db.execute(
+            text("SELECT DISTINCT tableoid::regclass::text FROM prompt_versions WHERE prompt_id = :p"),
+            {"p": created.prompt_id},
+        ).scalars().all()
+        assert len(partition) == 1
+        assert db.query(PromptVersionORM).filter_by(prompt_id=created.prompt_id).count() == 2
+        first = prompt_service.get_prompt_by_id(db, created.prompt_id, owner, version=1)
+        assert first.body == "v1"
+
+
+def test_audit_partitions_are_created_and_detached(Session):
+    future = date(2031, 5, 1)
+    with Session() as db:
+        db.execute(
+            text("INSERT INTO audit_log(action, created_at) VALUES ('early', '2031-06-15 UTC')")
+        )
+        db.commit()
+        assert db.execute(text("SELECT count(*) FROM audit_log_default")).scalar() == 1
+
+        created = partition_service.ensure_partitions(db, ahead=1, today=future)
+        assert created == ["audit_log_y2031m05", "audit_log_y2031m06"]
+        assert partition_service.ensure_partitions(db, ahead=1, today=future) == []
+        row_partition = db.execute(
+            text("SELECT tableoid::regclass::text FROM audit_log WHERE action = 'early'")
+        ).scalar()
+        assert row_partition == "audit_log_y2031m06"
+
+        older = [
+            (name, month)
+            for name, month in partition_service.audit_partitions(db)
+            if month < future
+        ]
+        detached = partition_service.detach_expired(db, retain_months=1, today=future)
+        try:
+            assert detached == [name for name, _ in older] and older
+            remaining = [name for name, _ in partition_service.audit_partitions(db)]
+            assert remaining == ["audit_log_y2031m05", "audit_log_y2031m06"]
+            # Detached months are kept as plain tables.
+            kept = db.execute(text("SELECT to_regclass(:name)"), {"name": detached[0]})
+            assert kept.scalar() is not None
+            assert db.execute(text("SELECT count(*) FROM audit_log")).scalar() == 1
+        finally:
+            # The schema is shared with the other modules; put the months back.
+            for name, month in older:
+                upper = partition_service.month_start(month, 1)
+                db.execute(
+                    text(
+                        f"ALTER TABLE audit_log ATTACH PARTITION {name} "
+                        f"FOR VALUES FROM ('{month} UTC') TO ('{upper} UTC')"
+                    )
+                )
+            db.commit()
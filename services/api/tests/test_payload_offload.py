@@ -0,0 +1,155 @@
+"""Offloading large payloads to the external payload store."""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.prompt import PayloadField, PromptBlobORM, PromptCreate, PromptVersionORM
+from app.services import blob_service, payload_store, prompt_service
+
+LARGE = {"shots": [{"input": "x" * 100, "output": "y" * 100}] * 50}
+SMALL = {"shots": []}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PAYLOAD_OFFLOAD_BYTES", 1024)
+    monkeypatch.setattr(settings, "PAYLOAD_STORE_PATH", str(tmp_path))
+    payload_store.get_store.cache_clear()
+    yield tmp_path
+    payload_store.get_store.cache_clear()
+
+
+def test_large_payloads_live_outside_the_row(Session, store, owner, create_prompt):
+    digest = blob_service.digest_of(LARGE)
+    with Session() as db:
+        created = create_prompt(
+            db, owner, "Few shot", sample_input=LARGE, sample_output=SMALL
+        )
+        assert created.sample_input == LARGE
+        assert created.payloads[PayloadField.sample_input].digest == digest
+
+        row = db.query(PromptVersionORM).filter_by(prompt_id=created.prompt_id).one()
+        assert row.sample_input is None and row.sample_input_digest == digest
+        assert row.sample_output == SMALL and row.sample_output_digest is None
+        blob = db.get(PromptBlobORM, digest)
+        assert blob.content is None and blob.storage == "filesystem"
+        assert (store / digest[:2] / digest).exists()
+
+        listed = prompt_service.list_prompts(db, owner_id=owner).items[0]
+        assert listed.sample_input is None and listed.sample_output == SMALL
+        assert listed.payloads[PayloadField.sample_input].size_bytes == blob.size_bytes
+
+        detail = prompt_service.get_prompt_by_id(db, created.prompt_id, owner)
+        assert detail.sample_input == LARGE
+
+
+def test_duplicates_share_offloaded_payloads(Session, store, owner, create_prompt):
+    digest = blob_service.digest_of(LARGE)
+    with Session() as db:
+        created = create_prompt(
+            db, owner, "Few shot", sample_input=LARGE, sample_output=SMALL
+        )
+        before = db.get(PromptBlobORM, digest).ref_count
+        prompt_service.duplicate_prompt(db, created.prompt_id)
+        db.expire_all()
+        assert db.get(PromptBlobORM, digest).ref_count == before + 1
+
+        prompt_service.update_prompt(
+            db, created.prompt_id, PromptCreate.model_construct(sample_input=SMALL)
+        )
+        db.expire_all()
+        assert db.get(PromptBlobORM, digest).ref_count == before
+        latest = prompt_service.get_prompt_by_id(db, created.prompt_id, owner)
+        assert latest.sample_input == SMALL
+        old = prompt_service.get_prompt_by_id(db, created.prompt_id, owner, version=1)
+        assert old.sample_input == LARGE
+
+
+def test_payload_streams_byte_ranges(Session, store, owner, create_prompt):
+    data = blob_service.canonical_bytes(LARGE)
+    with Session() as db:
+        created = create_prompt(
+            db, owner, "Few shot", sample_input=LARGE, sample_output=SMALL
+        )
+        payload = prompt_service.get_payload(
+            db, created.prompt_id, owner, "sample_input"
+        )
+        assert payload.size_bytes == len(data)
+        assert b"".join(payload.read(0, None)) == data
+        assert b"".join(payload.read(100, 200)) == data[100:200]
+
+        inline = prompt_service.get_payload(
+            db, created.prompt_id, owner, "sample_output"
+        )
+        assert b"".join(inline.read(2, 5)) == blob_service.canonical_bytes(SMALL)[2:5]
+        assert (
+            prompt_service.get_payload(db, created.prompt_id, owner, "input_schema")
+            is None
+        )
+        # Another user's prompt is reported as missing.
+        assert (
+            prompt_service.get_payload(db, created.prompt_id, uuid.uuid4(), "sample_input")
+            is None
+        )
+
+
+def test_gc_removes_external_objects(Session, store, owner, create_prompt):
+    payload = {"unique": str(uuid.uuid4()), "pad": "z" * 2048}
+    digest = blob_service.digest_of(payload)
+    with Session() as db:
+        created = create_prompt(
+            db, owner, "Few shot", sample_input=LARGE, sample_output=SMALL
+        )
+        prompt_service.update_prompt(
+            db, created.prompt_id, PromptCreate.model_construct(input_schema=payload)
+        )
+        assert (store / digest[:2] / digest).exists()
+        prompt_service.update_prompt(
+            db, created.prompt_id, PromptCreate.model_construct(input_schema=None)
+        )
+        blob_service.collect_garbage(db)
+        assert db.get(PromptBlobORM, digest) is None
+    assert not (store / digest[:2] / digest).exists()
+
+
+def test_gc_keeps_objects_stored_again_while_it_runs(Session, store):
+    payload = {"unique": str(uuid.uuid4()), "pad": "z" * 2048}
+    digest = blob_service.digest_of(payload)
+    with Session() as db:
+        blob_service._adjust_refs(db, {digest: 0}, {digest: payload}, offload={digest})
+        db.commit()
+
+    deleted, stored = threading.Event(), threading.Event()
+
+    def gc():
+        with Session() as db:
+            # Pause once the unreferenced rows are gone, before the files are.
+            @event.listens_for(db, "after_commit", once=True)
+            def pause(session):
+                deleted.set()
+                stored.wait(5)
+
+            return blob_service.collect_garbage(db)
+
+    with ThreadPoolExecutor(1) as pool:
+        collected = pool.submit(gc)
+        assert deleted.wait(5)
+        with Session() as db:
+            blob_service._adjust_refs(
+                db, {digest: 1}, {digest: payload}, offload={digest}
+            )
+            stored.set()
+            time.sleep(0.2)
+            db.commit()
+        collected.result(5)
+
+    assert (store / digest[:2] / digest).exists()
+    with Session() as db:
+        assert db.get(PromptBlobORM, digest).ref_count == 1
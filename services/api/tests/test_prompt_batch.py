@@ -0,0 +1,44 @@
+"""Batch fetch of prompts by id against Postgres."""
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import event
+
+from app.models.prompt import PromptCreate
+from app.services import prompt_service
+
+
+def test_batch_get_keeps_order_and_reports_missing(
+    engine, Session, owner, make_owner, create_prompt
+):
+    other = make_owner()
+    with Session() as db:
+        mine = [create_prompt(db, owner, f"P{n}") for n in range(5)]
+        prompt_service.update_prompt(
+            db, mine[2].prompt_id, PromptCreate.model_construct(body="Edited")
+        )
+        theirs = create_prompt(db, other, "Theirs")
+        unknown = uuid.uuid4()
+        requested = [
+            mine[3].prompt_id,
+            theirs.prompt_id,
+            mine[0].prompt_id,
+            unknown,
+            mine[2].prompt_id,
+            mine[3].prompt_id,
+        ]
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = prompt_service.batch_get_prompts(db, requested, owner_id=owner)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    assert [p.title for p in result.items] == ["P3", "P0", "P2"]
+    assert result.items[2].body == "Edited"
+    assert result.missing == [theirs.prompt_id, unknown]
+    assert len(statements) == 1
+    assert "= ANY" in statements[0]
@@ -0,0 +1,63 @@
+"""Side-loaded includes on prompt list pages against Postgres."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event
+
+from app.services import collection_service, prompt_service
+
+
+@pytest.fixture(scope="module")
+def library(Session, make_owner, create_prompt):
+    """Twelve prompts, each related to the previous one; even ones collected."""
+
+    owner_id = make_owner()
+    with Session() as db:
+        evens = collection_service.create_collection(db, owner_id, "Evens")
+        ids = []
+        for n in range(12):
+            ids.append(
+                create_prompt(
+                    db, owner_id, f"P{n:02d}", related_prompt_ids=ids[-1:] or None
+                ).prompt_id
+            )
+            if n % 2 == 0:
+                collection_service.add_prompt(db, owner_id, evens.id, ids[-1])
+    return Session, owner_id, ids, evens
+
+
+def _list(engine, Session, owner_id, limit, include):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    with Session() as db:
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            page = prompt_service.list_prompts(
+                db, owner_id, sort="title_asc", limit=limit, include=include
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+    return page, len(statements)
+
+
+def test_includes_are_keyed_by_prompt(engine, library):
+    Session, owner_id, ids, evens = library
+    page, _ = _list(engine, Session, owner_id, 4, ["collections,related"])
+    assert [item.title for item in page.items] == ["P00", "P01", "P02", "P03"]
+    collections = page.included.collections
+    assert [c.name for c in collections[ids[0]]] == ["Evens"]
+    assert collections[ids[1]] == []
+    related = page.included.related
+    assert related[ids[0]] == []
+    assert [(r.prompt_id, r.title) for r in related[ids[3]]] == [(ids[2], "P02")]
+
+
+def test_query_count_does_not_grow_with_page_size(engine, library):
+    Session, owner_id, _, _ = library
+    _, plain = _list(engine, Session, owner_id, 2, None)
+    _, small = _list(engine, Session, owner_id, 2, ["collections", "related"])
+    page, large = _list(engine, Session, owner_id, 12, ["collections", "related"])
+    assert len(page.items) == 12
+    assert small == large == plain + 2
+    _, related_only = _list(engine, Session, owner_id, 12, ["related"])
+    assert related_only == plain + 1
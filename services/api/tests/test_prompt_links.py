@@ -0,0 +1,105 @@
+"""Related-prompt links and graph traversal against Postgres."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from app.models.link import LinkDirection, PromptLinkORM
+from app.models.prompt import PromptCreate
+from app.services import link_service, prompt_service
+
+
+def _relate(db, source, targets):
+    prompt_service.update_prompt(
+        db, source, PromptCreate.model_construct(related_prompt_ids=targets)
+    )
+
+
+@pytest.fixture
+def graph(Session, owner, create_prompt):
+    """A -> B -> C -> A (a cycle), C -> D, and E -> A."""
+
+    def create(db, title, related=None):
+        return create_prompt(db, owner, title, related_prompt_ids=related).prompt_id
+
+    with Session() as db:
+        d = create(db, "D")
+        c = create(db, "C", [d])
+        b = create(db, "B", [c])
+        a = create(db, "A", [b])
+        e = create(db, "E", [a])
+        _relate(db, c, [a, d])
+    return owner, dict(A=a, B=b, C=c, D=d, E=e)
+
+
+def _titles(result):
+    return {node.prompt.title: node.depth for node in result.nodes}
+
+
+def test_links_follow_the_current_version(Session, graph):
+    owner_id, ids = graph
+    with Session() as db:
+        targets = {
+            row.target_id
+            for row in db.query(PromptLinkORM).filter(PromptLinkORM.source_id == ids["C"])
+        }
+        assert targets == {ids["A"], ids["D"]}
+        _relate(db, ids["C"], [ids["D"]])
+        targets = {
+            row.target_id
+            for row in db.query(PromptLinkORM).filter(PromptLinkORM.source_id == ids["C"])
+        }
+        assert targets == {ids["D"]}
+
+
+def test_outgoing_walk_stops_at_cycles_and_depth(Session, graph):
+    owner_id, ids = graph
+    with Session() as db:
+        one = link_service.neighbourhood(db, ids["A"], owner_id, depth=1, direction=LinkDirection.OUT)
+        assert _titles(one) == {"A": 0, "B": 1}
+        assert [(link.source_id, link.target_id) for link in one.links] == [
+            (ids["A"], ids["B"])
+        ]
+
+        far = link_service.neighbourhood(db, ids["A"], owner_id, depth=4, direction=LinkDirection.OUT)
+        assert _titles(far) == {"A": 0, "B": 1, "C": 2, "D": 3}
+        assert far.nodes[0].prompt.prompt_id == ids["A"]
+        assert not far.truncated
+
+
+def test_incoming_and_both_directions(Session, graph):
+    owner_id, ids = graph
+    with Session() as db:
+        backlinks = link_service.neighbourhood(db, ids["A"], owner_id, direction=LinkDirection.IN)
+        assert _titles(backlinks) == {"A": 0, "C": 1, "E": 1}
+
+        both = link_service.neighbourhood(db, ids["A"], owner_id, depth=2)
+        assert _titles(both) == {"A": 0, "B": 1, "C": 1, "E": 1, "D": 2}
+
+        limited = link_service.neighbourhood(db, ids["A"], owner_id, depth=2, limit=3)
+        assert len(limited.nodes) == 3 and limited.truncated
+
+
+def test_other_owners_cannot_walk_the_graph(Session, graph):
+    _, ids = graph
+    with Session() as db:
+        assert link_service.neighbourhood(db, ids["A"], uuid.uuid4()) is None
+        with pytest.raises(ValueError):
+            link_service.neighbourhood(db, ids["A"], uuid.uuid4(), depth=9)
+
+
+def test_dense_graphs_visit_each_prompt_once(Session, graph, create_prompt):
+    owner_id, _ = graph
+    with Session() as db:
+        ids = [create_prompt(db, owner_id, f"K{n}").prompt_id for n in range(12)]
+        for source in ids:
+            _relate(db, source, [target for target in ids if target != source])
+
+        full = link_service.neighbourhood(db, ids[0], owner_id, depth=4, limit=500)
+        assert len(full.nodes) == 12 and not full.truncated
+        assert [node.depth for node in full.nodes] == [0] + [1] * 11
+
+        limited = link_service.neighbourhood(db, ids[0], owner_id, depth=4, limit=3)
+        assert limited.truncated
+        assert [node.prompt.prompt_id for node in limited.nodes] == [ids[0]] + sorted(ids[1:])[:2]
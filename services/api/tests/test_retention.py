@@ -0,0 +1,88 @@
+"""Version retention policies and cold storage."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.models.prompt import PromptCreate, PromptVersionORM
+from app.services import history_service, prompt_service, retention_service
+
+VERSIONS = 20
+
+
+def _body(n: int) -> str:
+    return "".join(f"Rule {i}: be concise.\n" for i in range(10 + n))
+
+
+@pytest.fixture
+def history(Session, owner, create_prompt, monkeypatch):
+    """An owner with one prompt edited in each of its versions."""
+
+    monkeypatch.setattr(settings, "PROMPT_HISTORY_MODE", "delta")
+    monkeypatch.setattr(settings, "PROMPT_SNAPSHOT_INTERVAL", 4)
+    with Session() as db:
+        created = create_prompt(
+            db, owner, "Retained", body=_body(1), sample_input={"example": 1}
+        )
+        for n in range(2, VERSIONS + 1):
+            prompt_service.duplicate_prompt(db, created.prompt_id)
+            prompt_service.update_prompt(
+                db, created.prompt_id, PromptCreate.model_construct(body=_body(n))
+            )
+    return owner, created.prompt_id
+
+
+def _hot_versions(db, prompt_id):
+    return [
+        v.version
+        for v in db.query(PromptVersionORM)
+        .filter(PromptVersionORM.prompt_id == prompt_id)
+        .order_by(PromptVersionORM.version)
+    ]
+
+
+def test_keep_last_moves_unlabelled_versions_to_cold_storage(Session, history):
+    owner_id, prompt_id = history
+    with Session() as db:
+        label = retention_service.set_label(db, prompt_id, owner_id, "Production", 3)
+        assert label.label == "production"
+        retention_service.set_policy(db, owner_id, keep_last=5, keep_days=None)
+
+        stats = retention_service.apply_retention(db, owner_id=owner_id, batch_size=4)
+
+        assert stats.versions_moved == VERSIONS - 5 - 1
+        assert stats.bytes_reclaimed > 0 and stats.cold_bytes > 0
+        assert _hot_versions(db, prompt_id) == [3, 16, 17, 18, 19, 20]
+        for n in _hot_versions(db, prompt_id):
+            version = db.query(PromptVersionORM).filter_by(prompt_id=prompt_id, version=n).one()
+            assert history_service.body_of(version) == _body(n)
+
+        cold = prompt_service.get_prompt_by_id(db, prompt_id, owner_id, version=7)
+        assert cold.version == 7 and cold.body == _body(7)
+        assert cold.sample_input == {"example": 1} and cold.title.startswith("Retained")
+        assert prompt_service.get_prompt_by_id(db, prompt_id, uuid.uuid4(), version=7) is None
+
+        assert retention_service.apply_retention(db, owner_id=owner_id).versions_moved == 0
+
+
+def test_recent_versions_are_kept(Session, history):
+    owner_id, prompt_id = history
+    with Session() as db:
+        retention_service.set_policy(db, owner_id, keep_last=2, keep_days=30)
+        assert retention_service.apply_retention(db, owner_id=owner_id).versions_moved == 0
+        assert len(_hot_versions(db, prompt_id)) == VERSIONS
+
+
+def test_labels_are_scoped_to_the_owner(Session, history):
+    owner_id, prompt_id = history
+    stranger = uuid.uuid4()
+    with Session() as db:
+        retention_service.set_label(db, prompt_id, owner_id, "stable", 2)
+        assert retention_service.set_label(db, prompt_id, stranger, "stable", 4) is None
+        assert retention_service.list_labels(db, prompt_id, stranger) is None
+        assert retention_service.remove_label(db, prompt_id, stranger, "stable") is False
+        labels = retention_service.list_labels(db, prompt_id, owner_id)
+        assert [(item.label, item.version) for item in labels] == [("stable", 2)]
+        assert retention_service.remove_label(db, prompt_id, owner_id, "stable") is True
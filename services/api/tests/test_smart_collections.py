@@ -0,0 +1,204 @@
+"""Smart collections and their materialized members against Postgres."""
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+
+from app.models.collection import SmartCollectionFilters
+from app.models.prompt import PromptCreate
+from app.services import (
+    collection_service,
+    outbox_service,
+    prompt_service,
+    smart_collection_service,
+    sync_service,
+)
+
+SUPPORT_GPT4O = SmartCollectionFilters(tags=["support"], target_models=["gpt-4o"])
+
+
+@pytest.fixture
+def library(Session, owner, create_prompt):
+    """Prompts A and B match ``SUPPORT_GPT4O``; C and D do not."""
+
+    def create(db, title, tags, models):
+        return create_prompt(
+            db, owner, title, tags=tags, target_models=models
+        ).prompt_id
+
+    with Session() as db:
+        prompts = {
+            "A": create(db, "A", ["support"], ["gpt-4o"]),
+            "B": create(db, "B", ["support", "billing"], ["gpt-4o"]),
+            "C": create(db, "C", ["support"], ["claude"]),
+            "D": create(db, "D", ["sales"], ["gpt-4o"]),
+        }
+        smart = collection_service.create_collection(
+            db, owner, "Support on gpt-4o", filters=SUPPORT_GPT4O
+        )
+    return owner, smart.id, prompts
+
+
+def _titles(db, owner_id, collection_id):
+    page = collection_service.list_prompts(db, owner_id, collection_id, limit=50)
+    return sorted(item.title for item in page.items)
+
+
+def _cached(db, collection_id):
+    return db.execute(
+        text("SELECT count(*) FROM smart_collection_prompts WHERE collection_id = :id"),
+        {"id": collection_id},
+    ).scalar_one()
+
+
+def test_members_are_materialized_on_create(Session, library):
+    owner_id, collection_id, _ = library
+    with Session() as db:
+        assert _cached(db, collection_id) == 2
+        assert _titles(db, owner_id, collection_id) == ["A", "B"]
+        listed = collection_service.list_collections(db, owner_id, include_count=True)
+        assert [(c.name, c.count) for c in listed] == [("Support on gpt-4o", 2)]
+        assert listed[0].filters.tags == ["support"]
+
+
+def test_refresh_applies_only_changed_prompts(Session, library):
+    owner_id, collection_id, prompts = library
+    with Session() as db:
+        prompt_service.update_prompt(
+            db, prompts["C"], PromptCreate.model_construct(target_models=["gpt-4o"])
+        )
+        prompt_service.update_prompt(
+            db, prompts["A"], PromptCreate.model_construct(tags=["sales"])
+        )
+        checked = []
+
+        def capture(conn, cursor, statement, parameters, *args):
+            if "prompt_cards.id IN" in statement:
+                checked.append(parameters)
+
+        bind = db.get_bind()
+        event.listen(bind, "before_cursor_execute", capture)
+        try:
+            assert smart_collection_service.refresh_owner(db, owner_id) == 1
+        finally:
+            event.remove(bind, "before_cursor_execute", capture)
+        # Only the two updated prompts are re-evaluated.
+        assert len(checked) == 1
+        assert {v for k, v in checked[0].items() if k.startswith("id_")} == {
+            prompts["A"],
+            prompts["C"],
+        }
+        assert _titles(db, owner_id, collection_id) == ["B", "C"]
+        assert smart_collection_service.refresh_owner(db, owner_id) == 0
+
+
+def test_listing_catches_up_without_the_dispatcher(Session, library):
+    owner_id, collection_id, prompts = library
+    with Session() as db:
+        prompt_service.update_prompt(
+            db, prompts["D"], PromptCreate.model_construct(tags=["support"])
+        )
+        assert _titles(db, owner_id, collection_id) == ["A", "B", "D"]
+
+
+def test_fresh_listing_only_reads(Session, engine, library):
+    owner_id, collection_id, _ = library
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    with Session() as db:
+        _titles(db, owner_id, collection_id)
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            assert _titles(db, owner_id, collection_id) == ["A", "B"]
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    assert set(statements) == {"SELECT"}
+    assert len(statements) == 3
+
+
+def test_new_filters_rebuild_the_cache(Session, library):
+    owner_id, collection_id, _ = library
+    with Session() as db:
+        collection_service.rename_collection(
+            db,
+            owner_id,
+            collection_id,
+            "Support",
+            filters=SmartCollectionFilters(tags=["support"]),
+        )
+        assert _titles(db, owner_id, collection_id) == ["A", "B", "C"]
+        # Renaming alone keeps the filters.
+        renamed = collection_service.rename_collection(db, owner_id, collection_id, "Help")
+        assert renamed.filters.tags == ["support"]
+        assert _titles(db, owner_id, collection_id) == ["A", "B", "C"]
+
+
+def test_smart_collections_reject_manual_membership(Session, library):
+    owner_id, collection_id, prompts = library
+    with Session() as db:
+        with pytest.raises(ValueError):
+            collection_service.add_prompt(db, owner_id, collection_id, prompts["D"])
+        with pytest.raises(ValueError):
+            collection_service.remove_prompt(db, owner_id, collection_id, prompts["A"])
+        with pytest.raises(ValueError):
+            collection_service.list_prompts(db, owner_id, collection_id, sort="position")
+        static = collection_service.create_collection(db, owner_id, "Static")
+        with pytest.raises(ValueError):
+            collection_service.rename_collection(
+                db, owner_id, static.id, "Static", filters=SUPPORT_GPT4O
+            )
+        with pytest.raises(smart_collection_service.InvalidFilters):
+            collection_service.create_collection(
+                db, owner_id, "Broken", filters=SmartCollectionFilters(where=["nope"])
+            )
+        assert collection_service.list_prompts(db, uuid.uuid4(), collection_id) is None
+
+
+def test_outbox_events_refresh_the_owner(Session, library, monkeypatch):
+    owner_id, collection_id, prompts = library
+    monkeypatch.setattr("app.db.session.SessionLocal", Session)
+    with Session() as db:
+        prompt_service.update_prompt(
+            db, prompts["D"], PromptCreate.model_construct(tags=["support"])
+        )
+        event_row = db.execute(
+            text(
+                "SELECT id, event_type, aggregate_id, payload, attempts, created_at"
+                " FROM outbox_events WHERE aggregate_id = :id ORDER BY id DESC LIMIT 1"
+            ),
+            {"id": prompts["D"]},
+        ).one()
+    assert event_row.event_type in smart_collection_service.REFRESH_EVENTS
+    for handler in outbox_service._handlers[event_row.event_type]:
+        handler(outbox_service.OutboxEvent(**event_row._mapping))
+    with Session() as db:
+        assert _cached(db, collection_id) == 3
+
+
+def test_includes_list_smart_collections(Session, library):
+    owner_id, _, prompts = library
+    with Session() as db:
+        pinned = collection_service.create_collection(db, owner_id, "Pinned")
+        collection_service.add_prompt(db, owner_id, pinned.id, prompts["A"])
+        page = prompt_service.list_prompts(db, owner_id, limit=10, include=["collections"])
+    names = {
+        prompt_id: [c.name for c in collections]
+        for prompt_id, collections in page.included.collections.items()
+    }
+    assert names[prompts["A"]] == ["Pinned", "Support on gpt-4o"]
+    assert names[prompts["B"]] == ["Support on gpt-4o"]
+    assert names[prompts["C"]] == []
+
+
+def test_sync_carries_smart_collections_without_links(Session, library):
+    owner_id, collection_id, _ = library
+    with Session() as db:
+        synced = sync_service.changes(db, owner_id, None, limit=100)
+    smart = next(c for c in synced.collections if c.id == collection_id)
+    assert smart.filters.tags == ["support"]
+    assert synced.collection_links == []
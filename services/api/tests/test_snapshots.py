@@ -0,0 +1,103 @@
+"""Library snapshot bundles against Postgres."""
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.models.job import JobORM
+from app.models.prompt import PromptCreate
+from app.models.sync import SnapshotStatus
+from app.services import collection_service, prompt_service, snapshot_service, sync_service
+
+
+@pytest.fixture
+def library(Session, owner, create_prompt, tmp_path, monkeypatch):
+    """An owner with three tagged prompts, one of them in a collection."""
+
+    monkeypatch.setattr(settings, "SNAPSHOT_PATH", str(tmp_path))
+    with Session() as db:
+        prompts = [
+            create_prompt(db, owner, f"P{n}", tags=["shared", f"own-{n}"])
+            for n in range(3)
+        ]
+        collection = collection_service.create_collection(db, owner, "Starred")
+        collection_service.add_prompt(db, owner, collection.id, prompts[0].prompt_id)
+    return owner, prompts, collection
+
+
+def _build(Session, owner_id, **kwargs):
+    with Session() as db:
+        return snapshot_service.build_snapshot(db, owner_id, **kwargs)
+
+
+def _read(owner_id, seq):
+    with gzip.open(snapshot_service.bundle_path(owner_id, seq), "rt") as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_bundle_holds_library_at_its_sequence(Session, library):
+    owner_id, prompts, collection = library
+    snapshot = _build(Session, owner_id, batch_size=2)
+    with Session() as db:
+        assert snapshot.seq == snapshot_service.current_seq(db, owner_id)
+
+    records = _read(owner_id, snapshot.seq)
+    header, rest = records[0], records[1:]
+    assert header["type"] == "header" and header["seq"] == snapshot.seq
+    assert sync_service.decode_token(header["next_token"]) == snapshot.seq
+    by_type = {}
+    for record in rest:
+        by_type.setdefault(record.pop("type"), []).append(record)
+    assert sorted(p["title"] for p in by_type["prompt"]) == ["P0", "P1", "P2"]
+    assert [c["id"] for c in by_type["collection"]] == [str(collection.id)]
+    assert by_type["collection_link"] == [
+        {
+            "collection_id": str(collection.id),
+            "prompt_id": str(prompts[0].prompt_id),
+            "position": "V",
+        }
+    ]
+    tags = {t["tag"]: t["count"] for t in by_type["tag"]}
+    assert tags["shared"] == 3 and tags["own-1"] == 1
+
+
+def test_bundles_are_cached_per_sequence(Session, library):
+    owner_id, prompts, _ = library
+    first = _build(Session, owner_id)
+    path = snapshot_service.bundle_path(owner_id, first.seq)
+    mtime = path.stat().st_mtime_ns
+    assert _build(Session, owner_id).seq == first.seq
+    assert path.stat().st_mtime_ns == mtime
+
+    for n in range(2):
+        with Session() as db:
+            prompt_service.update_prompt(
+                db, prompts[1].prompt_id, PromptCreate.model_construct(body=f"Edit {n}")
+            )
+        _build(Session, owner_id)
+    kept = sorted(p.name for p in path.parent.iterdir())
+    assert len(kept) == settings.SNAPSHOT_KEEP
+    assert path.name not in kept
+    assert snapshot_service.latest_snapshot(owner_id).seq > first.seq
+
+
+def test_request_queues_one_build(Session, library):
+    owner_id, _, _ = library
+    with Session() as db:
+        pending = snapshot_service.request_snapshot(db, owner_id)
+        assert pending.status is SnapshotStatus.PENDING
+        snapshot_service.request_snapshot(db, owner_id)
+        jobs = (
+            db.query(JobORM)
+            .filter(JobORM.task == snapshot_service.BUILD_TASK)
+            .filter(JobORM.payload["owner_id"].astext == str(owner_id))
+            .count()
+        )
+        assert jobs == 1
+
+        _build(Session, owner_id)
+        ready = snapshot_service.request_snapshot(db, owner_id)
+        assert ready.status is SnapshotStatus.READY and ready.seq == pending.seq
@@ -0,0 +1,113 @@
+"""Delta sync of prompts, versions and collections against Postgres."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+
+from app.models.prompt import PromptCreate
+from app.models.sync import SyncEntity
+from app.services import collection_service, prompt_service, sync_service
+
+
+def _drain(db, owner_id, since=None, limit=500):
+    pages = []
+    while True:
+        page = sync_service.changes(db, owner_id, since, limit=limit)
+        pages.append(page)
+        since = page.next_token
+        if not page.has_more:
+            return pages, since
+
+
+def test_full_then_incremental_sync(Session, owner, create_prompt):
+    with Session() as db:
+        first = create_prompt(db, owner, "First")
+        second = create_prompt(db, owner, "Second")
+        full = sync_service.changes(db, owner, None)
+        assert {p.prompt_id for p in full.prompts} == {first.prompt_id, second.prompt_id}
+        assert {v.id for v in full.versions} == {first.id, second.id}
+        assert not full.has_more and not full.tombstones
+
+        prompt_service.update_prompt(db, first.prompt_id, PromptCreate.model_construct(body="Edited"))
+        delta = sync_service.changes(db, owner, full.next_token)
+        assert [p.body for p in delta.prompts] == ["Edited"]
+        assert [v.id for v in delta.versions] == [first.id]
+
+        idle = sync_service.changes(db, owner, delta.next_token)
+        assert idle.prompts == [] and idle.versions == []
+        assert idle.next_token == delta.next_token
+
+
+def test_repeated_edits_are_sent_once(Session, owner, create_prompt):
+    with Session() as db:
+        created = create_prompt(db, owner)
+        token = sync_service.changes(db, owner, None).next_token
+        for n in range(5):
+            prompt_service.update_prompt(
+                db, created.prompt_id, PromptCreate.model_construct(body=f"Edit {n}")
+            )
+        delta = sync_service.changes(db, owner, token)
+        assert [p.body for p in delta.prompts] == ["Edit 4"]
+        assert len(delta.versions) == 1
+
+
+def test_pages_are_bounded_and_ordered(Session, owner, create_prompt):
+    with Session() as db:
+        for n in range(7):
+            create_prompt(db, owner, f"P{n}")
+        pages, _ = _drain(db, owner, limit=3)
+        assert [p.has_more for p in pages] == [True, True, True, True, False]
+        titles = [p.title for page in pages for p in page.prompts]
+        assert titles == [f"P{n}" for n in range(7)]
+
+
+def test_deletes_are_sent_as_tombstones(Session, owner, create_prompt):
+    with Session() as db:
+        created = create_prompt(db, owner)
+        collection = collection_service.create_collection(db, owner, "Favourites")
+        collection_service.add_prompt(db, owner, collection.id, created.prompt_id)
+        full = sync_service.changes(db, owner, None)
+        assert [c.id for c in full.collections] == [collection.id]
+        links = [(link.collection_id, link.prompt_id) for link in full.collection_links]
+        assert links == [(collection.id, created.prompt_id)]
+
+        collection_service.remove_prompt(db, owner, collection.id, created.prompt_id)
+        delta = sync_service.changes(db, owner, full.next_token)
+        assert [(t.entity, t.id, t.parent_id) for t in delta.tombstones] == [
+            (SyncEntity.COLLECTION_PROMPT, created.prompt_id, collection.id)
+        ]
+
+        collection_service.add_prompt(db, owner, collection.id, created.prompt_id)
+        collection_service.delete_collection(db, owner, collection.id)
+        gone = sync_service.changes(db, owner, delta.next_token)
+        assert {(t.entity, t.id) for t in gone.tombstones} == {
+            (SyncEntity.COLLECTION, collection.id),
+            (SyncEntity.COLLECTION_PROMPT, created.prompt_id),
+        }
+        assert gone.collections == [] and gone.collection_links == []
+
+
+def test_other_owners_changes_are_not_visible(
+    Session, owner, make_owner, create_prompt
+):
+    other = make_owner()
+    with Session() as db:
+        create_prompt(db, other)
+        assert sync_service.changes(db, owner, None).prompts == []
+
+
+def test_stale_token_after_prune_requires_resync(Session, owner, create_prompt):
+    with Session() as db:
+        created = create_prompt(db, owner)
+        collection = collection_service.create_collection(db, owner, "Short-lived")
+        token = sync_service.changes(db, owner, None).next_token
+        collection_service.delete_collection(db, owner, collection.id)
+        prompt_service.update_prompt(db, created.prompt_id, PromptCreate.model_construct(body="Later"))
+
+        assert sync_service.prune(db, timedelta(seconds=-1)) >= 1
+        with pytest.raises(sync_service.ResyncRequired):
+            sync_service.changes(db, owner, token)
+        fresh = sync_service.changes(db, owner, None)
+        assert [p.body for p in fresh.prompts] == ["Later"]
+        assert fresh.tombstones == []
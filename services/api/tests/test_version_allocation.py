@@ -0,0 +1,55 @@
+"""Stress test for concurrent prompt duplication."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.services import prompt_service
+
+WORKERS = 16
+DUPLICATES_PER_WORKER = 4
+
+
+def test_concurrent_duplicates_allocate_unique_versions(
+    engine, Session, owner, create_prompt
+):
+    with Session() as db:
+        created = create_prompt(db, owner, "Stress", body="body")
+
+    def worker(_: int) -> list[int]:
+        versions = []
+        with Session() as db:
+            for _ in range(DUPLICATES_PER_WORKER):
+                versions.append(
+                    prompt_service.duplicate_prompt(db, created.prompt_id).version
+                )
+        return versions
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(worker, range(WORKERS)))
+
+    # Any serialization failure or unique violation would have raised above.
+    total = WORKERS * DUPLICATES_PER_WORKER
+    returned = sorted(v for versions in results for v in versions)
+    assert returned == list(range(2, total + 2))
+
+    with engine.connect() as conn:
+        stored = conn.execute(
+            text(
+                "SELECT version FROM prompt_versions WHERE prompt_id = :id "
+                "ORDER BY version"
+            ),
+            {"id": created.prompt_id},
+        ).scalars().all()
+        next_version = conn.execute(
+            text("SELECT next_version FROM prompts WHERE id = :id"),
+            {"id": created.prompt_id},
+        ).scalar_one()
+        card_version = conn.execute(
+            text("SELECT version FROM prompt_cards WHERE id = :id"),
+            {"id": created.prompt_id},
+        ).scalar_one()
+    assert stored == list(range(1, total + 2))
+    assert next_version == total + 2
+    assert card_version == total + 1